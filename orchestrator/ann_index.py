@@ -0,0 +1,241 @@
+# orchestrator/ann_index.py
+"""
+Inverted-file (IVF) approximate nearest-neighbour index over the blueprint
+embedding matrix.
+
+Rows are assumed to be L2-normalised (see blueprint_store), so similarity is
+a dot product and the coarse quantiser is a spherical k-means in NumPy.
+The index only stores centroids and a permutation of row ids grouped by
+list; the vectors themselves stay in the memory-mapped embedding matrix.
+
+Recall is tuned with `nprobe` (number of lists scanned per query). Corpora
+smaller than EXACT_SEARCH_MAX rows are always searched exactly.
+"""
+
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import numpy as np  # pip install numpy
+
+IVF_FILE = "blueprint_ivf.npz"
+
+# Below this many rows a brute-force scan is already sub-millisecond.
+EXACT_SEARCH_MAX = int(os.getenv("ORCHESTRATOR_ANN_EXACT_MAX", "20000"))
+DEFAULT_NPROBE = int(os.getenv("ORCHESTRATOR_ANN_NPROBE", "8"))
+
+_ASSIGN_BATCH = 65536
+
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k highest scores, best first, via argpartition."""
+    n = scores.shape[-1]
+    if n == 0 or k <= 0:
+        return np.empty(0, dtype="int64")
+    k = min(k, n)
+    if k < n:
+        part = np.argpartition(-scores, k - 1)[:k]
+    else:
+        part = np.arange(n)
+    return part[np.argsort(-scores[part], kind="stable")]
+
+
+def top_k_rows(scores: np.ndarray, k: int) -> np.ndarray:
+    """Row-wise top_k_indices for a (queries, rows) score matrix, best first."""
+    m, n = scores.shape
+    k = min(k, n)
+    if m == 0 or k <= 0:
+        return np.empty((m, 0), dtype="int64")
+    if k < n:
+        part = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    else:
+        part = np.broadcast_to(np.arange(n), (m, n)).copy()
+    order = np.argsort(-np.take_along_axis(scores, part, axis=1), axis=1, kind="stable")
+    return np.take_along_axis(part, order, axis=1)
+
+
+def _assign(data: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    out = np.empty(data.shape[0], dtype="int32")
+    for start in range(0, data.shape[0], _ASSIGN_BATCH):
+        block = np.asarray(data[start : start + _ASSIGN_BATCH], dtype="float32")
+        out[start : start + block.shape[0]] = np.argmax(block @ centroids.T, axis=1)
+    return out
+
+
+def spherical_kmeans(
+    data: np.ndarray,
+    k: int,
+    iters: int = 20,
+    seed: int = 0,
+    sample_size: Optional[int] = 100_000,
+) -> np.ndarray:
+    """
+    Spherical k-means (cosine) returning a (k, dim) float32 centroid matrix.
+    Large inputs are trained on a random sample; every row is assigned later.
+    """
+    rng = np.random.default_rng(seed)
+    n = data.shape[0]
+    if sample_size is not None and n > sample_size:
+        train = np.asarray(data[np.sort(rng.choice(n, sample_size, replace=False))], dtype="float32")
+    else:
+        train = np.asarray(data, dtype="float32")
+    k = max(1, min(k, train.shape[0]))
+
+    centroids = train[rng.choice(train.shape[0], k, replace=False)].copy()
+    for _ in range(iters):
+        labels = np.argmax(train @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, labels, train)
+        counts = np.bincount(labels, minlength=k)
+        empty = counts == 0
+        if empty.any():
+            # Re-seed empty lists with random training rows.
+            sums[empty] = train[rng.choice(train.shape[0], int(empty.sum()), replace=False)]
+        norms = np.linalg.norm(sums, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        centroids = (sums / norms).astype("float32")
+    return centroids
+
+
+@dataclass
+class IVFIndex:
+    centroids: np.ndarray     # (n_lists, dim) float32, unit rows
+    list_offsets: np.ndarray  # (n_lists + 1,) int64 offsets into list_ids
+    list_ids: np.ndarray      # (count,) int32 row ids grouped by list
+    count: int
+    dim: int
+
+    @property
+    def n_lists(self) -> int:
+        return int(self.centroids.shape[0])
+
+    @classmethod
+    def build(
+        cls,
+        matrix: np.ndarray,
+        n_lists: Optional[int] = None,
+        iters: int = 20,
+        seed: int = 0,
+        sample_size: Optional[int] = 100_000,
+    ) -> "IVFIndex":
+        n, dim = matrix.shape
+        if n_lists is None:
+            n_lists = int(np.clip(np.sqrt(n), 1, 4096))
+        centroids = spherical_kmeans(matrix, n_lists, iters=iters, seed=seed, sample_size=sample_size)
+        labels = _assign(matrix, centroids)
+        order = np.argsort(labels, kind="stable").astype("int32")
+        counts = np.bincount(labels, minlength=centroids.shape[0])
+        offsets = np.zeros(centroids.shape[0] + 1, dtype="int64")
+        np.cumsum(counts, out=offsets[1:])
+        return cls(centroids=centroids, list_offsets=offsets, list_ids=order, count=n, dim=dim)
+
+    def candidates(self, q_vec: np.ndarray, nprobe: int) -> np.ndarray:
+        nprobe = max(1, min(nprobe, self.n_lists))
+        probe = top_k_indices(self.centroids @ q_vec, nprobe)
+        parts = [self.list_ids[self.list_offsets[c] : self.list_offsets[c + 1]] for c in probe]
+        return np.concatenate(parts) if parts else np.empty(0, dtype="int32")
+
+    def search(
+        self,
+        matrix: np.ndarray,
+        q_vec: np.ndarray,
+        top_k: int,
+        nprobe: int = DEFAULT_NPROBE,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Return (row ids, scores) of the approximate top_k rows for a unit query."""
+        cand = np.sort(self.candidates(q_vec, nprobe))
+        if cand.size == 0:
+            return cand.astype("int64"), np.empty(0, dtype="float32")
+        scores = np.asarray(matrix[cand], dtype="float32") @ q_vec
+        best = top_k_indices(scores, top_k)
+        return cand[best].astype("int64"), scores[best]
+
+    def save(self, path: Path) -> Path:
+        tmp = path.with_suffix(".tmp.npz")
+        with tmp.open("wb") as f:
+            np.savez(
+                f,
+                centroids=self.centroids,
+                list_offsets=self.list_offsets,
+                list_ids=self.list_ids,
+                shape=np.array([self.count, self.dim], dtype="int64"),
+            )
+        os.replace(tmp, path)
+        return path
+
+    @classmethod
+    def load(cls, path: Path) -> "IVFIndex":
+        with np.load(path) as z:
+            count, dim = (int(x) for x in z["shape"])
+            return cls(
+                centroids=z["centroids"],
+                list_offsets=z["list_offsets"],
+                list_ids=z["list_ids"],
+                count=count,
+                dim=dim,
+            )
+
+
+def exact_search(matrix: np.ndarray, q_vec: np.ndarray, top_k: int) -> Tuple[np.ndarray, np.ndarray]:
+    scores = matrix @ q_vec
+    best = top_k_indices(scores, top_k)
+    return best.astype("int64"), scores[best]
+
+
+def build_for_index(docs_root: Path, matrix: np.ndarray, **build_kwargs) -> Optional[Path]:
+    """
+    (Re)build the IVF file next to the blueprint index. Small corpora get no
+    IVF file at all (and any stale one is removed) so search stays exact.
+    """
+    path = docs_root / IVF_FILE
+    if matrix.shape[0] < EXACT_SEARCH_MAX:
+        path.unlink(missing_ok=True)
+        return None
+    return IVFIndex.build(matrix, **build_kwargs).save(path)
+
+
+def load_for_index(docs_root: Path, matrix: np.ndarray) -> Optional[IVFIndex]:
+    """Load the IVF file if it exists and still matches the embedding matrix."""
+    path = docs_root / IVF_FILE
+    if matrix.shape[0] < EXACT_SEARCH_MAX or not path.exists():
+        return None
+    index = IVFIndex.load(path)
+    if (index.count, index.dim) != tuple(matrix.shape):
+        print(f"[blueprints] Ignoring stale {path.name}; falling back to exact search.")
+        return None
+    return index
+
+
+def search(
+    docs_root: Path,
+    matrix: np.ndarray,
+    q_vec: np.ndarray,
+    top_k: int,
+    nprobe: Optional[int] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Approximate search when an up-to-date IVF index exists, exact otherwise."""
+    index = load_for_index(docs_root, matrix)
+    if index is None:
+        return exact_search(matrix, q_vec, top_k)
+    return index.search(matrix, q_vec, top_k, nprobe=nprobe or DEFAULT_NPROBE)
+
+
+def search_many(
+    docs_root: Path,
+    matrix: np.ndarray,
+    q_mat: np.ndarray,
+    top_k: int,
+    nprobe: Optional[int] = None,
+) -> List[np.ndarray]:
+    """
+    Row ids of the top_k rows for each unit query in `q_mat` (queries x dim).
+    Exact search scores every query with one matrix-matrix product.
+    """
+    index = load_for_index(docs_root, matrix)
+    if index is None:
+        scores = q_mat @ np.asarray(matrix, dtype="float32").T
+        return list(top_k_rows(scores, top_k))
+    return [index.search(matrix, q, top_k, nprobe=nprobe or DEFAULT_NPROBE)[0] for q in q_mat]
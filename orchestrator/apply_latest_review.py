@@ -1,7 +1,9 @@
 from __future__ import annotations
-import re, subprocess, sys
+import argparse, re, subprocess, sys
 from pathlib import Path
 
+from . import task_status
+
 ROOT = Path(__file__).resolve().parent.parent
 REVIEWS = ROOT / "docs" / "orchestrator" / "reviews"
 RUNS = ROOT / "docs" / "runs"
@@ -9,10 +11,11 @@ RUNS = ROOT / "docs" / "runs"
 def sh(args: list[str]) -> subprocess.CompletedProcess[str]:
     return subprocess.run(args, cwd=ROOT, text=True, capture_output=True)
 
-def latest_review() -> tuple[Path, str]:
+def latest_review(wbs: str | None = None) -> tuple[Path, str]:
     if not REVIEWS.exists():
         raise SystemExit("no reviews dir")
-    cands = sorted(REVIEWS.glob("orchestrator-review-*.md"), key=lambda p: p.stat().st_mtime, reverse=True)
+    pattern = f"orchestrator-review-{wbs}-*.md" if wbs else "orchestrator-review-*.md"
+    cands = sorted(REVIEWS.glob(pattern), key=lambda p: p.stat().st_mtime, reverse=True)
     if not cands:
         raise SystemExit("no reviews found")
     p = cands[0]
@@ -24,8 +27,8 @@ def run_ci() -> bool:
     sys.stderr.write(proc.stderr or "")
     return proc.returncode == 0
 
-def apply():
-    p, body = latest_review()
+def apply(wbs_id: str | None = None, skip_ci: bool = False) -> str:
+    p, body = latest_review(wbs_id)
     m = re.search(r"(WBS-\d+)", p.name); wbs = m.group(1) if m else None
     if not wbs: raise SystemExit("no WBS in review filename")
 
@@ -35,11 +38,16 @@ def apply():
 
     run_report_exists = any(RUNS.glob(f"*{wbs}*.md"))
     acceptance_met = bool(re.search(r"ACCEPTANCE:\s*met", body, re.IGNORECASE))
-    ok_ci = run_ci()
+    ok_ci = True if skip_ci else run_ci()
 
     status = "done" if (run_report_exists and ok_ci and acceptance_met and decision == "done") else "in_progress"
-    sh(["python", "-m", "orchestrator.task_status", "set", "--id", wbs, "--status", status])
+    task_status.set_status(wbs, status)
     print(f"[apply_latest_review] {wbs} -> {status} (report={run_report_exists}, ci={ok_ci}, acceptance={acceptance_met}, decision={decision})")
+    return status
 
 if __name__ == "__main__":
-    apply()
+    ap = argparse.ArgumentParser(description="Apply the latest orchestrator review to the queue")
+    ap.add_argument("--wbs", default=None, help="Apply the latest review for this WBS id only.")
+    ap.add_argument("--skip-ci", action="store_true", help="CI already passed (e.g. in the merge queue).")
+    args = ap.parse_args()
+    apply(args.wbs, args.skip_ci)
@@ -11,33 +11,47 @@ def run(args: list[str], capture: bool = False) -> subprocess.CompletedProcess[s
 def run_py(mod: str, *args: str, capture: bool = False):
     return run([sys.executable, "-m", mod, *args], capture=capture)
 
-def has_connect_error(s: str) -> bool:
-    s = s.lower()
-    return "connecterror" in s or "protocol_error" in s or "timeout" in s
+def run_in_process(max_loops: int, sleep_s: int) -> None:
+    """Same loop as below, but every step is a function call in this process (see orchestrator.pipeline)."""
+    from .pipeline import Pipeline
+
+    pipe = Pipeline(ROOT)
+    for i in range(1, max_loops + 1):
+        print(f"\n[autopilot] === Iteration {i} ===")
+        pipe.iteration()
+        t = pipe.timings[-1]
+        print("[autopilot] Step times: " + ", ".join(f"{k} {v:.2f}s" for k, v in t.items()))
+        print(f"[autopilot] Sleeping {sleep_s}s ...")
+        time.sleep(sleep_s)
 
 def main():
     print("[autopilot] Starting orchestrator autopilot loop.")
+    parallel = int(os.getenv("ORCHESTRATOR_AUTOPILOT_PARALLEL", "1"))
+    if parallel > 1:
+        from .dispatcher import Dispatcher
+        from .workspaces import WorkspaceManager
+        # Parallel agents sharing one checkout trample each other; opt out only deliberately.
+        worktrees = os.getenv("ORCHESTRATOR_AUTOPILOT_WORKTREES", "1") != "0"
+        Dispatcher(ROOT, max_agents=parallel, workspaces=WorkspaceManager(ROOT) if worktrees else None).run()
+        print("[autopilot] Autopilot loop finished.")
+        return
+
     max_loops = int(os.getenv("ORCHESTRATOR_AUTOPILOT_MAX_LOOPS", "100"))
     sleep_s = int(os.getenv("ORCHESTRATOR_AUTOPILOT_SLEEP_SECONDS", "10"))
 
+    if os.getenv("ORCHESTRATOR_AUTOPILOT_SUBPROCESS", "0") != "1":
+        run_in_process(max_loops, sleep_s)
+        print("[autopilot] Autopilot loop finished.")
+        return
+
     for i in range(1, max_loops + 1):
         print(f"\n[autopilot] === Iteration {i} ===")
         try:
             print("[autopilot] Dispatching next task with `run-next` ...")
-            attempt = 0
-            while True:
-                attempt += 1
-                proc = run_py("orchestrator.cli", "run-next", capture=True)
-                txt = (proc.stdout or "") + (proc.stderr or "")
-                print(txt, end="")
-                if proc.returncode == 0 and not has_connect_error(txt):
-                    break
-                if attempt >= 3:
-                    print("[autopilot] WARN: run-next failed repeatedly; continuing.")
-                    break
-                backoff = min(30, attempt * 5)
-                print(f"[autopilot] run-next error; retrying in {backoff}s ...")
-                time.sleep(backoff)
+            # Not retried as a whole: LLM calls retry themselves (orchestrator.resilience).
+            proc = run_py("orchestrator.cli", "run-next")
+            if proc.returncode != 0:
+                print(f"[autopilot] WARN: run-next exited with {proc.returncode}; continuing.")
         except Exception as e:
             print(f"[autopilot] WARN: run-next raised {e!r}; continuing.")
 
@@ -0,0 +1,7 @@
+# orchestrator/bench/__init__.py
+
+"""
+Standalone benchmarks for orchestrator hot paths.
+
+Run any of them with: python -m orchestrator.bench.<name> --help
+"""
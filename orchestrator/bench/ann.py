@@ -0,0 +1,88 @@
+# orchestrator/bench/ann.py
+"""
+Recall-vs-latency benchmark for the IVF index in orchestrator.ann_index.
+
+Synthetic data is a Gaussian mixture on the unit sphere, which is closer to
+real embedding distributions than uniform noise. Ground truth is the exact
+top-k from a full scan.
+
+    python -m orchestrator.bench.ann --sizes 1000 100000 1000000 --dim 256
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+from typing import Iterable, List
+
+import numpy as np
+
+from ..ann_index import IVFIndex, exact_search
+from ..blueprint_store import normalise_rows
+
+
+def synthetic_corpus(n: int, dim: int, n_topics: int, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    topics = normalise_rows(rng.standard_normal((n_topics, dim)).astype("float32"))
+    out = np.empty((n, dim), dtype="float32")
+    step = 100_000
+    for start in range(0, n, step):
+        m = min(step, n - start)
+        labels = rng.integers(0, n_topics, m)
+        noise = rng.standard_normal((m, dim)).astype("float32") * 0.08
+        out[start : start + m] = topics[labels] + noise
+    return normalise_rows(out)
+
+
+def _queries(corpus: np.ndarray, n_queries: int, seed: int) -> np.ndarray:
+    rng = np.random.default_rng(seed + 1)
+    base = corpus[rng.choice(corpus.shape[0], n_queries, replace=False)]
+    return normalise_rows(base + rng.standard_normal(base.shape).astype("float32") * 0.05)
+
+
+def run(sizes: Iterable[int], dim: int, top_k: int, n_queries: int, nprobes: List[int], seed: int) -> None:
+    print("| rows | mode | nprobe | recall@%d | mean latency (ms) |" % top_k)
+    print("|---:|---|---:|---:|---:|")
+    for n in sizes:
+        corpus = synthetic_corpus(n, dim, n_topics=max(16, int(np.sqrt(n) * 2)), seed=seed)
+        queries = _queries(corpus, n_queries, seed)
+
+        truth = []
+        t0 = time.perf_counter()
+        for q in queries:
+            ids, _ = exact_search(corpus, q, top_k)
+            truth.append(set(ids.tolist()))
+        exact_ms = (time.perf_counter() - t0) * 1000 / n_queries
+        print(f"| {n:,} | exact | - | 1.000 | {exact_ms:.3f} |")
+
+        t0 = time.perf_counter()
+        index = IVFIndex.build(corpus, seed=seed)
+        build_s = time.perf_counter() - t0
+
+        for nprobe in nprobes:
+            if nprobe > index.n_lists:
+                continue
+            hits = 0
+            t0 = time.perf_counter()
+            for q, gt in zip(queries, truth):
+                ids, _ = index.search(corpus, q, top_k, nprobe=nprobe)
+                hits += len(gt.intersection(ids.tolist()))
+            ivf_ms = (time.perf_counter() - t0) * 1000 / n_queries
+            recall = hits / (top_k * n_queries)
+            print(f"| {n:,} | ivf ({index.n_lists} lists, build {build_s:.1f}s) | {nprobe} | {recall:.3f} | {ivf_ms:.3f} |")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="IVF recall/latency benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 100_000, 1_000_000])
+    parser.add_argument("--dim", type=int, default=256, help="Vector width (3072 for text-embedding-3-large).")
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32, 64])
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    run(args.sizes, args.dim, args.top_k, args.queries, args.nprobe, args.seed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+# orchestrator/bench/autopilot.py
+"""
+Per-iteration orchestration overhead of the serial autopilot: the old loop
+(three `python -m` subprocesses per iteration) vs orchestrator.pipeline
+(one long-lived process).
+
+Only the fixed cost is measured: interpreter start-up, imports, reading
+ops/config.yaml and building the SDK clients / model router that each step
+needs. The cursor-agent run, LLM calls and CI are identical in both modes
+and left out. No network calls are made; a placeholder OPENAI_API_KEY is
+set when none is configured so the clients can be constructed.
+
+    python -m orchestrator.bench.autopilot --repeat 5
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+ROOT = Path(__file__).resolve().parents[2]
+
+# What each per-iteration subprocess does before its real work starts.
+SUBPROCESS_STEPS: Dict[str, str] = {
+    "cli run-next": (
+        "from pathlib import Path; from orchestrator import cli; "
+        "cli.make_llm(cli.load_config(Path(r'{root}')))"
+    ),
+    "review_latest": (
+        "from orchestrator import review_latest; from orchestrator.model_router import ModelRouter; ModelRouter()"
+    ),
+    "apply_latest_review": "from orchestrator import apply_latest_review",
+}
+
+
+def _env() -> Dict[str, str]:
+    env = dict(os.environ)
+    env.setdefault("OPENAI_API_KEY", "bench-placeholder")
+    return env
+
+
+def _spawn(code: str) -> float:
+    t0 = time.perf_counter()
+    subprocess.run([sys.executable, "-c", code], cwd=str(ROOT), env=_env(), check=True)
+    return time.perf_counter() - t0
+
+
+def subprocess_iteration(repeat: int) -> Dict[str, float]:
+    out = {}
+    for step, code in SUBPROCESS_STEPS.items():
+        out[step] = statistics.median(_spawn(code.format(root=ROOT)) for _ in range(repeat))
+    return out
+
+
+def in_process_cold(repeat: int) -> float:
+    """First iteration of a fresh Pipeline: one interpreter, all imports, config, clients."""
+    code = (
+        "from orchestrator.pipeline import Pipeline; "
+        f"p = Pipeline(__import__('pathlib').Path(r'{ROOT}')); p.cfg; p.llm; p.router"
+    )
+    return statistics.median(_spawn(code) for _ in range(repeat))
+
+
+def in_process_warm(repeat: int) -> float:
+    """Later iterations: the same accessors on an already-warm Pipeline."""
+    os.environ.setdefault("OPENAI_API_KEY", "bench-placeholder")
+    from ..pipeline import Pipeline
+
+    pipe = Pipeline(ROOT)
+    pipe.cfg, pipe.llm, pipe.router
+    samples: List[float] = []
+    for _ in range(max(repeat, 100)):
+        t0 = time.perf_counter()
+        pipe.cfg, pipe.llm, pipe.router
+        samples.append(time.perf_counter() - t0)
+    return statistics.median(samples)
+
+
+def run(repeat: int) -> None:
+    sub = subprocess_iteration(repeat)
+    cold = in_process_cold(repeat)
+    warm = in_process_warm(repeat)
+    total = sum(sub.values())
+    print("| mode | step | overhead per iteration (ms) |")
+    print("|---|---|---:|")
+    for step, sec in sub.items():
+        print(f"| subprocess | {step} | {sec * 1000:.1f} |")
+    print(f"| subprocess | **total** | **{total * 1000:.1f}** |")
+    print(f"| in-process | first iteration (cold) | {cold * 1000:.1f} |")
+    print(f"| in-process | **later iterations** | **{warm * 1000:.3f}** |")
+    print(f"\nSaved per iteration after warm-up: {(total - warm) * 1000:.1f} ms")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--repeat", type=int, default=5, help="Samples per measurement (median is reported).")
+    run(ap.parse_args().repeat)
+
+
+if __name__ == "__main__":
+    main()
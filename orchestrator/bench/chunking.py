@@ -0,0 +1,83 @@
+# orchestrator/bench/chunking.py
+"""
+Token cost of the heading-aware chunker vs the old fixed-window chunker
+(4000 chars, 400 overlap) on the converted plans in docs/blueprints/.
+
+"embed tokens" is the chunk text sent to the embeddings API; "summary
+tokens" adds the per-call summarisation prompt. Counts use
+orchestrator.tokens (tiktoken when installed, chars/4 otherwise).
+
+    python -m orchestrator.bench.chunking
+"""
+
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+from typing import List, Tuple
+
+from .. import md_chunker
+from ..blueprints import BlueprintChunk, _summary_messages
+from ..tokens import estimate_tokens
+
+_PROMPT_OVERHEAD_ID = "XX-0000"
+
+
+def legacy_spans(text: str, max_chars: int = 4000, overlap: int = 400) -> List[Tuple[int, int]]:
+    """The previous _chunk_markdown: plain character windows with overlap."""
+    spans: List[Tuple[int, int]] = []
+    start = 0
+    while start < len(text):
+        end = min(start + max_chars, len(text))
+        spans.append((start, end))
+        if end == len(text):
+            break
+        start = max(0, end - overlap)
+    return spans
+
+
+def _prompt_overhead(model: str) -> int:
+    ch = BlueprintChunk(_PROMPT_OVERHEAD_ID, "tech", "", "", [], 0, 0, 0, 0, 0)
+    return sum(estimate_tokens(m["content"], model) for m in _summary_messages(ch, ""))
+
+
+def run(docs_root: Path, files: List[str], max_tokens: int, model: str) -> None:
+    overhead = _prompt_overhead(model)
+    print("| file | chunker | chunks | embed tokens | summary tokens | vs source | mid-paragraph cuts |")
+    print("|---|---|---:|---:|---:|---:|---:|")
+    totals = {"fixed": [0, 0], "structural": [0, 0]}
+    for name in files:
+        text = (docs_root / name).read_bytes().decode("utf-8")
+        source_tokens = estimate_tokens(text, model)
+        runs = {
+            "fixed": legacy_spans(text),
+            "structural": [(s.start, s.end) for s in md_chunker.structural_spans(text, max_tokens=max_tokens, model=model)],
+        }
+        for label, spans in runs.items():
+            embed = sum(estimate_tokens(text[a:b], model) for a, b in spans)
+            summary = embed + overhead * len(spans)
+            cuts = sum(1 for _, b in spans[:-1] if not text.endswith(("\n\n", "\r\n\r\n"), 0, b))
+            totals[label][0] += embed
+            totals[label][1] += summary
+            print(
+                f"| {name} | {label} | {len(spans)} | {embed:,} | {summary:,} | "
+                f"+{embed / source_tokens - 1:.1%} | {cuts} |"
+            )
+    (fe, fs), (se, ss) = totals["fixed"], totals["structural"]
+    print()
+    print(f"Embedding input saved: {fe - se:,} tokens ({1 - se / fe:.1%})")
+    print(f"Summarisation input saved: {fs - ss:,} tokens ({1 - ss / fs:.1%})")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Chunker token-cost comparison")
+    parser.add_argument("--docs-root", default="docs/blueprints")
+    parser.add_argument("--files", nargs="+", default=["tech_source.md", "non_tech_source.md"])
+    parser.add_argument("--max-tokens", type=int, default=md_chunker.DEFAULT_MAX_TOKENS)
+    parser.add_argument("--model", default="text-embedding-3-large")
+    args = parser.parse_args()
+    run(Path(args.docs_root), args.files, args.max_tokens, args.model)
+
+
+if __name__ == "__main__":
+    main()
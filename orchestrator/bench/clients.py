@@ -0,0 +1,183 @@
+# orchestrator/bench/clients.py
+"""
+Per-call latency with a new SDK client per request (the old call sites)
+vs the pooled clients from orchestrator.sdk_clients.
+
+A local stand-in server answers /v1/chat/completions and /v1/messages with
+a fixed reply, so nothing leaves the machine. `--connect-delay-ms` makes it
+sleep once per new TCP connection, standing in for the network round trips
+of a real TCP + TLS handshake (localhost connects are nearly free).
+
+    python -m orchestrator.bench.clients --calls 200 --connect-delay-ms 40
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .. import sdk_clients
+
+_CHAT = {
+    "id": "chatcmpl-bench",
+    "object": "chat.completion",
+    "created": 0,
+    "model": "bench",
+    "choices": [{"index": 0, "message": {"role": "assistant", "content": "ok"}, "finish_reason": "stop"}],
+    "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+}
+_MESSAGE = {
+    "id": "msg_bench",
+    "type": "message",
+    "role": "assistant",
+    "model": "bench",
+    "content": [{"type": "text", "text": "ok"}],
+    "stop_reason": "end_turn",
+    "usage": {"input_tokens": 1, "output_tokens": 1},
+}
+
+
+def stand_in_server(
+    connect_delay: float,
+    response_delay: float = 0.0,
+    requests_per_minute: Optional[float] = None,
+    fail_status: Optional[int] = None,
+) -> Tuple[ThreadingHTTPServer, Dict[str, int]]:
+    """
+    Start the server on a free port. With `requests_per_minute` it enforces
+    that budget like the real APIs: a token bucket of that size, OpenAI-style
+    x-ratelimit-* headers on every reply and 429 + Retry-After when empty.
+    With `fail_status` (e.g. 503) every request gets that error instead, as
+    from a provider that is down.
+    """
+    counts = {"connections": 0, "requests": 0, "throttled": 0}
+    bucket = {"level": float(requests_per_minute or 0), "at": time.monotonic()}
+    bucket_lock = threading.Lock()
+
+    def take() -> Tuple[bool, Dict[str, str]]:
+        if not requests_per_minute:
+            return True, {}
+        with bucket_lock:
+            now = time.monotonic()
+            bucket["level"] = min(requests_per_minute, bucket["level"] + (now - bucket["at"]) * requests_per_minute / 60)
+            bucket["at"] = now
+            ok = bucket["level"] >= 1
+            if ok:
+                bucket["level"] -= 1
+            refill = (1 - bucket["level"]) * 60 / requests_per_minute if not ok else 0.0
+            return ok, {
+                "x-ratelimit-limit-requests": str(int(requests_per_minute)),
+                "x-ratelimit-remaining-requests": str(int(bucket["level"])),
+                **({"retry-after-ms": str(int(refill * 1000) + 1)} if not ok else {}),
+            }
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive
+        # Send each reply in one segment; otherwise Nagle + delayed ACK adds ~40 ms per keep-alive request.
+        disable_nagle_algorithm = True
+        wbufsize = -1
+
+        def setup(self) -> None:
+            super().setup()
+            counts["connections"] += 1
+            time.sleep(connect_delay)
+
+        def do_POST(self) -> None:
+            self.rfile.read(int(self.headers.get("Content-Length") or 0))
+            counts["requests"] += 1
+            ok, limit_headers = take()
+            status = 200 if ok else 429
+            if fail_status:
+                status = fail_status
+                body = json.dumps({"error": {"type": "api_error", "message": "Service unavailable"}}).encode()
+            elif ok:
+                time.sleep(response_delay)
+                body = json.dumps(_MESSAGE if self.path.endswith("/messages") else _CHAT).encode()
+            else:
+                counts["throttled"] += 1
+                body = json.dumps({"error": {"type": "rate_limit_error", "message": "Rate limit reached"}}).encode()
+            self.send_response(status)
+            for name, value in limit_headers.items():
+                self.send_header(name, value)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args: Any) -> None:
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, counts
+
+
+def _call(provider: str, client: Any) -> None:
+    if provider == "openai":
+        client.chat.completions.create(model="bench", messages=[{"role": "user", "content": "ping"}])
+    else:
+        client.messages.create(model="bench", max_tokens=8, messages=[{"role": "user", "content": "ping"}])
+
+
+def _fresh_client(provider: str, base_url: str) -> Any:
+    # What llm.call_openai / the providers / review_latest used to do per call.
+    if provider == "openai":
+        from openai import OpenAI
+
+        return OpenAI(api_key="bench", base_url=base_url + "/v1")
+    import anthropic
+
+    return anthropic.Anthropic(api_key="bench", base_url=base_url)
+
+
+def measure(fn: Callable[[], None], calls: int) -> List[float]:
+    fn()  # warm-up: imports, first connection
+    out = []
+    for _ in range(calls):
+        t0 = time.perf_counter()
+        fn()
+        out.append(time.perf_counter() - t0)
+    return out
+
+
+def run(calls: int, connect_delay_ms: float) -> None:
+    server, counts = stand_in_server(connect_delay_ms / 1000)
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    print("| provider | clients | mean (ms) | p50 (ms) | p95 (ms) | new connections |")
+    print("|---|---|---:|---:|---:|---:|")
+    try:
+        for provider in ("openai", "anthropic"):
+            url = base_url + "/v1" if provider == "openai" else base_url
+            modes = {
+                "new per call": lambda: _call(provider, _fresh_client(provider, base_url)),
+                "pooled": lambda: _call(provider, sdk_clients.get_client(provider, "bench", url)),
+            }
+            for label, fn in modes.items():
+                before = counts["connections"]
+                samples = sorted(measure(fn, calls))
+                p95 = samples[int(len(samples) * 0.95) - 1]
+                print(
+                    f"| {provider} | {label} | {statistics.mean(samples) * 1000:.2f} | "
+                    f"{statistics.median(samples) * 1000:.2f} | {p95 * 1000:.2f} | {counts['connections'] - before} |"
+                )
+    finally:
+        sdk_clients.registry().close()
+        server.shutdown()
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--calls", type=int, default=200)
+    ap.add_argument("--connect-delay-ms", type=float, default=0.0, help="Server-side delay per new connection.")
+    args = ap.parse_args()
+    run(args.calls, args.connect_delay_ms)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+# orchestrator/bench/compact.py
+"""
+Memory / latency / recall@k of the compact embedding representations in
+orchestrator.compact_index against exact float32 search.
+
+Uses the real blueprint embedding matrix when docs/blueprints has one;
+otherwise a synthetic corpus of the same shape whose variance is
+front-loaded across dimensions, as in Matryoshka-trained models (a flat
+spectrum would make truncation look far worse than it is in practice).
+Queries are corpus rows plus noise; ground truth is the exact top-k.
+
+    python -m orchestrator.bench.compact
+    python -m orchestrator.bench.compact --synthetic --rows 100000
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+from pathlib import Path
+from typing import List
+
+import numpy as np
+
+from ..ann_index import top_k_rows
+from ..blueprint_store import has_split_index, normalise_rows, open_embeddings
+from ..compact_index import SPECS, CompactMatrix, two_stage_search
+from .ann import synthetic_corpus
+
+
+def matryoshka_corpus(n: int, dim: int, seed: int = 0) -> np.ndarray:
+    base = synthetic_corpus(n, dim, n_topics=max(16, int(np.sqrt(n) * 2)), seed=seed)
+    decay = (1.0 + np.arange(dim, dtype="float32")) ** -0.5
+    return normalise_rows(base * decay)
+
+
+def _ms_per_query(fn, n_queries: int, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000 / n_queries
+
+
+def run(matrix: np.ndarray, specs: List[str], top_k: int, n_queries: int, shortlist: int, seed: int) -> None:
+    rng = np.random.default_rng(seed + 1)
+    picks = matrix[np.sort(rng.choice(matrix.shape[0], n_queries, replace=False))]
+    queries = normalise_rows(picks + rng.standard_normal(picks.shape).astype("float32") * 0.02)
+    full = np.asarray(matrix, dtype="float32")
+    truth = top_k_rows(queries @ full.T, top_k)
+
+    def recall(found) -> float:
+        return sum(len(set(t.tolist()) & set(f[:top_k].tolist())) for t, f in zip(truth, found)) / truth.size
+
+    print(f"corpus {matrix.shape[0]:,} x {matrix.shape[1]}, {n_queries} queries, shortlist {shortlist}\n")
+    print(f"| representation | memory (MiB) | 1-stage ms/query | 1-stage recall@{top_k} | 2-stage ms/query | 2-stage recall@{top_k} |")
+    print("|---|---:|---:|---:|---:|---:|")
+    exact_ms = _ms_per_query(lambda: top_k_rows(queries @ full.T, top_k), n_queries)
+    print(f"| float32 (exact) | {full.nbytes / 2**20:.1f} | {exact_ms:.3f} | 1.000 | - | - |")
+    for spec in specs:
+        compact = CompactMatrix.build(full, spec)
+        one = top_k_rows(compact.scores(queries), top_k)
+        one_ms = _ms_per_query(lambda: top_k_rows(compact.scores(queries), top_k), n_queries)
+        two = two_stage_search(full, compact, queries, top_k, shortlist=shortlist)
+        two_ms = _ms_per_query(lambda: two_stage_search(full, compact, queries, top_k, shortlist=shortlist), n_queries)
+        print(
+            f"| {spec} | {compact.nbytes / 2**20:.1f} | {one_ms:.3f} | {recall(one):.3f} | "
+            f"{two_ms:.3f} | {recall(two):.3f} |"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compact embedding benchmark")
+    parser.add_argument("--docs-root", default="docs/blueprints")
+    parser.add_argument("--synthetic", action="store_true", help="Ignore the real index.")
+    parser.add_argument("--rows", type=int, default=1140, help="Synthetic corpus size (the real plans chunk to ~1140).")
+    parser.add_argument("--dim", type=int, default=3072)
+    parser.add_argument("--specs", nargs="+", default=list(SPECS))
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--shortlist", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    docs_root = Path(args.docs_root)
+    if not args.synthetic and has_split_index(docs_root):
+        matrix = open_embeddings(docs_root)
+        print(f"[bench] Using the real blueprint index in {docs_root}")
+    else:
+        matrix = matryoshka_corpus(args.rows, args.dim, seed=args.seed)
+        print("[bench] No blueprint index found; using a synthetic Matryoshka-like corpus")
+    run(matrix, args.specs, args.top_k, min(args.queries, matrix.shape[0]), args.shortlist, args.seed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+# orchestrator/bench/fanout.py
+"""
+Wall time for N independent prompts through OpenAIProvider: one after the
+other, on map_bounded's thread pool, and through AsyncLLMRouter.agather
+on a single thread. The HTTP pool is sized to `--concurrency` so it is not
+the bottleneck, and each mode gets one untimed warm-up pass (client
+construction, opening the connections).
+
+The local stand-in server from bench.clients answers every request after
+`--latency-ms`, standing in for model latency. It runs in a child process
+so it does not compete with the client for the GIL; nothing leaves the
+machine and the response cache is off.
+
+    python -m orchestrator.bench.fanout --prompts 200 --concurrency 32 --latency-ms 100
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import time
+from typing import Callable, Tuple
+
+from .. import sdk_clients
+from ..concurrency import map_bounded
+from ..llm_router import AsyncLLMRouter, LLMRouter
+from ..providers import OpenAIProvider
+from .clients import stand_in_server
+
+
+def _timed(fn: Callable[[], int]) -> Tuple[float, int]:
+    t0 = time.perf_counter()
+    failed = fn()
+    return time.perf_counter() - t0, failed
+
+
+def _row(label: str, wall: float, failed: int, prompts: int) -> None:
+    print(f"| {label} | {wall:.2f} | {prompts / wall:.1f} | {failed} |")
+
+
+def _serve(latency: float, conn) -> None:
+    server, _ = stand_in_server(0.0, latency)
+    conn.send(server.server_address[1])
+    conn.recv()  # until the parent is done
+
+
+def run(prompts: int, concurrency: int, latency_ms: float) -> None:
+    parent, child = multiprocessing.Pipe()
+    server = multiprocessing.Process(target=_serve, args=(latency_ms / 1000, child), daemon=True)
+    server.start()
+    port = parent.recv()
+    os.environ.update(
+        {
+            "OPENAI_API_KEY": "bench",
+            "OPENAI_BASE_URL": f"http://127.0.0.1:{port}/v1",
+            "ORCHESTRATOR_LLM_CACHE": "0",
+            "ORCHESTRATOR_LLM_STUB": "0",
+        }
+    )
+    sdk_clients.configure(sdk_clients.PoolConfig(max_connections=concurrency, max_keepalive=concurrency))
+    provider = OpenAIProvider()
+    items = [f"summarise chunk {i}" for i in range(prompts)]
+
+    def serial() -> int:
+        for p in items:
+            provider.complete(p)
+        return 0
+
+    def threads() -> int:
+        return len(map_bounded(provider.complete, items, workers=concurrency, max_retries=0).errors)
+
+    def coroutines() -> Tuple[float, int]:
+        router = AsyncLLMRouter(max_concurrency=concurrency, router=LLMRouter())
+        router.router._provider = provider
+
+        async def main() -> Tuple[float, int]:
+            await router.agather(items[:concurrency])  # warm-up
+            t0 = time.perf_counter()
+            outcome = await router.agather(items)
+            wall = time.perf_counter() - t0
+            await sdk_clients.registry().aclose()
+            return wall, len(outcome.errors)
+
+        return asyncio.run(main())
+
+    print(f"{prompts} prompts, {latency_ms:.0f} ms per reply, concurrency {concurrency}\n")
+    print("| mode | wall (s) | prompts/s | failed |")
+    print("|---|---:|---:|---:|")
+    try:
+        provider.complete("warm-up")
+        _row("serial complete", *_timed(serial), prompts)
+        map_bounded(provider.complete, items[:concurrency], workers=concurrency)  # warm-up
+        _row("map_bounded threads", *_timed(threads), prompts)
+        _row("agather", *coroutines(), prompts)
+    finally:
+        sdk_clients.registry().close()
+        parent.send("stop")
+        server.join(5)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--prompts", type=int, default=200)
+    ap.add_argument("--concurrency", type=int, default=32)
+    ap.add_argument("--latency-ms", type=float, default=100.0, help="Server-side delay per reply.")
+    args = ap.parse_args()
+    run(args.prompts, args.concurrency, args.latency_ms)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+# orchestrator/bench/rate_limits.py
+"""
+Several processes sharing one requests/min budget, with and without the
+shared buckets from orchestrator.rate_limits.
+
+A stand-in server (bench.clients) enforces `--rpm` like the real APIs:
+rate-limit headers on every reply, 429 + Retry-After when the budget is
+spent. Each worker process makes `--calls` OpenAIProvider calls, retried
+per orchestrator.resilience (ORCHESTRATOR_LLM_MAX_RETRIES). Without shared
+buckets every process discovers the limit on its own through 429s, and
+calls whose retries also hit 429 fail; with them, the processes wait
+their turn.
+
+    python -m orchestrator.bench.rate_limits --processes 4 --calls 20 --rpm 60
+"""
+
+from __future__ import annotations
+
+import argparse
+import multiprocessing
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Optional, Tuple
+
+from .. import rate_limits
+from ..providers import OpenAIProvider
+from .clients import stand_in_server
+
+
+def _serve(rpm: float, conn) -> None:
+    server, counts = stand_in_server(0.0, 0.0, rpm)
+    conn.send(server.server_address[1])
+    conn.recv()
+    conn.send(dict(counts))
+
+
+def _worker(port: int, calls: int, db: Optional[str], out) -> None:
+    os.environ.update(
+        {
+            "OPENAI_API_KEY": "bench",
+            "OPENAI_BASE_URL": f"http://127.0.0.1:{port}/v1",
+            "ORCHESTRATOR_LLM_CACHE": "0",
+            "ORCHESTRATOR_LLM_STUB": "0",
+            "ORCHESTRATOR_RATE_LIMIT": "1" if db else "0",
+        }
+    )
+    if db:
+        rate_limits._shared = rate_limits.SharedRateLimiter(Path(db))
+    provider = OpenAIProvider()
+    failed = 0
+    for i in range(calls):
+        try:
+            provider.complete(f"call {i} from {os.getpid()}")
+        except Exception:
+            failed += 1
+    out.put(failed)
+
+
+def run_mode(rpm: float, processes: int, calls: int, db: Optional[str]) -> Tuple[float, int, int]:
+    parent, child = multiprocessing.Pipe()
+    server = multiprocessing.Process(target=_serve, args=(rpm, child), daemon=True)
+    server.start()
+    port = parent.recv()
+    results: "multiprocessing.Queue[int]" = multiprocessing.Queue()
+    workers = [multiprocessing.Process(target=_worker, args=(port, calls, db, results)) for _ in range(processes)]
+    t0 = time.perf_counter()
+    for w in workers:
+        w.start()
+    failed = sum(results.get() for _ in workers)
+    wall = time.perf_counter() - t0
+    for w in workers:
+        w.join()
+    parent.send("stop")
+    counts = parent.recv()
+    server.join(5)
+    return wall, counts["throttled"], failed
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--processes", type=int, default=4)
+    ap.add_argument("--calls", type=int, default=20, help="Calls per process.")
+    ap.add_argument("--rpm", type=float, default=60.0, help="Requests per minute the stand-in server allows.")
+    args = ap.parse_args()
+
+    total = args.processes * args.calls
+    print(f"{args.processes} processes x {args.calls} calls against a {args.rpm:.0f} requests/min budget\n")
+    print("| buckets | wall (s) | 429 responses | failed calls |")
+    print("|---|---:|---:|---:|")
+    wall, throttled, failed = run_mode(args.rpm, args.processes, args.calls, None)
+    print(f"| per process (none) | {wall:.1f} | {throttled} | {failed}/{total} |")
+    with tempfile.TemporaryDirectory() as tmp:
+        wall, throttled, failed = run_mode(args.rpm, args.processes, args.calls, str(Path(tmp) / "rate_limits.sqlite"))
+    print(f"| shared | {wall:.1f} | {throttled} | {failed}/{total} |")
+
+
+if __name__ == "__main__":
+    main()
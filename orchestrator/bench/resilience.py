@@ -0,0 +1,83 @@
+# orchestrator/bench/resilience.py
+"""
+Sequential calls to a provider that is down, with and without the circuit
+breaker from orchestrator.resilience.
+
+The stand-in server (bench.clients) answers every request with `--status`
+(503 by default). Each OpenAIProvider call is retried `--retries` times
+with jittered exponential backoff starting at `--backoff` seconds. Without
+the breaker every call pays the full retry schedule; with it, the breaker
+opens after `--failures` failed requests and the remaining calls fail at
+once, without touching the network, until the cool-down has passed.
+
+    python -m orchestrator.bench.resilience --calls 20 --backoff 0.2
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import time
+from typing import Tuple
+from unittest import mock
+
+from .. import resilience, sdk_clients
+from ..providers import OpenAIProvider
+from .clients import stand_in_server
+
+
+def run_mode(port: int, counts, calls: int, failures: int) -> Tuple[float, int, int]:
+    env = {
+        "OPENAI_API_KEY": "bench",
+        "OPENAI_BASE_URL": f"http://127.0.0.1:{port}/v1",
+        "ORCHESTRATOR_LLM_CACHE": "0",
+        "ORCHESTRATOR_LLM_STUB": "0",
+        "ORCHESTRATOR_RATE_LIMIT": "0",
+        "ORCHESTRATOR_LLM_BREAKER_FAILURES": str(failures),
+    }
+    with mock.patch.dict(os.environ, env):
+        resilience.reset()
+        sdk_clients.configure(sdk_clients.PoolConfig())
+        provider = OpenAIProvider()
+        before = counts["requests"]
+        fast = 0
+        t0 = time.perf_counter()
+        for i in range(calls):
+            try:
+                provider.complete(f"call {i}")
+            except resilience.CircuitOpenError:
+                fast += 1
+            except Exception:
+                pass
+        wall = time.perf_counter() - t0
+    resilience.reset()
+    return wall, counts["requests"] - before, fast
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--calls", type=int, default=20)
+    ap.add_argument("--status", type=int, default=503, help="Status the stand-in server fails every request with.")
+    ap.add_argument("--retries", type=int, default=3)
+    ap.add_argument("--backoff", type=float, default=0.2, help="First backoff in seconds.")
+    ap.add_argument("--failures", type=int, default=5, help="Failures in a row that open the breaker.")
+    args = ap.parse_args()
+
+    os.environ["ORCHESTRATOR_LLM_MAX_RETRIES"] = str(args.retries)
+    os.environ["ORCHESTRATOR_LLM_BACKOFF_SECONDS"] = str(args.backoff)
+    server, counts = stand_in_server(0.0, fail_status=args.status)
+    print(f"{args.calls} calls to a provider answering {args.status}, {args.retries} retries from {args.backoff}s\n")
+    print("| mode | wall (s) | requests sent | failed fast |")
+    print("|---|---:|---:|---:|")
+    try:
+        wall, sent, fast = run_mode(server.server_address[1], counts, args.calls, 10**9)
+        print(f"| retries only | {wall:.1f} | {sent} | {fast}/{args.calls} |")
+        wall, sent, fast = run_mode(server.server_address[1], counts, args.calls, args.failures)
+        print(f"| retries + breaker | {wall:.1f} | {sent} | {fast}/{args.calls} |")
+    finally:
+        sdk_clients.configure(sdk_clients.PoolConfig.from_env())
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+# orchestrator/blueprint_store.py
+"""
+On-disk format for the blueprint index.
+
+The index is split in two files under docs/blueprints/:
+
+- blueprint_index.meta.jsonl   one compact JSON object per chunk (no embeddings)
+- blueprint_embeddings.npy     float32 matrix, one L2-normalised row per chunk
+
+The .npy file is opened with mmap_mode="r", so loading is O(1) in the corpus
+size and every orchestrator process that maps it shares the same page-cache
+pages. Rows are normalised at write time, so cosine similarity is a plain
+dot product at query time.
+
+The legacy single-file format (blueprint_index.json with inline embeddings)
+is still readable; `migrate_json_index` converts it once.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np  # pip install numpy
+
+META_FILE = "blueprint_index.meta.jsonl"
+EMBEDDINGS_FILE = "blueprint_embeddings.npy"
+LEGACY_INDEX_FILE = "blueprint_index.json"
+
+
+def blueprints_root(repo_root: Path) -> Path:
+    return repo_root / "docs" / "blueprints"
+
+
+def normalise_rows(matrix: np.ndarray) -> np.ndarray:
+    """
+    Return a float32 copy of `matrix` with unit-length rows.
+    All-zero rows stay zero instead of turning into NaNs.
+    """
+    mat = np.asarray(matrix, dtype="float32")
+    if mat.ndim != 2:
+        raise ValueError(f"Expected a 2-D embedding matrix, got shape {mat.shape}")
+    norms = np.linalg.norm(mat, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (mat / norms).astype("float32", copy=False)
+
+
+def _atomic_replace(tmp: Path, dest: Path) -> None:
+    os.replace(tmp, dest)
+
+
+def write_meta(docs_root: Path, rows: Iterable[Dict[str, Any]]) -> Path:
+    """Stream metadata rows to the sidecar, one compact JSON object per line."""
+    docs_root.mkdir(parents=True, exist_ok=True)
+    meta_path = docs_root / META_FILE
+    tmp = meta_path.with_suffix(meta_path.suffix + ".tmp")
+    with tmp.open("w", encoding="utf-8") as f:
+        for row in rows:
+            row = {k: v for k, v in row.items() if k != "embedding"}
+            f.write(json.dumps(row, ensure_ascii=False, separators=(",", ":")) + "\n")
+    _atomic_replace(tmp, meta_path)
+    return meta_path
+
+
+def write_embeddings(docs_root: Path, matrix: np.ndarray) -> Path:
+    """Normalise and persist the embedding matrix as a .npy file."""
+    docs_root.mkdir(parents=True, exist_ok=True)
+    emb_path = docs_root / EMBEDDINGS_FILE
+    tmp = emb_path.with_suffix(".tmp.npy")
+    with tmp.open("wb") as f:
+        np.save(f, normalise_rows(matrix))
+    _atomic_replace(tmp, emb_path)
+    return emb_path
+
+
+def write_embeddings_stream(docs_root: Path, vectors: Iterable[np.ndarray], count: int, dim: int) -> Path:
+    """
+    Write `count` vectors into the .npy file row by row through a memory map,
+    normalising as they arrive, so the full matrix never has to be in RAM.
+    """
+    docs_root.mkdir(parents=True, exist_ok=True)
+    emb_path = docs_root / EMBEDDINGS_FILE
+    tmp = emb_path.with_suffix(".tmp.npy")
+    out = np.lib.format.open_memmap(tmp, mode="w+", dtype="float32", shape=(count, dim))
+    written = 0
+    for i, vec in enumerate(vectors):
+        v = np.asarray(vec, dtype="float32")
+        norm = float(np.linalg.norm(v))
+        out[i] = v / norm if norm else v
+        written += 1
+    if written != count:
+        del out
+        tmp.unlink(missing_ok=True)
+        raise ValueError(f"Expected {count} embeddings, got {written}")
+    out.flush()
+    del out
+    _atomic_replace(tmp, emb_path)
+    return emb_path
+
+
+def write_index(
+    docs_root: Path,
+    rows: List[Dict[str, Any]],
+    matrix: np.ndarray,
+) -> Path:
+    """
+    Write both halves of the index. The embeddings are replaced first so a
+    reader never sees a sidecar that is longer than the matrix it indexes.
+    """
+    if len(rows) != matrix.shape[0]:
+        raise ValueError(f"{len(rows)} metadata rows but {matrix.shape[0]} embeddings")
+    write_embeddings(docs_root, matrix)
+    return write_meta(docs_root, rows)
+
+
+def read_meta(docs_root: Path) -> List[Dict[str, Any]]:
+    meta_path = docs_root / META_FILE
+    with meta_path.open("r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def open_embeddings(docs_root: Path, mmap: bool = True) -> np.ndarray:
+    """Open the embedding matrix, memory-mapped read-only by default."""
+    return np.load(docs_root / EMBEDDINGS_FILE, mmap_mode="r" if mmap else None)
+
+
+def has_split_index(docs_root: Path) -> bool:
+    return (docs_root / META_FILE).exists() and (docs_root / EMBEDDINGS_FILE).exists()
+
+
+def _read_legacy(legacy_path: Path) -> Tuple[List[Dict[str, Any]], np.ndarray]:
+    data: List[Dict[str, Any]] = json.loads(legacy_path.read_text(encoding="utf-8"))
+    matrix = np.array([row["embedding"] for row in data], dtype="float32")
+    for row in data:
+        row.pop("embedding", None)
+    return data, normalise_rows(matrix)
+
+
+def load_index(docs_root: Path, mmap: bool = True) -> Tuple[List[Dict[str, Any]], np.ndarray]:
+    """
+    Load (metadata rows, normalised embedding matrix).
+    Falls back to the legacy JSON index when the split files are missing.
+    """
+    if has_split_index(docs_root):
+        meta = read_meta(docs_root)
+        matrix = open_embeddings(docs_root, mmap=mmap)
+        if len(meta) != matrix.shape[0]:
+            raise RuntimeError(
+                f"Blueprint index is inconsistent: {len(meta)} metadata rows vs "
+                f"{matrix.shape[0]} embeddings in {docs_root}. Re-run ingest-blueprints."
+            )
+        return meta, matrix
+
+    legacy_path = docs_root / LEGACY_INDEX_FILE
+    if legacy_path.exists():
+        print(
+            f"[blueprints] Loading legacy JSON index {legacy_path}; "
+            "run `python -m orchestrator.cli migrate-blueprint-index` to speed this up."
+        )
+        return _read_legacy(legacy_path)
+
+    raise FileNotFoundError(
+        f"No blueprint index found in {docs_root}. Run `python -m orchestrator.cli ingest-blueprints` first."
+    )
+
+
+def migrate_json_index(docs_root: Path, remove_legacy: bool = False) -> Optional[Path]:
+    """
+    One-shot conversion of blueprint_index.json into the split format.
+    Returns the sidecar path, or None when there is no legacy index.
+    """
+    legacy_path = docs_root / LEGACY_INDEX_FILE
+    if not legacy_path.exists():
+        return None
+    meta, matrix = _read_legacy(legacy_path)
+    meta_path = write_index(docs_root, meta, matrix)
+    if remove_legacy:
+        legacy_path.unlink()
+    return meta_path
@@ -1,75 +1,245 @@
 # orchestrator/blueprints.py
 from __future__ import annotations
 
-import json
+import mmap
+import os
 import subprocess
-from dataclasses import dataclass, asdict
 from pathlib import Path
-from typing import List, Dict, Any, Tuple, Optional
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
 
 import numpy as np  # pip install numpy
 
+from . import ann_index, blueprint_store, compact_index, dedup, lexical_index, md_chunker
+from .concurrency import RateLimiter, Throughput, map_bounded
+from .embed_scheduler import MAX_INPUTS_PER_REQUEST, EmbeddingScheduler
+from .ingest_cache import IngestCache, embedding_key, summary_key
+from .ingest_checkpoint import IngestCheckpoint
 from .llm_client import LLMClient
+from .query_cache import QueryEmbeddingCache
+from .resilience import retry_outside
+from .tokens import estimate_tokens
+
+# Bump whenever the summary prompt below changes so cached summaries are redone.
+SUMMARY_PROMPT_VERSION = "v1"
+
+# Defaults for the `ingest:` section of ops/config.yaml.
+DEFAULT_INGEST_CONFIG: Dict[str, Any] = {
+    "summary_workers": 8,
+    "requests_per_minute": 500,
+    "tokens_per_minute": 200_000,
+    "max_retries": 3,
+    "embed_in_flight": 4,
+    "embed_max_tokens_per_request": 250_000,
+    "chunk_max_tokens": md_chunker.DEFAULT_MAX_TOKENS,
+    # Shingle Jaccard at which chunks share one summary/embedding; 0 disables.
+    "dedup_threshold": dedup.DEFAULT_THRESHOLD,
+    # Compact matrices for two-stage search, e.g. ["d256-i8"]; see compact_index.
+    "compact_embeddings": [],
+    # Per-chunk copies under docs/blueprints/{tech,non-tech}/ for humans only.
+    "write_chunk_files": False,
+}
+
+
+SEARCH_MODES = ("hybrid", "vector", "lexical")
+# Each list contributes this many candidates to reciprocal rank fusion.
+HYBRID_DEPTH = 50
+# Compact spec used to shortlist vector candidates (None: full matrix only).
+DEFAULT_COMPACT = os.getenv("ORCHESTRATOR_SEARCH_COMPACT") or None
 
 
-@dataclass
 class BlueprintChunk:
-    id: str
-    doc_type: str            # "non-tech" or "tech"
-    source_file: str
-    heading_path: List[str]  # reserved for future use
-    index: int
-    char_start: int
-    char_end: int
-    text: str
-    summary: Optional[str] = None
-    embedding: Optional[List[float]] = None
-
-
-def run_pandoc(src: Path, dest: Path) -> None:
+    """
+    One chunk of a converted blueprint, stored as offsets only.
+
+    The text lives once, in the converted source markdown
+    (docs/blueprints/<source_md>); `byte_start`/`byte_end` locate it there
+    and SourceTexts resolves it lazily from a memory map. `char_start`/
+    `char_end` are kept for humans and older tooling.
+    """
+
+    __slots__ = (
+        "id",
+        "doc_type",
+        "source_file",
+        "source_md",
+        "heading_path",
+        "index",
+        "char_start",
+        "char_end",
+        "byte_start",
+        "byte_end",
+        "summary",
+        "duplicate_of",
+    )
+
+    def __init__(
+        self,
+        id: str,
+        doc_type: str,            # "non-tech" or "tech"
+        source_file: str,
+        source_md: str,
+        heading_path: List[str],
+        index: int,
+        char_start: int,
+        char_end: int,
+        byte_start: int,
+        byte_end: int,
+        summary: Optional[str] = None,
+        duplicate_of: Optional[str] = None,
+    ):
+        self.id = id
+        self.doc_type = doc_type
+        self.source_file = source_file
+        self.source_md = source_md
+        self.heading_path = heading_path
+        self.index = index
+        self.char_start = char_start
+        self.char_end = char_end
+        self.byte_start = byte_start
+        self.byte_end = byte_end
+        self.summary = summary
+        self.duplicate_of = duplicate_of  # id of the representative of a near-duplicate group
+
+    def to_row(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    @classmethod
+    def from_row(cls, row: Dict[str, Any]) -> "BlueprintChunk":
+        return cls(**{name: row.get(name) for name in cls.__slots__})
+
+
+class SourceTexts:
+    """
+    Lazily memory-maps the converted source markdown files and slices chunk
+    text out of them by byte offset. Use as a context manager (or call
+    close()) so the maps are released before pandoc rewrites the files.
+    """
+
+    def __init__(self, docs_root: Path):
+        self.docs_root = docs_root
+        self._maps: Dict[str, mmap.mmap] = {}
+        self._files: List[Any] = []
+
+    def _map(self, source_md: str) -> mmap.mmap:
+        mm = self._maps.get(source_md)
+        if mm is None:
+            f = (self.docs_root / source_md).open("rb")
+            self._files.append(f)
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self._maps[source_md] = mm
+        return mm
+
+    def text(self, chunk: Any) -> str:
+        """Text of a BlueprintChunk or an index metadata row."""
+        row = chunk if isinstance(chunk, dict) else None
+        get = row.get if row is not None else (lambda k, d=None: getattr(chunk, k, d))
+        source_md = get("source_md")
+        if not source_md:
+            # Legacy index rows carry their own copy of the text.
+            return get("text", "") or ""
+        return self._map(source_md)[get("byte_start") : get("byte_end")].decode("utf-8")
+
+    def close(self) -> None:
+        for mm in self._maps.values():
+            mm.close()
+        for f in self._files:
+            f.close()
+        self._maps.clear()
+        self._files.clear()
+
+    def __enter__(self) -> "SourceTexts":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+
+def _byte_offsets(text: str, positions: List[int]) -> List[int]:
+    """UTF-8 byte offsets for ascending character positions in `text`, in one pass."""
+    out: List[int] = []
+    prev_char = 0
+    prev_byte = 0
+    for pos in positions:
+        prev_byte += len(text[prev_char:pos].encode("utf-8"))
+        prev_char = pos
+        out.append(prev_byte)
+    return out
+
+
+def run_pandoc(src: Path, dest: Path, cache: Optional[IngestCache] = None) -> None:
+    if cache is not None and cache.source_unchanged(src, dest):
+        print(f"[blueprints] {src.name} unchanged since last conversion; skipping pandoc.")
+        return
     dest.parent.mkdir(parents=True, exist_ok=True)
     cmd = ["pandoc", str(src), "-o", str(dest)]
     print(f"[blueprints] Running pandoc: {' '.join(cmd)}")
     subprocess.run(cmd, check=True)
+    if cache is not None:
+        cache.record_source(src, dest)
+
+
+def _summary_messages(ch: BlueprintChunk, text: str) -> List[Dict[str, str]]:
+    prompt = (
+        "You are documenting a large product blueprint.\n"
+        "Summarise the following chunk in <= 50 words, preserving each distinct requirement.\n"
+        "Do NOT drop edge cases or constraints. Use 1-2 sentences.\n\n"
+        f"CHUNK ID: {ch.id}\n"
+        "TEXT:\n"
+        f"{text}\n"
+    )
+    return [
+        {"role": "system", "content": "You are a meticulous technical product summariser."},
+        {"role": "user", "content": prompt},
+    ]
 
 
 def _chunk_markdown(
     text: str,
     doc_type: str,
     source_file: str,
+    source_md: str,
     id_prefix: str,
-    max_chars: int = 4000,
-    overlap: int = 400,
+    max_tokens: int = md_chunker.DEFAULT_MAX_TOKENS,
+    model: Optional[str] = None,
 ) -> List[BlueprintChunk]:
     """
-    Simple char-based chunking with overlap.
+    Heading-aware chunking (see orchestrator.md_chunker): chunks follow the
+    plan's sections, small sections are packed up to `max_tokens`, and
+    heading_path records where each chunk sits in the document.
     We *don't* treat document section numbers as execution order.
+
+    `text` must be the exact decoded contents of docs/blueprints/<source_md>
+    (no newline translation), so the byte offsets line up with the file.
     """
-    chunks: List[BlueprintChunk] = []
-    n = len(text)
-    start = 0
-    i = 0
-    while start < n:
-        end = min(start + max_chars, n)
-        chunk_text = text[start:end]
-        chunk_id = f"{id_prefix}-{i:04d}"
-        chunks.append(
-            BlueprintChunk(
-                id=chunk_id,
-                doc_type=doc_type,
-                source_file=source_file,
-                heading_path=[],
-                index=i,
-                char_start=start,
-                char_end=end,
-                text=chunk_text,
-            )
+    spans = md_chunker.structural_spans(text, max_tokens=max_tokens, model=model)
+
+    # Oversized sections overlap: convert the sorted boundary set once.
+    bounds = sorted({p for span in spans for p in (span.start, span.end)})
+    to_byte = dict(zip(bounds, _byte_offsets(text, bounds)))
+    return [
+        BlueprintChunk(
+            id=f"{id_prefix}-{i:04d}",
+            doc_type=doc_type,
+            source_file=source_file,
+            source_md=source_md,
+            heading_path=span.heading_path,
+            index=i,
+            char_start=span.start,
+            char_end=span.end,
+            byte_start=to_byte[span.start],
+            byte_end=to_byte[span.end],
         )
-        if end == n:
-            break
-        start = max(0, end - overlap)
-        i += 1
-    return chunks
+        for i, span in enumerate(spans)
+    ]
+
+
+def _read_source_md(path: Path) -> str:
+    # Decode the raw bytes: read_text() would translate CRLF and shift offsets.
+    return path.read_bytes().decode("utf-8")
+
+
+def _index_row(ch: BlueprintChunk) -> Dict[str, Any]:
+    return ch.to_row()
 
 
 def build_blueprint_index(
@@ -77,113 +247,364 @@ def build_blueprint_index(
     non_tech_src: Path,
     tech_src: Path,
     llm: LLMClient,
+    use_cache: bool = True,
+    ingest_cfg: Optional[Dict[str, Any]] = None,
 ) -> Path:
     """
     Convert the two master docs to markdown, chunk, summarise, embed,
-    and write a single JSON index with everything.
+    and write the split index (metadata sidecar + embedding matrix).
+
+    Summaries and embeddings come from the content-addressed ingest cache
+    when the chunk text, model and prompt version are unchanged; only the
+    misses reach the API. use_cache=False ignores (but still refills) it.
+
+    Summaries run on a bounded worker pool under a requests/tokens-per-minute
+    limiter (see DEFAULT_INGEST_CONFIG); a chunk that still fails after its
+    retries is left without a summary and retried on the next ingest.
+
+    Every completed summary and embedding is appended to an on-disk
+    checkpoint as it lands, so a crashed or rate-limited run resumes where
+    it stopped. The final index is streamed out of that checkpoint.
     """
+    settings = {**DEFAULT_INGEST_CONFIG, **(ingest_cfg or {})}
     docs_root = repo_root / "docs" / "blueprints"
     docs_root.mkdir(parents=True, exist_ok=True)
+    # Both released on any exit: the cache's SQLite connection, and the source
+    # maps (SourceTexts maps lazily; pandoc rewrites these files on the next run).
+    with IngestCache.for_docs_root(docs_root) as cache, SourceTexts(docs_root) as sources:
+        # 1) Convert to markdown via pandoc
+        non_tech_md = docs_root / "non_tech_source.md"
+        tech_md = docs_root / "tech_source.md"
 
-    # 1) Convert to markdown via pandoc
-    non_tech_md = docs_root / "non_tech_source.md"
-    tech_md = docs_root / "tech_source.md"
+        run_pandoc(non_tech_src, non_tech_md, cache if use_cache else None)
+        run_pandoc(tech_src, tech_md, cache if use_cache else None)
 
-    run_pandoc(non_tech_src, non_tech_md)
-    run_pandoc(tech_src, tech_md)
+        # 2) Chunk. Chunks hold offsets only; text is sliced from the mmapped
+        #    source markdown whenever it is needed.
+        non_chunks = _chunk_markdown(
+            _read_source_md(non_tech_md),
+            doc_type="non-tech",
+            source_file=str(non_tech_src.relative_to(repo_root)),
+            source_md=non_tech_md.name,
+            id_prefix="NT",
+            max_tokens=int(settings["chunk_max_tokens"]),
+            model=llm.cfg.embedding_model,
+        )
+        tech_chunks = _chunk_markdown(
+            _read_source_md(tech_md),
+            doc_type="tech",
+            source_file=str(tech_src.relative_to(repo_root)),
+            source_md=tech_md.name,
+            id_prefix="TD",
+            max_tokens=int(settings["chunk_max_tokens"]),
+            model=llm.cfg.embedding_model,
+        )
+        all_chunks: List[BlueprintChunk] = non_chunks + tech_chunks
+        total = len(all_chunks)
+        print(f"[blueprints] Created {total} chunks ({len(non_chunks)} non-tech, {len(tech_chunks)} tech)")
 
-    non_tech_text = non_tech_md.read_text(encoding="utf-8")
-    tech_text = tech_md.read_text(encoding="utf-8")
+        # 2b) Fold near-duplicate chunks into one representative each. Members
+        #     keep their own row (so blueprint_ids stay valid) but share the
+        #     representative's summary and embedding instead of paying for them.
+        by_id = {ch.id: ch for ch in all_chunks}
+        threshold = float(settings["dedup_threshold"] or 0)
+        if threshold > 0:
+            for i, r in dedup.near_duplicate_groups((sources.text(ch) for ch in all_chunks), threshold).items():
+                all_chunks[i].duplicate_of = all_chunks[r].id
+        unique = [ch for ch in all_chunks if ch.duplicate_of is None]
+        if len(unique) < total:
+            saved = sum(estimate_tokens(sources.text(ch)) for ch in all_chunks if ch.duplicate_of)
+            print(
+                f"[blueprints] Folded {total - len(unique)} near-duplicate chunks into "
+                f"{len({ch.duplicate_of for ch in all_chunks if ch.duplicate_of})} groups (~{saved} tokens not re-sent)."
+            )
 
-    # 2) Chunk
-    non_chunks = _chunk_markdown(
-        non_tech_text,
-        doc_type="non-tech",
-        source_file=str(non_tech_src.relative_to(repo_root)),
-        id_prefix="NT",
-    )
-    tech_chunks = _chunk_markdown(
-        tech_text,
-        doc_type="tech",
-        source_file=str(tech_src.relative_to(repo_root)),
-        id_prefix="TD",
-    )
-    all_chunks: List[BlueprintChunk] = non_chunks + tech_chunks
-    total = len(all_chunks)
-    print(f"[blueprints] Created {total} chunks ({len(non_chunks)} non-tech, {len(tech_chunks)} tech)")
-
-    # 3) Summarise each chunk with OpenAI, with progress output
-    print("[blueprints] Summarising chunks with OpenAI (this is a one-time cost)...")
-    for idx, ch in enumerate(all_chunks, start=1):
-        print(f"[blueprints]  - Summarising chunk {idx}/{total} ({ch.id}, {ch.doc_type})")
-        prompt = (
-            "You are documenting a large product blueprint.\n"
-            "Summarise the following chunk in <= 50 words, preserving each distinct requirement.\n"
-            "Do NOT drop edge cases or constraints. Use 1-2 sentences.\n\n"
-            f"CHUNK ID: {ch.id}\n"
-            "TEXT:\n"
-            f"{ch.text}\n"
+        # Resume whatever a previous, interrupted run already paid for.
+        checkpoint = IngestCheckpoint(docs_root, embedding_model=llm.cfg.embedding_model)
+        if checkpoint.resumed:
+            print(
+                f"[blueprints] Resuming from checkpoint: {len(checkpoint.summaries)} summaries, "
+                f"{len(checkpoint.rows)} embeddings already committed."
+            )
+
+        # 3) Summarise each chunk with OpenAI, with progress output
+        chat_model = llm.cfg.openai_model
+        skeys = {ch.id: summary_key(sources.text(ch), chat_model, SUMMARY_PROMPT_VERSION) for ch in unique}
+        pending: List[BlueprintChunk] = []
+        for ch in unique:
+            done = checkpoint.summaries.get(skeys[ch.id])
+            if done is None and use_cache:
+                done = cache.get_summary(skeys[ch.id])
+            if done is not None:
+                ch.summary = done
+            else:
+                pending.append(ch)
+        workers = int(settings["summary_workers"])
+        print(
+            f"[blueprints] Summarising {len(pending)} chunks with OpenAI on {workers} workers "
+            f"({len(unique) - len(pending)} reused from checkpoint/cache)..."
+        )
+
+        def _summarise(ch: BlueprintChunk) -> str:
+            return llm.chat_openai(messages=_summary_messages(ch, sources.text(ch))).strip()
+
+        def _store_summary(i: int, summary: str) -> None:
+            ch = pending[i]
+            ch.summary = summary
+            cache.put_summary(skeys[ch.id], summary)
+            checkpoint.commit_summary(ch.id, skeys[ch.id], summary)
+
+        outcome = map_bounded(
+            _summarise,
+            pending,
+            workers=workers,
+            limiter=RateLimiter(settings["requests_per_minute"], settings["tokens_per_minute"]),
+            cost=lambda ch: estimate_tokens(sources.text(ch), chat_model),
+            result_tokens=lambda summary: estimate_tokens(summary, chat_model),
+            max_retries=int(settings["max_retries"]),
+            retry_if=retry_outside,
+            progress=Throughput("[blueprints]  - Summarised", len(pending)),
+            on_result=_store_summary,
+        )
+        for i, err in sorted(outcome.errors.items()):
+            print(f"[blueprints] WARN: summary failed for {pending[i].id}: {err!r}")
+        for ch in all_chunks:
+            if ch.duplicate_of:
+                ch.summary = by_id[ch.duplicate_of].summary
+
+        # 4) Embed all chunks (full text, not just summary). Vectors go straight
+        #    to the checkpoint file, never onto the chunk objects.
+        embed_model = llm.cfg.embedding_model
+        ekeys = {ch.id: embedding_key(sources.text(ch), embed_model) for ch in unique}
+        for ch in all_chunks:
+            if ch.duplicate_of:
+                ekeys[ch.id] = ekeys[ch.duplicate_of]
+        missing = [ch for ch in unique if ekeys[ch.id] not in checkpoint.rows]
+        to_embed: List[BlueprintChunk] = []
+        for i in range(0, len(missing), 256):
+            block = missing[i : i + 256]
+            cached_vectors = cache.get_embeddings(ekeys[ch.id] for ch in block) if use_cache else {}
+            checkpoint.commit_vectors(
+                [(ch.id, ekeys[ch.id], cached_vectors[ekeys[ch.id]]) for ch in block if ekeys[ch.id] in cached_vectors]
+            )
+            to_embed.extend(ch for ch in block if ekeys[ch.id] not in cached_vectors)
+        print(
+            f"[blueprints] Creating embeddings for {len(to_embed)} chunks "
+            f"({len(unique) - len(to_embed)} reused from checkpoint/cache)..."
         )
-        ch.summary = llm.chat_openai(
-            messages=[
-                {"role": "system", "content": "You are a meticulous technical product summariser."},
-                {"role": "user", "content": prompt},
-            ]
-        ).strip()
-
-    # 4) Embed all chunks (full text, not just summary)
-    print("[blueprints] Creating embeddings for all chunks...")
-    batch_size = 96
-    for i in range(0, len(all_chunks), batch_size):
-        batch = all_chunks[i : i + batch_size]
-        print(f"[blueprints]  - Embedding batch {i+1}..{i+len(batch)} of {total}")
-        vectors = llm.embed([c.text for c in batch])
-        for c, v in zip(batch, vectors):
-            c.embedding = v
-
-    # 5) Write per-chunk anchored markdown (for human inspection / Cursor context)
-    print("[blueprints] Writing chunk markdown files...")
-    for ch in all_chunks:
-        folder = docs_root / ("non-tech" if ch.doc_type == "non-tech" else "tech")
-        folder.mkdir(parents=True, exist_ok=True)
-        out_path = folder / f"{ch.id}.md"
-        header = (
-            f"<!-- id: {ch.id} | source: {ch.source_file} | "
-            f"range: {ch.char_start}-{ch.char_end} -->\n\n"
+
+        def _store_vectors(batch: List[int], vectors: List[List[float]]) -> None:
+            cache.put_embeddings({ekeys[to_embed[i].id]: v for i, v in zip(batch, vectors)})
+            checkpoint.commit_vectors([(to_embed[i].id, ekeys[to_embed[i].id], v) for i, v in zip(batch, vectors)])
+
+        scheduler = EmbeddingScheduler(
+            lambda batch: llm.embed(batch, model=embed_model),
+            model=embed_model,
+            max_tokens_per_request=int(settings["embed_max_tokens_per_request"]),
+            in_flight=int(settings["embed_in_flight"]),
+            limiter=RateLimiter(settings["requests_per_minute"], settings["tokens_per_minute"]),
+            max_retries=int(settings["max_retries"]),
         )
-        out_path.write_text(header + ch.text, encoding="utf-8")
-
-    # 6) Write JSON index
-    index_path = docs_root / "blueprint_index.json"
-    serialisable: List[Dict[str, Any]] = []
-    for ch in all_chunks:
-        d = asdict(ch)
-        if d["embedding"] is not None:
-            d["embedding"] = list(d["embedding"])  # ensure JSON-serialisable
-        serialisable.append(d)
-
-    index_path.write_text(json.dumps(serialisable, indent=2), encoding="utf-8")
-    print(f"[blueprints] Wrote index to {index_path}")
+        scheduler.embed([sources.text(c) for c in to_embed], on_batch=_store_vectors, label="[blueprints]  - Embedded batch")
+
+        # 5) Optionally write per-chunk anchored markdown for human inspection.
+        #    Nothing in the orchestrator reads these any more; they are copies.
+        if settings["write_chunk_files"]:
+            print("[blueprints] Writing chunk markdown files...")
+            for ch in all_chunks:
+                folder = docs_root / ("non-tech" if ch.doc_type == "non-tech" else "tech")
+                folder.mkdir(parents=True, exist_ok=True)
+                out_path = folder / f"{ch.id}.md"
+                header = (
+                    f"<!-- id: {ch.id} | source: {ch.source_file} | "
+                    f"range: {ch.char_start}-{ch.char_end} -->\n\n"
+                )
+                out_path.write_text(header + sources.text(ch), encoding="utf-8")
+
+        # 6) Stream the split index out of the checkpoint: embeddings row by row
+        #    into the .npy memmap, then one metadata line per chunk.
+        if checkpoint.dim is None:
+            raise RuntimeError("[blueprints] No embeddings were produced; nothing to index.")
+        blueprint_store.write_embeddings_stream(
+            docs_root,
+            checkpoint.iter_vectors([ekeys[ch.id] for ch in all_chunks]),
+            count=total,
+            dim=checkpoint.dim,
+        )
+        index_path = blueprint_store.write_meta(docs_root, (_index_row(ch) for ch in all_chunks))
+        checkpoint.discard()
+        print(f"[blueprints] Wrote index to {index_path} (+ {blueprint_store.EMBEDDINGS_FILE})")
+
+        # 6b) BM25 inverted index for lexical / hybrid search
+        bm25_path = lexical_index.build_for_index(docs_root, _lexical_documents((_index_row(ch) for ch in all_chunks), sources))
+    print(f"[blueprints] Wrote BM25 index to {bm25_path}")
+
+    # 7) ANN index for large corpora (small ones are searched exactly)
+    ivf_path = ann_index.build_for_index(docs_root, blueprint_store.open_embeddings(docs_root))
+    if ivf_path:
+        print(f"[blueprints] Wrote IVF index to {ivf_path}")
+
+    # 8) Compact matrices (float16 / int8 / truncated) for two-stage search
+    for path in compact_index.build_for_index(
+        docs_root, blueprint_store.open_embeddings(docs_root), list(settings["compact_embeddings"] or [])
+    ):
+        print(f"[blueprints] Wrote compact embeddings to {path}")
     return index_path
 
 
 def load_blueprint_index(repo_root: Path) -> Tuple[List[Dict[str, Any]], np.ndarray]:
-    docs_root = repo_root / "docs" / "blueprints"
-    index_path = docs_root / "blueprint_index.json"
-    data: List[Dict[str, Any]] = json.loads(index_path.read_text(encoding="utf-8"))
-    matrix = np.array([row["embedding"] for row in data], dtype="float32")
-    return data, matrix
+    """
+    Return (metadata rows, embedding matrix). The matrix is memory-mapped and
+    its rows are already L2-normalised.
+    """
+    return blueprint_store.load_index(blueprint_store.blueprints_root(repo_root))
+
+
+def _lexical_documents(rows: Iterable[Dict[str, Any]], sources: SourceTexts) -> Iterator[str]:
+    for row in rows:
+        if row.get("duplicate_of"):
+            # Body and summary are the representative's; a member only
+            # answers to its own id and headings.
+            yield lexical_index.document_text({**row, "summary": ""}, "")
+        else:
+            yield lexical_index.document_text(row, sources.text(row))
+
+
+def load_lexical_index(docs_root: Path, meta: List[Dict[str, Any]]) -> lexical_index.BM25Index:
+    """The BM25 index for `meta`, built on first use for indexes that predate it."""
+    index = lexical_index.load_for_index(docs_root, len(meta))
+    if index is None:
+        print("[blueprints] Building BM25 index from the metadata sidecar...")
+        with SourceTexts(docs_root) as sources:
+            lexical_index.build_for_index(docs_root, _lexical_documents(meta, sources))
+        index = lexical_index.load_for_index(docs_root, len(meta))
+    return index
 
 
 def search_blueprints(
     repo_root: Path,
-    llm: LLMClient,
+    llm: Optional[LLMClient],
     query: str,
     top_k: int = 10,
+    nprobe: Optional[int] = None,
+    mode: str = "hybrid",
 ) -> List[Dict[str, Any]]:
+    """
+    Search the blueprint index.
+
+    mode="vector":  cosine top-k; IVF when one was built at ingest time
+                    (`nprobe` trades latency for recall), exact otherwise.
+    mode="lexical": BM25 over id, headings, summary and text. No API call,
+                    so `llm` may be None; finds exact ids like "TD-0076".
+    mode="hybrid":  both lists fused by reciprocal rank fusion, with chunks
+                    whose id appears in the query pinned first.
+
+    Near-duplicate chunks share their representative's vector, so vector
+    hits are collapsed onto the representative row.
+    """
+    return search_blueprints_many(repo_root, llm, [query], top_k=top_k, nprobe=nprobe, mode=mode)[0]
+
+
+def embed_queries(
+    docs_root: Path,
+    llm: LLMClient,
+    queries: Sequence[str],
+    use_cache: bool = True,
+) -> np.ndarray:
+    """
+    Unit-length query embeddings (queries x dim). Cached queries come from
+    the on-disk LRU cache; all the others are embedded in one request
+    (per 2048 inputs) and added to it.
+    """
+    model = llm.cfg.embedding_model
+    unique = list(dict.fromkeys(queries))
+    with QueryEmbeddingCache.for_docs_root(docs_root) as qcache:
+        found = qcache.get_many(model, unique) if use_cache else {}
+        missing = [q for q in unique if q not in found]
+        for start in range(0, len(missing), MAX_INPUTS_PER_REQUEST):
+            batch = missing[start : start + MAX_INPUTS_PER_REQUEST]
+            vectors = blueprint_store.normalise_rows(np.asarray(llm.embed(batch, model=model), dtype="float32"))
+            qcache.put_many(model, batch, vectors)
+            found.update(zip(batch, vectors))
+    return np.stack([found[q] for q in queries]).astype("float32", copy=False)
+
+
+def search_blueprints_many(
+    repo_root: Path,
+    llm: Optional[LLMClient],
+    queries: Sequence[str],
+    top_k: int = 10,
+    nprobe: Optional[int] = None,
+    mode: str = "hybrid",
+    use_cache: bool = True,
+    compact: Optional[str] = DEFAULT_COMPACT,
+    shortlist: int = compact_index.DEFAULT_SHORTLIST,
+) -> List[List[Dict[str, Any]]]:
+    """
+    search_blueprints for many queries at once: the index is loaded once,
+    uncached query embeddings are fetched in a single request, and exact
+    vector search scores every query with one matrix-matrix product.
+    Returns one result list per query, in order.
+
+    With `compact` naming a compact matrix built at ingest (e.g. "d256-i8"),
+    vector search shortlists `shortlist` rows per query on it and re-ranks
+    them with the full float32 vectors.
+    """
+    if mode not in SEARCH_MODES:
+        raise ValueError(f"Unknown search mode {mode!r}; expected one of {', '.join(SEARCH_MODES)}")
+    if not queries:
+        return []
     meta, mat = load_blueprint_index(repo_root)
-    q_vec = np.array(llm.embed([query])[0], dtype="float32")
-    norms = np.linalg.norm(mat, axis=1) * np.linalg.norm(q_vec)
-    scores = mat @ q_vec / norms
-    order = np.argsort(scores)[::-1][:top_k]
-    return [meta[int(i)] for i in order]
+    docs_root = blueprint_store.blueprints_root(repo_root)
+    depth = max(top_k, HYBRID_DEPTH) if mode == "hybrid" else top_k
+
+    rankings: List[List[List[int]]] = [[] for _ in queries]
+    if mode in ("lexical", "hybrid"):
+        bm25 = load_lexical_index(docs_root, meta)
+        for q, query in enumerate(queries):
+            order, _ = bm25.search(query, depth)
+            rankings[q].append([int(i) for i in order])
+    if mode in ("vector", "hybrid"):
+        if llm is None:
+            raise ValueError(f"search mode {mode!r} needs an LLM client to embed the query")
+        q_mat = embed_queries(docs_root, llm, queries, use_cache=use_cache)
+        n_dups = sum(1 for row in meta if row.get("duplicate_of"))
+        k = min(len(meta), depth + n_dups)
+        compact_mat = compact_index.load_for_index(docs_root, mat, compact) if compact else None
+        if compact_mat is not None:
+            orders = compact_index.two_stage_search(mat, compact_mat, q_mat, k, shortlist=shortlist)
+        else:
+            orders = ann_index.search_many(docs_root, mat, q_mat, k, nprobe=nprobe)
+        for q, order in enumerate(orders):
+            rankings[q].append(_collapse_duplicates(meta, order, depth))
+
+    if mode != "hybrid":
+        return [[meta[i] for i in ranked[0][:top_k]] for ranked in rankings]
+
+    row_of_id = {row["id"].lower(): i for i, row in enumerate(meta)}
+    results: List[List[Dict[str, Any]]] = []
+    for query, ranked in zip(queries, rankings):
+        # A chunk id named in the query is a lookup, not a similarity
+        # question: put those rows first whatever the embedding thinks.
+        pinned = list(dict.fromkeys(row_of_id[t] for t in lexical_index.tokenize(query) if t in row_of_id))
+        fused = lexical_index.rrf_fuse(ranked, top_k + len(pinned))
+        results.append([meta[i] for i in (pinned + [i for i in fused if i not in pinned])[:top_k]])
+    return results
+
+
+def _collapse_duplicates(meta: List[Dict[str, Any]], order: Any, top_k: int) -> List[int]:
+    """Row numbers of `order` with near-duplicates mapped to their representative."""
+    row_of = {row["id"]: i for i, row in enumerate(meta)}
+    out: List[int] = []
+    seen = set()
+    for i in order:
+        row = meta[int(i)]
+        rep = row.get("duplicate_of")
+        idx = row_of.get(rep, int(i)) if rep else int(i)
+        if idx in seen:
+            continue
+        seen.add(idx)
+        out.append(idx)
+        if len(out) == top_k:
+            break
+    return out
@@ -2,14 +2,17 @@ from __future__ import annotations
 
 import argparse
 import json
+import time
 from datetime import datetime, UTC
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 import yaml
 
 from .llm_client import LLMClient, LLMConfig
-from . import blueprints
+from . import ann_index, blueprints, blueprint_store, planning, queue_store, response_cache
+from .queue_store import QueueStore
+from .scheduler import CycleError, Scheduler
 
 
 REPO_ROOT = Path(__file__).resolve().parent.parent
@@ -27,6 +30,8 @@ def _default_config() -> Dict[str, Any]:
             "embedding_model": "text-embedding-3-large",
             "anthropic_model": None,
         },
+        "ingest": dict(blueprints.DEFAULT_INGEST_CONFIG),
+        "planning": dict(planning.DEFAULT_PLANNING_CONFIG),
         "cursor": {
             # ✅ use the CLI agent, not the desktop launcher
             "cli_command": "cursor-agent",
@@ -71,10 +76,11 @@ def ensure_basic_layout(repo_root: Path) -> None:
     else:
         print(f"[init] PROGRESS.md already exists at {progress_path}")
 
-    queue_path = repo_root / "ops" / "queue.jsonl"
+    queue_path = repo_root / queue_store.DB_FILE
     if not queue_path.exists():
-        queue_path.write_text("", encoding="utf-8")
-        print(f"[init] Created empty queue at {queue_path}")
+        with QueueStore.for_repo(repo_root) as store:
+            store.export_jsonl()
+        print(f"[init] Created queue at {queue_path}")
     else:
         print(f"[init] Queue already exists at {queue_path}")
 
@@ -104,7 +110,7 @@ def make_llm(config: Dict[str, Any]) -> LLMClient:
         embedding_model=models.get("embedding_model", "text-embedding-3-large"),
         anthropic_model=models.get("anthropic_model"),
     )
-    return LLMClient(cfg)
+    return LLMClient(cfg, cache=response_cache.shared())
 
 
 def cmd_init(args: argparse.Namespace) -> None:
@@ -129,144 +135,73 @@ def cmd_ingest_blueprints(args: argparse.Namespace) -> None:
         non_tech_src=non_tech_src,
         tech_src=tech_src,
         llm=llm,
+        use_cache=not args.no_cache,
+        ingest_cfg=cfg.get("ingest"),
     )
     print(f"[ingest-blueprints] Blueprint index ready at {index_path}")
 
 
+def cmd_migrate_blueprint_index(args: argparse.Namespace) -> None:
+    docs_root = blueprint_store.blueprints_root(REPO_ROOT)
+    meta_path = blueprint_store.migrate_json_index(docs_root, remove_legacy=args.remove_legacy)
+    if meta_path is None:
+        print(f"[migrate-blueprint-index] No {blueprint_store.LEGACY_INDEX_FILE} in {docs_root}; nothing to do.")
+        return
+    print(
+        f"[migrate-blueprint-index] Wrote {meta_path} and "
+        f"{docs_root / blueprint_store.EMBEDDINGS_FILE}"
+    )
+    ivf_path = ann_index.build_for_index(docs_root, blueprint_store.open_embeddings(docs_root))
+    if ivf_path:
+        print(f"[migrate-blueprint-index] Wrote IVF index to {ivf_path}")
+    blueprints.load_lexical_index(docs_root, blueprint_store.read_meta(docs_root))
+
+
+def cmd_search_blueprints(args: argparse.Namespace) -> None:
+    llm = None if args.mode == "lexical" else make_llm(load_config(REPO_ROOT))
+    t0 = time.perf_counter()
+    rows = blueprints.search_blueprints_many(
+        REPO_ROOT, llm, [args.query], top_k=args.top_k, mode=args.mode, compact=args.compact
+    )[0]
+    elapsed_ms = (time.perf_counter() - t0) * 1000
+    for row in rows:
+        where = " > ".join(row.get("heading_path") or []) or row.get("source_file", "")
+        print(f"{row['id']} ({row['doc_type']}) {where}")
+        if row.get("summary"):
+            print(f"    {row['summary']}")
+    print(f"[search-blueprints] {len(rows)} results ({args.mode}, {elapsed_ms:.1f} ms)")
+
+
 def cmd_plan(args: argparse.Namespace) -> None:
     cfg = load_config(REPO_ROOT)
     llm = make_llm(cfg)
-    meta, _ = blueprints.load_blueprint_index(REPO_ROOT)
-
-    lines: List[str] = []
-    for row in meta:
-        summary = row.get("summary") or ""
-        lines.append(f"{row['id']} ({row['doc_type']}): {summary}")
-    summaries_block = "\n".join(lines)
-
-    system = (
-        "You are a senior engineering program manager for a very large multi-month build. "
-        "You are given technical and non-technical blueprint fragments. "
-        "Your job is to construct a Work Breakdown Structure (WBS) and an execution queue for "
-        "four Cursor agents:\n"
-        "- AGENT-1: Bootstrap & DevOps\n"
-        "- AGENT-2: Backend & Services\n"
-        "- AGENT-3: Frontend & Developer Experience\n"
-        "- AGENT-4: QA, Security, Docs, Release\n\n"
-        "WBS must reflect implementation order, NOT document order.\n\n"
-        "You MUST output pure JSON (no markdown, no comments) of the form:\n"
-        "{\n"
-        '  \"tasks\": [\n'
-        "    {\n"
-        '      \"id\": \"WBS-001\",\n'
-        '      \"title\": \"short name\",\n'
-        '      \"description\": \"1-3 paragraphs\",\n'
-        '      \"agent\": \"AGENT-1|AGENT-2|AGENT-3|AGENT-4\",\n'
-        '      \"depends_on\": [\"WBS-000\"],\n'
-        '      \"blueprint_ids\": [\"NT-0001\", \"TD-0007\"],\n'
-        '      \"phase\": \"Bootstrap|Backend|Frontend|QA|Ops|Docs|Other\",\n'
-        '      \"acceptance_criteria\": [\"...\", \"...\"]\n'
-        "    }\n"
-        "  ]\n"
-        "}\n"
-    )
+    meta, matrix = blueprints.load_blueprint_index(REPO_ROOT)
+    planning_cfg = {**planning.DEFAULT_PLANNING_CONFIG, **(cfg.get("planning") or {})}
 
-    user = (
-        "You will receive a list of blueprint chunks: `ID (doc_type): summary`.\n"
-        "Use these to reconstruct the big picture and propose a sane build order.\n\n"
-        "You MUST include tasks not only for feature and infra work, but also for:\n"
-        "- Creating and maintaining core docs:\n"
-        "  - docs/ARCHITECTURE.md\n"
-        "  - docs/adr/ADR-xxxx-*.md (architecture decision records)\n"
-        "  - docs/runbooks/*.md (deploy, rollback, on-call, troubleshooting)\n"
-        "  - docs/ACCESS_ENVELOPE.md (God-mode-with-guardrails access policy)\n"
-        "  - docs/TEST_POLICY.md (zero-doubt testing policy)\n"
-        "  - docs/RISKS.md (risk log)\n"
-        "  - docs/FILE_INDEX.md or docs/CODEMAP.json (code/directory map)\n"
-        "- Orchestrator improvements and meta-work:\n"
-        "  - Idempotent tasks & resumable orchestrator runs (state.json, safe restart)\n"
-        "  - Token discipline patterns (chunk+summarise+index, never load huge blobs)\n"
-        "  - Per-agent prompt definitions in docs/agents/AGENT-*.md\n"
-        "  - Recurring meta-QA tasks by AGENT-4 to audit run reports & queue quality\n"
-        "  - Usage/cost tracking for LLM calls and CI runs\n\n"
-        "For each WBS task you output:\n"
-        "- Assign the most appropriate agent.\n"
-        "- Attach the relevant blueprint_ids from the list.\n"
-        "- Provide clear acceptance_criteria so Cursor agents can know when they are done.\n"
-        "- Ensure dependencies respect reality: infra before backend; backend before frontend;\n"
-        "  backend+frontend before E2E QA; docs & runbooks as the work matures.\n\n"
-        "Now here are the blueprint chunk summaries:\n\n"
-        f"{summaries_block}"
-    )
-
-    raw = llm.chat_openai(
-        messages=[
-            {"role": "system", "content": system},
-            {"role": "user", "content": user},
-        ],
-        temperature=0.2,
-    )
+    if getattr(args, "incremental", False):
+        planning.plan_incremental(REPO_ROOT, llm, meta)
+        return
 
-    try:
-        data = json.loads(raw)
-    except json.JSONDecodeError:
-        print("[plan] Failed to parse JSON from model output. Raw output:")
-        print(raw)
-        raise
+    if getattr(args, "map_reduce", False):
+        if getattr(args, "cluster_size", None):
+            planning_cfg["cluster_size"] = args.cluster_size
+        tasks = planning.plan_map_reduce(REPO_ROOT, llm, meta, matrix, planning_cfg)
+        if not tasks:
+            raise SystemExit("[plan] Model returned no tasks.")
+        planning.write_plan_outputs(REPO_ROOT, tasks)
+        planning.save_plan_state(REPO_ROOT, meta)
+        return
 
-    tasks = data.get("tasks", [])
+    messages = [
+        {"role": "system", "content": planning.plan_system_prompt()},
+        {"role": "user", "content": planning.plan_user_prompt(planning.summary_lines(meta))},
+    ]
+    writer = planning.PlanWriter(REPO_ROOT)
+    tasks = planning.stream_plan(llm, messages, writer, max_resumes=int(planning_cfg["max_resumes"]))
     if not tasks:
         raise SystemExit("[plan] Model returned no tasks.")
-
-    wbs_path = REPO_ROOT / "ops" / "wbs.json"
-    wbs_path.write_text(json.dumps(tasks, indent=2, ensure_ascii=False), encoding="utf-8")
-    print(f"[plan] Wrote WBS with {len(tasks)} tasks to {wbs_path}")
-
-    queue_path = REPO_ROOT / "ops" / "queue.jsonl"
-    with queue_path.open("w", encoding="utf-8") as f:
-        for i, t in enumerate(tasks):
-            queue_item = {
-                "task_id": t["id"],
-                "agent": t["agent"],
-                "status": "todo",
-                "created_at": datetime.utcnow().isoformat() + "Z",
-                "blueprint_ids": t.get("blueprint_ids", []),
-                "title": t.get("title", ""),
-                "phase": t.get("phase", ""),
-                "depends_on": t.get("depends_on", []),
-                "acceptance_criteria": t.get("acceptance_criteria", []),
-                "priority": i + 1,
-            }
-            f.write(json.dumps(queue_item, ensure_ascii=False) + "\n")
-    print(f"[plan] Wrote queue items to {queue_path}")
-
-    todo_path = REPO_ROOT / "docs" / "TODO_MASTER.md"
-    queue_items: List[Dict[str, Any]] = []
-    with queue_path.open("r", encoding="utf-8") as f:
-        for line in f:
-            queue_items.append(json.loads(line))
-
-    queue_items.sort(key=lambda q: (q.get("phase", ""), q["agent"], q["priority"]))
-
-    lines_out: List[str] = [
-        "# Orchestrator To-Do List\n",
-        "_This file is generated from ops/queue.jsonl. Do not edit manually._\n",
-    ]
-    current_phase: Optional[str] = None
-    for item in queue_items:
-        if item["status"] != "todo":
-            continue
-        phase = item.get("phase") or "Unspecified"
-        if phase != current_phase:
-            lines_out.append(f"\n## Phase: {phase}\n")
-            current_phase = phase
-        lines_out.append(
-            f"- [ ] `{item['task_id']}` **({item['agent']})** "
-            f"- {item.get('title','') or '(no title)'} (priority {item['priority']})"
-        )
-
-    todo_path.write_text("\n".join(lines_out), encoding="utf-8")
-    print(f"[plan] Wrote human-readable TODO list to {todo_path}")
+    writer.finish()
+    planning.save_plan_state(REPO_ROOT, meta)
 
 
 def build_task_file(
@@ -280,16 +215,13 @@ def build_task_file(
 
     blueprint_ids = wbs_task.get("blueprint_ids", [])
     blueprint_chunks: List[str] = []
-    for bid in blueprint_ids:
-        row = meta_by_id.get(bid)
-        if not row:
-            continue
-        sub = "non-tech" if row["doc_type"] == "non-tech" else "tech"
-        bp_path = repo_root / "docs" / "blueprints" / sub / f"{row['id']}.md"
-        if bp_path.exists():
-            blueprint_chunks.append(f"### {row['id']} ({sub})\n\n" + bp_path.read_text(encoding="utf-8"))
-        else:
-            blueprint_chunks.append(f"### {row['id']} ({sub})\n\n" + row.get("text", ""))
+    with blueprints.SourceTexts(blueprint_store.blueprints_root(repo_root)) as sources:
+        for bid in blueprint_ids:
+            row = meta_by_id.get(bid)
+            if not row:
+                continue
+            sub = "non-tech" if row["doc_type"] == "non-tech" else "tech"
+            blueprint_chunks.append(f"### {row['id']} ({sub})\n\n" + sources.text(row))
 
     bp_section = "\n\n".join(blueprint_chunks) if blueprint_chunks else "_No linked blueprint chunks._"
 
@@ -359,46 +291,48 @@ def build_task_file(
     return task_path
 
 
-def cmd_run_next(args: argparse.Namespace) -> None:
-    cfg = load_config(REPO_ROOT)
-    llm = make_llm(cfg)
-    queue_path = REPO_ROOT / "ops" / "queue.jsonl"
-    lines = [l for l in queue_path.read_text(encoding="utf-8").splitlines() if l.strip()]
-    if not lines:
-        print("[run-next] Queue is empty.")
-        return
-
-    items = [json.loads(l) for l in lines]
-    next_item: Optional[Dict[str, Any]] = None
-    remaining: List[Dict[str, Any]] = []
-
-    status_by_id = {it["task_id"]: it["status"] for it in items}
-    for it in items:
-        if it.get("status") != "todo":
-            remaining.append(it)
-            continue
-        deps = it.get("depends_on", [])
-        if all(status_by_id.get(d) == "done" for d in deps):
-            if not next_item:
-                next_item = it
-                it["status"] = "in_progress"
-        remaining.append(it)
-
-    if not next_item:
-        print("[run-next] No unblocked todo items found.")
-        return
-
-    with queue_path.open("w", encoding="utf-8") as f:
-        for it in remaining:
-            f.write(json.dumps(it, ensure_ascii=False) + "\n")
-
+def claim_next_task(
+    store: QueueStore,
+    agent: Optional[str] = None,
+    sched: Optional[Scheduler] = None,
+) -> Optional[Dict[str, Any]]:
+    """Claim the best ready task (critical path first), optionally for one agent."""
+    if sched is None:
+        try:
+            sched = Scheduler(store.all())
+        except CycleError as e:
+            raise SystemExit(f"[run-next] Queue has a {e}; re-run `plan` to rebuild it.")
+    # Another process may claim a candidate first; then try the next one.
+    for task_id in sched.ready(agent):
+        item = store.claim(task_id)
+        sched.start(task_id)
+        if item:
+            return item
+    return None
+
+
+def prepare_agent_run(
+    cfg: Dict[str, Any],
+    llm: LLMClient,
+    item: Dict[str, Any],
+    workdir: Optional[Path] = None,
+) -> Tuple[Path, List[str]]:
+    """
+    Write the task file for a claimed queue item; return it and the cursor-agent command.
+    With `workdir` (a task worktree) the task file lives there and the agent is pointed at it.
+    """
+    workdir = workdir or REPO_ROOT
     wbs_path = REPO_ROOT / "ops" / "wbs.json"
     wbs = json.loads(wbs_path.read_text(encoding="utf-8"))
     wbs_by_id = {t["id"]: t for t in wbs}
-    wbs_task = wbs_by_id[next_item["task_id"]]
+    wbs_task = wbs_by_id[item["task_id"]]
 
-    agent_name = next_item["agent"]
+    agent_name = item["agent"]
     task_file = build_task_file(REPO_ROOT, wbs_task, agent_name, llm)
+    if workdir != REPO_ROOT:
+        moved = workdir / task_file.relative_to(REPO_ROOT)
+        moved.parent.mkdir(parents=True, exist_ok=True)
+        task_file = task_file.replace(moved)
     print(f"[run-next] Created task file for {agent_name}: {task_file}")
 
     cursor_cfg = cfg.get("cursor", {})
@@ -425,7 +359,7 @@ def cmd_run_next(args: argparse.Namespace) -> None:
     # Non-interactive CLI prompt that tells the agent to read the task file
     prompt = (
         f"You are {agent_name}, a Cursor CLI agent with role: {agent_cfg.get('role','(unspecified role)')}.\n"
-        f"Repository root on disk: {REPO_ROOT}\n"
+        f"Repository root on disk: {workdir}\n"
         f"Task file path: {task_file}\n\n"
         "Instructions:\n"
         "1. Start by reading the task file at the given path and follow the instructions inside it.\n"
@@ -439,35 +373,74 @@ def cmd_run_next(args: argparse.Namespace) -> None:
         "[run-next] About to run Cursor Agent CLI (non-interactive): "
         f"{cli_cmd} -p \"[task instructions]\" --model {model} --force"
     )
+    return task_file, cmd
+
+
+CURSOR_NOT_FOUND = (
+    "[run-next] ERROR: `cursor-agent` CLI not found on PATH.\n"
+    "Install it from https://cursor.com/docs/cli/overview and ensure `cursor-agent` works "
+    "from this terminal (e.g. `cursor-agent --version`)."
+)
+
+
+def run_next(
+    cfg: Optional[Dict[str, Any]] = None,
+    llm: Optional[LLMClient] = None,
+    agent: Optional[str] = None,
+) -> Optional[Dict[str, Any]]:
+    """
+    Claim the next task and run its cursor-agent to completion.
+    Returns the claimed item, or None when nothing was ready. Pass `cfg` /
+    `llm` to reuse them across calls (see orchestrator.pipeline).
+    """
+    cfg = cfg if cfg is not None else load_config(REPO_ROOT)
+    llm = llm if llm is not None else make_llm(cfg)
+    with QueueStore.for_repo(REPO_ROOT) as store:
+        if not store.counts():
+            print("[run-next] Queue is empty.")
+            return None
+        next_item = claim_next_task(store, agent)
+        if not next_item:
+            print("[run-next] No unblocked todo items found.")
+            return None
+        store.export_jsonl()
+
+    _, cmd = prepare_agent_run(cfg, llm, next_item)
 
     import subprocess
 
     try:
         subprocess.run(cmd, cwd=str(REPO_ROOT), check=False)
     except FileNotFoundError:
-        print(
-            "[run-next] ERROR: `cursor-agent` CLI not found on PATH.\n"
-            "Install it from https://cursor.com/docs/cli/overview and ensure `cursor-agent` works "
-            "from this terminal (e.g. `cursor-agent --version`)."
-        )
+        print(CURSOR_NOT_FOUND)
+    return next_item
+
+
+def cmd_run_next(args: argparse.Namespace) -> None:
+    run_next(agent=getattr(args, "agent", None))
 
 
 def cmd_status(args: argparse.Namespace) -> None:
-    queue_path = REPO_ROOT / "ops" / "queue.jsonl"
-    if not queue_path.exists():
+    if not (REPO_ROOT / queue_store.DB_FILE).exists() and not (REPO_ROOT / queue_store.JSONL_FILE).exists():
         print("Queue not found; run init and plan.")
         return
-    lines = [l for l in queue_path.read_text(encoding="utf-8").splitlines() if l.strip()]
-    if not lines:
+    with QueueStore.for_repo(REPO_ROOT) as store:
+        counts = store.counts()
+        items = store.all()
+    if not counts:
         print("Queue is empty.")
         return
-    items = [json.loads(l) for l in lines]
-    counts: Dict[str, int] = {}
-    for it in items:
-        counts[it["status"]] = counts.get(it["status"], 0) + 1
     print("Queue status:")
     for k, v in counts.items():
         print(f"- {k}: {v}")
+    try:
+        ready = Scheduler(items).ready_by_agent()
+    except CycleError as e:
+        print(f"Ready: unknown ({e})")
+        return
+    print("Ready (critical path first):")
+    for agent, ids in ready.items():
+        print(f"- {agent}: {', '.join(ids[:5])}{' ...' if len(ids) > 5 else ''} ({len(ids)})")
 
 
 def cmd_index_files(args: argparse.Namespace) -> None:
@@ -546,9 +519,55 @@ def main() -> None:
     sub = parser.add_subparsers(dest="command", required=True)
 
     sub.add_parser("init", help="Initialise ops/ and docs/ structure.")
-    sub.add_parser("ingest-blueprints", help="Convert + index the two big project plans.")
-    sub.add_parser("plan", help="Generate WBS, queue.jsonl, and TODO_MASTER.md from blueprint index.")
-    sub.add_parser("run-next", help="Pop next queue item and dispatch to Cursor agent.")
+    ingest_parser = sub.add_parser("ingest-blueprints", help="Convert + index the two big project plans.")
+    ingest_parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Re-run pandoc and re-summarise/re-embed every chunk, ignoring the ingest cache.",
+    )
+    migrate_parser = sub.add_parser(
+        "migrate-blueprint-index",
+        help="Convert a legacy blueprint_index.json into the memory-mapped split format.",
+    )
+    migrate_parser.add_argument(
+        "--remove-legacy",
+        action="store_true",
+        help="Delete blueprint_index.json after a successful migration.",
+    )
+    search_parser = sub.add_parser("search-blueprints", help="Search the blueprint index.")
+    search_parser.add_argument("query")
+    search_parser.add_argument("--top-k", type=int, default=10)
+    search_parser.add_argument(
+        "--mode",
+        choices=blueprints.SEARCH_MODES,
+        default="hybrid",
+        help="lexical needs no API call; hybrid fuses BM25 and embeddings (default).",
+    )
+    search_parser.add_argument(
+        "--compact",
+        default=blueprints.DEFAULT_COMPACT,
+        help="Shortlist on a compact matrix built at ingest (e.g. d256-i8), then re-rank in float32.",
+    )
+    plan_parser = sub.add_parser("plan", help="Generate WBS, queue.jsonl, and TODO_MASTER.md from blueprint index.")
+    plan_mode = plan_parser.add_mutually_exclusive_group()
+    plan_mode.add_argument(
+        "--map-reduce",
+        action="store_true",
+        help="Cluster the chunks, plan each cluster in parallel, then merge (for large blueprints).",
+    )
+    plan_mode.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Re-plan only chunks that changed since the last plan; keeps queue statuses and priorities.",
+    )
+    plan_parser.add_argument(
+        "--cluster-size",
+        type=int,
+        default=None,
+        help="Target chunks per cluster for --map-reduce (default: planning.cluster_size in ops/config.yaml).",
+    )
+    run_next_parser = sub.add_parser("run-next", help="Pop next queue item and dispatch to Cursor agent.")
+    run_next_parser.add_argument("--agent", default=None, help="Only take a task for this agent (e.g. AGENT-2).")
     sub.add_parser("status", help="Print high-level queue status.")
 
     index_parser = sub.add_parser("index-files", help="Build the file/directory map from the repo.")
@@ -565,6 +584,10 @@ def main() -> None:
         cmd_init(args)
     elif args.command == "ingest-blueprints":
         cmd_ingest_blueprints(args)
+    elif args.command == "migrate-blueprint-index":
+        cmd_migrate_blueprint_index(args)
+    elif args.command == "search-blueprints":
+        cmd_search_blueprints(args)
     elif args.command == "plan":
         cmd_plan(args)
     elif args.command == "run-next":
@@ -0,0 +1,172 @@
+# orchestrator/compact_index.py
+"""
+Compact copies of the blueprint embedding matrix for two-stage search.
+
+A representation is named by a spec string:
+
+    f16        float16, all dims
+    i8         int8 scalar quantisation, all dims (per-dimension scale)
+    d256       first 256 dims, re-normalised (Matryoshka truncation), float32
+    d512-f16   first 512 dims, re-normalised, float16
+    d256-i8    first 256 dims, re-normalised, int8
+
+text-embedding-3 models are trained so that a prefix of the vector is
+itself a usable embedding, which is what makes truncation work.
+
+Each spec is stored as blueprint_embeddings.<spec>.npy (plus a .scale.npy
+for int8) and memory-mapped like the full matrix. Two-stage search
+shortlists `shortlist` rows per query with the compact matrix, then
+re-ranks only those rows with the full float32 vectors, so the final
+scores are exact.
+"""
+
+from __future__ import annotations
+
+import os
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import numpy as np  # pip install numpy
+
+from .ann_index import top_k_indices, top_k_rows
+
+SPECS = ("f16", "i8", "d256", "d512", "d256-f16", "d512-f16", "d256-i8", "d512-i8")
+DEFAULT_SHORTLIST = int(os.getenv("ORCHESTRATOR_SEARCH_SHORTLIST", "100"))
+
+_SPEC = re.compile(r"^(?:d(?P<dims>\d+))?-?(?P<dtype>f16|f32|i8)?$")
+_BLOCK = 65536
+
+
+def _file(docs_root: Path, spec: str, suffix: str = "npy") -> Path:
+    return docs_root / f"blueprint_embeddings.{spec}.{suffix}"
+
+
+@dataclass
+class CompactMatrix:
+    spec: str
+    dims: Optional[int]        # None: all dims
+    data: np.ndarray           # (count, dims) float16 / float32 / int8
+    scale: Optional[np.ndarray] = None  # (dims,) float32 for int8
+
+    @staticmethod
+    def parse(spec: str) -> Tuple[Optional[int], str]:
+        m = _SPEC.match(spec)
+        if not m or spec in ("", "-"):
+            raise ValueError(f"Bad compact embedding spec {spec!r}; expected e.g. {', '.join(SPECS)}")
+        dims = int(m.group("dims")) if m.group("dims") else None
+        return dims, m.group("dtype") or "f32"
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.data.nbytes + (self.scale.nbytes if self.scale is not None else 0))
+
+    @classmethod
+    def build(cls, matrix: np.ndarray, spec: str) -> "CompactMatrix":
+        """Compress a (count, dim) matrix of unit rows."""
+        dims, dtype = cls.parse(spec)
+        dim = matrix.shape[1]
+        if dims is not None and dims >= dim:
+            dims = None
+        width = dims or dim
+
+        if dtype == "i8":
+            # Per-dimension symmetric scale from the (truncated, renormalised) rows.
+            peak = np.zeros(width, dtype="float32")
+            for start in range(0, matrix.shape[0], _BLOCK):
+                peak = np.maximum(peak, np.abs(cls._prefix(matrix[start : start + _BLOCK], dims)).max(axis=0))
+            peak[peak == 0] = 1.0
+            scale = (peak / 127.0).astype("float32")
+        else:
+            scale = None
+
+        out_dtype = {"f16": "float16", "f32": "float32", "i8": "int8"}[dtype]
+        data = np.empty((matrix.shape[0], width), dtype=out_dtype)
+        for start in range(0, matrix.shape[0], _BLOCK):
+            block = cls._prefix(matrix[start : start + _BLOCK], dims)
+            if scale is not None:
+                block = np.clip(np.rint(block / scale), -127, 127)
+            data[start : start + block.shape[0]] = block
+        return cls(spec=spec, dims=dims, data=data, scale=scale)
+
+    @staticmethod
+    def _prefix(block: np.ndarray, dims: Optional[int]) -> np.ndarray:
+        block = np.asarray(block, dtype="float32")
+        if dims is None:
+            return block
+        block = block[:, :dims]
+        norms = np.linalg.norm(block, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return block / norms
+
+    def queries(self, q_mat: np.ndarray) -> np.ndarray:
+        """Project unit queries into this representation's space (float32)."""
+        q = self._prefix(np.atleast_2d(q_mat), self.dims)
+        return q * self.scale if self.scale is not None else q
+
+    def scores(self, q_mat: np.ndarray) -> np.ndarray:
+        """(queries, rows) approximate cosine scores."""
+        q = self.queries(q_mat).T
+        out = np.empty((q.shape[1], self.data.shape[0]), dtype="float32")
+        for start in range(0, self.data.shape[0], _BLOCK):
+            block = np.asarray(self.data[start : start + _BLOCK], dtype="float32")
+            out[:, start : start + block.shape[0]] = (block @ q).T
+        return out
+
+    def save(self, docs_root: Path) -> Path:
+        path = _file(docs_root, self.spec)
+        tmp = path.with_suffix(".tmp.npy")
+        with tmp.open("wb") as f:
+            np.save(f, self.data)
+        if self.scale is not None:
+            np.save(_file(docs_root, self.spec, "scale.npy"), self.scale)
+        os.replace(tmp, path)
+        return path
+
+    @classmethod
+    def load(cls, docs_root: Path, spec: str) -> "CompactMatrix":
+        dims, dtype = cls.parse(spec)
+        data = np.load(_file(docs_root, spec), mmap_mode="r")
+        scale = np.load(_file(docs_root, spec, "scale.npy")) if dtype == "i8" else None
+        return cls(spec=spec, dims=dims, data=data, scale=scale)
+
+
+def build_for_index(docs_root: Path, matrix: np.ndarray, specs: List[str]) -> List[Path]:
+    """Write one compact matrix per spec and drop compact files for other specs."""
+    wanted = set(specs)
+    for path in docs_root.glob("blueprint_embeddings.*.npy"):
+        spec = path.name[len("blueprint_embeddings.") :].split(".")[0]
+        if spec not in wanted:
+            path.unlink()
+    return [CompactMatrix.build(matrix, spec).save(docs_root) for spec in specs]
+
+
+def load_for_index(docs_root: Path, matrix: np.ndarray, spec: str) -> Optional[CompactMatrix]:
+    """The compact matrix for `spec` if it exists and matches the full matrix."""
+    if not _file(docs_root, spec).exists():
+        return None
+    compact = CompactMatrix.load(docs_root, spec)
+    if compact.data.shape[0] != matrix.shape[0]:
+        print(f"[blueprints] Ignoring stale {_file(docs_root, spec).name}; using the full matrix.")
+        return None
+    return compact
+
+
+def rerank(matrix: np.ndarray, q_vec: np.ndarray, candidates: np.ndarray, top_k: int) -> np.ndarray:
+    """Exact float32 re-ranking of candidate rows for one unit query."""
+    cand = np.sort(candidates)
+    scores = np.asarray(matrix[cand], dtype="float32") @ q_vec
+    return cand[top_k_indices(scores, top_k)].astype("int64")
+
+
+def two_stage_search(
+    matrix: np.ndarray,
+    compact: CompactMatrix,
+    q_mat: np.ndarray,
+    top_k: int,
+    shortlist: int = DEFAULT_SHORTLIST,
+) -> List[np.ndarray]:
+    """Top-k row ids per query: compact shortlist, then full-precision re-rank."""
+    short = top_k_rows(compact.scores(q_mat), max(top_k, shortlist))
+    return [rerank(matrix, q, cand, top_k) for q, cand in zip(np.atleast_2d(q_mat), short)]
@@ -0,0 +1,261 @@
+# orchestrator/concurrency.py
+"""
+Bounded-concurrency helpers for batch LLM workloads.
+
+- RateLimiter: thread-safe token bucket with requests/min and tokens/min budgets.
+- Throughput: prints items/s and tokens/s progress lines.
+- map_bounded: run a function over items on a thread pool, results in input
+  order, each item retried on its own; failures are returned instead of
+  aborting the whole batch.
+- AsyncLimiter / agather: the asyncio counterparts, for coroutines such as
+  the providers' achat/acomplete; hundreds of calls in flight on one thread.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import random
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, Generic, List, Optional, Sequence, TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+class RateLimiter:
+    """
+    Token bucket over two budgets: requests per minute and tokens per minute.
+    A budget of None (or <= 0) is unlimited. `acquire` blocks until both
+    buckets can cover the call.
+    """
+
+    def __init__(self, requests_per_minute: Optional[float] = None, tokens_per_minute: Optional[float] = None):
+        self.rpm = requests_per_minute if requests_per_minute and requests_per_minute > 0 else None
+        self.tpm = tokens_per_minute if tokens_per_minute and tokens_per_minute > 0 else None
+        self._lock = threading.Lock()
+        self._req = float(self.rpm or 0)
+        self._tok = float(self.tpm or 0)
+        self._last = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._last
+        self._last = now
+        if self.rpm:
+            self._req = min(self.rpm, self._req + elapsed * self.rpm / 60.0)
+        if self.tpm:
+            self._tok = min(self.tpm, self._tok + elapsed * self.tpm / 60.0)
+
+    def acquire(self, tokens: int = 0) -> float:
+        """Block until a request costing `tokens` fits; returns seconds waited."""
+        waited = 0.0
+        if self.tpm:
+            tokens = min(tokens, int(self.tpm))  # an oversize call waits for a full bucket, not forever
+        while True:
+            with self._lock:
+                self._refill(time.monotonic())
+                wait = 0.0
+                if self.rpm and self._req < 1:
+                    wait = max(wait, (1 - self._req) * 60.0 / self.rpm)
+                if self.tpm and self._tok < tokens:
+                    wait = max(wait, (tokens - self._tok) * 60.0 / self.tpm)
+                if wait == 0.0:
+                    if self.rpm:
+                        self._req -= 1
+                    if self.tpm:
+                        self._tok -= tokens
+                    return waited
+            time.sleep(wait)
+            waited += wait
+
+
+class Throughput:
+    """Thread-safe progress counter that reports items/s and tokens/s."""
+
+    def __init__(self, label: str, total: int, every: int = 10):
+        self.label = label
+        self.total = total
+        self.every = max(1, every)
+        self.done = 0
+        self.failed = 0
+        self.tokens = 0
+        self._start = time.monotonic()
+        self._lock = threading.Lock()
+
+    def add(self, tokens: int = 0, failed: bool = False) -> None:
+        with self._lock:
+            self.done += 1
+            self.failed += int(failed)
+            self.tokens += tokens
+            if self.done % self.every == 0 or self.done == self.total:
+                print(self.line())
+
+    def line(self) -> str:
+        elapsed = max(time.monotonic() - self._start, 1e-9)
+        return (
+            f"{self.label} {self.done}/{self.total} "
+            f"({self.done / elapsed:.2f} items/s, {self.tokens / elapsed:.0f} tokens/s, "
+            f"{self.failed} failed, {elapsed:.1f}s elapsed)"
+        )
+
+
+@dataclass
+class BatchResult(Generic[R]):
+    results: List[Optional[R]]
+    errors: Dict[int, BaseException] = field(default_factory=dict)
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors
+
+
+def map_bounded(
+    fn: Callable[[T], R],
+    items: Sequence[T],
+    workers: int = 8,
+    limiter: Optional[RateLimiter] = None,
+    cost: Optional[Callable[[T], int]] = None,
+    result_tokens: Optional[Callable[[R], int]] = None,
+    max_retries: int = 3,
+    backoff_seconds: float = 2.0,
+    progress: Optional[Throughput] = None,
+    on_result: Optional[Callable[[int, R], None]] = None,
+    retry_if: Optional[Callable[[BaseException], bool]] = None,
+) -> BatchResult[R]:
+    """
+    Apply `fn` to every item with at most `workers` calls in flight.
+
+    `cost(item)` is the token estimate charged to `limiter` per attempt;
+    `result_tokens(result)` adds output tokens to the progress counter.
+    `on_result(i, result)` runs on the worker thread as soon as item i
+    succeeds (e.g. to persist it). `retry_if(exc)` returning False makes an
+    error final straight away. results[i] is None for failed items, whose
+    last exception is in errors[i].
+    """
+    results: List[Optional[R]] = [None] * len(items)
+    errors: Dict[int, BaseException] = {}
+
+    def run_one(i: int) -> R:
+        item = items[i]
+        tokens = cost(item) if cost else 0
+        attempt = 0
+        while True:
+            attempt += 1
+            if limiter is not None:
+                limiter.acquire(tokens)
+            try:
+                out = fn(item)
+            except Exception as e:
+                if attempt > max_retries or (retry_if is not None and not retry_if(e)):
+                    raise
+                # Jittered exponential backoff, per item, without blocking other workers.
+                time.sleep(backoff_seconds * (2 ** (attempt - 1)) * (0.5 + random.random()))
+                continue
+            if on_result is not None:
+                on_result(i, out)
+            return out
+
+    if not items:
+        return BatchResult(results=results, errors=errors)
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        futures = {pool.submit(run_one, i): i for i in range(len(items))}
+        for fut in as_completed(futures):
+            i = futures[fut]
+            try:
+                results[i] = fut.result()
+            except Exception as e:
+                errors[i] = e
+                if progress is not None:
+                    progress.add(failed=True)
+                continue
+            if progress is not None:
+                spent = cost(items[i]) if cost else 0
+                if result_tokens is not None:
+                    spent += result_tokens(results[i])
+                progress.add(tokens=spent)
+
+    return BatchResult(results=results, errors=errors)
+
+
+class AsyncLimiter:
+    """
+    Semaphore capping how many coroutines are inside `async with limiter:` at
+    once. One limiter can be shared by several event loops (each gets its
+    own semaphore); `peak` records the highest concurrency seen.
+    """
+
+    def __init__(self, limit: int = 8):
+        self.limit = max(1, limit)
+        self.in_flight = 0
+        self.peak = 0
+        self._sems: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+
+    def _sem(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        sem = self._sems.get(loop)
+        if sem is None:
+            sem = self._sems[loop] = asyncio.Semaphore(self.limit)
+        return sem
+
+    async def __aenter__(self) -> "AsyncLimiter":
+        await self._sem().acquire()
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        self.in_flight -= 1
+        self._sem().release()
+
+
+async def agather(
+    fn: Callable[[T], Awaitable[R]],
+    items: Sequence[T],
+    limit: int = 8,
+    limiter: Optional[AsyncLimiter] = None,
+    max_retries: int = 0,
+    backoff_seconds: float = 2.0,
+    retry_if: Optional[Callable[[BaseException], bool]] = None,
+    progress: Optional[Throughput] = None,
+    on_result: Optional[Callable[[int, R], None]] = None,
+) -> BatchResult[R]:
+    """
+    Await `fn(item)` for every item with at most `limit` in flight (or as
+    many as the shared `limiter` allows), results in input order.
+
+    One item failing does not cancel the others: results[i] is None and
+    errors[i] holds its last exception. Retries and `retry_if` behave as in
+    map_bounded; a backing-off item gives its slot back while it sleeps.
+    """
+    limiter = limiter or AsyncLimiter(limit)
+    results: List[Optional[R]] = [None] * len(items)
+    errors: Dict[int, BaseException] = {}
+
+    async def run_one(i: int) -> None:
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                async with limiter:
+                    out = await fn(items[i])
+            except Exception as e:
+                if attempt > max_retries or (retry_if is not None and not retry_if(e)):
+                    errors[i] = e
+                    if progress is not None:
+                        progress.add(failed=True)
+                    return
+                await asyncio.sleep(backoff_seconds * (2 ** (attempt - 1)) * (0.5 + random.random()))
+                continue
+            results[i] = out
+            if on_result is not None:
+                on_result(i, out)
+            if progress is not None:
+                progress.add()
+            return
+
+    await asyncio.gather(*(run_one(i) for i in range(len(items))))
+    return BatchResult(results=results, errors=errors)
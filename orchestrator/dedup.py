@@ -0,0 +1,118 @@
+# orchestrator/dedup.py
+"""
+Near-duplicate detection for blueprint chunks (MinHash + LSH).
+
+Each text is reduced to a set of word 5-shingles and a 128-value MinHash
+signature. Signatures are cut into bands; a text that agrees with an
+earlier group representative on a whole band is a candidate duplicate of
+it, confirmed only when the exact shingle Jaccard similarity reaches the
+threshold. LSH keeps this near-linear: texts are only ever compared with
+the few representatives they collide with.
+
+The representative of a group is its earliest member, which keeps the
+result stable across runs as long as chunk order is.
+"""
+
+from __future__ import annotations
+
+import re
+import zlib
+from collections import defaultdict
+from typing import Dict, Iterable, List
+
+import numpy as np  # pip install numpy
+
+NUM_PERM = 128
+BANDS = 32  # 32 bands x 4 rows: a pair at Jaccard 0.7 collides with p ~ 1.0
+SHINGLE = 5
+DEFAULT_THRESHOLD = 0.85
+
+_MERSENNE = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+_WORD = re.compile(r"\w+")
+
+
+def _permutations(seed: int = 1) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    a = rng.integers(1, 1 << 31, NUM_PERM, dtype=np.uint64)
+    b = rng.integers(0, 1 << 31, NUM_PERM, dtype=np.uint64)
+    return np.stack([a, b])
+
+
+_PERMS = _permutations()
+
+
+def shingles(text: str, k: int = SHINGLE) -> np.ndarray:
+    """32-bit hashes of the word k-shingles of `text` (case-folded)."""
+    words = _WORD.findall(text.lower())
+    if len(words) < k:
+        grams = {" ".join(words)} if words else set()
+    else:
+        grams = {" ".join(words[i : i + k]) for i in range(len(words) - k + 1)}
+    return np.fromiter((zlib.crc32(g.encode("utf-8")) for g in grams), dtype=np.uint64, count=len(grams))
+
+
+def signature(text: str) -> np.ndarray:
+    """MinHash signature (NUM_PERM uint32 values) of `text`."""
+    return signature_of(shingles(text))
+
+
+def signature_of(hashes: np.ndarray) -> np.ndarray:
+    if hashes.size == 0:
+        return np.full(NUM_PERM, np.uint32(0xFFFFFFFF), dtype=np.uint32)
+    a, b = _PERMS
+    # (a*x + b) mod p: a < 2**31 and 32-bit x keep every term inside uint64.
+    values = (np.outer(hashes, a) + b) % _MERSENNE
+    return (values.min(axis=0) & _MAX_HASH).astype(np.uint32)
+
+
+def jaccard(a: np.ndarray, b: np.ndarray) -> float:
+    if a.size == 0 and b.size == 0:
+        return 1.0
+    inter = np.intersect1d(a, b, assume_unique=True).size
+    return inter / (a.size + b.size - inter)
+
+
+def near_duplicate_groups(texts: Iterable[str], threshold: float = DEFAULT_THRESHOLD) -> Dict[int, int]:
+    """
+    Map each duplicate's index to its representative's index. Texts that
+    are not near-duplicates of an earlier text do not appear in the map.
+
+    Texts are visited in order. A text joins the most similar earlier
+    representative it shares an LSH band with, provided their exact
+    shingle Jaccard reaches `threshold`; otherwise it becomes a
+    representative itself. Every member is therefore checked against its
+    representative directly, and groups cannot drift through chains of
+    pairwise matches.
+    """
+    rows = NUM_PERM // BANDS
+    buckets: List[Dict[bytes, List[int]]] = [defaultdict(list) for _ in range(BANDS)]
+    sets: List[np.ndarray] = []
+    out: Dict[int, int] = {}
+
+    for i, text in enumerate(texts):
+        sh = np.unique(shingles(text))
+        sets.append(sh)
+        sig = signature_of(sh)
+        keys = [sig[band * rows : (band + 1) * rows].tobytes() for band in range(BANDS)]
+
+        candidates = {rep for band, key in enumerate(keys) for rep in buckets[band].get(key, ())}
+        best, best_sim = None, threshold
+        for rep in sorted(candidates):
+            sim = jaccard(sh, sets[rep])
+            if sim >= best_sim and (best is None or sim > best_sim):
+                best, best_sim = rep, sim
+        if best is not None:
+            out[i] = best
+            continue
+        for band, key in enumerate(keys):
+            buckets[band][key].append(i)
+    return out
+
+
+def group_sizes(rep_of: Dict[int, int]) -> Dict[int, int]:
+    """Representative index -> number of duplicates folded into it."""
+    sizes: Dict[int, int] = defaultdict(int)
+    for rep in rep_of.values():
+        sizes[rep] += 1
+    return dict(sizes)
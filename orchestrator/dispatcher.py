@@ -0,0 +1,330 @@
+# orchestrator/dispatcher.py
+"""
+Concurrent autopilot: up to N cursor-agent runs at once, at most one per agent.
+
+The serial autopilot runs one `run-next` at a time and waits for its
+cursor-agent process, so three of the four agents idle even when they have
+independent unblocked work. Dispatcher instead:
+
+- keeps a Scheduler over the queue (critical path first) and claims tasks
+  through QueueStore.claim, so other run-next callers stay safe;
+- starts an agent only when it has no run of ours in flight and no fresh
+  ops/locks/<agent>.lock, in the main checkout or in any task worktree
+  (stale locks are swept with the usual TTL);
+- polls its child processes; a finished run releases the agent's lock (if
+  the lock names that task) and queues review + apply for that task alone
+  on a small thread pool, while the other agents keep working;
+- marks a task complete in the scheduler once apply has set it done,
+  which is what unlocks its dependents.
+
+A task whose agent fails to start goes back to todo and the others carry
+on; after START_ATTEMPTS failures it is left alone for the rest of the run.
+If the loop itself dies (an error, Ctrl-C), the agents still running are
+terminated and their tasks returned to todo.
+
+With a WorkspaceManager each task runs in its own git worktree; after
+review its work is squashed into one commit and handed to the serial
+MergeQueue (rebase, CI, fast-forward) before apply records the result.
+A branch that does not merge leaves its task in_progress.
+
+At the end it prints wall-clock time per WBS phase next to the summed
+agent time, i.e. the parallelism actually achieved.
+"""
+
+from __future__ import annotations
+
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from . import locks
+from .planning import AGENTS
+from .queue_store import QueueStore
+from .scheduler import Scheduler
+from .workspaces import MergeQueue, Workspace, WorkspaceManager
+
+LOCK_TTL_MINUTES = int(os.getenv("ORCHESTRATOR_LOCK_TTL_MINUTES", "60"))
+POLL_SECONDS = float(os.getenv("ORCHESTRATOR_AUTOPILOT_POLL_SECONDS", "5"))
+START_ATTEMPTS = int(os.getenv("ORCHESTRATOR_AUTOPILOT_START_ATTEMPTS", "2"))
+STOP_GRACE_SECONDS = 10.0
+
+
+@dataclass
+class AgentRun:
+    task_id: str
+    agent: str
+    phase: str
+    proc: Any  # subprocess.Popen-like: poll() -> Optional[int]
+    started: float = field(default_factory=time.time)
+    finished: Optional[float] = None
+
+
+@dataclass
+class PhaseClock:
+    first_start: float
+    last_end: float = 0.0
+    agent_seconds: float = 0.0
+    tasks: int = 0
+
+
+class Dispatcher:
+    def __init__(
+        self,
+        repo_root: Path,
+        max_agents: int = len(AGENTS),
+        poll_seconds: float = POLL_SECONDS,
+        start: Optional[Callable[[Dict[str, Any]], Any]] = None,
+        post: Optional[Callable[[str], None]] = None,
+        agents: Sequence[str] = AGENTS,
+        workspaces: Optional[WorkspaceManager] = None,
+    ):
+        self.repo_root = repo_root
+        self.max_agents = max(1, min(max_agents, len(agents)))
+        self.poll_seconds = poll_seconds
+        self.agents = list(agents)
+        self.locks_dir = repo_root / "ops" / "locks"
+        self._start = start or self._start_cursor
+        self._post = post or self._review_and_apply
+        self.running: Dict[str, AgentRun] = {}
+        self.phases: Dict[str, PhaseClock] = {}
+        self._cli_state: Optional[tuple] = None
+        self.workspaces = workspaces
+        self.merge_queue = MergeQueue(workspaces) if workspaces else None
+        self._worktrees: Dict[str, Workspace] = {}
+        self._start_failures: Dict[str, int] = {}
+
+    # ---------- default start / post steps ----------
+
+    def _start_cursor(self, item: Dict[str, Any]) -> Any:
+        from . import cli
+
+        if self._cli_state is None:
+            cfg = cli.load_config(self.repo_root)
+            self._cli_state = (cfg, cli.make_llm(cfg))
+        cfg, llm = self._cli_state
+        cwd = self.repo_root
+        if self.workspaces is not None:
+            ws = self.workspaces.create(item["task_id"], title=item.get("title") or "")
+            self._worktrees[item["task_id"]] = ws
+            cwd = ws.path
+        _, cmd = cli.prepare_agent_run(cfg, llm, item, workdir=cwd)
+        log_dir = self.repo_root / "logs"
+        log_dir.mkdir(parents=True, exist_ok=True)
+        log = (log_dir / f"agent-{item['task_id']}-{time.strftime('%Y%m%d-%H%M%S')}.log").open("w", encoding="utf-8")
+        try:
+            return subprocess.Popen(cmd, cwd=str(cwd), stdout=log, stderr=subprocess.STDOUT, text=True)
+        except FileNotFoundError:
+            print(cli.CURSOR_NOT_FOUND)
+            raise
+        finally:
+            log.close()  # the child keeps its own handle
+
+    def _run_module(self, task_id: str, module: str, *args: str, cwd: Optional[Path] = None) -> bool:
+        proc = subprocess.run(
+            [sys.executable, "-m", module, "--wbs", task_id, *args],
+            cwd=str(cwd or self.repo_root),
+            text=True,
+            capture_output=True,
+        )
+        out = ((proc.stdout or "") + (proc.stderr or "")).strip()
+        if out:
+            print("\n".join(f"[autopilot:{task_id}] {line}" for line in out.splitlines()))
+        if proc.returncode != 0:
+            print(f"[autopilot:{task_id}] WARN: {module} exited with {proc.returncode}.")
+        return proc.returncode == 0
+
+    def _review_and_apply(self, task_id: str) -> None:
+        ws = self._worktrees.pop(task_id, None)
+        if ws is None:
+            if self._run_module(task_id, "orchestrator.review_latest"):
+                self._run_module(task_id, "orchestrator.apply_latest_review")
+            return
+        # The run report lives in the worktree, so review there; the review is committed with the task.
+        if not self._run_module(task_id, "orchestrator.review_latest", cwd=ws.path):
+            self.workspaces.commit(ws)  # keep the agent's work on its branch
+            self.workspaces.remove(ws, delete_branch=False)
+            return
+        if self.workspaces.commit(ws) is None:
+            print(f"[autopilot:{task_id}] No changes in its worktree; nothing to merge.")
+            self.workspaces.remove(ws)
+            return
+        result = self.merge_queue.merge(ws)
+        if not result.ok:
+            print(f"[autopilot:{task_id}] Merge {result.status}; keeping branch {ws.branch}.\n{result.detail}")
+            self.workspaces.remove(ws, delete_branch=False)
+            return
+        print(f"[autopilot:{task_id}] Merged {ws.branch} into {self.workspaces.base} ({result.detail[:10]}).")
+        self.workspaces.remove(ws)
+        self._run_module(task_id, "orchestrator.apply_latest_review", "--skip-ci")
+
+    # ---------- agent availability ----------
+
+    def _lock_dirs(self) -> List[Path]:
+        # An agent in a worktree takes the lock relative to its own checkout.
+        return [self.locks_dir] + [ws.path / "ops" / "locks" for ws in list(self._worktrees.values())]
+
+    def _release_lock(self, agent: str, task_id: str) -> None:
+        for locks_dir in self._lock_dirs():
+            if locks.holder(agent, locks_dir) == task_id:
+                (locks_dir / f"{agent}.lock").unlink(missing_ok=True)
+
+    def _locked(self, agent: str) -> bool:
+        return any(locks.holder(agent, d) is not None for d in self._lock_dirs())
+
+    def _free_agents(self) -> List[str]:
+        for locks_dir in self._lock_dirs():
+            locks.sweep(LOCK_TTL_MINUTES, locks_dir)
+        return [a for a in self.agents if a not in self.running and not self._locked(a)]
+
+    # ---------- main loop ----------
+
+    def _scheduler(self, store: QueueStore) -> Scheduler:
+        sched = Scheduler(store.all())
+        for task_id, failures in self._start_failures.items():
+            if failures >= START_ATTEMPTS:
+                sched.start(task_id)  # keep it out of this run
+        return sched
+
+    def _start_failed(self, store: QueueStore, sched: Scheduler, agent: str, task_id: str, exc: Exception) -> None:
+        failures = self._start_failures[task_id] = self._start_failures.get(task_id, 0) + 1
+        retry = failures < START_ATTEMPTS
+        print(
+            f"[autopilot] WARN: could not start {agent} on {task_id}: {exc!r}; returning it to todo"
+            + ("." if retry else f" and skipping it for the rest of this run ({failures} failed starts).")
+        )
+        ws = self._worktrees.pop(task_id, None)
+        if ws is not None:
+            self.workspaces.remove(ws)
+        store.set_status(task_id, "todo")
+        store.export_jsonl()
+        if retry:
+            sched.release(task_id)
+
+    def _dispatch(self, store: QueueStore, sched: Scheduler) -> int:
+        from .cli import claim_next_task
+
+        started = 0
+        # Agents whose best ready task is most critical go first.
+        order = sorted(
+            (a for a in self._free_agents() if sched.peek(a) is not None),
+            key=lambda a: sched.sort_key(sched.peek(a)),
+        )
+        for agent in order:
+            if len(self.running) >= self.max_agents:
+                break
+            item = claim_next_task(store, agent, sched)
+            if item is None:
+                continue
+            try:
+                proc = self._start(item)
+            except Exception as e:
+                self._start_failed(store, sched, agent, item["task_id"], e)
+                continue
+            run = AgentRun(task_id=item["task_id"], agent=agent, phase=item.get("phase") or "Unspecified", proc=proc)
+            self.running[agent] = run
+            clock = self.phases.setdefault(run.phase, PhaseClock(first_start=run.started))
+            clock.first_start = min(clock.first_start, run.started)
+            print(f"[autopilot] {agent} started {run.task_id} ({len(self.running)}/{self.max_agents} running).")
+            started += 1
+        return started
+
+    def _reap(self, pool: ThreadPoolExecutor, pending: Dict[Future, AgentRun]) -> None:
+        for agent, run in list(self.running.items()):
+            code = run.proc.poll()
+            if code is None:
+                continue
+            run.finished = time.time()
+            del self.running[agent]
+            self._release_lock(agent, run.task_id)
+            print(
+                f"[autopilot] {agent} finished {run.task_id} (exit {code}, "
+                f"{run.finished - run.started:.0f}s); reviewing it."
+            )
+            pending[pool.submit(self._post, run.task_id)] = run
+
+    def _settle(self, store: QueueStore, sched: Scheduler, pending: Dict[Future, AgentRun]) -> None:
+        for fut in [f for f in pending if f.done()]:
+            run = pending.pop(fut)
+            if fut.exception() is not None:
+                print(f"[autopilot] WARN: review/apply for {run.task_id} raised {fut.exception()!r}.")
+            item = store.get(run.task_id) or {}
+            status = item.get("status")
+            clock = self.phases[run.phase]
+            clock.last_end = max(clock.last_end, time.time())
+            clock.agent_seconds += (run.finished or time.time()) - run.started
+            clock.tasks += 1
+            if status == "done":
+                unlocked = sched.complete(run.task_id)
+                if unlocked:
+                    print(f"[autopilot] {run.task_id} done; unlocked {', '.join(unlocked)}.")
+            elif status == "todo":
+                sched.release(run.task_id)
+            else:
+                print(f"[autopilot] {run.task_id} left {status}; not re-dispatching it.")
+
+    def _stop_children(self, store: QueueStore) -> None:
+        """Terminate and reap agents still running when the loop dies; their tasks go back to todo."""
+        for agent, run in list(self.running.items()):
+            del self.running[agent]
+            print(f"[autopilot] Stopping {agent} ({run.task_id}); returning it to todo.")
+            try:
+                run.proc.terminate()
+                try:
+                    run.proc.wait(timeout=STOP_GRACE_SECONDS)
+                except subprocess.TimeoutExpired:
+                    run.proc.kill()
+                    run.proc.wait()
+            except Exception as e:
+                print(f"[autopilot] WARN: could not stop {agent}: {e!r}.")
+            self._release_lock(agent, run.task_id)
+            store.set_status(run.task_id, "todo")
+
+    def run(self, max_seconds: Optional[float] = None) -> Dict[str, PhaseClock]:
+        t0 = time.time()
+        store = QueueStore.for_repo(self.repo_root)
+        sched = self._scheduler(store)
+        pending: Dict[Future, AgentRun] = {}
+        print(f"[autopilot] Parallel mode: up to {self.max_agents} agents.")
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_agents, thread_name_prefix="review") as pool:
+                while True:
+                    self._reap(pool, pending)
+                    self._settle(store, sched, pending)
+                    started = self._dispatch(store, sched)
+                    if not self.running and not pending and not started:
+                        # Idle: pick up edits made by other processes before giving up.
+                        sched = self._scheduler(store)
+                        if not self._dispatch(store, sched) and not any(sched.peek(a) for a in self.agents):
+                            break
+                    if max_seconds is not None and time.time() - t0 > max_seconds:
+                        print("[autopilot] Time budget reached; waiting for running agents.")
+                        while self.running or pending:
+                            self._reap(pool, pending)
+                            self._settle(store, sched, pending)
+                            time.sleep(self.poll_seconds)
+                        break
+                    time.sleep(self.poll_seconds)
+        finally:
+            self._stop_children(store)
+            store.export_jsonl()
+            store.close()
+        self.report()
+        return self.phases
+
+    def report(self) -> None:
+        if not self.phases:
+            print("[autopilot] Nothing was dispatched.")
+            return
+        print("[autopilot] Wall-clock per phase:")
+        for phase, c in sorted(self.phases.items(), key=lambda kv: kv[1].first_start):
+            wall = max(0.0, (c.last_end or time.time()) - c.first_start)
+            ratio = c.agent_seconds / wall if wall else 0.0
+            print(
+                f"  - {phase}: {c.tasks} tasks, wall {wall / 60:.1f} min, "
+                f"agent time {c.agent_seconds / 60:.1f} min ({ratio:.1f}x parallel)"
+            )
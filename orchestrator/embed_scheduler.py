@@ -0,0 +1,152 @@
+# orchestrator/embed_scheduler.py
+"""
+Token-aware embedding scheduler.
+
+Texts are packed greedily (in input order) into requests by estimated token
+count, up to the per-request token and input ceilings, and several requests
+are kept in flight at once. If the API still rejects a request as too large
+(the estimate is only an estimate), that batch is split in half and each
+half retried, recursively, down to a single input.
+
+Any caller of LLMClient.embed can use it through LLMClient.embed_many or by
+wrapping its own embed function in EmbeddingScheduler.
+"""
+
+from __future__ import annotations
+
+import os
+from typing import Callable, List, Optional, Sequence
+
+from .concurrency import RateLimiter, Throughput, map_bounded
+from .resilience import retry_outside
+from .tokens import estimate_tokens
+
+# OpenAI embeddings limits: 2048 inputs and 300k tokens per request,
+# 8191 tokens per input. The token ceiling keeps a margin for estimate error.
+MAX_INPUTS_PER_REQUEST = 2048
+MAX_TOKENS_PER_REQUEST = int(os.getenv("ORCHESTRATOR_EMBED_MAX_TOKENS_PER_REQUEST", "250000"))
+MAX_TOKENS_PER_INPUT = 8191
+
+EmbedFn = Callable[[List[str]], List[List[float]]]
+
+
+class OversizeInputError(ValueError):
+    """A single input is larger than the embedding model accepts."""
+
+
+def is_oversize_error(exc: BaseException) -> bool:
+    """Heuristic match for 'request too large' errors from the embeddings API."""
+    if isinstance(exc, OversizeInputError):
+        return True
+    msg = str(exc).lower()
+    return any(
+        hint in msg
+        for hint in (
+            "maximum context length",
+            "too many tokens",
+            "max_tokens_per_request",
+            "maximum request size",
+            "too many inputs",
+            "request too large",
+        )
+    )
+
+
+def pack_batches(
+    token_counts: Sequence[int],
+    max_tokens: int = MAX_TOKENS_PER_REQUEST,
+    max_inputs: int = MAX_INPUTS_PER_REQUEST,
+) -> List[List[int]]:
+    """Greedy, order-preserving packing of input indices into request batches."""
+    batches: List[List[int]] = []
+    current: List[int] = []
+    used = 0
+    for i, n in enumerate(token_counts):
+        if current and (used + n > max_tokens or len(current) >= max_inputs):
+            batches.append(current)
+            current, used = [], 0
+        current.append(i)
+        used += n
+    if current:
+        batches.append(current)
+    return batches
+
+
+class EmbeddingScheduler:
+    def __init__(
+        self,
+        embed_fn: EmbedFn,
+        model: Optional[str] = None,
+        max_tokens_per_request: int = MAX_TOKENS_PER_REQUEST,
+        max_inputs_per_request: int = MAX_INPUTS_PER_REQUEST,
+        in_flight: int = 4,
+        limiter: Optional[RateLimiter] = None,
+        max_retries: int = 3,
+    ):
+        self.embed_fn = embed_fn
+        self.model = model
+        self.max_tokens = max_tokens_per_request
+        self.max_inputs = max_inputs_per_request
+        self.in_flight = in_flight
+        self.limiter = limiter
+        self.max_retries = max_retries
+
+    def _call(self, texts: List[str], tokens: int) -> List[List[float]]:
+        if self.limiter is not None:
+            self.limiter.acquire(tokens)
+        return self.embed_fn(texts)
+
+    def _embed_split(self, texts: List[str], counts: List[int]) -> List[List[float]]:
+        try:
+            return self._call(texts, sum(counts))
+        except Exception as e:
+            if not is_oversize_error(e):
+                raise
+            if len(texts) == 1:
+                raise OversizeInputError(f"Single input of ~{counts[0]} tokens rejected: {e}") from e
+            mid = len(texts) // 2
+            return self._embed_split(texts[:mid], counts[:mid]) + self._embed_split(texts[mid:], counts[mid:])
+
+    def embed(
+        self,
+        texts: Sequence[str],
+        on_batch: Optional[Callable[[List[int], List[List[float]]], None]] = None,
+        label: str = "[embed]  - Embedded batch",
+    ) -> List[List[float]]:
+        """
+        Embed `texts`, returning vectors in input order. `on_batch(indices,
+        vectors)` is called as each request completes (e.g. to cache it).
+        Raises the first failure once every other batch has finished.
+        """
+        counts = [estimate_tokens(t, self.model) for t in texts]
+        batches = pack_batches(counts, self.max_tokens, self.max_inputs)
+
+        def run(batch: List[int]) -> List[List[float]]:
+            return self._embed_split([texts[i] for i in batch], [counts[i] for i in batch])
+
+        def done(b: int, vectors: List[List[float]]) -> None:
+            if on_batch is not None:
+                on_batch(batches[b], vectors)
+
+        outcome = map_bounded(
+            run,
+            batches,
+            workers=self.in_flight,
+            cost=lambda batch: sum(counts[i] for i in batch),
+            max_retries=self.max_retries,
+            progress=Throughput(label, len(batches), every=1),
+            on_result=done,
+            retry_if=lambda e: not isinstance(e, OversizeInputError) and retry_outside(e),
+        )
+        if outcome.errors:
+            b, err = min(outcome.errors.items())
+            raise RuntimeError(
+                f"Embedding failed for {len(outcome.errors)} of {len(batches)} batches "
+                f"(first: inputs {batches[b][0]}..{batches[b][-1]})"
+            ) from err
+
+        out: List[List[float]] = [None] * len(texts)  # type: ignore[list-item]
+        for batch, vectors in zip(batches, outcome.results):
+            for i, v in zip(batch, vectors or []):
+                out[i] = v
+        return out
@@ -0,0 +1,157 @@
+# orchestrator/ingest_cache.py
+"""
+Content-addressed cache for blueprint ingest.
+
+Summaries and embeddings are keyed by sha256(kind, model, prompt version,
+chunk text), so re-ingesting an edited plan only pays for chunks whose text
+actually changed. Source documents are tracked by hash as well, which lets
+the pandoc conversion be skipped when neither the source nor its converted
+markdown changed.
+
+Everything lives in one SQLite file (docs/blueprints/ingest_cache.sqlite).
+Each write is committed immediately, so work paid for before a crash is kept.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np  # pip install numpy
+
+CACHE_FILE = "ingest_cache.sqlite"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS summaries (
+    key TEXT PRIMARY KEY,
+    summary TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS embeddings (
+    key TEXT PRIMARY KEY,
+    dim INTEGER NOT NULL,
+    vector BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS sources (
+    markdown_name TEXT PRIMARY KEY,
+    source_sha256 TEXT NOT NULL,
+    markdown_sha256 TEXT NOT NULL
+);
+"""
+
+
+def sha256_text(*parts: str) -> str:
+    h = hashlib.sha256()
+    for part in parts:
+        data = part.encode("utf-8")
+        # Length-prefix each part so ("ab", "c") and ("a", "bc") never collide.
+        h.update(len(data).to_bytes(8, "big"))
+        h.update(data)
+    return h.hexdigest()
+
+
+def sha256_file(path: Path) -> str:
+    h = hashlib.sha256()
+    with path.open("rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def summary_key(text: str, model: str, prompt_version: str) -> str:
+    return sha256_text("summary", model, prompt_version, text)
+
+
+def embedding_key(text: str, model: str) -> str:
+    return sha256_text("embedding", model, text)
+
+
+class IngestCache:
+    def __init__(self, path: Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+
+    @classmethod
+    def for_docs_root(cls, docs_root: Path) -> "IngestCache":
+        return cls(docs_root / CACHE_FILE)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self) -> "IngestCache":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    # ---------- summaries ----------
+
+    def get_summary(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT summary FROM summaries WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def put_summary(self, key: str, summary: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO summaries (key, summary) VALUES (?, ?)", (key, summary)
+            )
+            self._conn.commit()
+
+    # ---------- embeddings ----------
+
+    def get_embeddings(self, keys: Iterable[str]) -> Dict[str, np.ndarray]:
+        keys = list(keys)
+        out: Dict[str, np.ndarray] = {}
+        with self._lock:
+            # Stay well under SQLite's bound-parameter limit.
+            for i in range(0, len(keys), 500):
+                batch = keys[i : i + 500]
+                marks = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({marks})", batch
+                ).fetchall()
+                for key, blob in rows:
+                    out[key] = np.frombuffer(blob, dtype="float32")
+        return out
+
+    def put_embeddings(self, items: Dict[str, List[float]]) -> None:
+        rows = []
+        for key, vec in items.items():
+            arr = np.asarray(vec, dtype="float32")
+            rows.append((key, int(arr.shape[0]), arr.tobytes()))
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, dim, vector) VALUES (?, ?, ?)", rows
+            )
+            self._conn.commit()
+
+    # ---------- source documents ----------
+
+    def source_unchanged(self, src: Path, dest: Path) -> bool:
+        """True when `src` and its converted markdown `dest` match the recorded hashes."""
+        if not dest.exists():
+            return False
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT source_sha256, markdown_sha256 FROM sources WHERE markdown_name = ?", (dest.name,)
+            ).fetchone()
+        if not row:
+            return False
+        return row[0] == sha256_file(src) and row[1] == sha256_file(dest)
+
+    def record_source(self, src: Path, dest: Path) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sources (markdown_name, source_sha256, markdown_sha256) "
+                "VALUES (?, ?, ?)",
+                (dest.name, sha256_file(src), sha256_file(dest)),
+            )
+            self._conn.commit()
@@ -0,0 +1,212 @@
+# orchestrator/ingest_checkpoint.py
+"""
+Append-only checkpoint for an in-progress blueprint ingest.
+
+Two files under docs/blueprints/:
+
+- ingest_checkpoint.jsonl  journal, one JSON object per line:
+    {"t": "h", "dim": 3072, "model": ...}          header (before the first vector)
+    {"t": "s", "id": ..., "key": ..., "summary": ...}   summary committed
+    {"t": "v", "id": ..., "key": ..., "row": 17}        embedding committed
+- ingest_checkpoint.f32    raw float32 rows, appended in row order
+
+A vector's bytes are flushed before its journal line, so every journal line
+points at data that is on disk. On restart a torn trailing line or partial
+row is discarded and everything before it is reused. Entries are keyed by
+the chunk's content key, not its position, so a resumed run can re-chunk.
+
+Embeddings from a different model (recorded in the header) or of a
+different width are stale: they are dropped, with a message, when the
+checkpoint is opened or when the first vector of the new width arrives.
+Summaries are keyed by their own model and prompt, so they are kept.
+
+The files are removed once the final index has been written.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence
+
+import numpy as np  # pip install numpy
+
+JOURNAL_FILE = "ingest_checkpoint.jsonl"
+VECTORS_FILE = "ingest_checkpoint.f32"
+
+
+class IngestCheckpoint:
+    def __init__(self, docs_root: Path, embedding_model: Optional[str] = None):
+        docs_root.mkdir(parents=True, exist_ok=True)
+        self.journal_path = docs_root / JOURNAL_FILE
+        self.vectors_path = docs_root / VECTORS_FILE
+        self.embedding_model = embedding_model
+        self._lock = threading.Lock()
+        self.dim: Optional[int] = None
+        self.summaries: Dict[str, str] = {}
+        self._summary_ids: Dict[str, str] = {}
+        self.rows: Dict[str, int] = {}
+        self._committed_vectors = False
+        self._recover()
+        self._journal = self.journal_path.open("a", encoding="utf-8")
+        self._vectors = self.vectors_path.open("ab")
+        self._next_row = self.vectors_path.stat().st_size // self._row_bytes() if self.dim else 0
+        self._view: Optional[np.memmap] = None
+
+    # ---------- recovery ----------
+
+    def _row_bytes(self) -> int:
+        return int(self.dim or 0) * 4
+
+    def _recover(self) -> None:
+        if not self.journal_path.exists():
+            self.vectors_path.unlink(missing_ok=True)
+            return
+
+        raw = self.journal_path.read_bytes()
+        good = raw[: raw.rfind(b"\n") + 1]  # drop a torn trailing line
+        if len(good) != len(raw):
+            self.journal_path.write_bytes(good)
+
+        entries = []
+        model = None
+        for line in good.decode("utf-8").splitlines():
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            if entry.get("t") == "h":
+                self.dim = int(entry["dim"])
+                model = entry.get("model")
+            else:
+                entries.append(entry)
+
+        if self.dim and model and self.embedding_model and model != self.embedding_model:
+            print(
+                f"[checkpoint] Embeddings in {self.vectors_path.name} are from {model}, not "
+                f"{self.embedding_model}; discarding them (summaries are kept)."
+            )
+            entries = [e for e in entries if e["t"] == "s"]
+            self._rewrite_journal(entries)
+            self.vectors_path.unlink(missing_ok=True)
+            self.dim = None
+
+        n_rows = 0
+        if self.dim and self.vectors_path.exists():
+            size = self.vectors_path.stat().st_size
+            n_rows = size // self._row_bytes()
+            if size != n_rows * self._row_bytes():
+                with self.vectors_path.open("r+b") as f:
+                    f.truncate(n_rows * self._row_bytes())
+
+        for entry in entries:
+            if entry["t"] == "s":
+                self.summaries[entry["key"]] = entry["summary"]
+                self._summary_ids[entry["key"]] = entry.get("id", "")
+            elif entry["t"] == "v" and entry["row"] < n_rows:
+                self.rows[entry["key"]] = int(entry["row"])
+
+    def _rewrite_journal(self, entries: Sequence[Dict]) -> None:
+        tmp = self.journal_path.with_suffix(".jsonl.tmp")
+        tmp.write_text(
+            "".join(json.dumps(e, ensure_ascii=False, separators=(",", ":")) + "\n" for e in entries), encoding="utf-8"
+        )
+        tmp.replace(self.journal_path)
+
+    def _drop_vectors(self, dim: int) -> None:
+        """Forget every stored embedding (they are stale) and start over at width `dim`."""
+        print(
+            f"[checkpoint] Embedding width changed ({self.dim} -> {dim}); discarding "
+            f"{len(self.rows)} stale embeddings (summaries are kept)."
+        )
+        self._journal.close()
+        self._vectors.close()
+        self._rewrite_journal(
+            [{"t": "s", "id": self._summary_ids.get(k, ""), "key": k, "summary": v} for k, v in self.summaries.items()]
+        )
+        self.vectors_path.unlink(missing_ok=True)
+        self._journal = self.journal_path.open("a", encoding="utf-8")
+        self._vectors = self.vectors_path.open("ab")
+        self.rows.clear()
+        self._next_row = 0
+        self._view = None
+        self.dim = None
+
+    @property
+    def resumed(self) -> bool:
+        return bool(self.summaries or self.rows)
+
+    # ---------- writes ----------
+
+    def _append(self, entries: Sequence[Dict]) -> None:
+        for entry in entries:
+            self._journal.write(json.dumps(entry, ensure_ascii=False, separators=(",", ":")) + "\n")
+        self._journal.flush()
+        os.fsync(self._journal.fileno())
+
+    def commit_summary(self, chunk_id: str, key: str, summary: str) -> None:
+        with self._lock:
+            self._append([{"t": "s", "id": chunk_id, "key": key, "summary": summary}])
+            self.summaries[key] = summary
+            self._summary_ids[key] = chunk_id
+
+    def commit_vectors(self, items: Sequence[tuple]) -> None:
+        """Commit [(chunk_id, key, vector), ...] in one flush."""
+        if not items:
+            return
+        with self._lock:
+            block = np.asarray([v for _, _, v in items], dtype="float32")
+            if self.dim is not None and block.shape[1] != self.dim:
+                if self._committed_vectors:
+                    raise ValueError(f"Embedding width {block.shape[1]} != checkpoint width {self.dim}")
+                self._drop_vectors(int(block.shape[1]))  # left over from an earlier run
+            if self.dim is None:
+                self.dim = int(block.shape[1])
+                header = {"t": "h", "dim": self.dim}
+                if self.embedding_model:
+                    header["model"] = self.embedding_model
+                self._append([header])
+            self._vectors.write(block.tobytes())
+            self._vectors.flush()
+            os.fsync(self._vectors.fileno())
+            self._view = None
+            entries = []
+            for offset, (chunk_id, key, _) in enumerate(items):
+                row = self._next_row + offset
+                entries.append({"t": "v", "id": chunk_id, "key": key, "row": row})
+                self.rows[key] = row
+            self._next_row += len(items)
+            self._append(entries)
+            self._committed_vectors = True
+
+    # ---------- reads ----------
+
+    def vector(self, key: str) -> Optional[np.ndarray]:
+        row = self.rows.get(key)
+        if row is None:
+            return None
+        with self._lock:
+            if self._view is None:
+                self._view = np.memmap(self.vectors_path, dtype="float32", mode="r").reshape(-1, self.dim)
+            return self._view[row]
+
+    def iter_vectors(self, keys: List[str]) -> Iterator[np.ndarray]:
+        for key in keys:
+            vec = self.vector(key)
+            if vec is None:
+                raise KeyError(f"No committed embedding for chunk key {key[:12]}...")
+            yield vec
+
+    # ---------- lifecycle ----------
+
+    def close(self) -> None:
+        with self._lock:
+            self._view = None
+            self._journal.close()
+            self._vectors.close()
+
+    def discard(self) -> None:
+        self.close()
+        self.journal_path.unlink(missing_ok=True)
+        self.vectors_path.unlink(missing_ok=True)
@@ -0,0 +1,88 @@
+# orchestrator/json_stream.py
+"""
+Incremental parser for a streamed `{"tasks": [ {...}, {...} ]}` reply.
+
+Text is fed in arbitrary pieces as it arrives; every task object is
+returned as soon as its closing brace is seen, without waiting for (or
+needing) the rest of the document. The parser only tracks bracket depth
+and string/escape state, so anything around the JSON (a ```json fence, a
+stray sentence) is ignored, and a bare top-level array of tasks works too.
+
+`complete` tells whether the outermost value was closed, i.e. whether the
+reply ended normally or was truncated; `last_end` is the offset just past
+the last emitted object, which is where a resumed generation picks up.
+"""
+
+from __future__ import annotations
+
+import json
+from typing import Any, Dict, List
+
+
+class TaskStreamParser:
+    def __init__(self) -> None:
+        self.started = False
+        self.complete = False
+        self.last_end = 0        # offset just past the last emitted object
+        self.errors: List[str] = []
+        self._parts: List[str] = []
+        self._length = 0
+        self._stack: List[str] = []
+        self._in_string = False
+        self._escape = False
+        self._obj: List[str] = []  # characters of the task object being read
+        self._in_obj = False
+
+    @property
+    def text(self) -> str:
+        """Everything fed so far."""
+        return "".join(self._parts)
+
+    def _is_task_level(self) -> bool:
+        # {"tasks": [ <here> ]}  or  [ <here> ]
+        return self._stack in (["{", "["], ["["])
+
+    def feed(self, piece: str) -> List[Dict[str, Any]]:
+        """Consume `piece`; return the task objects it completed."""
+        out: List[Dict[str, Any]] = []
+        base = self._length
+        self._parts.append(piece)
+        self._length += len(piece)
+        for i, ch in enumerate(piece):
+            if self.complete:
+                break
+            if self._in_obj:
+                self._obj.append(ch)
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                continue
+            if ch == '"':
+                if self.started:
+                    self._in_string = True
+            elif ch in "{[":
+                if ch == "{" and self._is_task_level():
+                    self._in_obj = True
+                    self._obj = [ch]
+                self._stack.append(ch)
+                self.started = True
+            elif ch in "}]" and self._stack:
+                self._stack.pop()
+                if ch == "}" and self._in_obj and self._is_task_level():
+                    raw = "".join(self._obj)
+                    self._in_obj = False
+                    self.last_end = base + i + 1
+                    try:
+                        obj = json.loads(raw)
+                    except json.JSONDecodeError as e:
+                        self.errors.append(f"{e}: {raw[:80]}")
+                        obj = None
+                    if isinstance(obj, dict):
+                        out.append(obj)
+                if not self._stack:
+                    self.complete = True
+        return out
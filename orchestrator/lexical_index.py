@@ -0,0 +1,179 @@
+# orchestrator/lexical_index.py
+"""
+BM25 inverted index over blueprint chunks, for offline and hybrid search.
+
+Each chunk is indexed on its id, heading path, summary and text. The
+tokeniser keeps identifiers such as "TD-0076", "WBS-023" or "1.2.A" whole
+and also indexes their parts, so exact ids match strongly while "0076"
+alone still finds them.
+
+The index is stored next to the blueprint index as blueprint_bm25.npz in
+CSR form: a sorted vocabulary, per-term offsets into one postings array of
+(row, term frequency), and per-row lengths. Rows are meta-sidecar row
+numbers, so results line up with the embedding matrix.
+
+`rrf_fuse` combines ranked lists by reciprocal rank fusion, which needs no
+score calibration between BM25 and cosine similarity.
+"""
+
+from __future__ import annotations
+
+import os
+import re
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np  # pip install numpy
+
+from .ann_index import top_k_indices
+
+BM25_FILE = "blueprint_bm25.npz"
+
+K1 = 1.2
+B = 0.75
+RRF_K = 60
+
+_TOKEN = re.compile(r"\w+(?:[-_.]\w+)*")
+_PART = re.compile(r"[-_.]")
+
+
+def tokenize(text: str) -> List[str]:
+    out: List[str] = []
+    for tok in _TOKEN.findall(text.lower()):
+        out.append(tok)
+        if _PART.search(tok):
+            out.extend(p for p in _PART.split(tok) if p)
+    return out
+
+
+def document_text(row: Dict, text: str) -> str:
+    """What gets indexed for one meta row: id, heading path, summary and body."""
+    return " ".join([row.get("id", ""), " ".join(row.get("heading_path") or []), row.get("summary") or "", text])
+
+
+@dataclass
+class BM25Index:
+    vocab: Dict[str, int]
+    offsets: np.ndarray  # (n_terms + 1,) int64 into rows/tfs
+    rows: np.ndarray     # (n_postings,) int32 meta row numbers
+    tfs: np.ndarray      # (n_postings,) float32 term frequencies
+    doc_len: np.ndarray  # (count,) float32 tokens per row
+
+    @property
+    def count(self) -> int:
+        return int(self.doc_len.shape[0])
+
+    @classmethod
+    def build(cls, documents: Iterable[str]) -> "BM25Index":
+        postings: Dict[str, List[Tuple[int, int]]] = {}
+        lengths: List[int] = []
+        for row, doc in enumerate(documents):
+            tokens = tokenize(doc)
+            lengths.append(len(tokens))
+            for term, tf in Counter(tokens).items():
+                postings.setdefault(term, []).append((row, tf))
+
+        terms = sorted(postings)
+        offsets = np.zeros(len(terms) + 1, dtype="int64")
+        np.cumsum([len(postings[t]) for t in terms], out=offsets[1:])
+        rows = np.empty(int(offsets[-1]), dtype="int32")
+        tfs = np.empty(int(offsets[-1]), dtype="float32")
+        for i, term in enumerate(terms):
+            block = postings[term]
+            rows[offsets[i] : offsets[i + 1]] = [r for r, _ in block]
+            tfs[offsets[i] : offsets[i + 1]] = [tf for _, tf in block]
+        return cls(
+            vocab={t: i for i, t in enumerate(terms)},
+            offsets=offsets,
+            rows=rows,
+            tfs=tfs,
+            doc_len=np.asarray(lengths, dtype="float32"),
+        )
+
+    def scores(self, query: str) -> np.ndarray:
+        """BM25 score of every row for `query` (zeros where no term matches)."""
+        out = np.zeros(self.count, dtype="float32")
+        if self.count == 0:
+            return out
+        avgdl = float(self.doc_len.mean()) or 1.0
+        for term, qtf in Counter(tokenize(query)).items():
+            t = self.vocab.get(term)
+            if t is None:
+                continue
+            lo, hi = self.offsets[t], self.offsets[t + 1]
+            rows, tf = self.rows[lo:hi], self.tfs[lo:hi]
+            df = hi - lo
+            idf = np.log1p((self.count - df + 0.5) / (df + 0.5))
+            norm = tf + K1 * (1 - B + B * self.doc_len[rows] / avgdl)
+            out[rows] += qtf * idf * tf * (K1 + 1) / norm
+        return out
+
+    def search(self, query: str, top_k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """(row ids, scores) of the top_k rows with a positive score."""
+        scores = self.scores(query)
+        best = top_k_indices(scores, top_k)
+        best = best[scores[best] > 0]
+        return best.astype("int64"), scores[best]
+
+    def save(self, path: Path) -> Path:
+        terms = sorted(self.vocab, key=self.vocab.__getitem__)
+        tmp = path.with_suffix(".tmp.npz")
+        with tmp.open("wb") as f:
+            np.savez(
+                f,
+                terms=np.asarray(terms, dtype=str),
+                offsets=self.offsets,
+                rows=self.rows,
+                tfs=self.tfs,
+                doc_len=self.doc_len,
+            )
+        os.replace(tmp, path)
+        return path
+
+    @classmethod
+    def load(cls, path: Path) -> "BM25Index":
+        with np.load(path) as z:
+            return cls(
+                vocab={t: i for i, t in enumerate(z["terms"].tolist())},
+                offsets=z["offsets"],
+                rows=z["rows"],
+                tfs=z["tfs"],
+                doc_len=z["doc_len"],
+            )
+
+
+def rrf_fuse(rankings: Sequence[Sequence[int]], top_k: int, k: int = RRF_K) -> List[int]:
+    """Reciprocal rank fusion: sum of 1 / (k + rank) over every ranked list."""
+    fused: Dict[int, float] = {}
+    for ranking in rankings:
+        for rank, row in enumerate(ranking):
+            fused[int(row)] = fused.get(int(row), 0.0) + 1.0 / (k + rank + 1)
+    return sorted(fused, key=lambda row: (-fused[row], row))[:top_k]
+
+
+def build_for_index(docs_root: Path, documents: Iterable[str]) -> Path:
+    return BM25Index.build(documents).save(docs_root / BM25_FILE)
+
+
+# Loaded indexes, keyed by path and invalidated by mtime, so repeated
+# lookups from one process stay in memory.
+_LOADED: Dict[Path, Tuple[float, BM25Index]] = {}
+
+
+def load_for_index(docs_root: Path, count: int) -> Optional[BM25Index]:
+    """The BM25 index if it exists and still matches a `count`-row meta sidecar."""
+    path = docs_root / BM25_FILE
+    if not path.exists():
+        return None
+    mtime = path.stat().st_mtime
+    cached = _LOADED.get(path)
+    if cached is None or cached[0] != mtime:
+        cached = (mtime, BM25Index.load(path))
+        _LOADED[path] = cached
+    index = cached[1]
+    if index.count != count:
+        print(f"[blueprints] Ignoring stale {path.name} ({index.count} rows, index has {count}).")
+        return None
+    return index
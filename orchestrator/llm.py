@@ -5,7 +5,7 @@ import logging
 import os
 from typing import Dict, List, Optional, Tuple
 
-from openai import OpenAI
+from . import resilience, response_cache, sdk_clients
 
 try:
     from anthropic import Anthropic
@@ -99,19 +99,33 @@ def _anthropic_available() -> bool:
 # --------------------------------------------------------------------------------------
 # OpenAI
 # --------------------------------------------------------------------------------------
-def call_openai(messages: List[Dict[str, str]], model: Optional[str] = None) -> str:
+def call_openai(messages: List[Dict[str, str]], model: Optional[str] = None, fresh: bool = False) -> str:
     """
-    Calls OpenAI with robust fallback:
-      1) Try Chat Completions API
-      2) On known errors (or if forced), use the Responses API with flattened input
-    Returns trimmed text. Raises if both attempts fail.
+    Calls OpenAI:
+      1) Try Chat Completions API (retried per orchestrator.resilience)
+      2) If the API rejects the model as Responses-only (or if forced), use the
+         Responses API with flattened input
+    Returns trimmed text; any other error is raised. Replies come from the
+    response cache when the same request was made before (fresh=True skips it).
     """
-    client = OpenAI()
     m = model or DEFAULT_OAI_MODEL
+    params = {"temperature": TEMPERATURE, "max_tokens": OAI_MAX_TOKENS}
+    return response_cache.cached_call("openai", m, messages, params, lambda: _call_openai(messages, m), fresh=fresh)
+
+
+def _wants_responses_api(e: Exception) -> bool:
+    # e.g. "This model is only supported in v1/responses and not in v1/chat/completions."
+    msg = (str(e) or "").lower()
+    return resilience.classify(e) == resilience.FATAL and ("v1/responses" in msg or "responses api" in msg)
+
+
+def _call_openai(messages: List[Dict[str, str]], m: str) -> str:
+    client = sdk_clients.openai_client()
+    guard = resilience.guard("openai")
 
     def _responses_call() -> str:
         text = _flatten_messages(messages)
-        r = client.responses.create(model=m, input=text, max_output_tokens=OAI_MAX_TOKENS)
+        r = guard.call(lambda: client.responses.create(model=m, input=text, max_output_tokens=OAI_MAX_TOKENS))
         # Robustly extract text for multiple SDK shapes
         try:
             out = getattr(r, "output_text", None)
@@ -142,43 +156,47 @@ def call_openai(messages: List[Dict[str, str]], model: Optional[str] = None) ->
 
     # Try Chat Completions first
     try:
-        resp = client.chat.completions.create(
-            model=m,
-            messages=messages,
-            temperature=TEMPERATURE,
-            max_tokens=OAI_MAX_TOKENS,
+        resp = guard.call(
+            lambda: client.chat.completions.create(
+                model=m,
+                messages=messages,
+                temperature=TEMPERATURE,
+                max_tokens=OAI_MAX_TOKENS,
+            )
         )
         return (resp.choices[0].message.content or "").strip()
     except Exception as e:
-        msg = (str(e) or "").lower()
-        # Known migration error or any hint to use Responses API
-        if "only supported in v1/responses" in msg or "responses" in msg:
+        # Only a Responses-only model is worth a second request: outages and
+        # rate limits were already retried and would fail there as well.
+        if _wants_responses_api(e):
             logger.info("Falling back to OpenAI Responses API due to: %s", e)
             return _responses_call()
-        logger.warning("OpenAI chat.completions failed: %s", e)
-        # As a last attempt, try Responses anyway
-        try:
-            return _responses_call()
-        except Exception:
-            # Re-raise the original error for observability
-            raise
+        raise
 
 
 # --------------------------------------------------------------------------------------
 # Anthropic (optional)
 # --------------------------------------------------------------------------------------
-def call_anthropic(messages: List[Dict[str, str]], model: Optional[str] = None) -> Optional[str]:
+def call_anthropic(
+    messages: List[Dict[str, str]], model: Optional[str] = None, fresh: bool = False
+) -> Optional[str]:
     """
     Calls Anthropic if available/enabled.
     Returns text (str) on success, or None if Anthropic unavailable or call fails.
+    Successful replies are served from / stored in the response cache.
     """
     if not _anthropic_available():
         if USE_ANTHROPIC:
             logger.warning("Anthropic client unavailable or ANTHROPIC_API_KEY not set; skipping.")
         return None
 
-    client = Anthropic()
     m = model or DEFAULT_ANTHROPIC_MODEL
+    params = {"temperature": TEMPERATURE, "max_tokens": ANTHROPIC_MAX_TOKENS}
+    return response_cache.cached_call("anthropic", m, messages, params, lambda: _call_anthropic(messages, m), fresh=fresh)
+
+
+def _call_anthropic(messages: List[Dict[str, str]], m: str) -> Optional[str]:
+    client = sdk_clients.anthropic_client()
 
     # Convert OpenAI-style messages into a compact “single user text” + optional system.
     system = None
@@ -193,11 +211,14 @@ def call_anthropic(messages: List[Dict[str, str]], model: Optional[str] = None)
     user_text = "\n\n".join(parts) if parts else ""
 
     try:
-        resp = client.messages.create(
-            model=m,
-            max_tokens=ANTHROPIC_MAX_TOKENS,
-            system=system or "You are a precise, concise senior engineer reviewer.",
-            messages=[{"role": "user", "content": user_text}],
+        resp = resilience.guard("anthropic").call(
+            lambda: client.messages.create(
+                model=m,
+                max_tokens=ANTHROPIC_MAX_TOKENS,
+                temperature=TEMPERATURE,
+                system=system or "You are a precise, concise senior engineer reviewer.",
+                messages=[{"role": "user", "content": user_text}],
+            )
         )
         # Extract textual content across SDK shapes
         try:
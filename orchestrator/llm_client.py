@@ -3,10 +3,10 @@ from __future__ import annotations
 
 import os
 from dataclasses import dataclass
-from typing import List, Dict, Any, Optional
+from typing import Any, Callable, Dict, Iterator, List, Optional
 
-from openai import OpenAI  # pip install openai
-import anthropic          # pip install anthropic
+from . import resilience, sdk_clients
+from .response_cache import ResponseCache
 
 
 @dataclass
@@ -23,30 +23,55 @@ class LLMClient:
 
     - OpenAI: main engine for indexing, planning, task prompts.
     - Anthropic: optional, good for long synth + heavy docs.
+
+    With a ResponseCache, chat_openai / chat_anthropic replay identical
+    requests from disk; pass fresh=True for a call that must hit the API.
     """
 
-    def __init__(self, cfg: LLMConfig):
+    def __init__(self, cfg: LLMConfig, cache: Optional[ResponseCache] = None):
         self.cfg = cfg
-        self._openai = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+        self.cache = cache
+        # Shared, pooled SDK clients (see orchestrator.sdk_clients).
+        self._openai = sdk_clients.openai_client()
         anth_key = os.getenv("ANTHROPIC_API_KEY")
-        self._anthropic = anthropic.Anthropic(api_key=anth_key) if anth_key else None
+        self._anthropic = sdk_clients.anthropic_client(anth_key) if anth_key else None
 
     # ---------- Embeddings (OpenAI) ----------
 
     def embed(self, texts: List[str], model: Optional[str] = None) -> List[List[float]]:
         model = model or self.cfg.embedding_model
-        resp = self._openai.embeddings.create(
-            model=model,
-            input=texts,
+        resp = resilience.guard("openai").call(
+            lambda: self._openai.embeddings.create(
+                model=model,
+                input=texts,
+            )
         )
         return [item.embedding for item in resp.data]
 
+    def embed_many(
+        self,
+        texts: List[str],
+        model: Optional[str] = None,
+        on_batch: Optional[Callable[[List[int], List[List[float]]], None]] = None,
+        **scheduler_opts: Any,
+    ) -> List[List[float]]:
+        """
+        Embed any number of texts: token-packed requests, several in flight,
+        oversize batches split and retried. See orchestrator.embed_scheduler.
+        """
+        from .embed_scheduler import EmbeddingScheduler
+
+        model = model or self.cfg.embedding_model
+        scheduler = EmbeddingScheduler(lambda batch: self.embed(batch, model=model), model=model, **scheduler_opts)
+        return scheduler.embed(texts, on_batch=on_batch)
+
     # ---------- Chat (OpenAI) ----------
 
     def chat_openai(
         self,
         messages: List[Dict[str, str]],
         model: Optional[str] = None,
+        fresh: bool = False,
         **extra: Any,
     ) -> str:
         """
@@ -56,13 +81,46 @@ class LLMClient:
         code in the orchestrator.
         """
         model = model or self.cfg.openai_model
+        temperature = extra.get("temperature", self.cfg.temperature)
+
+        def _call() -> str:
+            resp = resilience.guard("openai").call(
+                lambda: self._openai.chat.completions.create(
+                    model=model,
+                    messages=messages,
+                    temperature=temperature,
+                )
+            )
+            return resp.choices[0].message.content or ""
+
+        if self.cache is None:
+            return _call()
+        return self.cache.call("openai", model, messages, {"temperature": temperature}, _call, fresh=fresh) or ""
+
+    def stream_openai(
+        self,
+        messages: List[Dict[str, str]],
+        model: Optional[str] = None,
+        **extra: Any,
+    ) -> Iterator[str]:
+        """
+        Streaming chat completion: yields message.content pieces as they
+        arrive. A reply cut off by the token limit simply stops early.
+        Only opening the stream is retried; a stream that breaks midway raises.
+        """
+        model = model or self.cfg.openai_model
 
-        resp = self._openai.chat.completions.create(
-            model=model,
-            messages=messages,
-            temperature=extra.get("temperature", self.cfg.temperature),
+        stream = resilience.guard("openai").call(
+            lambda: self._openai.chat.completions.create(
+                model=model,
+                messages=messages,
+                temperature=extra.get("temperature", self.cfg.temperature),
+                stream=True,
+            )
         )
-        return resp.choices[0].message.content or ""
+        for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
 
     # ---------- Chat (Anthropic, optional) ----------
 
@@ -70,6 +128,7 @@ class LLMClient:
         self,
         messages: List[Dict[str, str]],
         model: Optional[str] = None,
+        fresh: bool = False,
         **extra: Any,
     ) -> str:
         """
@@ -93,17 +152,28 @@ class LLMClient:
             else:
                 converted.append({"role": m["role"], "content": m["content"]})
 
-        resp = self._anthropic.messages.create(
-            model=model,
-            max_tokens=extra.get("max_tokens", 2048),
-            temperature=extra.get("temperature", self.cfg.temperature),
-            system=system_msg or None,
-            messages=converted,
-        )
-
-        # Join all text blocks together
-        out_chunks: List[str] = []
-        for block in resp.content:
-            if getattr(block, "type", None) == "text":
-                out_chunks.append(block.text)
-        return "\n".join(out_chunks)
+        max_tokens = extra.get("max_tokens", 2048)
+        temperature = extra.get("temperature", self.cfg.temperature)
+
+        def _call() -> str:
+            resp = resilience.guard("anthropic").call(
+                lambda: self._anthropic.messages.create(
+                    model=model,
+                    max_tokens=max_tokens,
+                    temperature=temperature,
+                    system=system_msg or None,
+                    messages=converted,
+                )
+            )
+
+            # Join all text blocks together
+            out_chunks: List[str] = []
+            for block in resp.content:
+                if getattr(block, "type", None) == "text":
+                    out_chunks.append(block.text)
+            return "\n".join(out_chunks)
+
+        if self.cache is None:
+            return _call()
+        params = {"temperature": temperature, "max_tokens": max_tokens}
+        return self.cache.call("anthropic", model, messages, params, _call, fresh=fresh) or ""
@@ -2,11 +2,16 @@
 from __future__ import annotations
 
 import argparse
+import asyncio
+import inspect
 import json
 import os
 import sys
 from dataclasses import dataclass, field
-from typing import Any, Dict, Iterable, List, Optional, Union
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Union
+
+from orchestrator import resilience
+from orchestrator.concurrency import AsyncLimiter, BatchResult, agather
 
 # Providers factory (already in your repo)
 try:
@@ -133,6 +138,9 @@ def _extract_from_choices(choices: Any) -> Optional[str]:
 class LLMRouter:
     """
     Simple provider router. Tries a named provider, else defaults, else stub.
+
+    Provider errors are raised once the provider's retries are spent
+    (orchestrator.resilience); `health()` reports its circuit breaker.
     """
 
     def __init__(self, provider_name: Optional[str] = None, model: Optional[str] = None):
@@ -150,15 +158,12 @@ class LLMRouter:
         provider = self._provider
 
         # Prefer a 'complete' style if present; else try 'chat'
-        try:
-            if hasattr(provider, "complete"):
-                resp = provider.complete(prompt, model=model, **kwargs)
-            elif hasattr(provider, "chat"):
-                messages = [{"role": "user", "content": prompt}]
-                resp = provider.chat(messages, model=model, **kwargs)
-            else:
-                resp = None
-        except Exception:  # don’t crash CLI/tests if a provider misbehaves
+        if hasattr(provider, "complete"):
+            resp = provider.complete(prompt, model=model, **kwargs)
+        elif hasattr(provider, "chat"):
+            messages = [{"role": "user", "content": prompt}]
+            resp = provider.chat(messages, model=model, **kwargs)
+        else:
             resp = None
 
         return coerce_to_result(provider_name, model, resp)
@@ -168,22 +173,26 @@ class LLMRouter:
         provider_name = self.provider_name
         provider = self._provider
 
-        try:
-            if hasattr(provider, "chat"):
-                resp = provider.chat(messages, model=model, **kwargs)
-            elif hasattr(provider, "complete"):
-                # flatten messages to a single prompt (last user message)
-                last = ""
-                if messages and isinstance(messages, list):
-                    last = messages[-1].get("content", "")
-                resp = provider.complete(last, model=model, **kwargs)
-            else:
-                resp = None
-        except Exception:
+        if hasattr(provider, "chat"):
+            resp = provider.chat(messages, model=model, **kwargs)
+        elif hasattr(provider, "complete"):
+            # flatten messages to a single prompt (last user message)
+            last = ""
+            if messages and isinstance(messages, list):
+                last = messages[-1].get("content", "")
+            resp = provider.complete(last, model=model, **kwargs)
+        else:
             resp = None
 
         return coerce_to_result(provider_name, model, resp)
 
+    def health(self) -> Dict[str, Any]:
+        """Circuit-breaker state and call counts for this router's provider."""
+        name = getattr(self._provider, "name", None)
+        if not name or isinstance(self._provider, _StubProvider):
+            return {"provider": self.provider_name, "state": resilience.CLOSED}
+        return {"provider": name, **resilience.guard(name).breaker.snapshot()}
+
     # -- internals ----------------------------------------------------------
 
     @staticmethod
@@ -219,6 +228,104 @@ def get_router(provider_name: Optional[str] = None, model: Optional[str] = None)
     return LLMRouter(provider_name=provider_name, model=model)
 
 
+class AsyncLLMRouter:
+    """
+    asyncio façade over LLMRouter: same provider resolution and LLMResult
+    shape, with at most `max_concurrency` calls in flight
+    (ORCHESTRATOR_LLM_MAX_CONCURRENCY, default 8). Providers with native
+    `acomplete`/`achat` are awaited; others run on a worker thread.
+
+    Provider errors are raised once the provider's retries are spent
+    (immediately while its circuit breaker is open), so `agather` can
+    report them per item.
+    """
+
+    def __init__(
+        self,
+        provider_name: Optional[str] = None,
+        model: Optional[str] = None,
+        max_concurrency: Optional[int] = None,
+        router: Optional[LLMRouter] = None,
+    ):
+        self.router = router or LLMRouter(provider_name=provider_name, model=model)
+        self.limiter = AsyncLimiter(max_concurrency or int(os.getenv("ORCHESTRATOR_LLM_MAX_CONCURRENCY", "8")))
+
+    @property
+    def provider_name(self) -> str:
+        return self.router.provider_name
+
+    def health(self) -> Dict[str, Any]:
+        return self.router.health()
+
+    async def acomplete(self, prompt: str, **kwargs) -> LLMResult:
+        async with self.limiter:
+            return await self._acomplete(prompt, **kwargs)
+
+    async def achat(self, messages: List[Dict[str, str]], **kwargs) -> LLMResult:
+        async with self.limiter:
+            return await self._achat(messages, **kwargs)
+
+    async def agather(
+        self,
+        prompts: Sequence[Union[str, List[Dict[str, str]]]],
+        max_retries: int = 0,
+        **kwargs,
+    ) -> BatchResult[LLMResult]:
+        """
+        Run every prompt (a string for complete, a message list for chat)
+        under the router's limiter. results[i] is None where prompt i failed,
+        with the exception in errors[i]; the other prompts are unaffected.
+        """
+
+        async def one(prompt: Union[str, List[Dict[str, str]]]) -> LLMResult:
+            if isinstance(prompt, str):
+                return await self._acomplete(prompt, **kwargs)
+            return await self._achat(prompt, **kwargs)
+
+        return await agather(
+            one, prompts, limiter=self.limiter, max_retries=max_retries, retry_if=resilience.retry_outside
+        )
+
+    # -- internals ----------------------------------------------------------
+
+    async def _acomplete(self, prompt: str, **kwargs) -> LLMResult:
+        model = kwargs.pop("model", None) or self.router.model
+        provider = self.router._provider
+        if _has(provider, "complete"):
+            resp = await _call(provider, "complete", prompt, model=model, **kwargs)
+        else:
+            resp = await _call(provider, "chat", [{"role": "user", "content": prompt}], model=model, **kwargs)
+        return coerce_to_result(self.provider_name, model, resp)
+
+    async def _achat(self, messages: List[Dict[str, str]], **kwargs) -> LLMResult:
+        model = kwargs.pop("model", None) or self.router.model
+        provider = self.router._provider
+        if _has(provider, "chat"):
+            resp = await _call(provider, "chat", messages, model=model, **kwargs)
+        else:
+            last = messages[-1].get("content", "") if messages else ""
+            resp = await _call(provider, "complete", last, model=model, **kwargs)
+        return coerce_to_result(self.provider_name, model, resp)
+
+
+def _has(provider: Any, method: str) -> bool:
+    return hasattr(provider, method) or hasattr(provider, "a" + method)
+
+
+async def _call(provider: Any, method: str, payload: Any, **kwargs) -> Any:
+    """provider.a<method>(...) when it is a coroutine function, else provider.<method>(...) on a thread."""
+    native = getattr(provider, "a" + method, None)
+    if native is not None and inspect.iscoroutinefunction(native):
+        return await native(payload, **kwargs)
+    return await asyncio.to_thread(getattr(provider, method), payload, **kwargs)
+
+
+def get_async_router(
+    provider_name: Optional[str] = None, model: Optional[str] = None, max_concurrency: Optional[int] = None
+) -> AsyncLLMRouter:
+    return AsyncLLMRouter(provider_name=provider_name, model=model, max_concurrency=max_concurrency)
+
+
 # ----------------------------- CLI support ----------------------------------
 
 def _parse_cli(argv: Optional[Iterable[str]] = None) -> argparse.Namespace:
@@ -230,6 +337,7 @@ def _parse_cli(argv: Optional[Iterable[str]] = None) -> argparse.Namespace:
     p.add_argument("--temperature", type=float, default=None)
     p.add_argument("--max-tokens", type=int, default=None)
     p.add_argument("--as-json", action="store_true", help="Emit machine-readable JSON.")
+    p.add_argument("--health", action="store_true", help="Print the provider's circuit-breaker state and exit.")
     return p.parse_args(list(argv) if argv is not None else None)
 
 
@@ -237,20 +345,27 @@ def _main(argv: Optional[Iterable[str]] = None) -> int:
     args = _parse_cli(argv)
 
     router = get_router(provider_name=args.provider, model=args.model)
+    if args.health:
+        print(json.dumps(router.health()))
+        return 0
 
     # Prefer --messages if present; else use positional prompt
-    if args.messages:
-        try:
-            messages = json.loads(args.messages)
-            if not isinstance(messages, list):
-                raise ValueError("messages must be a JSON array")
-        except Exception as e:
-            print(f"Invalid --messages JSON: {e}", file=sys.stderr)
-            return 2
-        result = router.chat(messages, temperature=args.temperature, max_tokens=args.max_tokens)
-    else:
-        prompt = args.prompt or ""
-        result = router.complete(prompt, temperature=args.temperature, max_tokens=args.max_tokens)
+    try:
+        if args.messages:
+            try:
+                messages = json.loads(args.messages)
+                if not isinstance(messages, list):
+                    raise ValueError("messages must be a JSON array")
+            except Exception as e:
+                print(f"Invalid --messages JSON: {e}", file=sys.stderr)
+                return 2
+            result = router.chat(messages, temperature=args.temperature, max_tokens=args.max_tokens)
+        else:
+            prompt = args.prompt or ""
+            result = router.complete(prompt, temperature=args.temperature, max_tokens=args.max_tokens)
+    except Exception as e:
+        print(f"{router.provider_name} call failed: {e.__class__.__name__}: {e}", file=sys.stderr)
+        return 1
 
     if args.as_json:
         print(json.dumps({
@@ -5,13 +5,13 @@ from datetime import datetime, timedelta, timezone
 ROOT = Path(__file__).resolve().parent.parent
 LOCKS = ROOT / "ops" / "locks"
 
-def sweep(ttl_minutes: int = 60) -> list[str]:
+def sweep(ttl_minutes: int = 60, locks_dir: Path = LOCKS) -> list[str]:
     removed = []
-    if not LOCKS.exists():
+    if not locks_dir.exists():
         return removed
     now = datetime.now(timezone.utc).timestamp()
     ttl = ttl_minutes * 60
-    for p in LOCKS.glob("*.lock"):
+    for p in locks_dir.glob("*.lock"):
         try:
             age = now - p.stat().st_mtime
             if age > ttl:
@@ -21,6 +21,18 @@ def sweep(ttl_minutes: int = 60) -> list[str]:
             pass
     return removed
 
+def holder(agent: str, locks_dir: Path = LOCKS) -> str | None:
+    """The wbs_id in an agent's lock file ("" if it names none), or None when unlocked."""
+    p = locks_dir / f"{agent}.lock"
+    try:
+        text = p.read_text(encoding="utf-8", errors="ignore")
+    except FileNotFoundError:
+        return None
+    for line in text.splitlines():
+        if line.strip().startswith("wbs_id:"):
+            return line.split(":", 1)[1].strip().strip('"')
+    return ""
+
 if __name__ == "__main__":
     gone = sweep()
     if gone:
@@ -0,0 +1,238 @@
+# orchestrator/md_chunker.py
+"""
+Heading-aware chunking for the converted blueprint markdown.
+
+The plans come out of pandoc (docx -> markdown), so besides ATX headings
+("## Title") most section titles are plain or bold paragraphs that start
+with a section marker:
+
+    Part 2 --- Non-Tech Blueprint
+    Section 2 --- Go-to-Market & City Launch Plan
+    SubSection 1.1 --- Role System Design
+    Appendix A --- Glossary & Role Map
+    A1. Core Marketplace Terms
+    §1.2.7 Per-Platform Social Search
+    **1.1.P Role field schemas (canonical JSON + Zod)**
+
+and some subsections are bold-only label paragraphs ("**Idempotency**") or
+numbered items ("1\\) Core Concept: ..."). All of them start a section.
+
+`structural_spans` makes one pass over the lines: it tracks the heading
+stack, closes a section at each heading and packs consecutive small
+sections into one chunk up to a token budget. A heading at or above
+`break_level` (Parts and top-level Sections by default) always starts a
+new chunk, so packing never mixes two sections of the plan. Only a
+section larger than the budget is split, into windows that end on
+paragraph breaks and overlap slightly.
+
+`window_spans` is the original fixed-size character window with overlap;
+it is used for oversized sections and as the baseline in
+orchestrator.bench.chunking.
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field
+from typing import Iterator, List, Optional, Tuple
+
+from .tokens import estimate_tokens
+
+DEFAULT_MAX_TOKENS = 1000
+DEFAULT_BREAK_LEVEL = 1
+LABEL_LEVEL = 9  # bold labels / numbered items sit below every numbered level
+
+_ATX = re.compile(r"^(#{1,6})[ \t]+(.*?)[ \t#]*$")
+_FENCE = re.compile(r"^(```|~~~)")
+_PART = re.compile(r"^Part\s+\d+\b")
+_SECTION = re.compile(r"^(?:Sub)*Section\s+(\d+(?:\.\w+)*)\s*(?:---|:)")
+_NUMBERED = re.compile(r"^(\d+(?:\.\w+)+)\.?\s+(?:---\s+)?[A-Z\"“(]")
+_APPENDIX = re.compile(r"^Appendix\s+[A-Z]\b\s*(?:---|:)")
+_LETTERED = re.compile(r"^[A-Z](\d+(?:\.\d+)*)\.?\s+[A-Z\"“(]")
+_SECTION_SIGN = re.compile(r"^§\s*(\d+(?:\.\w+)*)\s+(?:---\s+)?[A-Z\"“(]")
+_LIST_ITEM = re.compile(r"^\d+\\?\)\s+[A-Z]")
+_BOLD_ONLY = re.compile(r"^\*\*([^*].*?)\*\*:?$")
+_MAX_HEADING_CHARS = 160
+
+
+@dataclass
+class Span:
+    start: int
+    end: int
+    heading_path: List[str] = field(default_factory=list)
+
+
+def _clean(title: str) -> str:
+    title = title.replace("**", "").replace("\\", "").strip()
+    return re.sub(r"\s+", " ", title).rstrip(":").strip()
+
+
+def _numbered_level(number: str) -> int:
+    return len(number.split("."))
+
+
+def _marker_level(title: str, numbered: bool) -> Optional[int]:
+    """Level implied by a section marker at the start of `title`, if any."""
+    if _PART.match(title):
+        return 0
+    if _APPENDIX.match(title):
+        return 2
+    m = _LETTERED.match(title)
+    if m:
+        return 2 + _numbered_level(m.group(1))  # "A1." sits under "Appendix A"
+    m = _SECTION.match(title) or _SECTION_SIGN.match(title)
+    if m is None and numbered:
+        # Bare "1.2.A Title" only counts when the block is already styled
+        # as a heading (ATX or bold); in body text it is just a reference.
+        m = _NUMBERED.match(title)
+    return _numbered_level(m.group(1)) if m else None
+
+
+def heading_level(paragraph: str) -> Optional[Tuple[int, str]]:
+    """
+    (level, title) when `paragraph` (a blank-line delimited block with its
+    lines stripped and joined by spaces) is a section heading, else None.
+    """
+    text = paragraph.strip()
+    if not text or len(text) > _MAX_HEADING_CHARS:
+        return None
+
+    atx = _ATX.match(text)
+    if atx:
+        title = _clean(atx.group(2))
+        if not title:
+            return None  # pandoc emits bare "# " lines for empty headings
+        level = _marker_level(title, numbered=True)
+        return (len(atx.group(1)) if level is None else level), title
+
+    bold = _BOLD_ONLY.match(text)
+    if bold:
+        title = _clean(bold.group(1))
+        level = _marker_level(title, numbered=True)
+        return (LABEL_LEVEL if level is None else level), title
+
+    level = _marker_level(text, numbered=False)
+    if level is not None:
+        return level, _clean(text)
+    if _LIST_ITEM.match(text):
+        return LABEL_LEVEL, _clean(text)
+    return None
+
+
+def _paragraphs(text: str) -> Iterator[Tuple[int, int, Optional[Tuple[int, str]]]]:
+    """
+    Yield (start, end, heading) for each blank-line delimited block, with
+    char offsets into `text`. ATX headings are blocks of their own even
+    without surrounding blank lines; fenced code never contains headings.
+    """
+    pos = 0
+    block_start: Optional[int] = None
+    block_lines: List[str] = []
+    in_fence = False
+
+    for line in text.splitlines(keepends=True):
+        stripped = line.strip()
+        line_end = pos + len(line)
+        if _FENCE.match(stripped):
+            in_fence = not in_fence
+        is_atx = not in_fence and bool(_ATX.match(stripped))
+        if (is_atx or (not stripped and not in_fence)) and block_start is not None:
+            yield block_start, pos, heading_level(" ".join(block_lines))
+            block_start, block_lines = None, []
+        if is_atx:
+            yield pos, line_end, heading_level(stripped)
+        elif stripped or in_fence:
+            if block_start is None:
+                block_start = pos
+            block_lines.append(stripped)
+        pos = line_end
+    if block_start is not None:
+        yield block_start, pos, heading_level(" ".join(block_lines))
+
+
+def window_spans(text: str, start: int, end: int, max_chars: int, overlap: int) -> List[Tuple[int, int]]:
+    """
+    Fixed windows of `max_chars` with `overlap` over text[start:end]. Each
+    window ends at the last paragraph (or line) break in its final quarter
+    when there is one, so requirements are not cut mid-sentence.
+    """
+    spans: List[Tuple[int, int]] = []
+    overlap = min(overlap, max_chars // 2)
+    pos = start
+    while pos < end:
+        stop = min(pos + max_chars, end)
+        if stop < end:
+            half = pos + max_chars * 3 // 4
+            for seps in (("\n\n", "\r\n\r\n"), ("\n",), (". ",)):
+                cut = max(text.rfind(sep, half, stop) + len(sep) for sep in seps)
+                if cut > half:
+                    stop = cut
+                    break
+        spans.append((pos, stop))
+        if stop == end:
+            break
+        pos = max(pos + 1, stop - overlap)
+    return spans
+
+
+def structural_spans(
+    text: str,
+    max_tokens: int = DEFAULT_MAX_TOKENS,
+    break_level: int = DEFAULT_BREAK_LEVEL,
+    overlap_ratio: float = 0.05,
+    model: Optional[str] = None,
+) -> List[Span]:
+    """
+    Chunk `text` along its heading structure (see module docstring).
+    Spans are contiguous and cover the whole text; each carries the heading
+    path of the section it starts in.
+    """
+    out: List[Span] = []
+    stack: List[Tuple[int, str]] = []
+
+    # Current section and the pack it is being added to.
+    sec_start = 0
+    sec_path: List[str] = []
+    pack: Optional[Span] = None
+    pack_tokens = 0
+
+    def close_section(end: int, hard_break: bool) -> None:
+        nonlocal pack, pack_tokens
+        if end <= sec_start:
+            return
+        tokens = estimate_tokens(text[sec_start:end], model)
+        if tokens > max_tokens:
+            if pack is not None:
+                out.append(pack)
+                pack, pack_tokens = None, 0
+            chars_per_token = (end - sec_start) / tokens
+            max_chars = max(1, int(max_tokens * chars_per_token))
+            for a, b in window_spans(text, sec_start, end, max_chars, int(max_chars * overlap_ratio)):
+                out.append(Span(a, b, list(sec_path)))
+            return
+        if pack is not None and (hard_break or pack_tokens + tokens > max_tokens):
+            out.append(pack)
+            pack, pack_tokens = None, 0
+        if pack is None:
+            pack = Span(sec_start, end, list(sec_path))
+        else:
+            pack.end = end
+        pack_tokens += tokens
+
+    pending_break = False
+    for start, end, heading in _paragraphs(text):
+        if heading is None:
+            continue
+        level, title = heading
+        close_section(start, pending_break)
+        while stack and stack[-1][0] >= level:
+            stack.pop()
+        stack.append((level, title))
+        sec_start = start
+        sec_path = [t for _, t in stack]
+        pending_break = level <= break_level
+
+    close_section(len(text), pending_break)
+    if pack is not None:
+        out.append(pack)
+    return out
@@ -0,0 +1,104 @@
+# orchestrator/pipeline.py
+"""
+run-next -> review -> apply, in one long-lived process.
+
+The serial autopilot used to start three interpreters per iteration
+(`orchestrator.cli run-next`, `review_latest`, `apply_latest_review`),
+each re-importing openai/anthropic/numpy/yaml, re-reading ops/config.yaml
+and building fresh SDK clients. Pipeline calls the same steps as
+functions and keeps what they share:
+
+- config is parsed once and re-read only when ops/config.yaml changes;
+- the LLMClient (OpenAI/Anthropic SDK clients) and the review ModelRouter
+  are built on first use and reused;
+- review_latest keeps its SDK clients in a module-level pool.
+
+Each iteration records per-step wall time in `timings`; the orchestration
+overhead is everything except the cursor-agent run and the LLM calls.
+`python -m orchestrator.bench.autopilot` compares it with the subprocess loop.
+"""
+
+from __future__ import annotations
+
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from . import apply_latest_review, cli, review_latest
+from .llm_client import LLMClient
+from .model_router import ModelRouter
+
+
+class Pipeline:
+    def __init__(self, repo_root: Path = cli.REPO_ROOT):
+        self.repo_root = repo_root
+        self._cfg: Optional[Dict[str, Any]] = None
+        self._cfg_mtime: Optional[float] = None
+        self._llm: Optional[LLMClient] = None
+        self._router: Optional[ModelRouter] = None
+        self.timings: List[Dict[str, float]] = []
+
+    # ---------- warm state ----------
+
+    @property
+    def cfg(self) -> Dict[str, Any]:
+        mtime = (self.repo_root / "ops" / "config.yaml").stat().st_mtime
+        if self._cfg is None or mtime != self._cfg_mtime:
+            self._cfg = cli.load_config(self.repo_root)
+            self._cfg_mtime = mtime
+            self._llm = None  # model names may have changed
+        return self._cfg
+
+    @property
+    def llm(self) -> LLMClient:
+        cfg = self.cfg
+        if self._llm is None:
+            self._llm = cli.make_llm(cfg)
+        return self._llm
+
+    @property
+    def router(self) -> ModelRouter:
+        if self._router is None:
+            self._router = ModelRouter()
+        return self._router
+
+    # ---------- steps ----------
+
+    def run_next(self, agent: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        return cli.run_next(self.cfg, self.llm, agent)
+
+    def review(self, wbs: str) -> Path:
+        return review_latest.main(wbs, router=self.router, root=self.repo_root)
+
+    def apply(self, wbs: str) -> str:
+        return apply_latest_review.apply(wbs)
+
+    def _step(self, name: str, fn, *args: Any) -> Any:
+        try:
+            return fn(*args)
+        except (Exception, SystemExit) as e:  # the steps report "nothing to do" via SystemExit
+            print(f"[autopilot] WARN: {name} raised {e!r}; continuing.")
+            return None
+
+    def iteration(self, agent: Optional[str] = None) -> Optional[str]:
+        """
+        One run-next/review/apply round; returns the task's new status, or None
+        if nothing ran. Steps are not retried: failed LLM calls were already
+        retried per request (orchestrator.resilience), and a provider whose
+        circuit breaker is open fails fast until the next iteration.
+        """
+        t: Dict[str, float] = {}
+        t0 = time.perf_counter()
+        item = self._step("run-next", self.run_next, agent)
+        t["run_next"] = time.perf_counter() - t0
+        status = None
+        if item is not None:
+            t1 = time.perf_counter()
+            self._step("review_latest", self.review, item["task_id"])
+            t["review"] = time.perf_counter() - t1
+            t2 = time.perf_counter()
+            status = self._step("apply_latest_review", self.apply, item["task_id"])
+            t["apply"] = time.perf_counter() - t2
+        t["total"] = time.perf_counter() - t0
+        self.timings.append(t)
+        return status
@@ -0,0 +1,833 @@
+# orchestrator/planning.py
+"""
+WBS planning: prompts, the streamed single-shot planner, the map-reduce
+planner behind `cli plan --map-reduce`, and the ops/ output writers.
+
+Single-shot planning streams the reply and hands every task to PlanWriter
+as soon as its closing brace arrives, so ops/wbs.json and ops/queue.jsonl
+grow while the model is still generating. A reply cut off by the output
+token limit is resumed: the model gets the tasks it already produced and
+is asked for the rest only.
+
+Single-shot planning still sends every chunk summary in one prompt.
+Map-reduce planning instead:
+
+1. clusters the (non-duplicate) chunks with spherical k-means on their
+   stored embeddings, ~`cluster_size` chunks per cluster;
+2. map: plans each cluster in parallel with cluster-local task ids
+   (C03-001, ...) plus free-text `needs` for prerequisites that probably
+   live in other clusters;
+3. reduce: sends only the task titles and needs to the model, which
+   returns a global order, duplicate merges, cross-cluster depends_on and
+   any cross-cutting tasks (docs, runbooks, meta-work);
+4. renumbers everything to WBS-001.. and rewrites depends_on.
+
+Every map result is cached under ops/plan_cache/ keyed by the model,
+prompt version and the cluster's chunk ids + summaries, so a failed or
+re-run reduce never repeats the map stage, and an unchanged cluster is
+never re-planned. The reduce reply is cached the same way.
+
+Every plan records a fingerprint per chunk in ops/plan_state.json.
+`plan --incremental` diffs the index against it and sends only new or
+changed summaries plus a one-line-per-task skeleton of the current WBS;
+the reply's new tasks are appended and its edits applied in place, while
+queue statuses, priorities and created_at stay as they are.
+
+The queue itself lives in orchestrator.queue_store (SQLite);
+ops/queue.jsonl is its export.
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import re
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np  # pip install numpy
+
+from . import ann_index
+from .concurrency import Throughput, map_bounded
+from .ingest_cache import sha256_text
+from .json_stream import TaskStreamParser
+from .llm_client import LLMClient
+from .queue_store import QueueStore
+from .resilience import retry_outside
+from .scheduler import break_cycles
+
+PLAN_PROMPT_VERSION = "v1"
+CACHE_DIR = Path("ops") / "plan_cache"
+STATE_FILE = Path("ops") / "plan_state.json"
+
+DEFAULT_PLANNING_CONFIG: Dict[str, Any] = {
+    "cluster_size": 120,
+    "workers": 4,
+    "max_retries": 2,
+    "max_resumes": 3,
+}
+
+AGENTS = ("AGENT-1", "AGENT-2", "AGENT-3", "AGENT-4")
+# A streamed plan rewrites ops/wbs.json at most this often (and always in finish()).
+WBS_FLUSH_SECONDS = 2.0
+LIST_FIELDS = ("depends_on", "blueprint_ids", "acceptance_criteria")
+
+AGENTS_BLOCK = (
+    "- AGENT-1: Bootstrap & DevOps\n"
+    "- AGENT-2: Backend & Services\n"
+    "- AGENT-3: Frontend & Developer Experience\n"
+    "- AGENT-4: QA, Security, Docs, Release\n\n"
+)
+
+TASK_SCHEMA = (
+    "    {\n"
+    '      \"id\": \"WBS-001\",\n'
+    '      \"title\": \"short name\",\n'
+    '      \"description\": \"1-3 paragraphs\",\n'
+    '      \"agent\": \"AGENT-1|AGENT-2|AGENT-3|AGENT-4\",\n'
+    '      \"depends_on\": [\"WBS-000\"],\n'
+    '      \"blueprint_ids\": [\"NT-0001\", \"TD-0007\"],\n'
+    '      \"phase\": \"Bootstrap|Backend|Frontend|QA|Ops|Docs|Other\",\n'
+    '      \"acceptance_criteria\": [\"...\", \"...\"]\n'
+    "    }\n"
+)
+
+CROSS_CUTTING_GUIDANCE = (
+    "You MUST include tasks not only for feature and infra work, but also for:\n"
+    "- Creating and maintaining core docs:\n"
+    "  - docs/ARCHITECTURE.md\n"
+    "  - docs/adr/ADR-xxxx-*.md (architecture decision records)\n"
+    "  - docs/runbooks/*.md (deploy, rollback, on-call, troubleshooting)\n"
+    "  - docs/ACCESS_ENVELOPE.md (God-mode-with-guardrails access policy)\n"
+    "  - docs/TEST_POLICY.md (zero-doubt testing policy)\n"
+    "  - docs/RISKS.md (risk log)\n"
+    "  - docs/FILE_INDEX.md or docs/CODEMAP.json (code/directory map)\n"
+    "- Orchestrator improvements and meta-work:\n"
+    "  - Idempotent tasks & resumable orchestrator runs (state.json, safe restart)\n"
+    "  - Token discipline patterns (chunk+summarise+index, never load huge blobs)\n"
+    "  - Per-agent prompt definitions in docs/agents/AGENT-*.md\n"
+    "  - Recurring meta-QA tasks by AGENT-4 to audit run reports & queue quality\n"
+    "  - Usage/cost tracking for LLM calls and CI runs\n\n"
+)
+
+TASK_RULES = (
+    "For each WBS task you output:\n"
+    "- Assign the most appropriate agent.\n"
+    "- Attach the relevant blueprint_ids from the list.\n"
+    "- Provide clear acceptance_criteria so Cursor agents can know when they are done.\n"
+    "- Ensure dependencies respect reality: infra before backend; backend before frontend;\n"
+    "  backend+frontend before E2E QA; docs & runbooks as the work matures.\n\n"
+)
+
+
+def plan_system_prompt() -> str:
+    return (
+        "You are a senior engineering program manager for a very large multi-month build. "
+        "You are given technical and non-technical blueprint fragments. "
+        "Your job is to construct a Work Breakdown Structure (WBS) and an execution queue for "
+        "four Cursor agents:\n"
+        + AGENTS_BLOCK
+        + "WBS must reflect implementation order, NOT document order.\n\n"
+        "You MUST output pure JSON (no markdown, no comments) of the form:\n"
+        "{\n"
+        '  \"tasks\": [\n' + TASK_SCHEMA + "  ]\n"
+        "}\n"
+    )
+
+
+def plan_user_prompt(summaries_block: str) -> str:
+    return (
+        "You will receive a list of blueprint chunks: `ID (doc_type): summary`.\n"
+        "Use these to reconstruct the big picture and propose a sane build order.\n\n"
+        + CROSS_CUTTING_GUIDANCE
+        + TASK_RULES
+        + "Now here are the blueprint chunk summaries:\n\n"
+        f"{summaries_block}"
+    )
+
+
+def summary_lines(rows: Sequence[Dict[str, Any]]) -> str:
+    """`ID (doc_type): summary` lines; near-duplicates are covered by their representative."""
+    lines: List[str] = []
+    for row in rows:
+        if row.get("duplicate_of"):
+            continue
+        lines.append(f"{row['id']} ({row['doc_type']}): {row.get('summary') or ''}")
+    return "\n".join(lines)
+
+
+def parse_json_reply(raw: str) -> Any:
+    """json.loads that tolerates a ```json fence around the payload."""
+    text = raw.strip()
+    fenced = re.match(r"^```(?:json)?\s*(.*?)\s*```$", text, re.DOTALL)
+    return json.loads(fenced.group(1) if fenced else text)
+
+
+# ---------- outputs ----------
+
+
+def validate_task(task: Any, seen: Sequence[str] = ()) -> Optional[str]:
+    """Why `task` can't go into the queue, or None. Normalises list fields in place."""
+    if not isinstance(task, dict):
+        return "not an object"
+    tid = task.get("id")
+    if not isinstance(tid, str) or not tid.strip():
+        return "missing id"
+    if tid in seen:
+        return f"duplicate id {tid}"
+    if task.get("agent") not in AGENTS:
+        return f"{tid}: unknown agent {task.get('agent')!r}"
+    for field in LIST_FIELDS:
+        value = task.get(field)
+        if value is None:
+            task[field] = []
+        elif isinstance(value, str):
+            task[field] = [value]
+        elif not isinstance(value, list):
+            return f"{tid}: {field} is not a list"
+    return None
+
+
+class PlanWriter:
+    """
+    Writes the task queue (ops/queue.sqlite, with each task appended to the
+    ops/queue.jsonl export) one task at a time, ops/wbs.json as it goes, and
+    docs/TODO_MASTER.md in finish(). wbs.json is rewritten atomically at
+    most every WBS_FLUSH_SECONDS, so it is valid JSON at any moment of a
+    streamed plan without costing a full rewrite per task; finish() writes
+    the final version. The previous plan and queue are only replaced once
+    the first task passes validation, so a failed or empty reply leaves
+    them as they were.
+    """
+
+    def __init__(self, repo_root: Path):
+        self.wbs_path = repo_root / "ops" / "wbs.json"
+        self.queue_path = repo_root / "ops" / "queue.jsonl"
+        self.todo_path = repo_root / "docs" / "TODO_MASTER.md"
+        self.wbs_path.parent.mkdir(parents=True, exist_ok=True)
+        self.tasks: List[Dict[str, Any]] = []
+        self.queue_items: List[Dict[str, Any]] = []
+        self.rejected: List[str] = []
+        self._ids: set = set()
+        self.store = QueueStore.for_repo(repo_root)
+        self._started = False
+        self._wbs_written: Optional[float] = None
+
+    def _start(self) -> None:
+        self.store.replace_all([])
+        self.store.export_jsonl()
+        self._started = True
+
+    def _write_wbs(self) -> None:
+        _write_json(self.wbs_path, self.tasks)
+        self._wbs_written = time.monotonic()
+
+    def add(self, task: Any) -> bool:
+        problem = validate_task(task, self._ids)
+        if problem:
+            self.rejected.append(problem)
+            print(f"[plan] Skipping task: {problem}")
+            return False
+        if not self._started:
+            self._start()
+        self.tasks.append(task)
+        self._ids.add(task["id"])
+        queue_item = {
+            "task_id": task["id"],
+            "agent": task["agent"],
+            "status": "todo",
+            "created_at": datetime.utcnow().isoformat() + "Z",
+            "blueprint_ids": task.get("blueprint_ids", []),
+            "title": task.get("title", ""),
+            "phase": task.get("phase", ""),
+            "depends_on": task.get("depends_on", []),
+            "acceptance_criteria": task.get("acceptance_criteria", []),
+            "priority": len(self.tasks),
+        }
+        self.queue_items.append(queue_item)
+        self.store.upsert(queue_item)
+        self.store.append_jsonl(queue_item["task_id"])
+        if self._wbs_written is None or time.monotonic() - self._wbs_written >= WBS_FLUSH_SECONDS:
+            self._write_wbs()
+        return True
+
+    def finish(self) -> None:
+        if not self._started:
+            print(f"[plan] No valid tasks; keeping the existing plan in {self.wbs_path}")
+            self.store.close()
+            return
+        removed = report_cycles(self.queue_items)
+        if removed:
+            fixed = {q["task_id"]: q["depends_on"] for q in self.queue_items}
+            for task in self.tasks:
+                task["depends_on"] = list(fixed[task["id"]])
+            self.store.update_fields({tid: {"depends_on": fixed[tid]} for tid, _ in removed})
+            self.store.export_jsonl()
+        self._write_wbs()
+        print(f"[plan] Wrote WBS with {len(self.tasks)} tasks to {self.wbs_path}")
+        print(f"[plan] Wrote queue items to {self.queue_path}")
+        write_todo_master(self.todo_path, self.queue_items)
+        print(f"[plan] Wrote human-readable TODO list to {self.todo_path}")
+        self.store.close()
+
+
+def report_cycles(queue_items: Sequence[Dict[str, Any]]) -> List[Tuple[str, str]]:
+    """Break dependency cycles in place (see scheduler.break_cycles) and say which edges went."""
+    removed = break_cycles(queue_items)
+    for task_id, dep_id in removed:
+        print(f"[plan] Dependency cycle: dropped {task_id} -> depends_on {dep_id}.")
+    return removed
+
+
+def write_todo_master(todo_path: Path, queue_items: Sequence[Dict[str, Any]]) -> None:
+    items = sorted(queue_items, key=lambda q: (q.get("phase", ""), q["agent"], q["priority"]))
+    lines_out: List[str] = [
+        "# Orchestrator To-Do List\n",
+        "_This file is generated from ops/queue.jsonl. Do not edit manually._\n",
+    ]
+    current_phase: Optional[str] = None
+    for item in items:
+        if item["status"] != "todo":
+            continue
+        phase = item.get("phase") or "Unspecified"
+        if phase != current_phase:
+            lines_out.append(f"\n## Phase: {phase}\n")
+            current_phase = phase
+        lines_out.append(
+            f"- [ ] `{item['task_id']}` **({item['agent']})** "
+            f"- {item.get('title','') or '(no title)'} (priority {item['priority']})"
+        )
+    todo_path.parent.mkdir(parents=True, exist_ok=True)
+    todo_path.write_text("\n".join(lines_out), encoding="utf-8")
+
+
+def _write_json(path: Path, data: Any) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(data, indent=2, ensure_ascii=False), encoding="utf-8")
+    tmp.replace(path)
+
+
+def write_plan_outputs(repo_root: Path, tasks: Sequence[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Write ops/wbs.json, ops/queue.jsonl and docs/TODO_MASTER.md; returns the accepted tasks."""
+    writer = PlanWriter(repo_root)
+    for task in tasks:
+        writer.add(task)
+    writer.finish()
+    return writer.tasks
+
+
+# ---------- streamed single-shot planning ----------
+
+
+def _resume_messages(messages: List[Dict[str, str]], done: Sequence[Dict[str, Any]]) -> List[Dict[str, str]]:
+    partial = '{"tasks": [' + ", ".join(json.dumps(t, ensure_ascii=False) for t in done)
+    return messages + [
+        {"role": "assistant", "content": partial},
+        {
+            "role": "user",
+            "content": (
+                f"Your reply was cut off after task {done[-1]['id']}. Continue the same plan: output "
+                'pure JSON {"tasks": [...]} containing ONLY the remaining tasks, continuing the id '
+                "sequence. Do not repeat any task above."
+            ),
+        },
+    ]
+
+
+def stream_plan(
+    llm: LLMClient,
+    messages: List[Dict[str, str]],
+    writer: PlanWriter,
+    max_resumes: int = 3,
+) -> List[Dict[str, Any]]:
+    """
+    Stream the planner reply into `writer`, task by task. If the reply ends
+    before its JSON closes, ask for the remaining tasks (up to
+    `max_resumes` times) instead of regenerating the whole plan.
+    """
+    request = messages
+    for attempt in range(max_resumes + 1):
+        parser = TaskStreamParser()
+        before = len(writer.tasks)
+        for piece in llm.stream_openai(messages=request, temperature=0.2):
+            for task in parser.feed(piece):
+                writer.add(task)
+        for err in parser.errors:
+            print(f"[plan] Skipping unparsable task: {err}")
+        if parser.complete:
+            return writer.tasks
+        if not writer.tasks:
+            print("[plan] Failed to parse JSON from model output. Raw output:")
+            print(parser.text)
+            raise ValueError("[plan] Model output contains no complete task.")
+        if attempt < max_resumes:
+            print(
+                f"[plan] Reply truncated after {len(writer.tasks)} tasks "
+                f"({len(writer.tasks) - before} new); resuming ({attempt + 1}/{max_resumes})..."
+            )
+            request = _resume_messages(messages, writer.tasks)
+    print(f"[plan] Reply still truncated after {max_resumes} resumes; keeping {len(writer.tasks)} tasks.")
+    return writer.tasks
+
+
+# ---------- clustering ----------
+
+
+def cluster_rows(
+    meta: Sequence[Dict[str, Any]],
+    matrix: np.ndarray,
+    cluster_size: int,
+    seed: int = 0,
+) -> List[List[int]]:
+    """
+    Group the non-duplicate meta rows into ~cluster_size clusters with
+    spherical k-means on their embeddings. Clusters keep document order
+    internally and are ordered by their first row.
+    """
+    rows = [i for i, row in enumerate(meta) if not row.get("duplicate_of")]
+    if not rows:
+        return []
+    k = max(1, math.ceil(len(rows) / max(1, cluster_size)))
+    if k == 1:
+        return [rows]
+    data = np.asarray(matrix[rows], dtype="float32")
+    centroids = ann_index.spherical_kmeans(data, k, seed=seed)
+    labels = np.argmax(data @ centroids.T, axis=1)
+    groups: Dict[int, List[int]] = {}
+    for row, label in zip(rows, labels):
+        groups.setdefault(int(label), []).append(row)
+    return sorted(groups.values(), key=lambda g: g[0])
+
+
+# ---------- map ----------
+
+
+def _map_messages(cluster_no: int, rows: Sequence[Dict[str, Any]]) -> List[Dict[str, str]]:
+    prefix = f"C{cluster_no:02d}"
+    system = (
+        plan_system_prompt()
+        + "\nYou are planning ONE slice of the blueprint; other slices are planned separately "
+        "and merged afterwards.\n"
+        f"- Use ids of the form {prefix}-001, {prefix}-002, ... (not WBS-xxx).\n"
+        "- depends_on may only reference ids from this slice.\n"
+        '- Add \"needs\": a list of short phrases naming prerequisites that are probably built '
+        "outside this slice (e.g. \"bookings database schema\"). Use [] when there are none.\n"
+        "- Do NOT add generic docs/runbook/meta tasks; those are planned globally.\n"
+    )
+    user = (
+        "You will receive a slice of the blueprint chunks: `ID (doc_type): summary`.\n"
+        "Plan the implementation work this slice describes.\n\n"
+        + TASK_RULES
+        + "Blueprint chunk summaries for this slice:\n\n"
+        + summary_lines(rows)
+    )
+    return [{"role": "system", "content": system}, {"role": "user", "content": user}]
+
+
+def _cache_path(repo_root: Path, kind: str, key: str) -> Path:
+    return repo_root / CACHE_DIR / f"{kind}-{key[:24]}.json"
+
+
+def _read_cache(path: Path) -> Optional[Any]:
+    if not path.exists():
+        return None
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except json.JSONDecodeError:
+        return None
+
+
+def map_clusters(
+    repo_root: Path,
+    llm: LLMClient,
+    clusters: Sequence[Sequence[Dict[str, Any]]],
+    workers: int = 4,
+    max_retries: int = 2,
+) -> List[List[Dict[str, Any]]]:
+    """Plan every cluster (cached results are reused). Returns tasks per cluster."""
+    model = llm.cfg.openai_model
+    messages = [_map_messages(c + 1, rows) for c, rows in enumerate(clusters)]
+    paths = [
+        _cache_path(repo_root, "map", sha256_text("map", model, PLAN_PROMPT_VERSION, json.dumps(m, ensure_ascii=False)))
+        for m in messages
+    ]
+    results: List[Optional[List[Dict[str, Any]]]] = [_read_cache(p) for p in paths]
+    todo = [c for c, cached in enumerate(results) if cached is None]
+    print(f"[plan] Map stage: {len(todo)} clusters to plan, {len(clusters) - len(todo)} cached.")
+
+    def plan_one(c: int) -> List[Dict[str, Any]]:
+        raw = llm.chat_openai(messages=messages[c], temperature=0.2)
+        tasks = parse_json_reply(raw).get("tasks") or []
+        if not isinstance(tasks, list):
+            raise ValueError(f"cluster {c + 1}: 'tasks' is not a list")
+        return tasks
+
+    def store(i: int, tasks: List[Dict[str, Any]]) -> None:
+        _write_json(paths[todo[i]], tasks)
+
+    outcome = map_bounded(
+        plan_one,
+        todo,
+        workers=workers,
+        max_retries=max_retries,
+        retry_if=retry_outside,
+        progress=Throughput("[plan]  - Planned cluster", len(todo), every=1),
+        on_result=store,
+    )
+    if outcome.errors:
+        i, err = min(outcome.errors.items())
+        raise RuntimeError(
+            f"[plan] {len(outcome.errors)} of {len(todo)} clusters failed (first: cluster {todo[i] + 1}). "
+            "Completed clusters are cached; re-run to retry only the failures."
+        ) from err
+    for i, tasks in zip(todo, outcome.results):
+        results[i] = tasks
+    return [r or [] for r in results]
+
+
+# ---------- reduce ----------
+
+
+def _reduce_messages(partials: Sequence[Sequence[Dict[str, Any]]]) -> List[Dict[str, str]]:
+    lines: List[str] = []
+    for tasks in partials:
+        for t in tasks:
+            needs = "; ".join(t.get("needs") or [])
+            deps = ", ".join(t.get("depends_on") or [])
+            lines.append(
+                f"{t['id']} [{t.get('agent', '')}/{t.get('phase', '')}] {t.get('title', '')}"
+                + (f" | depends_on: {deps}" if deps else "")
+                + (f" | needs: {needs}" if needs else "")
+            )
+    system = (
+        "You are a senior engineering program manager merging partial WBS plans that were "
+        "produced independently for slices of one product blueprint. Four Cursor agents:\n"
+        + AGENTS_BLOCK
+        + "You MUST output pure JSON (no markdown, no comments) of the form:\n"
+        "{\n"
+        '  \"order\": [\"C01-001\", \"C02-003\", ...],\n'
+        '  \"merge\": {\"C04-002\": \"C01-003\"},\n'
+        '  \"depends_on\": {\"C02-001\": [\"C01-002\"]},\n'
+        '  \"extra_tasks\": [\n' + TASK_SCHEMA.replace("WBS-001", "X-001").replace("WBS-000", "C01-001") + "  ]\n"
+        "}\n"
+        "- order: every task id in global implementation order (NOT document order).\n"
+        "- merge: duplicate task id -> the id it duplicates.\n"
+        "- depends_on: extra cross-slice dependencies, resolving each task's `needs`.\n"
+        "- extra_tasks: cross-cutting tasks no slice covers, with ids X-001, X-002, ...\n"
+    )
+    user = (
+        "Partial WBS tasks: `id [agent/phase] title | depends_on | needs`.\n\n"
+        + CROSS_CUTTING_GUIDANCE
+        + "Tasks:\n\n"
+        + "\n".join(lines)
+    )
+    return [{"role": "system", "content": system}, {"role": "user", "content": user}]
+
+
+def reduce_partials(
+    repo_root: Path,
+    llm: LLMClient,
+    partials: Sequence[Sequence[Dict[str, Any]]],
+) -> Dict[str, Any]:
+    messages = _reduce_messages(partials)
+    key = sha256_text("reduce", llm.cfg.openai_model, PLAN_PROMPT_VERSION, json.dumps(messages, ensure_ascii=False))
+    path = _cache_path(repo_root, "reduce", key)
+    cached = _read_cache(path)
+    if cached is not None:
+        print("[plan] Reduce stage: using cached merge.")
+        return cached
+    print("[plan] Reduce stage: merging partial plans...")
+    plan = parse_json_reply(llm.chat_openai(messages=messages, temperature=0.2))
+    if not isinstance(plan, dict):
+        raise ValueError("[plan] Reduce reply is not a JSON object")
+    _write_json(path, plan)
+    return plan
+
+
+def merge_plans(partials: Sequence[Sequence[Dict[str, Any]]], plan: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Apply the reduce decisions to the partial tasks and renumber to WBS-001..
+    Unknown ids in the reply are ignored; tasks the reply forgot to order
+    keep their cluster order after the ordered ones.
+    """
+    tasks: Dict[str, Dict[str, Any]] = {}
+    for partial in partials:
+        for t in partial:
+            if t.get("id") and t["id"] not in tasks:
+                tasks[t["id"]] = dict(t)
+    for t in plan.get("extra_tasks") or []:
+        if t.get("id") and t["id"] not in tasks:
+            tasks[t["id"]] = dict(t)
+
+    # Resolve merge chains (a -> b -> c) to their final survivor.
+    merge: Dict[str, str] = {a: b for a, b in (plan.get("merge") or {}).items() if a in tasks and b in tasks and a != b}
+
+    def survivor(tid: str) -> str:
+        seen = set()
+        while tid in merge and tid not in seen:
+            seen.add(tid)
+            tid = merge[tid]
+        return tid
+
+    for dup in list(merge):
+        keep = survivor(dup)
+        if keep == dup:
+            continue
+        src, dst = tasks.pop(dup), tasks[keep]
+        for field in ("blueprint_ids", "acceptance_criteria", "depends_on"):
+            dst[field] = list(dict.fromkeys((dst.get(field) or []) + (src.get(field) or [])))
+
+    for tid, deps in (plan.get("depends_on") or {}).items():
+        tid = survivor(tid)
+        if tid in tasks:
+            tasks[tid]["depends_on"] = list(tasks[tid].get("depends_on") or []) + list(deps or [])
+
+    ordered = list(dict.fromkeys(survivor(t) for t in plan.get("order") or [] if survivor(t) in tasks))
+    ordered += [tid for tid in tasks if tid not in ordered]
+    new_id = {tid: f"WBS-{n:03d}" for n, tid in enumerate(ordered, start=1)}
+    for old in merge:
+        new_id.setdefault(old, new_id.get(survivor(old), ""))
+
+    out: List[Dict[str, Any]] = []
+    for tid in ordered:
+        t = tasks[tid]
+        wid = new_id[tid]
+        deps = [new_id.get(survivor(d)) for d in t.get("depends_on") or []]
+        t = {k: v for k, v in t.items() if k != "needs"}
+        t["id"] = wid
+        t["depends_on"] = [d for d in dict.fromkeys(deps) if d and d != wid]
+        out.append(t)
+    return out
+
+
+def plan_map_reduce(
+    repo_root: Path,
+    llm: LLMClient,
+    meta: Sequence[Dict[str, Any]],
+    matrix: np.ndarray,
+    planning_cfg: Optional[Dict[str, Any]] = None,
+) -> List[Dict[str, Any]]:
+    settings = {**DEFAULT_PLANNING_CONFIG, **(planning_cfg or {})}
+    clusters = cluster_rows(meta, matrix, int(settings["cluster_size"]))
+    print(f"[plan] Clustered {sum(map(len, clusters))} chunks into {len(clusters)} clusters.")
+    partials = map_clusters(
+        repo_root,
+        llm,
+        [[meta[i] for i in cluster] for cluster in clusters],
+        workers=int(settings["workers"]),
+        max_retries=int(settings["max_retries"]),
+    )
+    plan = reduce_partials(repo_root, llm, partials)
+    return merge_plans(partials, plan)
+
+
+# ---------- incremental re-planning ----------
+
+
+def chunk_fingerprints(meta: Sequence[Dict[str, Any]]) -> Dict[str, str]:
+    """id -> hash of what the planner sees for that chunk (representatives only)."""
+    return {
+        row["id"]: sha256_text(row.get("doc_type") or "", row.get("summary") or "")
+        for row in meta
+        if not row.get("duplicate_of")
+    }
+
+
+def save_plan_state(repo_root: Path, meta: Sequence[Dict[str, Any]]) -> Path:
+    path = repo_root / STATE_FILE
+    _write_json(path, {"planned_at": datetime.utcnow().isoformat() + "Z", "chunks": chunk_fingerprints(meta)})
+    return path
+
+
+def diff_index(
+    repo_root: Path,
+    meta: Sequence[Dict[str, Any]],
+    wbs: Sequence[Dict[str, Any]],
+) -> Tuple[List[str], List[str], List[str]]:
+    """
+    (new, changed, removed) chunk ids since the last plan. Plans written
+    before plan_state.json existed count every chunk a WBS task cites as
+    unchanged and every other chunk as new.
+    """
+    current = chunk_fingerprints(meta)
+    state = _read_cache(repo_root / STATE_FILE)
+    if state is None:
+        print(f"[plan] No {STATE_FILE.as_posix()}; treating chunks cited by the WBS as already planned.")
+        cited = {bid for t in wbs for bid in t.get("blueprint_ids") or []}
+        previous = {cid: fp for cid, fp in current.items() if cid in cited}
+    else:
+        previous = state.get("chunks") or {}
+    new = [cid for cid in current if cid not in previous]
+    changed = [cid for cid in current if cid in previous and previous[cid] != current[cid]]
+    removed = [cid for cid in previous if cid not in current]
+    return new, changed, removed
+
+
+def _skeleton_lines(wbs: Sequence[Dict[str, Any]], status: Dict[str, str]) -> str:
+    lines = []
+    for t in wbs:
+        deps = ", ".join(t.get("depends_on") or [])
+        bps = ", ".join(t.get("blueprint_ids") or [])
+        lines.append(
+            f"{t['id']} [{t.get('agent', '')}/{t.get('phase', '')}/{status.get(t['id'], 'todo')}] {t.get('title', '')}"
+            + (f" | depends_on: {deps}" if deps else "")
+            + (f" | blueprints: {bps}" if bps else "")
+        )
+    return "\n".join(lines)
+
+
+def next_wbs_number(wbs: Sequence[Dict[str, Any]]) -> int:
+    numbers = [int(m.group(1)) for t in wbs for m in [re.match(r"^WBS-(\d+)$", str(t.get("id")))] if m]
+    return max(numbers, default=0) + 1
+
+
+def incremental_messages(
+    meta: Sequence[Dict[str, Any]],
+    wbs: Sequence[Dict[str, Any]],
+    status: Dict[str, str],
+    new: Sequence[str],
+    changed: Sequence[str],
+    removed: Sequence[str],
+) -> List[Dict[str, str]]:
+    touched = set(new) | set(changed)
+    rows = [row for row in meta if row["id"] in touched]
+    system = (
+        plan_system_prompt()
+        + "\nYou are UPDATING an existing WBS after the blueprint changed. Output only:\n"
+        f"- new tasks, with ids continuing from WBS-{next_wbs_number(wbs):03d};\n"
+        "- existing tasks whose scope must change, as full objects with their existing id.\n"
+        "Do not repeat unchanged tasks. Do not edit tasks whose status is done. "
+        "depends_on may reference existing and new task ids.\n"
+    )
+    parts = [
+        "Current WBS (`id [agent/phase/status] title | depends_on | blueprints`):\n\n",
+        _skeleton_lines(wbs, status),
+        "\n\nNew or changed blueprint chunk summaries:\n\n",
+        summary_lines(rows) or "(none)",
+    ]
+    if removed:
+        parts.append("\n\nChunks removed from the blueprint (drop them from blueprint_ids): " + ", ".join(removed))
+    return [{"role": "system", "content": system}, {"role": "user", "content": "".join(parts)}]
+
+
+def merge_incremental(
+    wbs: List[Dict[str, Any]],
+    queue: List[Dict[str, Any]],
+    updates: Sequence[Any],
+) -> Tuple[List[str], List[str]]:
+    """
+    Apply a reply's tasks to `wbs` and `queue` in place: known ids are
+    edited (status/priority/created_at untouched, done tasks skipped), new
+    ids appended as todo after the current lowest priority. Returns
+    (added ids, edited ids).
+    """
+    by_id = {t["id"]: t for t in wbs}
+    items = {q["task_id"]: q for q in queue}
+    valid: List[Dict[str, Any]] = []
+    fresh: List[str] = []
+    for update in updates:
+        problem = validate_task(update, fresh)
+        if problem:
+            print(f"[plan] Skipping task: {problem}")
+            continue
+        valid.append(update)
+        if update["id"] not in by_id:
+            fresh.append(update["id"])
+    # Only ids that will exist afterwards: a dependency on a rejected task would never be met.
+    known = set(by_id) | set(fresh)
+    priority = max((int(q.get("priority") or 0) for q in queue), default=0)
+    added: List[str] = []
+    edited: List[str] = []
+
+    for update in valid:
+        tid = update["id"]
+        update["depends_on"] = [d for d in update["depends_on"] if d in known and d != tid]
+        item = items.get(tid)
+        if tid in by_id:
+            if item is not None and item.get("status") == "done":
+                print(f"[plan] Not editing {tid}: already done.")
+                continue
+            by_id[tid].update({k: v for k, v in update.items() if k != "needs"})
+            if item is not None:
+                for field in ("agent", "title", "phase", *LIST_FIELDS):
+                    if field in update:
+                        item[field] = update[field]
+            edited.append(tid)
+            continue
+        priority += 1
+        wbs.append(update)
+        by_id[tid] = update
+        queue.append(
+            {
+                "task_id": tid,
+                "agent": update["agent"],
+                "status": "todo",
+                "created_at": datetime.utcnow().isoformat() + "Z",
+                "blueprint_ids": update["blueprint_ids"],
+                "title": update.get("title", ""),
+                "phase": update.get("phase", ""),
+                "depends_on": update["depends_on"],
+                "acceptance_criteria": update["acceptance_criteria"],
+                "priority": priority,
+            }
+        )
+        added.append(tid)
+    return added, edited
+
+
+def plan_incremental(repo_root: Path, llm: LLMClient, meta: Sequence[Dict[str, Any]]) -> bool:
+    """Re-plan only what changed in the index. Returns False when nothing changed."""
+    wbs_path = repo_root / "ops" / "wbs.json"
+    with QueueStore.for_repo(repo_root) as store:
+        queue = store.all()
+        if not wbs_path.exists() or not queue:
+            raise SystemExit("[plan] --incremental needs an existing WBS and queue; run `plan` first.")
+        wbs = json.loads(wbs_path.read_text(encoding="utf-8"))
+
+        new, changed, removed = diff_index(repo_root, meta, wbs)
+        print(f"[plan] Index diff: {len(new)} new, {len(changed)} changed, {len(removed)} removed chunks.")
+        if not (new or changed or removed):
+            print("[plan] Nothing to re-plan.")
+            return False
+
+        status = {q["task_id"]: q.get("status", "todo") for q in queue}
+        raw = llm.chat_openai(messages=incremental_messages(meta, wbs, status, new, changed, removed), temperature=0.2)
+        try:
+            reply = parse_json_reply(raw)
+        except json.JSONDecodeError:
+            print("[plan] Failed to parse JSON from model output. Raw output:")
+            print(raw)
+            raise
+        updates = reply.get("tasks", []) if isinstance(reply, dict) else reply
+        before = {q["task_id"]: json.dumps(q, sort_keys=True) for q in queue}
+        if removed:
+            gone = set(removed)
+            for task in wbs:
+                task["blueprint_ids"] = [b for b in task.get("blueprint_ids") or [] if b not in gone]
+            for item in queue:
+                item["blueprint_ids"] = [b for b in item.get("blueprint_ids") or [] if b not in gone]
+        added, edited = merge_incremental(wbs, queue, updates or [])
+        for task_id, dep_id in report_cycles(queue):
+            task = next(t for t in wbs if t["id"] == task_id)
+            task["depends_on"] = [d for d in task.get("depends_on") or [] if d != dep_id]
+
+        # Only touched items are written, and never their status/priority, so
+        # tasks claimed or finished while the model was thinking keep that state.
+        keep = ("status", "priority", "created_at")
+        store.update_fields(
+            {
+                q["task_id"]: {k: v for k, v in q.items() if k not in keep}
+                for q in queue
+                if q["task_id"] in before and json.dumps(q, sort_keys=True) != before[q["task_id"]]
+            }
+        )
+        store.upsert_many(q for q in queue if q["task_id"] in added)
+        store.export_jsonl()
+        _write_json(wbs_path, wbs)
+        write_todo_master(repo_root / "docs" / "TODO_MASTER.md", store.all())
+    save_plan_state(repo_root, meta)
+    print(f"[plan] Added {len(added)} tasks, edited {len(edited)}; {len(queue)} tasks in the queue.")
+    return True
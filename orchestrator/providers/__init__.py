@@ -22,7 +22,7 @@ import os
 import sys
 from typing import Any, Dict, List, Optional, Type
 
-from .base import LLMResponse, LLMProvider, _stub_reply, stub_enabled  # re-exported
+from .base import BaseProvider, LLMResponse, LLMProvider, _stub_reply, stub_enabled  # re-exported
 
 # ------------------------------------------------------------------------------
 # Debug logging
@@ -180,6 +180,7 @@ __all__ = [
     # base
     "LLMResponse",
     "LLMProvider",
+    "BaseProvider",
     "_stub_reply",
     "stub_enabled",
     # concrete providers (optional)
@@ -1,14 +1,16 @@
 from __future__ import annotations
 import os
-from typing import Optional
-from .base import LLMProvider
+from typing import Any, Dict, Optional
+from .base import BaseProvider
+from .. import resilience, sdk_clients
+from ..response_cache import acached_call, cached_call
 
 try:
     import anthropic as _anthropic  # Claude SDK
 except Exception:  # pragma: no cover
     _anthropic = None
 
-class AnthropicProvider(LLMProvider):
+class AnthropicProvider(BaseProvider):
     def __init__(self, default_model: Optional[str] = None):
         super().__init__(
             name="anthropic",
@@ -19,19 +21,35 @@ class AnthropicProvider(LLMProvider):
         return _anthropic is not None and bool(os.getenv("ANTHROPIC_API_KEY"))
 
     def _complete_impl(self, *, prompt: str, model: Optional[str], system: Optional[str], **kwargs) -> str:
-        client = _anthropic.Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
-        # Anthropic's Messages API
+        model = model or self.default_model
+        return cached_call(
+            "anthropic", model, *self._cache_args(prompt, system, kwargs),
+            lambda: self._request(prompt=prompt, model=model, system=system, **kwargs),
+            fresh=kwargs.get("fresh", False),
+        ) or ""
+
+    async def _acomplete_impl(self, *, prompt: str, model: Optional[str], system: Optional[str], **kwargs) -> str:
+        model = model or self.default_model
+        return await acached_call(
+            "anthropic", model, *self._cache_args(prompt, system, kwargs),
+            lambda: self._arequest(prompt=prompt, model=model, system=system, **kwargs),
+            fresh=kwargs.get("fresh", False),
+        ) or ""
+
+    def _params(self, *, prompt: str, model: Optional[str], system: Optional[str], **kwargs) -> Dict[str, Any]:
+        messages, sampling = self._cache_args(prompt, system, kwargs)
+        # Anthropic's Messages API takes the system prompt as its own field
         params = {
             "model": model or self.default_model,
-            "max_tokens": kwargs.get("max_tokens", 1024),
-            "temperature": kwargs.get("temperature", 0),
-            "messages": [{"role": "user", "content": prompt}],
+            **sampling,
+            "messages": [m for m in messages if m["role"] != "system"],
         }
-        if system:
-            params["system"] = system
-
-        resp = client.messages.create(**params)
+        if messages[0]["role"] == "system":
+            params["system"] = messages[0]["content"]
+        return params
 
+    @staticmethod
+    def _text(resp: Any) -> str:
         # Concatenate text blocks (Anthropic returns a list of blocks)
         text_parts = []
         try:
@@ -43,3 +61,13 @@ class AnthropicProvider(LLMProvider):
             pass
 
         return ("\n".join(text_parts) if text_parts else str(resp)).strip()
+
+    def _request(self, *, prompt: str, model: Optional[str], system: Optional[str], **kwargs) -> str:
+        client = sdk_clients.anthropic_client()
+        params = self._params(prompt=prompt, model=model, system=system, **kwargs)
+        return self._text(resilience.guard(self.name).call(lambda: client.messages.create(**params)))
+
+    async def _arequest(self, *, prompt: str, model: Optional[str], system: Optional[str], **kwargs) -> str:
+        client = sdk_clients.async_anthropic_client()
+        params = self._params(prompt=prompt, model=model, system=system, **kwargs)
+        return self._text(await resilience.guard(self.name).acall(lambda: client.messages.create(**params)))
@@ -1,9 +1,10 @@
 # orchestrator/providers/base.py
 from __future__ import annotations
 
+import asyncio
 import os
 from dataclasses import dataclass
-from typing import Any, Dict, List, Optional, Protocol, runtime_checkable
+from typing import Any, Dict, List, Optional, Protocol, Tuple, runtime_checkable
 
 # Env toggle used by tests/CI to stub out provider calls
 STUB_ENV = "ORCHESTRATOR_LLM_STUB"
@@ -24,12 +25,89 @@ class LLMProvider(Protocol):
     """
     Minimal protocol the orchestrator/tests expect.
     Concrete providers (OpenAIProvider, AnthropicProvider) should implement at
-    least one of: `chat` (messages) or `complete` (single prompt).
+    least one of: `chat` (messages) or `complete` (single prompt), and
+    their coroutine twins `achat` / `acomplete` for fan-out from asyncio.
     """
     model: str
 
     def chat(self, messages: List[Dict[str, str]], **kwargs: Any) -> LLMResponse: ...
     def complete(self, prompt: str, **kwargs: Any) -> LLMResponse: ...
+    async def achat(self, messages: List[Dict[str, str]], **kwargs: Any) -> LLMResponse: ...
+    async def acomplete(self, prompt: str, **kwargs: Any) -> LLMResponse: ...
+
+
+class BaseProvider:
+    """
+    Shared plumbing for the concrete providers: a name and default model,
+    plus `chat`/`complete` on top of one `_complete_impl(prompt, model,
+    system)` and `achat`/`acomplete` on top of `_acomplete_impl`. A provider
+    without a native async implementation runs `_complete_impl` on a worker
+    thread. With ORCHESTRATOR_LLM_STUB set, no request is made.
+    """
+
+    def __init__(self, name: str, default_model: str):
+        self.name = name
+        self.default_model = default_model
+
+    @property
+    def model(self) -> str:
+        return self.default_model
+
+    def _is_available(self) -> bool:
+        return False
+
+    def _complete_impl(self, *, prompt: str, model: Optional[str], system: Optional[str], **kwargs: Any) -> str:
+        raise NotImplementedError
+
+    async def _acomplete_impl(self, *, prompt: str, model: Optional[str], system: Optional[str], **kwargs: Any) -> str:
+        return await asyncio.to_thread(
+            lambda: self._complete_impl(prompt=prompt, model=model, system=system, **kwargs)
+        )
+
+    @staticmethod
+    def _cache_args(prompt: str, system: Optional[str], kwargs: Dict[str, Any]) -> Tuple[List[Dict[str, str]], Dict[str, Any]]:
+        """(messages, sampling) of one call: the response-cache key and the source of every request's params."""
+        messages = ([{"role": "system", "content": system}] if system else []) + [{"role": "user", "content": prompt}]
+        sampling = {"temperature": kwargs.get("temperature", 0), "max_tokens": kwargs.get("max_tokens", 1024)}
+        return messages, sampling
+
+    def _check_available(self) -> None:
+        if not self._is_available():
+            raise RuntimeError(f"{self.name} provider is not available (SDK not installed or API key missing).")
+
+    def complete(self, prompt: str, model: Optional[str] = None, system: Optional[str] = None, **kwargs: Any) -> LLMResponse:
+        model = model or self.default_model
+        if stub_enabled():
+            return _stub_reply(prompt, model=model)
+        self._check_available()
+        return LLMResponse(model=model, content=self._complete_impl(prompt=prompt, model=model, system=system, **kwargs))
+
+    async def acomplete(
+        self, prompt: str, model: Optional[str] = None, system: Optional[str] = None, **kwargs: Any
+    ) -> LLMResponse:
+        model = model or self.default_model
+        if stub_enabled():
+            return _stub_reply(prompt, model=model)
+        self._check_available()
+        text = await self._acomplete_impl(prompt=prompt, model=model, system=system, **kwargs)
+        return LLMResponse(model=model, content=text)
+
+    def chat(self, messages: List[Dict[str, str]], model: Optional[str] = None, **kwargs: Any) -> LLMResponse:
+        prompt, system = flatten_messages(messages)
+        return self.complete(prompt, model=model, system=system, **kwargs)
+
+    async def achat(self, messages: List[Dict[str, str]], model: Optional[str] = None, **kwargs: Any) -> LLMResponse:
+        prompt, system = flatten_messages(messages)
+        return await self.acomplete(prompt, model=model, system=system, **kwargs)
+
+
+def flatten_messages(messages: List[Dict[str, str]]) -> Tuple[str, Optional[str]]:
+    """(prompt, system) for a single-prompt API: system turns are joined, other turns labelled by role."""
+    system = "\n".join(m.get("content", "") for m in messages if m.get("role") == "system") or None
+    turns = [m for m in messages if m.get("role") != "system"]
+    if len(turns) == 1:
+        return turns[0].get("content", ""), system
+    return "\n\n".join(f"{(m.get('role') or 'user').upper()}: {m.get('content', '')}" for m in turns), system
 
 
 def stub_enabled() -> bool:
@@ -60,4 +138,4 @@ def _stub_reply(
     )
 
 
-__all__ = ["LLMResponse", "LLMProvider", "_stub_reply", "stub_enabled"]
+__all__ = ["LLMResponse", "LLMProvider", "BaseProvider", "flatten_messages", "_stub_reply", "stub_enabled"]
@@ -1,7 +1,9 @@
 from __future__ import annotations
 import os
-from typing import Optional
-from .base import LLMProvider
+from typing import Any, Dict, Optional
+from .base import BaseProvider
+from .. import resilience, sdk_clients
+from ..response_cache import acached_call, cached_call
 
 try:
     # Newer OpenAI SDK
@@ -9,7 +11,7 @@ try:
 except Exception:  # pragma: no cover
     _OpenAI = None  # SDK not installed; we'll stub
 
-class OpenAIProvider(LLMProvider):
+class OpenAIProvider(BaseProvider):
     def __init__(self, default_model: Optional[str] = None):
         super().__init__(
             name="openai",
@@ -20,17 +22,34 @@ class OpenAIProvider(LLMProvider):
         return _OpenAI is not None and bool(os.getenv("OPENAI_API_KEY"))
 
     def _complete_impl(self, *, prompt: str, model: Optional[str], system: Optional[str], **kwargs) -> str:
-        client = _OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-        messages = []
-        if system:
-            messages.append({"role": "system", "content": system})
-        messages.append({"role": "user", "content": prompt})
+        model = model or self.default_model
+        return cached_call(
+            "openai", model, *self._cache_args(prompt, system, kwargs),
+            lambda: self._request(prompt=prompt, model=model, system=system, **kwargs),
+            fresh=kwargs.get("fresh", False),
+        ) or ""
 
+    async def _acomplete_impl(self, *, prompt: str, model: Optional[str], system: Optional[str], **kwargs) -> str:
+        model = model or self.default_model
+        return await acached_call(
+            "openai", model, *self._cache_args(prompt, system, kwargs),
+            lambda: self._arequest(prompt=prompt, model=model, system=system, **kwargs),
+            fresh=kwargs.get("fresh", False),
+        ) or ""
+
+    def _params(self, *, prompt: str, model: Optional[str], system: Optional[str], **kwargs) -> Dict[str, Any]:
+        messages, sampling = self._cache_args(prompt, system, kwargs)
         # Use Chat Completions for broad compatibility
-        resp = client.chat.completions.create(
-            model=model or self.default_model,
-            messages=messages,
-            temperature=kwargs.get("temperature", 0),
-            max_tokens=kwargs.get("max_tokens", 1024),
-        )
+        return {"model": model or self.default_model, "messages": messages, **sampling}
+
+    def _request(self, *, prompt: str, model: Optional[str], system: Optional[str], **kwargs) -> str:
+        client = sdk_clients.openai_client()
+        params = self._params(prompt=prompt, model=model, system=system, **kwargs)
+        resp = resilience.guard(self.name).call(lambda: client.chat.completions.create(**params))
+        return (resp.choices[0].message.content or "").strip()
+
+    async def _arequest(self, *, prompt: str, model: Optional[str], system: Optional[str], **kwargs) -> str:
+        client = sdk_clients.async_openai_client()
+        params = self._params(prompt=prompt, model=model, system=system, **kwargs)
+        resp = await resilience.guard(self.name).acall(lambda: client.chat.completions.create(**params))
         return (resp.choices[0].message.content or "").strip()
@@ -0,0 +1,111 @@
+# orchestrator/query_cache.py
+"""
+On-disk LRU cache of search-query embeddings, keyed by (model, text).
+
+Planning and context backfills ask the same questions over and over (task
+titles, WBS descriptions), so a repeated query should not cost an
+embeddings request. Vectors are stored L2-normalised, ready for scoring.
+
+One SQLite file, docs/blueprints/query_cache.sqlite. Each hit refreshes
+the entry's last-used time; once the cache holds more than `max_entries`
+rows the least recently used ones are dropped.
+"""
+
+from __future__ import annotations
+
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Sequence
+
+import numpy as np  # pip install numpy
+
+from .ingest_cache import sha256_text
+
+CACHE_FILE = "query_cache.sqlite"
+MAX_ENTRIES = int(os.getenv("ORCHESTRATOR_QUERY_CACHE_MAX", "20000"))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS queries (
+    key TEXT PRIMARY KEY,
+    vector BLOB NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS queries_last_used ON queries (last_used);
+"""
+
+
+def query_key(text: str, model: str) -> str:
+    return sha256_text("query", model, text)
+
+
+class QueryEmbeddingCache:
+    def __init__(self, path: Path, max_entries: int = MAX_ENTRIES):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+
+    @classmethod
+    def for_docs_root(cls, docs_root: Path) -> "QueryEmbeddingCache":
+        return cls(docs_root / CACHE_FILE)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self) -> "QueryEmbeddingCache":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def get_many(self, model: str, texts: Iterable[str]) -> Dict[str, np.ndarray]:
+        """text -> cached vector for the texts that are cached; refreshes their LRU time."""
+        by_key = {query_key(t, model): t for t in texts}
+        keys = list(by_key)
+        out: Dict[str, np.ndarray] = {}
+        with self._lock:
+            for i in range(0, len(keys), 500):
+                batch = keys[i : i + 500]
+                marks = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM queries WHERE key IN ({marks})", batch
+                ).fetchall()
+                for key, blob in rows:
+                    out[by_key[key]] = np.frombuffer(blob, dtype="float32")
+            if out:
+                now = time.time()
+                self._conn.executemany(
+                    "UPDATE queries SET last_used = ? WHERE key = ?",
+                    [(now, query_key(t, model)) for t in out],
+                )
+                self._conn.commit()
+            self.hits += len(out)
+            self.misses += len(by_key) - len(out)
+        return out
+
+    def put_many(self, model: str, texts: Sequence[str], vectors: Sequence[Sequence[float]]) -> None:
+        now = time.time()
+        rows: List[tuple] = []
+        for text, vec in zip(texts, vectors):
+            rows.append((query_key(text, model), np.asarray(vec, dtype="float32").tobytes(), now))
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO queries (key, vector, last_used) VALUES (?, ?, ?)", rows
+            )
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM queries").fetchone()
+            if count > self.max_entries:
+                self._conn.execute(
+                    "DELETE FROM queries WHERE key IN "
+                    "(SELECT key FROM queries ORDER BY last_used ASC LIMIT ?)",
+                    (count - self.max_entries,),
+                )
+            self._conn.commit()
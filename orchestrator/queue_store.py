@@ -0,0 +1,364 @@
+# orchestrator/queue_store.py
+"""
+Transactional task queue: ops/queue.sqlite, with ops/queue.jsonl as an export.
+
+Every queue item (the dicts `plan` writes: task_id, agent, status,
+priority, depends_on, ...) is one row. The columns the queue is filtered
+and ordered by are real columns with indexes; the whole item is kept as
+JSON next to them so fields added later survive a round trip. Dependencies
+live in their own table so "is this task ready" is a single query.
+
+The database runs in WAL mode: readers never block the writer, and every
+mutation is one `BEGIN IMMEDIATE` transaction, so two processes calling
+claim_next() can never both get the same task and a status change never
+rewrites the queue. `export_jsonl()` writes ops/queue.jsonl (priority
+order, one item per line) for humans and git; it is a snapshot, not the
+source of truth. A store opened next to a queue.jsonl but without a
+database imports the JSONL once, so existing checkouts migrate silently.
+
+The database remembers the hash of the queue.jsonl it last imported or
+exported. A queue.jsonl that has changed since (pulled, or edited by hand)
+is re-imported when the store is opened, and export_jsonl() refuses to
+overwrite one that changes while a store is open.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+DB_FILE = Path("ops") / "queue.sqlite"
+JSONL_FILE = Path("ops") / "queue.jsonl"
+
+STATUSES = ("todo", "in_progress", "done", "review", "partial")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    task_id TEXT PRIMARY KEY,
+    agent TEXT NOT NULL,
+    status TEXT NOT NULL,
+    priority INTEGER NOT NULL,
+    updated_at TEXT NOT NULL,
+    item TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS tasks_status ON tasks (status);
+CREATE INDEX IF NOT EXISTS tasks_agent ON tasks (agent);
+CREATE INDEX IF NOT EXISTS tasks_priority ON tasks (priority);
+CREATE TABLE IF NOT EXISTS deps (
+    task_id TEXT NOT NULL,
+    dep_id TEXT NOT NULL,
+    PRIMARY KEY (task_id, dep_id)
+);
+CREATE INDEX IF NOT EXISTS deps_dep ON deps (dep_id);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+# A todo task is ready when every dependency exists and is done.
+_READY = """
+SELECT t.item FROM tasks t
+WHERE t.status = 'todo' {agent_filter}
+  AND NOT EXISTS (
+    SELECT 1 FROM deps d LEFT JOIN tasks u ON u.task_id = d.dep_id
+    WHERE d.task_id = t.task_id AND (u.status IS NULL OR u.status != 'done')
+  )
+ORDER BY t.priority, t.task_id
+"""
+
+
+def _now() -> str:
+    return datetime.utcnow().isoformat() + "Z"
+
+
+class QueueStore:
+    def __init__(self, path: Path, jsonl_path: Optional[Path] = None):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.jsonl_path = jsonl_path or path.with_suffix(".jsonl")
+        fresh = not path.exists()
+        self._lock = threading.Lock()
+        # Autocommit; transactions are explicit (BEGIN IMMEDIATE) below.
+        self._conn = sqlite3.connect(str(path), timeout=30, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        # (size, running sha256) of queue.jsonl as this store last wrote it; lets append_jsonl skip re-hashing.
+        self._jsonl_tail: Optional[tuple] = None
+        self._sync_from_jsonl(fresh)
+
+    def _sync_from_jsonl(self, fresh: bool) -> None:
+        current = _file_hash(self.jsonl_path)
+        synced = self._meta("jsonl_sha256")
+        if current is None:
+            return
+        if synced is None and not fresh:
+            # Database from before hashes were recorded: it has been exporting this file.
+            self._set_meta("jsonl_sha256", current)
+            return
+        if current == synced:
+            return
+        try:
+            items = _read_jsonl(self.jsonl_path)
+        except ValueError as e:
+            print(f"[queue] WARN: {self.jsonl_path.name} changed but does not parse ({e}); keeping {self.path.name}.")
+            return
+        if not items:
+            if not fresh:
+                print(f"[queue] WARN: {self.jsonl_path.name} is now empty; keeping {self.path.name}.")
+            return
+        self.replace_all(items)
+        self._set_meta("jsonl_sha256", current)
+        how = "Imported" if fresh else "Re-imported (changed outside the store)"
+        print(f"[queue] {how} {len(items)} items from {self.jsonl_path.name} into {self.path.name}.")
+
+    def _meta(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key: str, value: str) -> None:
+        self._write(lambda conn: conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value)))
+
+    @classmethod
+    def for_repo(cls, repo_root: Path) -> "QueueStore":
+        return cls(repo_root / DB_FILE, repo_root / JSONL_FILE)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self) -> "QueueStore":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    # ---------- writes ----------
+
+    def _write(self, fn) -> Any:
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                out = fn(self._conn)
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+            return out
+
+    @staticmethod
+    def _upsert(conn: sqlite3.Connection, item: Dict[str, Any]) -> None:
+        conn.execute(
+            "INSERT OR REPLACE INTO tasks (task_id, agent, status, priority, updated_at, item) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                item["task_id"],
+                item.get("agent") or "",
+                item.get("status") or "todo",
+                int(item.get("priority") or 0),
+                _now(),
+                json.dumps(item, ensure_ascii=False),
+            ),
+        )
+        conn.execute("DELETE FROM deps WHERE task_id = ?", (item["task_id"],))
+        conn.executemany(
+            "INSERT OR IGNORE INTO deps (task_id, dep_id) VALUES (?, ?)",
+            [(item["task_id"], d) for d in item.get("depends_on") or []],
+        )
+
+    def upsert_many(self, items: Iterable[Dict[str, Any]]) -> None:
+        items = list(items)
+
+        def run(conn: sqlite3.Connection) -> None:
+            for item in items:
+                self._upsert(conn, item)
+
+        self._write(run)
+
+    def upsert(self, item: Dict[str, Any]) -> None:
+        self.upsert_many([item])
+
+    def replace_all(self, items: Iterable[Dict[str, Any]]) -> None:
+        items = list(items)
+
+        def run(conn: sqlite3.Connection) -> None:
+            conn.execute("DELETE FROM tasks")
+            conn.execute("DELETE FROM deps")
+            for item in items:
+                self._upsert(conn, item)
+
+        self._write(run)
+
+    def update_fields(self, changes: Dict[str, Dict[str, Any]]) -> None:
+        """
+        Merge `changes[task_id]` into each existing item in one transaction,
+        on top of the item's current state (so a concurrent status change is
+        kept unless `status` is among the changed fields).
+        """
+
+        def run(conn: sqlite3.Connection) -> None:
+            for task_id, fields in changes.items():
+                row = conn.execute("SELECT item FROM tasks WHERE task_id = ?", (task_id,)).fetchone()
+                if row is not None:
+                    self._upsert(conn, {**json.loads(row[0]), **fields})
+
+        self._write(run)
+
+    def set_status(self, task_id: str, status: str) -> Optional[str]:
+        """Set one task's status; returns the old status, or None if there is no such task."""
+
+        def run(conn: sqlite3.Connection) -> Optional[str]:
+            row = conn.execute("SELECT status, item FROM tasks WHERE task_id = ?", (task_id,)).fetchone()
+            if row is None:
+                return None
+            item = json.loads(row[1])
+            item["status"] = status
+            conn.execute(
+                "UPDATE tasks SET status = ?, updated_at = ?, item = ? WHERE task_id = ?",
+                (status, _now(), json.dumps(item, ensure_ascii=False), task_id),
+            )
+            return row[0]
+
+        return self._write(run)
+
+    def claim(self, task_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Atomically mark `task_id` in_progress if it is still a ready todo
+        task. None when another process got there first (or it is blocked).
+        """
+
+        def run(conn: sqlite3.Connection) -> Optional[Dict[str, Any]]:
+            sql = _READY.format(agent_filter="AND t.task_id = ?")
+            row = conn.execute(sql, (task_id,)).fetchone()
+            if row is None:
+                return None
+            return self._mark_in_progress(conn, row[0])
+
+        return self._write(run)
+
+    @staticmethod
+    def _mark_in_progress(conn: sqlite3.Connection, raw: str) -> Dict[str, Any]:
+        item = json.loads(raw)
+        item["status"] = "in_progress"
+        conn.execute(
+            "UPDATE tasks SET status = 'in_progress', updated_at = ?, item = ? WHERE task_id = ?",
+            (_now(), json.dumps(item, ensure_ascii=False), item["task_id"]),
+        )
+        return item
+
+    def claim_next(self, agent: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Atomically pick the highest-priority ready todo task (optionally for
+        one agent) and mark it in_progress. None when nothing is ready.
+        """
+
+        def run(conn: sqlite3.Connection) -> Optional[Dict[str, Any]]:
+            row = conn.execute(*self._ready_query(agent, limit=1)).fetchone()
+            if row is None:
+                return None
+            return self._mark_in_progress(conn, row[0])
+
+        return self._write(run)
+
+    # ---------- reads ----------
+
+    @staticmethod
+    def _ready_query(agent: Optional[str], limit: Optional[int] = None):
+        sql = _READY.format(agent_filter="AND t.agent = ?" if agent else "")
+        if limit is not None:
+            sql += f" LIMIT {int(limit)}"
+        return sql, (agent,) if agent else ()
+
+    def ready(self, agent: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Todo tasks whose dependencies are all done, in priority order."""
+        with self._lock:
+            rows = self._conn.execute(*self._ready_query(agent)).fetchall()
+        return [json.loads(r[0]) for r in rows]
+
+    def get(self, task_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute("SELECT item FROM tasks WHERE task_id = ?", (task_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def all(self, status: Optional[str] = None) -> List[Dict[str, Any]]:
+        sql = "SELECT item FROM tasks"
+        params: tuple = ()
+        if status:
+            sql += " WHERE status = ?"
+            params = (status,)
+        with self._lock:
+            rows = self._conn.execute(sql + " ORDER BY priority, task_id", params).fetchall()
+        return [json.loads(r[0]) for r in rows]
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM tasks GROUP BY status").fetchall()
+        return {status: n for status, n in rows}
+
+    def export_jsonl(self, path: Optional[Path] = None) -> Path:
+        """
+        Write the queue as JSONL in priority order (atomic replace). The
+        store's own queue.jsonl is left alone, with a warning, if it was
+        changed outside the store since the last import/export; it is
+        re-imported the next time a store is opened.
+        """
+        own = path is None
+        path = path or self.jsonl_path
+        if own:
+            current, synced = _file_hash(path), self._meta("jsonl_sha256")
+            if current is not None and synced is not None and current != synced:
+                print(f"[queue] WARN: {path} was changed outside the store; not overwriting it.")
+                return path
+        tmp = path.with_suffix(".jsonl.tmp")
+        with tmp.open("w", encoding="utf-8") as f:
+            for item in self.all():
+                f.write(json.dumps(item, ensure_ascii=False) + "\n")
+        tmp.replace(path)
+        if own:
+            data = path.read_bytes()
+            self._jsonl_tail = (len(data), hashlib.sha256(data))
+            self._set_meta("jsonl_sha256", self._jsonl_tail[1].hexdigest())
+        return path
+
+    def append_jsonl(self, task_id: str) -> Path:
+        """
+        Append one stored item to queue.jsonl, for writers that add items in
+        priority order (the streamed planner) without rewriting the whole
+        export each time. Falls back to export_jsonl() unless the file is
+        exactly what this store last wrote.
+        """
+        path = self.jsonl_path
+        tail = self._jsonl_tail
+        item = self.get(task_id)
+        if tail is None or item is None or not path.exists() or path.stat().st_size != tail[0]:
+            return self.export_jsonl()
+        data = (json.dumps(item, ensure_ascii=False) + os.linesep).encode("utf-8")  # as text-mode export writes it
+        with path.open("ab") as f:
+            f.write(data)
+        tail[1].update(data)
+        self._jsonl_tail = (tail[0] + len(data), tail[1])
+        self._set_meta("jsonl_sha256", tail[1].hexdigest())
+        return path
+
+
+def _file_hash(path: Path) -> Optional[str]:
+    try:
+        return hashlib.sha256(path.read_bytes()).hexdigest()
+    except FileNotFoundError:
+        return None
+
+
+def _read_jsonl(path: Path) -> List[Dict[str, Any]]:
+    items = []
+    for line in path.read_text(encoding="utf-8").splitlines():
+        if line.strip():
+            items.append(json.loads(line))
+    return items
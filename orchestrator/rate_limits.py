@@ -0,0 +1,515 @@
+# orchestrator/rate_limits.py
+"""
+Requests/min and tokens/min buckets shared by every orchestrator process.
+
+The autopilot, the dispatcher's agents and ingest all call the same APIs
+from separate processes; an in-process RateLimiter cannot see the others,
+so together they overrun the account limits and recover by failing and
+restarting. Here the buckets live in one SQLite file (ops/rate_limits.sqlite,
+WAL mode), one pair per (provider, model), and every take/refill is a
+`BEGIN IMMEDIATE` transaction, so all processes draw from the same budget.
+
+The pooled SDK clients (orchestrator.sdk_clients) install httpx event hooks
+from `event_hooks`/`async_event_hooks`:
+- before a request is sent, its cost (1 request, estimated prompt tokens +
+  max_tokens) is taken from the buckets, sleeping just long enough when
+  they are short;
+- every response's rate-limit headers (OpenAI `x-ratelimit-*`, Anthropic
+  `anthropic-ratelimit-*`) reset the bucket capacity to the account limit
+  and lower the level to what the API says remains;
+- a 429 blocks that model for every process until its Retry-After.
+
+Another process holding the write lock can stall a transaction for up to
+the 30 s busy timeout, so the async hooks run the SQLite work on a worker
+thread (asyncio.to_thread) and never block the event loop.
+
+Budgets are learned from the headers. Until the first response, a model
+is unlimited unless ops/config.yaml has a budget for it:
+
+    rate_limits:
+      openai: {requests_per_minute: 500, tokens_per_minute: 200000}
+      "anthropic:claude-3-5-sonnet": {tokens_per_minute: 80000}
+
+    python -m orchestrator.rate_limits stats | reset
+
+ORCHESTRATOR_RATE_LIMIT=0 turns the shared buckets off.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+from .tokens import estimate_tokens
+
+ROOT = Path(__file__).resolve().parent.parent
+LIMITS_FILE = ROOT / "ops" / "rate_limits.sqlite"
+KINDS = ("requests", "tokens")
+# Waits at least this long are logged.
+LOG_WAIT_SECONDS = 1.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS buckets (
+    provider TEXT NOT NULL,
+    model TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    capacity REAL NOT NULL,
+    level REAL NOT NULL,
+    updated REAL NOT NULL,
+    blocked_until REAL NOT NULL DEFAULT 0,
+    PRIMARY KEY (provider, model, kind)
+);
+"""
+
+
+@dataclass(frozen=True)
+class Budget:
+    requests_per_minute: Optional[float] = None
+    tokens_per_minute: Optional[float] = None
+
+    def capacity(self, kind: str) -> Optional[float]:
+        value = self.requests_per_minute if kind == "requests" else self.tokens_per_minute
+        return value if value and value > 0 else None
+
+
+# ------------------------------------------------------------------------------
+# Header parsing
+# ------------------------------------------------------------------------------
+_DURATION = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_UNIT_SECONDS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+def parse_duration(value: Optional[str], now: Optional[float] = None) -> Optional[float]:
+    """Seconds from "6m0s" / "20ms" (OpenAI), "12" (Retry-After) or an RFC 3339 / HTTP date."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    parts = _DURATION.findall(value)
+    if parts and "".join(n + u for n, u in parts) == value:
+        return sum(float(n) * _UNIT_SECONDS[u] for n, u in parts)
+    now = time.time() if now is None else now
+    try:
+        when = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        try:
+            when = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+    return max(0.0, when.timestamp() - now)
+
+
+def _header(headers: Mapping[str, str], *names: str) -> Optional[str]:
+    for name in names:
+        value = headers.get(name)
+        if value is not None:
+            return value
+    return None
+
+
+def _number(value: Optional[str]) -> Optional[float]:
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def parse_headers(headers: Mapping[str, str]) -> Dict[str, Tuple[Optional[float], Optional[float]]]:
+    """{kind: (limit, remaining)} from OpenAI or Anthropic rate-limit headers; kinds without headers are left out."""
+    out: Dict[str, Tuple[Optional[float], Optional[float]]] = {}
+    for kind in KINDS:
+        names = [
+            (f"x-ratelimit-limit-{kind}", f"x-ratelimit-remaining-{kind}"),
+            (f"anthropic-ratelimit-{kind}-limit", f"anthropic-ratelimit-{kind}-remaining"),
+        ]
+        if kind == "tokens":
+            # Accounts with split limits report input tokens, which is what prompts consume.
+            names.append(("anthropic-ratelimit-input-tokens-limit", "anthropic-ratelimit-input-tokens-remaining"))
+        for limit_name, remaining_name in names:
+            limit = _number(headers.get(limit_name))
+            remaining = _number(headers.get(remaining_name))
+            if limit is not None or remaining is not None:
+                out[kind] = (limit, remaining)
+                break
+    return out
+
+
+def retry_after(headers: Mapping[str, str]) -> Optional[float]:
+    """How long a 429 asks us to wait: retry-after-ms, Retry-After, else the later bucket reset."""
+    ms = _number(headers.get("retry-after-ms"))
+    if ms is not None:
+        return ms / 1000.0
+    seconds = parse_duration(headers.get("retry-after"))
+    if seconds is not None:
+        return seconds
+    resets = [
+        parse_duration(_header(headers, f"x-ratelimit-reset-{kind}", f"anthropic-ratelimit-{kind}-reset"))
+        for kind in KINDS
+    ]
+    resets = [r for r in resets if r is not None]
+    return max(resets) if resets else None
+
+
+# ------------------------------------------------------------------------------
+# Shared buckets
+# ------------------------------------------------------------------------------
+class SharedRateLimiter:
+    def __init__(self, path: Path = LIMITS_FILE, budgets: Optional[Mapping[str, Budget]] = None):
+        self.path = path
+        self.budgets: Dict[str, Budget] = dict(budgets or {})
+        self.waited = 0.0
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def __enter__(self) -> "SharedRateLimiter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _db(self, create: bool) -> Optional[sqlite3.Connection]:
+        # Nothing is written until there is a budget to enforce, so runs
+        # against unlimited endpoints never create the file.
+        if self._conn is None:
+            if not create and not self.path.exists():
+                return None
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(_SCHEMA)
+        return self._conn
+
+    def budget(self, provider: str, model: str) -> Budget:
+        return self.budgets.get(f"{provider}:{model}") or self.budgets.get(provider) or Budget()
+
+    def _rows(self, conn: sqlite3.Connection, provider: str, model: str) -> Dict[str, List[float]]:
+        rows = conn.execute(
+            "SELECT kind, capacity, level, updated, blocked_until FROM buckets WHERE provider = ? AND model = ?",
+            (provider, model),
+        ).fetchall()
+        return {kind: [capacity, level, updated, blocked] for kind, capacity, level, updated, blocked in rows}
+
+    def _seed(self, rows: Dict[str, List[float]], provider: str, model: str, now: float) -> None:
+        budget = self.budget(provider, model)
+        for kind in KINDS:
+            capacity = budget.capacity(kind)
+            if kind not in rows and capacity:
+                rows[kind] = [capacity, capacity, now, 0.0]
+
+    @staticmethod
+    def _refill(row: List[float], now: float) -> None:
+        capacity, level, updated, _ = row
+        row[2] = now
+        if capacity <= 0:  # size not known yet (a 429 came before any headers)
+            return
+        row[1] = min(capacity, level + max(0.0, now - updated) * capacity / 60.0)
+
+    @staticmethod
+    def _save(conn: sqlite3.Connection, provider: str, model: str, rows: Dict[str, List[float]]) -> None:
+        conn.executemany(
+            "INSERT OR REPLACE INTO buckets (provider, model, kind, capacity, level, updated, blocked_until) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [(provider, model, kind, *row) for kind, row in rows.items()],
+        )
+
+    def try_acquire(self, provider: str, model: str, tokens: int = 0) -> float:
+        """Take one request and `tokens` now and return 0, or return the seconds to wait (nothing taken)."""
+        now = time.time()
+        with self._lock:
+            budget = self.budget(provider, model)
+            conn = self._db(create=any(budget.capacity(kind) for kind in KINDS))
+            if conn is None:
+                return 0.0
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = self._rows(conn, provider, model)
+                self._seed(rows, provider, model, now)
+                if not rows:
+                    conn.execute("COMMIT")
+                    return 0.0
+                wait = max(0.0, max(row[3] for row in rows.values()) - now)
+                for kind, row in rows.items():
+                    self._refill(row, now)
+                    # An oversize call waits for a full bucket, not forever.
+                    need = 1.0 if kind == "requests" else float(min(tokens, row[0]))
+                    if row[0] > 0 and row[1] < need:
+                        wait = max(wait, (need - row[1]) * 60.0 / row[0])
+                if wait == 0.0:
+                    for kind, row in rows.items():
+                        if row[0] > 0:
+                            row[1] -= 1.0 if kind == "requests" else float(min(tokens, row[0]))
+                self._save(conn, provider, model, rows)
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        return wait
+
+    def acquire(self, provider: str, model: str, tokens: int = 0) -> float:
+        """Block until the call fits the shared buckets; returns seconds waited."""
+        waited = 0.0
+        while True:
+            wait = self.try_acquire(provider, model, tokens)
+            if wait == 0.0:
+                self._note(provider, model, waited)
+                return waited
+            time.sleep(wait)
+            waited += wait
+
+    async def aacquire(self, provider: str, model: str, tokens: int = 0) -> float:
+        """`acquire` for coroutines: the transaction runs on a worker thread and the wait is an asyncio.sleep."""
+        waited = 0.0
+        while True:
+            wait = await asyncio.to_thread(self.try_acquire, provider, model, tokens)
+            if wait == 0.0:
+                self._note(provider, model, waited)
+                return waited
+            await asyncio.sleep(wait)
+            waited += wait
+
+    def _note(self, provider: str, model: str, waited: float) -> None:
+        self.waited += waited
+        if waited >= LOG_WAIT_SECONDS:
+            print(f"[rate_limits] waited {waited:.1f}s for {provider}/{model}")
+
+    def update(self, provider: str, model: str, limits: Mapping[str, Tuple[Optional[float], Optional[float]]]) -> None:
+        """Apply {kind: (limit, remaining)} as reported by the API."""
+        if not limits:
+            return
+        now = time.time()
+        with self._lock:
+            conn = self._db(create=True)
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = self._rows(conn, provider, model)
+                self._seed(rows, provider, model, now)
+                for kind, (limit, remaining) in limits.items():
+                    row = rows.get(kind)
+                    if row is None or row[0] <= 0:
+                        if not limit:
+                            continue
+                        row = rows[kind] = [limit, limit, now, row[3] if row else 0.0]
+                    self._refill(row, now)
+                    if limit:
+                        row[0] = limit
+                        row[1] = min(row[1], limit)
+                    if remaining is not None:
+                        # Calls other processes have in flight are already taken
+                        # locally but not yet counted by the API: never raise the level.
+                        row[1] = min(row[1], remaining)
+                self._save(conn, provider, model, rows)
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+    def block(self, provider: str, model: str, seconds: float) -> None:
+        """Make every process wait `seconds` before its next call to this model (after a 429)."""
+        until = time.time() + seconds
+        with self._lock:
+            conn = self._db(create=True)
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = self._rows(conn, provider, model)
+                self._seed(rows, provider, model, time.time())
+                if not rows:
+                    # A 429 before any limit is known: keep the block on an unsized bucket.
+                    rows["requests"] = [0.0, 0.0, time.time(), 0.0]
+                for row in rows.values():
+                    row[3] = max(row[3], until)
+                self._save(conn, provider, model, rows)
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+    def observe(self, provider: str, model: str, status: int, headers: Mapping[str, str]) -> None:
+        """Feed one API response back into the buckets."""
+        self.update(provider, model, parse_headers(headers))
+        if status == 429:
+            self.block(provider, model, retry_after(headers) or 1.0)
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        now = time.time()
+        with self._lock:
+            conn = self._db(create=False)
+            if conn is None:
+                return []
+            rows = conn.execute(
+                "SELECT provider, model, kind, capacity, level, updated, blocked_until FROM buckets ORDER BY provider, model, kind"
+            ).fetchall()
+        out = []
+        for provider, model, kind, capacity, level, updated, blocked in rows:
+            row = [capacity, level, updated, blocked]
+            self._refill(row, now)
+            out.append(
+                {
+                    "provider": provider,
+                    "model": model,
+                    "kind": kind,
+                    "capacity": capacity,
+                    "level": row[1],
+                    "blocked_for": max(0.0, blocked - now),
+                }
+            )
+        return out
+
+    def reset(self) -> None:
+        with self._lock:
+            conn = self._db(create=False)
+            if conn is not None:
+                conn.execute("DELETE FROM buckets")
+
+
+# ------------------------------------------------------------------------------
+# httpx hooks for the SDK clients
+# ------------------------------------------------------------------------------
+def _text_of(content: Any) -> str:
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        return "\n".join(_text_of(part) for part in content)
+    if isinstance(content, dict):
+        return _text_of(content.get("text") or content.get("content") or "")
+    return ""
+
+
+def request_cost(body: bytes) -> Tuple[str, int]:
+    """(model, estimated tokens) of an OpenAI/Anthropic JSON request body: prompt text + max output tokens."""
+    try:
+        payload = json.loads(body or b"{}")
+    except (ValueError, UnicodeDecodeError):
+        return "", 0
+    if not isinstance(payload, dict):
+        return "", 0
+    model = str(payload.get("model") or "")
+    parts = [_text_of(payload.get("system"))]
+    parts += [_text_of(m.get("content")) for m in payload.get("messages") or [] if isinstance(m, dict)]
+    parts.append(_text_of(payload.get("input")))
+    text = "\n".join(p for p in parts if p)
+    prompt = estimate_tokens(text, model or None) if text else 0
+    output = payload.get("max_tokens") or payload.get("max_completion_tokens") or payload.get("max_output_tokens") or 0
+    return model, prompt + int(output)
+
+
+def _request_model_and_cost(request: Any) -> Tuple[str, int]:
+    try:
+        return request_cost(request.content)
+    except Exception:  # streamed / unread bodies: count the request only
+        return "", 0
+
+
+def event_hooks(provider: str) -> Dict[str, List[Any]]:
+    """httpx.Client event hooks that run every `provider` call through the shared buckets."""
+
+    def on_request(request: Any) -> None:
+        limiter = shared()
+        if limiter is not None:
+            model, tokens = _request_model_and_cost(request)
+            request.extensions["orchestrator_model"] = model
+            limiter.acquire(provider, model, tokens)
+
+    def on_response(response: Any) -> None:
+        limiter = shared()
+        if limiter is not None:
+            model = response.request.extensions.get("orchestrator_model")
+            if model is None:
+                model, _ = _request_model_and_cost(response.request)
+            limiter.observe(provider, model, response.status_code, response.headers)
+
+    return {"request": [on_request], "response": [on_response]}
+
+
+def async_event_hooks(provider: str) -> Dict[str, List[Any]]:
+    """httpx.AsyncClient counterpart of `event_hooks`."""
+    sync = event_hooks(provider)
+
+    async def on_request(request: Any) -> None:
+        limiter = shared()
+        if limiter is not None:
+            model, tokens = _request_model_and_cost(request)
+            request.extensions["orchestrator_model"] = model
+            await limiter.aacquire(provider, model, tokens)
+
+    async def on_response(response: Any) -> None:
+        await asyncio.to_thread(sync["response"][0], response)
+
+    return {"request": [on_request], "response": [on_response]}
+
+
+# ------------------------------------------------------------------------------
+# Process-wide instance
+# ------------------------------------------------------------------------------
+def load_budgets(config_path: Path = ROOT / "ops" / "config.yaml") -> Dict[str, Budget]:
+    """The `rate_limits:` section of ops/config.yaml as {"provider" | "provider:model": Budget}."""
+    if not config_path.exists():
+        return {}
+    try:
+        import yaml
+
+        cfg = yaml.safe_load(config_path.read_text(encoding="utf-8")) or {}
+    except Exception:
+        return {}
+    section = cfg.get("rate_limits") or {}
+    return {
+        str(key): Budget(value.get("requests_per_minute"), value.get("tokens_per_minute"))
+        for key, value in section.items()
+        if isinstance(value, dict)
+    }
+
+
+_shared: Optional[SharedRateLimiter] = None
+_shared_lock = threading.Lock()
+
+
+def shared() -> Optional[SharedRateLimiter]:
+    """The process-wide limiter on ops/rate_limits.sqlite, or None when ORCHESTRATOR_RATE_LIMIT=0."""
+    global _shared
+    if os.getenv("ORCHESTRATOR_RATE_LIMIT", "1").lower() in ("0", "false", "no", "off"):
+        return None
+    with _shared_lock:
+        if _shared is None:
+            _shared = SharedRateLimiter(budgets=load_budgets())
+        return _shared
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Inspect or reset the shared rate-limit buckets")
+    ap.add_argument("command", choices=("stats", "reset"))
+    ap.add_argument("--path", default=str(LIMITS_FILE))
+    args = ap.parse_args()
+    with SharedRateLimiter(Path(args.path)) as limiter:
+        if args.command == "reset":
+            limiter.reset()
+            print("[rate_limits] reset")
+        rows = limiter.snapshot()
+        if not rows:
+            print("[rate_limits] no buckets yet")
+        for row in rows:
+            blocked = f", blocked {row['blocked_for']:.1f}s" if row["blocked_for"] else ""
+            size = f"{row['level']:.0f}/{row['capacity']:.0f} per minute" if row["capacity"] else "limit not known yet"
+            print(f"[rate_limits] {row['provider']}/{row['model'] or '-'} {row['kind']}: {size}{blocked}")
+
+
+if __name__ == "__main__":
+    main()
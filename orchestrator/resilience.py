@@ -0,0 +1,305 @@
+# orchestrator/resilience.py
+"""
+Retries and circuit breakers for provider calls.
+
+Every network call to a provider goes through that provider's guard
+(`guard("openai").call(fn)` / `await guard(...).acall(afn)`):
+
+- 429s, 5xx (incl. Anthropic's 529 "overloaded"), timeouts and connection
+  errors are retried with jittered exponential backoff; when the API sends
+  Retry-After (or retry-after-ms) that wait is used instead. Anything else
+  (bad request, auth, ...) is raised straight away.
+- 5xx/timeouts/connection errors count against a circuit breaker. After
+  `failure_threshold` of them in a row the breaker opens and calls fail
+  immediately with CircuitOpenError for `cooldown_seconds`; then one trial
+  call is let through, and its outcome closes or re-opens the breaker.
+  429s are the rate limiter's business (orchestrator.rate_limits), not a
+  sign of an outage, so they never trip it.
+
+The SDK clients are built with max_retries=0 (orchestrator.sdk_clients) so
+a request is never retried by both layers. Batch helpers that wrap guarded
+calls (concurrency.map_bounded / agather) pass `retry_if=retry_outside`, so
+they only retry what no guard has handled, such as a reply that does not
+parse. Breaker state is per process and visible through `states()` and
+LLMRouter.health().
+
+Environment:
+- ORCHESTRATOR_LLM_MAX_RETRIES          retries per call (default 3)
+- ORCHESTRATOR_LLM_BACKOFF_SECONDS      first backoff (default 1)
+- ORCHESTRATOR_LLM_MAX_BACKOFF_SECONDS  backoff / Retry-After cap (default 60)
+- ORCHESTRATOR_LLM_BREAKER_FAILURES     failures that open a breaker (default 5)
+- ORCHESTRATOR_LLM_BREAKER_COOLDOWN     seconds a breaker stays open (default 60)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Optional, TypeVar
+
+from .rate_limits import retry_after
+
+R = TypeVar("R")
+
+RATE_LIMITED = "rate_limited"
+TRANSIENT = "transient"
+FATAL = "fatal"
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+_TRANSIENT_STATUS = {408, 409, 500, 502, 503, 504, 529}
+# SDK / httpx exception class names for network-level failures; matched by
+# name so neither SDK has to be importable here.
+_TRANSIENT_NAMES = (
+    "APIConnectionError",
+    "APITimeoutError",
+    "TimeoutException",
+    "ConnectError",
+    "ReadError",
+    "WriteError",
+    "RemoteProtocolError",
+    "ConnectTimeout",
+    "ReadTimeout",
+    "PoolTimeout",
+)
+
+
+class CircuitOpenError(RuntimeError):
+    """The provider's breaker is open; the call was not attempted."""
+
+    def __init__(self, provider: str, retry_in: float):
+        super().__init__(f"{provider} circuit breaker is open; retry in {retry_in:.0f}s")
+        self.provider = provider
+        self.retry_in = retry_in
+
+
+def _status_of(exc: BaseException) -> Optional[int]:
+    status = getattr(exc, "status_code", None)
+    if status is None:
+        status = getattr(getattr(exc, "response", None), "status_code", None)
+    return status if isinstance(status, int) else None
+
+
+def classify(exc: BaseException) -> str:
+    """RATE_LIMITED, TRANSIENT (worth retrying, counts against the breaker) or FATAL."""
+    status = _status_of(exc)
+    if status == 429:
+        return RATE_LIMITED
+    if status is not None:
+        return TRANSIENT if status in _TRANSIENT_STATUS or status >= 500 else FATAL
+    if isinstance(exc, (TimeoutError, ConnectionError)):
+        return TRANSIENT
+    if any(cls.__name__ in _TRANSIENT_NAMES for cls in type(exc).__mro__):
+        return TRANSIENT
+    return FATAL
+
+
+def retry_outside(exc: BaseException) -> bool:
+    """retry_if for loops around guarded calls: False once a guard has retried or refused the error."""
+    return not isinstance(exc, CircuitOpenError) and not getattr(exc, "_guarded", False)
+
+
+def _give_up(exc: Exception) -> Exception:
+    try:
+        exc._guarded = True  # type: ignore[attr-defined]
+    except AttributeError:  # exceptions with __slots__
+        pass
+    return exc
+
+
+def server_retry_after(exc: BaseException) -> Optional[float]:
+    """Seconds the API asked us to wait (Retry-After & co.), if the error carries a response."""
+    headers = getattr(getattr(exc, "response", None), "headers", None)
+    return retry_after(headers) if headers is not None else None
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    max_retries: int = 3
+    backoff_seconds: float = 1.0
+    max_backoff_seconds: float = 60.0
+
+    @classmethod
+    def from_env(cls) -> "RetryPolicy":
+        return cls(
+            max_retries=int(os.getenv("ORCHESTRATOR_LLM_MAX_RETRIES", "3")),
+            backoff_seconds=float(os.getenv("ORCHESTRATOR_LLM_BACKOFF_SECONDS", "1")),
+            max_backoff_seconds=float(os.getenv("ORCHESTRATOR_LLM_MAX_BACKOFF_SECONDS", "60")),
+        )
+
+    def delay(self, attempt: int, exc: BaseException) -> float:
+        """Wait before retry number `attempt` (1-based): the server's Retry-After, else jittered exponential."""
+        asked = server_retry_after(exc)
+        if asked is not None:
+            return min(asked, self.max_backoff_seconds)
+        return min(self.max_backoff_seconds, self.backoff_seconds * (2 ** (attempt - 1)) * (0.5 + random.random()))
+
+
+class CircuitBreaker:
+    def __init__(self, name: str, failure_threshold: int = 5, cooldown_seconds: float = 60.0):
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.cooldown_seconds = cooldown_seconds
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._trial_running = False
+        self._consecutive = 0
+        self._lock = threading.Lock()
+        self.counts: Dict[str, int] = {
+            "calls": 0,
+            "successes": 0,
+            "failures": 0,
+            "retries": 0,
+            "rejected": 0,
+            "opened": 0,
+        }
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current(time.monotonic())
+
+    def _current(self, now: float) -> str:
+        if self._state == OPEN and now - self._opened_at >= self.cooldown_seconds:
+            self._state = HALF_OPEN
+            self._trial_running = False
+        return self._state
+
+    def before_call(self) -> None:
+        """Raise CircuitOpenError unless a call may go out now."""
+        with self._lock:
+            now = time.monotonic()
+            state = self._current(now)
+            if state == OPEN or (state == HALF_OPEN and self._trial_running):
+                self.counts["rejected"] += 1
+                retry_in = max(0.0, self.cooldown_seconds - (now - self._opened_at)) if state == OPEN else 1.0
+                raise CircuitOpenError(self.name, retry_in)
+            if state == HALF_OPEN:
+                self._trial_running = True
+            self.counts["calls"] += 1
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.counts["successes"] += 1
+            self._consecutive = 0
+            self._state = CLOSED
+            self._trial_running = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.counts["failures"] += 1
+            self._consecutive += 1
+            if self._state == HALF_OPEN or self._consecutive >= self.failure_threshold:
+                if self._state != OPEN:
+                    self.counts["opened"] += 1
+                self._state = OPEN
+                self._opened_at = time.monotonic()
+                self._trial_running = False
+
+    def record_retry(self) -> None:
+        with self._lock:
+            self.counts["retries"] += 1
+
+    def record_neutral(self) -> None:
+        """The provider answered (429, 4xx): not a failure, but no proof of recovery for a trial call either."""
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._trial_running = False
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            now = time.monotonic()
+            state = self._current(now)
+            reopen = max(0.0, self.cooldown_seconds - (now - self._opened_at)) if state == OPEN else 0.0
+            return {"state": state, "consecutive_failures": self._consecutive, "retry_in": reopen, **self.counts}
+
+
+class ProviderGuard:
+    """Retry policy + circuit breaker for one provider."""
+
+    def __init__(self, name: str, policy: Optional[RetryPolicy] = None, breaker: Optional[CircuitBreaker] = None):
+        self.name = name
+        self.policy = policy or RetryPolicy.from_env()
+        self.breaker = breaker or CircuitBreaker(
+            name,
+            failure_threshold=int(os.getenv("ORCHESTRATOR_LLM_BREAKER_FAILURES", "5")),
+            cooldown_seconds=float(os.getenv("ORCHESTRATOR_LLM_BREAKER_COOLDOWN", "60")),
+        )
+
+    def _after_failure(self, attempt: int, exc: Exception) -> Optional[float]:
+        """Book the failure; return the wait before retrying, or None to give up."""
+        kind = classify(exc)
+        if kind == TRANSIENT:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_neutral()
+        if kind == FATAL or attempt > self.policy.max_retries or self.breaker.state == OPEN:
+            return None
+        self.breaker.record_retry()
+        wait = self.policy.delay(attempt, exc)
+        print(f"[resilience] {self.name}: {type(exc).__name__} ({kind}); retry {attempt}/{self.policy.max_retries} in {wait:.1f}s")
+        return wait
+
+    def call(self, fn: Callable[[], R]) -> R:
+        attempt = 0
+        while True:
+            attempt += 1
+            self.breaker.before_call()
+            try:
+                out = fn()
+            except Exception as e:
+                wait = self._after_failure(attempt, e)
+                if wait is None:
+                    raise _give_up(e)
+                time.sleep(wait)
+                continue
+            self.breaker.record_success()
+            return out
+
+    async def acall(self, afn: Callable[[], Awaitable[R]]) -> R:
+        attempt = 0
+        while True:
+            attempt += 1
+            self.breaker.before_call()
+            try:
+                out = await afn()
+            except Exception as e:
+                wait = self._after_failure(attempt, e)
+                if wait is None:
+                    raise _give_up(e)
+                await asyncio.sleep(wait)
+                continue
+            self.breaker.record_success()
+            return out
+
+
+_guards: Dict[str, ProviderGuard] = {}
+_guards_lock = threading.Lock()
+
+
+def guard(provider: str) -> ProviderGuard:
+    """The process-wide guard for `provider` (created on first use)."""
+    with _guards_lock:
+        g = _guards.get(provider)
+        if g is None:
+            g = _guards[provider] = ProviderGuard(provider)
+        return g
+
+
+def states() -> Dict[str, Dict[str, Any]]:
+    """Breaker snapshot per provider used so far in this process."""
+    with _guards_lock:
+        guards = list(_guards.values())
+    return {g.name: g.breaker.snapshot() for g in guards}
+
+
+def reset() -> None:
+    """Forget all guards (fresh breakers, policies re-read from the environment)."""
+    with _guards_lock:
+        _guards.clear()
@@ -0,0 +1,287 @@
+# orchestrator/response_cache.py
+"""
+Content-addressed on-disk cache of LLM text responses.
+
+Reviews, sweeps and planning prompts are re-issued with identical inputs
+across autopilot iterations. Every chat/complete entry point (llm.py,
+LLMClient, the providers, review_latest) asks this cache first, keyed by
+sha256(provider, model, normalised messages, sampling params), so a repeat
+costs no API time. Only deterministic requests are cached: a call with a
+non-zero temperature always goes to the API, so sampled output is never
+frozen and replayed.
+
+One SQLite file shared by all orchestrator processes (ops/llm_cache.sqlite,
+WAL mode). Entries older than the TTL are never served; when the stored
+text exceeds the size budget the least recently used entries are evicted.
+Hit/miss/eviction counts are kept per process and, summed over all
+processes, in the file itself:
+
+    python -m orchestrator.response_cache stats | prune | clear
+
+Environment:
+- ORCHESTRATOR_LLM_CACHE=0            disable the cache
+- ORCHESTRATOR_LLM_CACHE_FRESH=1      bypass reads (results are still stored)
+- ORCHESTRATOR_LLM_CACHE_MAX_MB       size budget (default 256)
+- ORCHESTRATOR_LLM_CACHE_TTL_DAYS     entry lifetime (default 30)
+Individual calls bypass it with fresh=True.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Mapping, Optional, Sequence
+
+from .ingest_cache import sha256_text
+
+ROOT = Path(__file__).resolve().parent.parent
+CACHE_FILE = ROOT / "ops" / "llm_cache.sqlite"
+MAX_BYTES = int(float(os.getenv("ORCHESTRATOR_LLM_CACHE_MAX_MB", "256")) * 1024 * 1024)
+TTL_SECONDS = float(os.getenv("ORCHESTRATOR_LLM_CACHE_TTL_DAYS", "30")) * 86400
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    provider TEXT NOT NULL,
+    model TEXT NOT NULL,
+    text TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created REAL NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used);
+CREATE TABLE IF NOT EXISTS stats (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+
+def _normalise_content(content: Any) -> str:
+    if not isinstance(content, str):
+        return json.dumps(content, sort_keys=True, ensure_ascii=False)
+    lines = content.replace("\r\n", "\n").replace("\r", "\n").split("\n")
+    return "\n".join(line.rstrip() for line in lines).strip()
+
+
+def response_key(
+    provider: str,
+    model: Optional[str],
+    messages: Sequence[Mapping[str, Any]],
+    params: Optional[Mapping[str, Any]] = None,
+) -> str:
+    """Line endings and trailing whitespace do not change the key; unset (None) params are ignored."""
+    msgs = [[m.get("role", "user"), _normalise_content(m.get("content", ""))] for m in messages]
+    sampling = {k: v for k, v in (params or {}).items() if v is not None}
+    return sha256_text(
+        "response",
+        provider,
+        model or "",
+        json.dumps(msgs, ensure_ascii=False),
+        json.dumps(sampling, sort_keys=True),
+    )
+
+
+class ResponseCache:
+    def __init__(self, path: Path = CACHE_FILE, max_bytes: int = MAX_BYTES, ttl_seconds: float = TTL_SECONDS):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(path), timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self) -> "ResponseCache":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _bump(self, name: str, n: int = 1) -> None:
+        self._conn.execute(
+            "INSERT INTO stats (name, value) VALUES (?, ?) ON CONFLICT(name) DO UPDATE SET value = value + ?",
+            (name, n, n),
+        )
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT text FROM responses WHERE key = ? AND created >= ?", (key, now - self.ttl_seconds)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                self._bump("misses")
+                return None
+            self._conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+            self.hits += 1
+            self._bump("hits")
+            return row[0]
+
+    def put(self, key: str, provider: str, model: Optional[str], text: str) -> None:
+        now = time.time()
+        size = len(text.encode("utf-8"))
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, provider, model, text, size, created, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, provider, model or "", text, size, now, now),
+            )
+            self._evict(now)
+
+    def _evict(self, now: float) -> int:
+        removed = self._conn.execute("DELETE FROM responses WHERE created < ?", (now - self.ttl_seconds,)).rowcount
+        (total,) = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()
+        if total > self.max_bytes:
+            victims: List[str] = []
+            for key, size in self._conn.execute("SELECT key, size FROM responses ORDER BY last_used ASC"):
+                if total <= self.max_bytes:
+                    break
+                victims.append(key)
+                total -= size
+            self._conn.executemany("DELETE FROM responses WHERE key = ?", [(k,) for k in victims])
+            removed += len(victims)
+        if removed:
+            self.evictions += removed
+            self._bump("evictions", removed)
+        return removed
+
+    def prune(self) -> int:
+        with self._lock:
+            return self._evict(time.time())
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.execute("DELETE FROM stats")
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            out = dict(self._conn.execute("SELECT name, value FROM stats").fetchall())
+            entries, size = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        return {"entries": entries, "bytes": size, **{k: out.get(k, 0) for k in ("hits", "misses", "evictions")}}
+
+    def call(
+        self,
+        provider: str,
+        model: Optional[str],
+        messages: Sequence[Mapping[str, Any]],
+        params: Optional[Mapping[str, Any]],
+        fn: Callable[[], Optional[str]],
+        fresh: bool = False,
+    ) -> Optional[str]:
+        """Return the cached reply, or run `fn` and store what it returns (None / "" are not stored)."""
+        if not cacheable(params):
+            return fn()
+        key = response_key(provider, model, messages, params)
+        if not fresh_requested(fresh):
+            hit = self.get(key)
+            if hit is not None:
+                return hit
+        text = fn()
+        if text:
+            self.put(key, provider, model, text)
+        return text
+
+
+def cacheable(params: Optional[Mapping[str, Any]]) -> bool:
+    """Only temperature-0 requests: anything sampled must reach the API every time."""
+    return float((params or {}).get("temperature") or 0) == 0
+
+
+def fresh_requested(fresh: bool = False) -> bool:
+    """True when this call (or the whole process, via ORCHESTRATOR_LLM_CACHE_FRESH) must skip cached replies."""
+    return fresh or os.getenv("ORCHESTRATOR_LLM_CACHE_FRESH", "0").lower() in ("1", "true", "yes", "on")
+
+
+_shared: Optional[ResponseCache] = None
+_shared_lock = threading.Lock()
+
+
+def shared() -> Optional[ResponseCache]:
+    """The process-wide cache at ops/llm_cache.sqlite, or None when ORCHESTRATOR_LLM_CACHE=0."""
+    global _shared
+    if os.getenv("ORCHESTRATOR_LLM_CACHE", "1").lower() in ("0", "false", "no", "off"):
+        return None
+    with _shared_lock:
+        if _shared is None:
+            _shared = ResponseCache()
+        return _shared
+
+
+def cached_call(
+    provider: str,
+    model: Optional[str],
+    messages: Sequence[Mapping[str, Any]],
+    params: Optional[Mapping[str, Any]],
+    fn: Callable[[], Optional[str]],
+    fresh: bool = False,
+    cache: Optional[ResponseCache] = None,
+) -> Optional[str]:
+    """`ResponseCache.call` on `cache` (default: the shared one); just `fn()` when caching is off."""
+    cache = cache or shared()
+    if cache is None:
+        return fn()
+    return cache.call(provider, model, messages, params, fn, fresh=fresh)
+
+
+async def acached_call(
+    provider: str,
+    model: Optional[str],
+    messages: Sequence[Mapping[str, Any]],
+    params: Optional[Mapping[str, Any]],
+    afn: Callable[[], Awaitable[Optional[str]]],
+    fresh: bool = False,
+    cache: Optional[ResponseCache] = None,
+) -> Optional[str]:
+    """`cached_call` for coroutines: only `afn()` is awaited; the SQLite lookups are local and short."""
+    cache = cache or shared()
+    if cache is None or not cacheable(params):
+        return await afn()
+    key = response_key(provider, model, messages, params)
+    if not fresh_requested(fresh):
+        hit = cache.get(key)
+        if hit is not None:
+            return hit
+    text = await afn()
+    if text:
+        cache.put(key, provider, model, text)
+    return text
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Inspect or trim the LLM response cache")
+    ap.add_argument("command", choices=("stats", "prune", "clear"))
+    ap.add_argument("--path", default=str(CACHE_FILE))
+    args = ap.parse_args()
+    with ResponseCache(Path(args.path)) as cache:
+        if args.command == "prune":
+            print(f"[response_cache] evicted {cache.prune()} entries")
+        elif args.command == "clear":
+            cache.clear()
+            print("[response_cache] cleared")
+        stats = cache.stats()
+        looked_up = stats["hits"] + stats["misses"]
+        rate = stats["hits"] / looked_up if looked_up else 0.0
+        print(
+            f"[response_cache] {stats['entries']} entries, {stats['bytes'] / 1024 / 1024:.1f} MiB; "
+            f"hits {stats['hits']}, misses {stats['misses']} ({rate:.0%} hit rate), evictions {stats['evictions']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
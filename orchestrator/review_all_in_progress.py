@@ -2,9 +2,6 @@ from __future__ import annotations
 
 import json
 import os
-import re
-import subprocess
-import sys
 from dataclasses import dataclass
 from datetime import datetime, timezone
 from pathlib import Path
@@ -12,6 +9,7 @@ from typing import Dict, List, Optional
 
 from openai import OpenAI
 
+from . import resilience, sdk_clients, task_status
 
 ROOT = Path(__file__).resolve().parent.parent
 RUN_REPORTS_DIR = ROOT / "docs" / "runs"
@@ -25,36 +23,8 @@ class RunReport:
     wbs_id: str
 
 
-def _run(cmd: List[str]) -> subprocess.CompletedProcess:
-    return subprocess.run(
-        cmd,
-        cwd=ROOT,
-        text=True,
-        capture_output=True,
-    )
-
-
 def get_wbs_by_status() -> Dict[str, List[str]]:
-    proc = _run([sys.executable, "-m", "orchestrator.task_status", "list"])
-    if proc.returncode != 0:
-        raise RuntimeError(f"task_status list failed: {proc.stderr}")
-
-    status_map: Dict[str, List[str]] = {}
-    current_status: Optional[str] = None
-
-    for raw in proc.stdout.splitlines():
-        line = raw.strip()
-        if line.startswith("Status:"):
-            parts = line.split()
-            if len(parts) >= 2:
-                current_status = parts[1]
-                status_map.setdefault(current_status, [])
-        else:
-            m = re.search(r"(WBS-\d+)", line)
-            if current_status and m:
-                status_map.setdefault(current_status, []).append(m.group(1))
-
-    return status_map
+    return task_status.ids_by_status()
 
 
 def find_run_report_for_wbs(wbs_id: str) -> Optional[RunReport]:
@@ -104,7 +74,7 @@ def log_model_decision(payload: dict) -> None:
 
 def call_openai_for_wbs(wbs_id: str, report_text: str) -> str:
     model = choose_model_for_task(wbs_id, report_text)
-    client = OpenAI()
+    client: OpenAI = sdk_clients.openai_client()
 
     system_prompt = (
         "You are the autopilot orchestrator for a large engineering project.\n"
@@ -127,12 +97,14 @@ def call_openai_for_wbs(wbs_id: str, report_text: str) -> str:
     print(f"[review_all_in_progress] Calling OpenAI for {wbs_id} ...")
     started_at = datetime.now(timezone.utc).isoformat()
 
-    resp = client.chat.completions.create(
-        model=model,
-        messages=[
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": report_text},
-        ],
+    resp = resilience.guard("openai").call(
+        lambda: client.chat.completions.create(
+            model=model,
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": report_text},
+            ],
+        )
     )
 
     content = resp.choices[0].message.content or ""
@@ -161,20 +133,9 @@ def call_openai_for_wbs(wbs_id: str, report_text: str) -> str:
 
 def set_wbs_status(wbs_id: str, status: str) -> None:
     print(f"[review_all_in_progress] Setting {wbs_id} -> {status}")
-    proc = _run(
-        [
-            sys.executable,
-            "-m",
-            "orchestrator.task_status",
-            "set",
-            "--id",
-            wbs_id,
-            "--status",
-            status,
-        ]
-    )
-    sys.stdout.write(proc.stdout)
-    sys.stderr.write(proc.stderr)
+    old = task_status.set_status(wbs_id, status)
+    if old is None:
+        print(f"[review_all_in_progress] WARN: {wbs_id} is not in the queue.")
 
 
 def main() -> None:
@@ -1,18 +1,23 @@
 from __future__ import annotations
+import argparse
 import os
 import re
 import time
+from dataclasses import dataclass
 from pathlib import Path
-from typing import List, Tuple
+from typing import Any, List, Optional, Tuple
 
+from . import resilience, response_cache, sdk_clients
 from .model_router import ModelRouter
-from .providers.base import _stub_reply, LLMResponse
+from .providers.base import _stub_reply
 
 RUN_DIR = Path("docs/runs")
 OUT_DIR = Path("docs/orchestrator/reviews")
 OUT_DIR.mkdir(parents=True, exist_ok=True)
 
 HEADER = "# Orchestrator Review\n"
+# Reviews run at temperature 0, so a review of unchanged input can be replayed from the response cache.
+REVIEW_TEMPERATURE = 0.0
 
 ASSISTANT_MANAGER_SYSTEM = (
     "You are the assistant manager reviewer. Your job is to critically review the agent run report, "
@@ -24,101 +29,117 @@ PRIMARY_DECIDER_SYSTEM = (
     "produce the final review with accept/reject decisions and a prioritized set of next actions for the orchestrator."
 )
 
-def _latest_run_file() -> Path:
-    md_files = sorted(RUN_DIR.glob("*.md"), key=lambda p: p.stat().st_mtime, reverse=True)
+@dataclass
+class ReviewReply:
+    text: str
+    model: str
+    provider: str
+    latency_ms: int
+    tokens: Optional[int] = None
+    raw: Any = None
+
+def _latest_run_file(wbs: str | None = None, run_dir: Path = RUN_DIR) -> Path:
+    pattern = f"*{wbs}*.md" if wbs else "*.md"
+    md_files = sorted(run_dir.glob(pattern), key=lambda p: p.stat().st_mtime, reverse=True)
     if not md_files:
-        raise FileNotFoundError(f"No run reports found in {RUN_DIR}")
+        raise FileNotFoundError(f"No run reports{f' for {wbs}' if wbs else ''} found in {run_dir}")
     return md_files[0]
 
-def _call_provider(provider, model: str, system: str, prompt: str) -> LLMResponse:
-    """Best-effort call; falls back to stub if keys/libs not present or call fails."""
+def _call_provider(provider, model: str, system: str, prompt: str, fresh: bool = False) -> ReviewReply:
+    """
+    Best-effort call; falls back to stub if keys/libs not present or call fails
+    (after the provider's retries, or at once while its circuit breaker is open).
+    A review of unchanged input is replayed from the response cache unless `fresh`.
+    """
     start = time.time()
     name = getattr(provider, "name", str(provider))
     use_stub = os.getenv("ORCHESTRATOR_LLM_STUB", "0") == "1"
     text, raw, tokens = None, None, None
-
-    if not use_stub:
-        try:
-            if name == "openai":
-                # OpenAI
-                api_key = os.getenv("OPENAI_API_KEY")
-                if not api_key:
-                    raise RuntimeError("Missing OPENAI_API_KEY")
-                try:
-                    import openai
-                    client = openai.OpenAI(api_key=api_key)
-                except Exception:
-                    # Back-compat for older SDKs
-                    import openai  # type: ignore
-                    openai.api_key = api_key
-                    client = openai  # type: ignore
-
-                try:
-                    resp = client.chat.completions.create(
-                        model=model,
-                        messages=[
-                            {"role": "system", "content": system},
-                            {"role": "user", "content": prompt},
-                        ],
-                        temperature=0.2,
-                    )
-                    # New SDK
-                    choice = resp.choices[0]
-                    text = getattr(choice.message, "content", None) or getattr(choice, "text", None)
-                    raw = resp.model_dump() if hasattr(resp, "model_dump") else resp
-                    tokens = getattr(resp, "usage", None)
-                    tokens = getattr(tokens, "total_tokens", None) if tokens else None
-                except AttributeError:
-                    # Older SDK shape
-                    resp = client.ChatCompletion.create(
+    messages = [{"role": "system", "content": system}, {"role": "user", "content": prompt}]
+
+    def _request() -> Optional[str]:
+        nonlocal raw, tokens
+        if name == "openai":
+            # OpenAI
+            api_key = os.getenv("OPENAI_API_KEY")
+            if not api_key:
+                raise RuntimeError("Missing OPENAI_API_KEY")
+            try:
+                client = sdk_clients.openai_client(api_key)
+            except Exception:
+                # Back-compat for older SDKs
+                import openai  # type: ignore
+                openai.api_key = api_key
+                client = openai  # type: ignore
+
+            try:
+                resp = resilience.guard(name).call(
+                    lambda: client.chat.completions.create(
                         model=model,
-                        messages=[
-                            {"role": "system", "content": system},
-                            {"role": "user", "content": prompt},
-                        ],
-                        temperature=0.2,
+                        messages=messages,
+                        temperature=REVIEW_TEMPERATURE,
                     )
-                    text = resp["choices"][0]["message"]["content"]
-                    raw = resp
-                    tokens = resp.get("usage", {}).get("total_tokens")
-
-            elif name == "anthropic":
-                # Anthropic
-                api_key = os.getenv("ANTHROPIC_API_KEY")
-                if not api_key:
-                    raise RuntimeError("Missing ANTHROPIC_API_KEY")
-                import anthropic
-                client = anthropic.Anthropic(api_key=api_key)
-                msg = client.messages.create(
+                )
+                # New SDK
+                choice = resp.choices[0]
+                raw = resp.model_dump() if hasattr(resp, "model_dump") else resp
+                tokens = getattr(resp, "usage", None)
+                tokens = getattr(tokens, "total_tokens", None) if tokens else None
+                return getattr(choice.message, "content", None) or getattr(choice, "text", None)
+            except AttributeError:
+                # Older SDK shape
+                resp = client.ChatCompletion.create(
+                    model=model,
+                    messages=messages,
+                    temperature=REVIEW_TEMPERATURE,
+                )
+                raw = resp
+                tokens = resp.get("usage", {}).get("total_tokens")
+                return resp["choices"][0]["message"]["content"]
+
+        if name == "anthropic":
+            # Anthropic
+            api_key = os.getenv("ANTHROPIC_API_KEY")
+            if not api_key:
+                raise RuntimeError("Missing ANTHROPIC_API_KEY")
+            client = sdk_clients.anthropic_client(api_key)
+            msg = resilience.guard(name).call(
+                lambda: client.messages.create(
                     model=model,
                     system=PRIMARY_DECIDER_SYSTEM if "decid" in system.lower() else system,
                     messages=[{"role": "user", "content": prompt}],
                     max_tokens=1200,
-                    temperature=0.2,
+                    temperature=REVIEW_TEMPERATURE,
                 )
-                # msg.content is a list of blocks
+            )
+            raw = msg.to_dict() if hasattr(msg, "to_dict") else msg
+            if hasattr(msg, "usage"):
                 try:
-                    text = "".join(
-                        blk.text for blk in msg.content if getattr(blk, "type", "") == "text"
-                    )
+                    tokens = msg.usage.input_tokens + msg.usage.output_tokens
                 except Exception:
-                    text = str(msg.content)
-                raw = msg.to_dict() if hasattr(msg, "to_dict") else msg
-                if hasattr(msg, "usage"):
-                    try:
-                        tokens = msg.usage.input_tokens + msg.usage.output_tokens
-                    except Exception:
-                        tokens = None
+                    tokens = None
+            # msg.content is a list of blocks
+            try:
+                return "".join(blk.text for blk in msg.content if getattr(blk, "type", "") == "text")
+            except Exception:
+                return str(msg.content)
+        return None
+
+    if not use_stub:
+        try:
+            text = response_cache.cached_call(
+                name, model, messages, {"temperature": REVIEW_TEMPERATURE}, _request, fresh=fresh
+            )
         except Exception as e:
-            text = f"{_stub_reply(name, prompt)} (fallback: {e.__class__.__name__})"
+            text = f"{_stub_reply(prompt, model=model).content} (fallback: {e.__class__.__name__})"
 
     if text is None:
-        text = _stub_reply(name, prompt)
+        text = _stub_reply(prompt, model=model).content
 
     latency_ms = int((time.time() - start) * 1000)
-    return LLMResponse(text=text, model=model, tokens=tokens, raw=raw, provider=name, latency_ms=latency_ms)
+    return ReviewReply(text=text, model=model, provider=name, latency_ms=latency_ms, tokens=tokens, raw=raw)
 
-def compile_dual_review(report_md: str, router: ModelRouter) -> str:
+def compile_dual_review(report_md: str, router: ModelRouter, fresh: bool = False) -> str:
     """Run assistant‑manager then primary‑decider and merge into one markdown document."""
     am_prompt = (
         "Review the following agent run report. Identify concrete risks, missing deliverables, "
@@ -129,7 +150,7 @@ def compile_dual_review(report_md: str, router: ModelRouter) -> str:
 
     # Assistant‑manager
     am_provider, am_model = plan[0]
-    am = _call_provider(am_provider, am_model, ASSISTANT_MANAGER_SYSTEM, am_prompt)
+    am = _call_provider(am_provider, am_model, ASSISTANT_MANAGER_SYSTEM, am_prompt, fresh=fresh)
 
     # Primary decider
     pd_provider, pd_model = plan[1] if len(plan) > 1 else plan[0]
@@ -137,7 +158,7 @@ def compile_dual_review(report_md: str, router: ModelRouter) -> str:
         f"{am.text}\n\nNow decide: accept or reject the work, and output a prioritized list of next actions "
         "for the orchestrator with owners and due dates when possible."
     )
-    pd = _call_provider(pd_provider, pd_model, PRIMARY_DECIDER_SYSTEM, pd_prompt)
+    pd = _call_provider(pd_provider, pd_model, PRIMARY_DECIDER_SYSTEM, pd_prompt, fresh=fresh)
 
     merged = [
         HEADER,
@@ -151,21 +172,31 @@ def compile_dual_review(report_md: str, router: ModelRouter) -> str:
     ]
     return "\n".join(merged)
 
-def main():
-    latest = _latest_run_file()
+def main(
+    wbs: str | None = None, router: ModelRouter | None = None, root: Path | None = None, fresh: bool = False
+) -> Path:
+    """Review the latest run report (for `wbs` if given); paths are relative to `root` (default: cwd)."""
+    base = root or Path(".")
+    latest = _latest_run_file(wbs, base / RUN_DIR)
     print(f"[orchestrator.review_latest] Found latest run report: {latest}")
     print("[orchestrator.review_latest] Using providers per policy (kind=review) ...")
-    router = ModelRouter()
+    router = router or ModelRouter()
     report_md = latest.read_text(encoding="utf-8")
-    merged = compile_dual_review(report_md, router)
+    merged = compile_dual_review(report_md, router, fresh=fresh)
 
     # Derive WBS tag from filename if present
     m = re.search(r"(WBS-\d+)", latest.name)
     wbs = m.group(1) if m else "RUN"
     ts = time.strftime("%Y%m%d-%H%M%SZ", time.gmtime())
-    out_path = OUT_DIR / f"orchestrator-review-{wbs}-{ts}.md"
+    out_path = base / OUT_DIR / f"orchestrator-review-{wbs}-{ts}.md"
+    out_path.parent.mkdir(parents=True, exist_ok=True)
     out_path.write_text(merged, encoding="utf-8")
     print(f"[orchestrator.review_latest] Wrote orchestrator review to: {out_path}")
+    return out_path
 
 if __name__ == "__main__":
-    main()
+    ap = argparse.ArgumentParser(description="Dual-review the latest run report")
+    ap.add_argument("--wbs", default=None, help="Review the latest report for this WBS id only.")
+    ap.add_argument("--fresh", action="store_true", help="Ignore cached LLM replies for this review.")
+    args = ap.parse_args()
+    main(args.wbs, fresh=args.fresh)
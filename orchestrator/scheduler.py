@@ -0,0 +1,188 @@
+# orchestrator/scheduler.py
+"""
+Dependency-aware ready set over the WBS DAG.
+
+Built once from the queue items in O(V+E): every task gets an in-degree
+(dependencies not yet done) and a rank, the number of tasks on the longest
+chain that starts at it. Tasks with in-degree 0 and status todo sit in one
+heap per agent, ordered by (-rank, priority, task_id), so the next task is
+always the one on the critical path, and plan order breaks ties.
+
+complete(task_id) only walks that task's dependents, decrementing their
+in-degree and pushing the ones that become ready, so the autopilot never
+rescans the queue. A dependency on an id that is not in the queue never
+clears (the queue store treats it the same way).
+
+`find_cycle` / `break_cycles` are the plan-time checks: a cycle would leave
+its tasks blocked forever.
+"""
+
+from __future__ import annotations
+
+import heapq
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+DONE = "done"
+READY_STATUS = "todo"
+
+
+class CycleError(ValueError):
+    def __init__(self, cycle: Sequence[str]):
+        super().__init__("dependency cycle: " + " -> ".join(cycle))
+        self.cycle = list(cycle)
+
+
+def _graph(items: Iterable[Dict[str, Any]]) -> Tuple[List[str], Dict[str, List[str]], Dict[str, List[str]]]:
+    """(ids in input order, deps per id restricted to known ids, dependents per id)."""
+    items = list(items)
+    ids = [it["task_id"] for it in items]
+    known = set(ids)
+    deps = {it["task_id"]: [d for d in dict.fromkeys(it.get("depends_on") or []) if d in known] for it in items}
+    dependents: Dict[str, List[str]] = {tid: [] for tid in ids}
+    for tid in ids:
+        for d in deps[tid]:
+            dependents[d].append(tid)
+    return ids, deps, dependents
+
+
+def topological_order(items: Iterable[Dict[str, Any]]) -> List[str]:
+    """Kahn's algorithm; raises CycleError naming one cycle."""
+    ids, deps, dependents = _graph(items)
+    indeg = {tid: len(deps[tid]) for tid in ids}
+    order = [tid for tid in ids if indeg[tid] == 0]
+    for tid in order:  # `order` grows while we walk it
+        for nxt in dependents[tid]:
+            indeg[nxt] -= 1
+            if indeg[nxt] == 0:
+                order.append(nxt)
+    if len(order) < len(ids):
+        raise CycleError(_cycle_among({t for t in ids if indeg[t] > 0}, deps))
+    return order
+
+
+def _cycle_among(stuck: set, deps: Dict[str, List[str]]) -> List[str]:
+    # Every stuck node has a stuck dependency, so walking deps must revisit a node.
+    start = min(stuck)
+    path: List[str] = []
+    seen: Dict[str, int] = {}
+    node = start
+    while node not in seen:
+        seen[node] = len(path)
+        path.append(node)
+        node = next(d for d in deps[node] if d in stuck)
+    return path[seen[node]:][::-1] + [path[seen[node]:][::-1][0]]
+
+
+def find_cycle(items: Iterable[Dict[str, Any]]) -> Optional[List[str]]:
+    try:
+        topological_order(items)
+    except CycleError as e:
+        return e.cycle
+    return None
+
+
+def break_cycles(items: Sequence[Dict[str, Any]]) -> List[Tuple[str, str]]:
+    """
+    Remove dependencies until the graph is acyclic, editing `depends_on` in
+    place. In each cycle the edge dropped is the one pointing at the task
+    planned latest (highest priority number), i.e. the edge that runs
+    against plan order. Returns the removed (task_id, dep_id) pairs.
+    """
+    by_id = {it["task_id"]: it for it in items}
+    removed: List[Tuple[str, str]] = []
+    while True:
+        cycle = find_cycle(items)
+        if cycle is None:
+            return removed
+        # cycle is [a, b, ..., a] with each element depending on the previous one.
+        edges = [(cycle[i + 1], cycle[i]) for i in range(len(cycle) - 1)]
+        task_id, dep_id = max(edges, key=lambda e: (by_id[e[1]].get("priority") or 0, e[1]))
+        by_id[task_id]["depends_on"] = [d for d in by_id[task_id].get("depends_on") or [] if d != dep_id]
+        removed.append((task_id, dep_id))
+
+
+class Scheduler:
+    def __init__(self, items: Iterable[Dict[str, Any]]):
+        items = list(items)
+        self.items: Dict[str, Dict[str, Any]] = {it["task_id"]: it for it in items}
+        ids, deps, self._dependents = _graph(items)
+        order = topological_order(items)
+
+        self.rank: Dict[str, int] = {}
+        for tid in reversed(order):
+            self.rank[tid] = 1 + max((self.rank[n] for n in self._dependents[tid]), default=0)
+
+        self.indeg: Dict[str, int] = {}
+        for it in items:
+            missing = sum(1 for d in dict.fromkeys(it.get("depends_on") or []) if d not in self.items)
+            waiting = sum(1 for d in deps[it["task_id"]] if self.items[d].get("status") != DONE)
+            self.indeg[it["task_id"]] = missing + waiting
+
+        self._heaps: Dict[str, List[Tuple[int, int, str]]] = {}
+        for tid in ids:
+            self._push_if_ready(tid)
+
+    def sort_key(self, tid: str) -> Tuple[int, int, str]:
+        return (-self.rank[tid], int(self.items[tid].get("priority") or 0), tid)
+
+    def _is_ready(self, tid: str) -> bool:
+        return self.indeg[tid] == 0 and self.items[tid].get("status") == READY_STATUS
+
+    def _push_if_ready(self, tid: str) -> None:
+        if self._is_ready(tid):
+            agent = self.items[tid].get("agent") or ""
+            heapq.heappush(self._heaps.setdefault(agent, []), self.sort_key(tid))
+
+    def _top(self, agent: str) -> Optional[Tuple[int, int, str]]:
+        heap = self._heaps.get(agent) or []
+        # Lazy deletion: entries whose task was claimed since they were pushed.
+        while heap and not self._is_ready(heap[0][2]):
+            heapq.heappop(heap)
+        return heap[0] if heap else None
+
+    # ---------- queries ----------
+
+    def peek(self, agent: Optional[str] = None) -> Optional[str]:
+        """The best ready task (for one agent, or overall) without claiming it."""
+        agents = [agent] if agent is not None else list(self._heaps)
+        tops = [t for t in (self._top(a) for a in agents) if t is not None]
+        return min(tops)[2] if tops else None
+
+    def ready(self, agent: Optional[str] = None) -> List[str]:
+        """All ready task ids in scheduling order."""
+        agents = [agent] if agent is not None else list(self._heaps)
+        keys = [k for a in agents for k in self._heaps.get(a, []) if self._is_ready(k[2])]
+        return [k[2] for k in sorted(set(keys))]
+
+    def ready_by_agent(self) -> Dict[str, List[str]]:
+        return {agent: ids for agent in sorted(self._heaps) for ids in [self.ready(agent)] if ids}
+
+    # ---------- transitions ----------
+
+    def start(self, task_id: str, status: str = "in_progress") -> None:
+        """Mark a task as taken; it leaves the ready set."""
+        self.items[task_id]["status"] = status
+
+    def pop(self, agent: Optional[str] = None) -> Optional[str]:
+        tid = self.peek(agent)
+        if tid is not None:
+            self.start(tid)
+        return tid
+
+    def complete(self, task_id: str) -> List[str]:
+        """Mark `task_id` done; returns the tasks that became ready because of it."""
+        if self.items[task_id].get("status") == DONE:
+            return []
+        self.items[task_id]["status"] = DONE
+        unlocked: List[str] = []
+        for nxt in self._dependents[task_id]:
+            self.indeg[nxt] -= 1
+            if self._is_ready(nxt):
+                self._push_if_ready(nxt)
+                unlocked.append(nxt)
+        return unlocked
+
+    def release(self, task_id: str) -> None:
+        """Put a started task back into the ready set (e.g. its agent failed to launch)."""
+        self.items[task_id]["status"] = READY_STATUS
+        self._push_if_ready(task_id)
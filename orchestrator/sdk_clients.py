@@ -0,0 +1,191 @@
+# orchestrator/sdk_clients.py
+"""
+Process-wide registry of OpenAI / Anthropic SDK clients.
+
+Building an SDK client builds a fresh HTTP connection pool, so the first
+request on it pays TCP + TLS setup again. Every call site (llm.py,
+LLMClient, the providers, review_latest, review_all_in_progress) asks this
+registry instead, which keeps one keep-alive client per
+(provider, api key, base URL) for the life of the process. Each client's
+transport runs its calls through the cross-process rate-limit buckets
+(orchestrator.rate_limits). Async clients
+(AsyncOpenAI / AsyncAnthropic, used by the providers' achat/acomplete) are
+bound to the event loop that created their connections, so they are kept
+per (provider, api key, base URL, running loop) instead.
+
+Pool size and timeouts come from the environment:
+- ORCHESTRATOR_HTTP_MAX_CONNECTIONS   per client (default 20)
+- ORCHESTRATOR_HTTP_MAX_KEEPALIVE     idle connections kept open (default 20)
+- ORCHESTRATOR_HTTP_TIMEOUT           read/write timeout in seconds (default 600)
+- ORCHESTRATOR_HTTP_CONNECT_TIMEOUT   connect timeout in seconds (default 10)
+API keys / base URLs default to OPENAI_API_KEY / OPENAI_BASE_URL and
+ANTHROPIC_API_KEY / ANTHROPIC_BASE_URL.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    import httpx  # transport used by both SDKs
+except ImportError:  # pragma: no cover - SDK builds that vendor it as httpx2
+    import httpx2 as httpx  # type: ignore[no-redef]
+
+from . import rate_limits
+
+PROVIDERS = ("openai", "anthropic")
+_ENV = {
+    "openai": ("OPENAI_API_KEY", "OPENAI_BASE_URL"),
+    "anthropic": ("ANTHROPIC_API_KEY", "ANTHROPIC_BASE_URL"),
+}
+
+
+@dataclass(frozen=True)
+class PoolConfig:
+    max_connections: int = 20
+    max_keepalive: int = 20
+    timeout: float = 600.0
+    connect_timeout: float = 10.0
+
+    @classmethod
+    def from_env(cls) -> "PoolConfig":
+        return cls(
+            max_connections=int(os.getenv("ORCHESTRATOR_HTTP_MAX_CONNECTIONS", "20")),
+            max_keepalive=int(os.getenv("ORCHESTRATOR_HTTP_MAX_KEEPALIVE", "20")),
+            timeout=float(os.getenv("ORCHESTRATOR_HTTP_TIMEOUT", "600")),
+            connect_timeout=float(os.getenv("ORCHESTRATOR_HTTP_CONNECT_TIMEOUT", "10")),
+        )
+
+    def http_client(self, event_hooks: Optional[Dict[str, List[Any]]] = None) -> "httpx.Client":
+        return httpx.Client(
+            limits=httpx.Limits(max_connections=self.max_connections, max_keepalive_connections=self.max_keepalive),
+            timeout=httpx.Timeout(self.timeout, connect=self.connect_timeout),
+            follow_redirects=True,
+            event_hooks=event_hooks,
+        )
+
+    def async_http_client(self, event_hooks: Optional[Dict[str, List[Any]]] = None) -> "httpx.AsyncClient":
+        return httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=self.max_connections, max_keepalive_connections=self.max_keepalive),
+            timeout=httpx.Timeout(self.timeout, connect=self.connect_timeout),
+            follow_redirects=True,
+            event_hooks=event_hooks,
+        )
+
+
+class ClientRegistry:
+    def __init__(self, pool: Optional[PoolConfig] = None):
+        self.pool = pool or PoolConfig.from_env()
+        self._clients: Dict[Tuple[str, str, str], Any] = {}
+        self._async_clients: Dict[Tuple[str, str, str, asyncio.AbstractEventLoop], Any] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._clients)
+
+    @staticmethod
+    def _resolve(provider: str, api_key: Optional[str], base_url: Optional[str]) -> Tuple[str, str, str]:
+        if provider not in _ENV:
+            raise ValueError(f"Unknown provider {provider!r}; expected one of: {', '.join(PROVIDERS)}")
+        key_env, url_env = _ENV[provider]
+        return provider, api_key or os.getenv(key_env) or "", base_url or os.getenv(url_env) or ""
+
+    def get(self, provider: str, api_key: Optional[str] = None, base_url: Optional[str] = None) -> Any:
+        k = self._resolve(provider, api_key, base_url)
+        with self._lock:
+            client = self._clients.get(k)
+            if client is None:
+                client = self._clients[k] = self._build(*k)
+            return client
+
+    def get_async(self, provider: str, api_key: Optional[str] = None, base_url: Optional[str] = None) -> Any:
+        """The async client for the running event loop (call from inside a coroutine)."""
+        loop = asyncio.get_running_loop()
+        k = (*self._resolve(provider, api_key, base_url), loop)
+        with self._lock:
+            # Clients of finished loops cannot be reused (or awaited to close); let them go.
+            for stale in [key for key in self._async_clients if key[3].is_closed()]:
+                del self._async_clients[stale]
+            client = self._async_clients.get(k)
+            if client is None:
+                client = self._async_clients[k] = self._build(*k[:3], use_async=True)
+            return client
+
+    def _build(self, provider: str, api_key: str, base_url: str, use_async: bool = False) -> Any:
+        if use_async:
+            http = self.pool.async_http_client(rate_limits.async_event_hooks(provider))
+        else:
+            http = self.pool.http_client(rate_limits.event_hooks(provider))
+        # Retries happen once, in orchestrator.resilience, not again inside the SDK.
+        kwargs: Dict[str, Any] = {"http_client": http, "max_retries": 0}
+        if api_key:
+            kwargs["api_key"] = api_key
+        if base_url:
+            kwargs["base_url"] = base_url
+        if provider == "openai":
+            from openai import AsyncOpenAI, OpenAI
+
+            return (AsyncOpenAI if use_async else OpenAI)(**kwargs)
+        import anthropic
+
+        return (anthropic.AsyncAnthropic if use_async else anthropic.Anthropic)(**kwargs)
+
+    def close(self) -> None:
+        with self._lock:
+            clients, self._clients = list(self._clients.values()), {}
+        for client in clients:
+            try:
+                client.close()
+            except Exception:
+                pass
+
+    async def aclose(self) -> None:
+        """Close the async clients bound to the running loop."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            mine = [k for k in self._async_clients if k[3] is loop]
+            clients = [self._async_clients.pop(k) for k in mine]
+        for client in clients:
+            try:
+                await client.close()
+            except Exception:
+                pass
+
+
+_registry = ClientRegistry()
+
+
+def registry() -> ClientRegistry:
+    return _registry
+
+
+def configure(pool: PoolConfig) -> ClientRegistry:
+    """Replace the process-wide registry (closing the old clients) with one using `pool`."""
+    global _registry
+    old, _registry = _registry, ClientRegistry(pool)
+    old.close()
+    return _registry
+
+
+def get_client(provider: str, api_key: Optional[str] = None, base_url: Optional[str] = None) -> Any:
+    return _registry.get(provider, api_key, base_url)
+
+
+def openai_client(api_key: Optional[str] = None, base_url: Optional[str] = None) -> Any:
+    return _registry.get("openai", api_key, base_url)
+
+
+def anthropic_client(api_key: Optional[str] = None, base_url: Optional[str] = None) -> Any:
+    return _registry.get("anthropic", api_key, base_url)
+
+
+def async_openai_client(api_key: Optional[str] = None, base_url: Optional[str] = None) -> Any:
+    return _registry.get_async("openai", api_key, base_url)
+
+
+def async_anthropic_client(api_key: Optional[str] = None, base_url: Optional[str] = None) -> Any:
+    return _registry.get_async("anthropic", api_key, base_url)
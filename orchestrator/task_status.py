@@ -2,27 +2,49 @@
 from __future__ import annotations
 
 import argparse
-import json
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
+
+from .queue_store import DB_FILE, JSONL_FILE, STATUSES, QueueStore
 
 # Repo root is the project folder (e.g., C:\RastUp1)
 REPO_ROOT = Path(__file__).resolve().parent.parent
 
 
+def open_queue() -> QueueStore:
+    if not (REPO_ROOT / DB_FILE).exists() and not (REPO_ROOT / JSONL_FILE).exists():
+        raise SystemExit(f"Queue not found: {REPO_ROOT / DB_FILE}. Run `python -m orchestrator.cli plan` first.")
+    return QueueStore.for_repo(REPO_ROOT)
+
+
 def load_queue() -> List[Dict[str, Any]]:
-    queue_path = REPO_ROOT / "ops" / "queue.jsonl"
-    if not queue_path.exists():
-        raise SystemExit(f"Queue file not found: {queue_path}. Run `python -m orchestrator.cli plan` first.")
-    lines = [l for l in queue_path.read_text(encoding="utf-8").splitlines() if l.strip()]
-    return [json.loads(l) for l in lines]
+    with open_queue() as store:
+        return store.all()
 
 
 def save_queue(items: List[Dict[str, Any]]) -> None:
-    queue_path = REPO_ROOT / "ops" / "queue.jsonl"
-    with queue_path.open("w", encoding="utf-8") as f:
-        for it in items:
-            f.write(json.dumps(it, ensure_ascii=False) + "\n")
+    with open_queue() as store:
+        store.replace_all(items)
+        store.export_jsonl()
+
+
+def set_status(task_id: str, status: str) -> Optional[str]:
+    """Set one task's status and refresh the JSONL export; returns the old status (None if unknown)."""
+    if status not in STATUSES:
+        raise SystemExit(f"Status must be one of: {', '.join(STATUSES)}")
+    with open_queue() as store:
+        old = store.set_status(task_id, status)
+        if old is not None:
+            store.export_jsonl()
+    return old
+
+
+def ids_by_status() -> Dict[str, List[str]]:
+    """Task ids grouped by status, each group in priority order."""
+    out: Dict[str, List[str]] = {}
+    for it in sorted(load_queue(), key=lambda x: x.get("priority", 9999)):
+        out.setdefault(it["status"], []).append(it["task_id"])
+    return out
 
 
 def cmd_list(args: argparse.Namespace) -> None:
@@ -47,23 +69,17 @@ def cmd_set(args: argparse.Namespace) -> None:
     task_id = args.id
     new_status = args.status
 
-    if new_status not in {"todo", "in_progress", "done", "review", "partial"}:
-        raise SystemExit("Status must be one of: todo, in_progress, done, review, partial")
-
-    items = load_queue()
-    found = False
+    old = set_status(task_id, new_status)
+    if old is None:
+        print(f"No item with task_id {task_id} found in queue.")
+        return
+    print(f"Updated {task_id}: {old} -> {new_status}")
 
-    for it in items:
-        if it["task_id"] == task_id:
-            old = it["status"]
-            it["status"] = new_status
-            found = True
-            print(f"Updated {task_id}: {old} -> {new_status}")
 
-    if not found:
-        print(f"No item with task_id {task_id} found in queue.")
-    else:
-        save_queue(items)
+def cmd_export(args: argparse.Namespace) -> None:
+    with open_queue() as store:
+        path = store.export_jsonl(Path(args.out) if args.out else None)
+    print(f"Exported queue to {path}")
 
 
 def main() -> None:
@@ -82,6 +98,10 @@ def main() -> None:
     )
     p_set.set_defaults(func=cmd_set)
 
+    p_export = sub.add_parser("export", help="Write the queue as JSONL (default: ops/queue.jsonl).")
+    p_export.add_argument("--out", default=None, help="Output path.")
+    p_export.set_defaults(func=cmd_export)
+
     args = parser.parse_args()
     args.func(args)
 
@@ -0,0 +1,38 @@
+# orchestrator/tokens.py
+"""
+Token estimates for budgeting LLM calls.
+
+Uses tiktoken when it is installed; otherwise falls back to the usual
+~4 characters per token heuristic, which is close enough for rate limits
+and batch packing.
+"""
+
+from __future__ import annotations
+
+from functools import lru_cache
+from typing import Optional
+
+try:
+    import tiktoken as _tiktoken  # optional: pip install tiktoken
+except Exception:  # pragma: no cover
+    _tiktoken = None
+
+CHARS_PER_TOKEN = 4
+
+
+@lru_cache(maxsize=8)
+def _encoding(model: Optional[str]):
+    if _tiktoken is None:
+        return None
+    try:
+        return _tiktoken.encoding_for_model(model) if model else _tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        return _tiktoken.get_encoding("cl100k_base")
+
+
+def estimate_tokens(text: str, model: Optional[str] = None) -> int:
+    """Approximate token count of `text` (never less than 1)."""
+    enc = _encoding(model)
+    if enc is not None:
+        return max(1, len(enc.encode(text, disallowed_special=())))
+    return max(1, (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN)
@@ -1,21 +1,15 @@
 from __future__ import annotations
-import json
 from pathlib import Path
 
+from .queue_store import DB_FILE, JSONL_FILE, QueueStore
+
 ROOT = Path(__file__).resolve().parent.parent
-QUEUE = ROOT / "ops" / "queue.jsonl"
 PROGRESS = ROOT / "docs" / "PROGRESS.md"
 
 def read_queue():
-    items = []
-    if not QUEUE.exists(): return items
-    for line in QUEUE.read_text(encoding="utf-8").splitlines():
-        if not line.strip(): continue
-        try:
-            items.append(json.loads(line))
-        except Exception:
-            pass
-    return items
+    if not (ROOT / DB_FILE).exists() and not (ROOT / JSONL_FILE).exists(): return []
+    with QueueStore.for_repo(ROOT) as store:
+        return store.all()
 
 def write_progress(items):
     by = {"done":[], "in_progress":[], "todo":[]}
@@ -27,11 +21,11 @@ def write_progress(items):
         if not by[sec]:
             lines.append("- (none)")
         else:
-            for it in sorted(by[sec], key=lambda x: x.get("id","")):
+            for it in sorted(by[sec], key=lambda x: x.get("task_id","")):
                 agent = it.get("agent","?")
                 title = it.get("title","")
-                deps = ",".join(it.get("deps",[])) or "(none)"
-                lines.append(f"- **{it['id']}** [{agent}] deps: {deps} — {title}")
+                deps = ",".join(it.get("depends_on",[])) or "(none)"
+                lines.append(f"- **{it['task_id']}** [{agent}] deps: {deps} — {title}")
         lines.append("")
     PROGRESS.write_text("\n".join(lines), encoding="utf-8")
     print("[update_progress] PROGRESS.md updated.")
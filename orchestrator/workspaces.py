@@ -0,0 +1,146 @@
+# orchestrator/workspaces.py
+"""
+Per-task git worktrees and the serial merge queue behind them.
+
+Every dispatched task gets its own checkout under .worktrees/<task_id> on
+branch task/<task_id>, forked from the base branch (whatever the main
+checkout had checked out when the manager was created). Agents only ever
+touch their own worktree, so parallel runs cannot trample each other.
+
+When a run ends, `WorkspaceManager.commit` folds everything the agent did
+(its own commits plus uncommitted edits) into ONE commit on the task
+branch, so each commit that reaches the base branch maps to exactly one
+WBS id. Orchestrator runtime state (agent locks, the queue export) stays
+out of task commits.
+
+`MergeQueue.merge` then lands branches one at a time: rebase onto the
+current base, run CI inside the worktree, fast-forward the base branch.
+A conflict or a red CI leaves the base untouched and keeps the branch for
+a manual fix. So does a main checkout that is no longer on the base
+branch: moving only the ref would leave the task's review and run report
+out of the working tree that apply_latest_review reads.
+"""
+
+from __future__ import annotations
+
+import os
+import shlex
+import subprocess
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional, Sequence
+
+WORKTREES_DIR = ".worktrees"
+BRANCH_PREFIX = "task/"
+# Runtime state that agents may write inside their worktree; never committed with a task.
+RUNTIME_PATHS = ("ops/locks", "ops/queue.jsonl")
+
+
+def git(cwd: Path, *args: str, check: bool = True) -> subprocess.CompletedProcess:
+    return subprocess.run(["git", "-C", str(cwd), *args], text=True, capture_output=True, check=check)
+
+
+def _out(proc: subprocess.CompletedProcess) -> str:
+    return ((proc.stdout or "") + (proc.stderr or "")).strip()
+
+
+@dataclass
+class Workspace:
+    task_id: str
+    path: Path
+    branch: str
+    title: str = ""
+
+
+@dataclass
+class MergeResult:
+    task_id: str
+    status: str  # merged | conflict | ci_failed | ff_failed
+    detail: str = ""
+
+    @property
+    def ok(self) -> bool:
+        return self.status == "merged"
+
+
+class WorkspaceManager:
+    def __init__(
+        self,
+        repo_root: Path,
+        base: Optional[str] = None,
+        ci_cmd: Optional[Sequence[str]] = None,
+        root: Optional[Path] = None,
+    ):
+        self.repo_root = repo_root
+        self.root = root or repo_root / WORKTREES_DIR
+        self.base = base or git(repo_root, "rev-parse", "--abbrev-ref", "HEAD").stdout.strip()
+        self.ci_cmd: List[str] = list(ci_cmd or shlex.split(os.getenv("ORCHESTRATOR_MERGE_CI", "make ci")))
+
+    def branch_for(self, task_id: str) -> str:
+        return BRANCH_PREFIX + task_id.lower()
+
+    def _branch_exists(self, branch: str) -> bool:
+        return git(self.repo_root, "rev-parse", "--verify", "--quiet", f"refs/heads/{branch}", check=False).returncode == 0
+
+    def create(self, task_id: str, title: str = "") -> Workspace:
+        """Check out a fresh worktree for `task_id`; a branch kept from an earlier failed merge is resumed."""
+        ws = Workspace(task_id=task_id, path=self.root / task_id, branch=self.branch_for(task_id), title=title)
+        if ws.path.exists():
+            git(self.repo_root, "worktree", "remove", "--force", str(ws.path), check=False)
+        git(self.repo_root, "worktree", "prune")
+        self.root.mkdir(parents=True, exist_ok=True)
+        if self._branch_exists(ws.branch):
+            git(self.repo_root, "worktree", "add", str(ws.path), ws.branch)
+        else:
+            git(self.repo_root, "worktree", "add", "-b", ws.branch, str(ws.path), self.base)
+        return ws
+
+    def commit(self, ws: Workspace) -> Optional[str]:
+        """Squash the task's work into one commit on its branch; None when there is nothing to commit."""
+        fork = git(ws.path, "merge-base", self.base, "HEAD").stdout.strip()
+        git(ws.path, "reset", "--soft", fork)
+        git(ws.path, "add", "-A")
+        git(ws.path, "reset", "-q", "HEAD", "--", *RUNTIME_PATHS, check=False)
+        if git(ws.path, "diff", "--cached", "--quiet", check=False).returncode == 0:
+            return None
+        summary = f"feat({ws.task_id.lower()}): {ws.title or 'agent run'}"
+        git(ws.path, "commit", "-q", "-m", f"{summary}\n\nWBS: {ws.task_id}\n")
+        return git(ws.path, "rev-parse", "HEAD").stdout.strip()
+
+    def remove(self, ws: Workspace, delete_branch: bool = True) -> None:
+        git(self.repo_root, "worktree", "remove", "--force", str(ws.path), check=False)
+        if delete_branch:
+            git(self.repo_root, "branch", "-D", ws.branch, check=False)
+
+
+class MergeQueue:
+    """Lands task branches on the base branch strictly one at a time."""
+
+    def __init__(self, manager: WorkspaceManager):
+        self.manager = manager
+        self._lock = threading.Lock()
+
+    def merge(self, ws: Workspace) -> MergeResult:
+        with self._lock:
+            return self._merge(ws)
+
+    def _merge(self, ws: Workspace) -> MergeResult:
+        m = self.manager
+        current = git(m.repo_root, "rev-parse", "--abbrev-ref", "HEAD").stdout.strip()
+        if current != m.base:
+            return MergeResult(ws.task_id, "ff_failed", f"main checkout is on {current}, not {m.base}")
+
+        rebase = git(ws.path, "rebase", m.base, check=False)
+        if rebase.returncode != 0:
+            git(ws.path, "rebase", "--abort", check=False)
+            return MergeResult(ws.task_id, "conflict", _out(rebase))
+
+        ci = subprocess.run(m.ci_cmd, cwd=str(ws.path), text=True, capture_output=True)
+        if ci.returncode != 0:
+            return MergeResult(ws.task_id, "ci_failed", _out(ci)[-2000:])
+
+        ff = git(m.repo_root, "merge", "--ff-only", "-q", ws.branch, check=False)
+        if ff.returncode != 0:
+            return MergeResult(ws.task_id, "ff_failed", _out(ff))
+        return MergeResult(ws.task_id, "merged", git(m.repo_root, "rev-parse", m.base).stdout.strip())
@@ -0,0 +1,41 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+from orchestrator import ann_index
+from orchestrator.bench.ann import synthetic_corpus
+
+
+class ANNIndexTest(unittest.TestCase):
+    def test_top_k_indices_orders_best_first(self):
+        scores = np.array([0.1, 0.9, 0.5, 0.7], dtype="float32")
+        self.assertEqual(ann_index.top_k_indices(scores, 2).tolist(), [1, 3])
+        self.assertEqual(ann_index.top_k_indices(scores, 10).tolist(), [1, 3, 2, 0])
+
+    def test_ivf_recall_matches_exact_with_all_lists_probed(self):
+        corpus = synthetic_corpus(2000, 32, n_topics=20, seed=1)
+        index = ann_index.IVFIndex.build(corpus, n_lists=16, seed=1)
+        self.assertEqual(int(index.list_offsets[-1]), 2000)
+        q = corpus[7]
+        exact_ids, _ = ann_index.exact_search(corpus, q, 10)
+        ivf_ids, _ = index.search(corpus, q, 10, nprobe=index.n_lists)
+        self.assertEqual(ivf_ids.tolist(), exact_ids.tolist())
+        self.assertEqual(index.search(corpus, q, 1, nprobe=1)[0][0], 7)
+
+    def test_save_load_and_small_corpus_fallback(self):
+        corpus = synthetic_corpus(300, 16, n_topics=4)
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            path = ann_index.IVFIndex.build(corpus, n_lists=4).save(root / ann_index.IVF_FILE)
+            loaded = ann_index.IVFIndex.load(path)
+            self.assertEqual((loaded.count, loaded.dim), (300, 16))
+            # 300 rows is below EXACT_SEARCH_MAX: the file is ignored and removed on rebuild.
+            self.assertIsNone(ann_index.load_for_index(root, corpus))
+            self.assertIsNone(ann_index.build_for_index(root, corpus))
+            self.assertFalse(path.exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,123 @@
+import asyncio
+import os
+import unittest
+from unittest import mock
+
+from orchestrator import sdk_clients
+from orchestrator.bench.clients import stand_in_server
+from orchestrator.concurrency import AsyncLimiter, agather
+from orchestrator.llm_router import AsyncLLMRouter, LLMRouter
+from orchestrator.providers import OpenAIProvider
+from orchestrator.providers.anthropic_provider import AnthropicProvider
+
+
+class AgatherTest(unittest.TestCase):
+    def test_bounded_in_order_with_per_item_errors(self):
+        limiter = AsyncLimiter(3)
+        attempts = {}
+
+        async def fn(i):
+            attempts[i] = attempts.get(i, 0) + 1
+            await asyncio.sleep(0.01)
+            if i == 4:
+                raise ValueError("bad item")
+            if i == 7 and attempts[i] == 1:
+                raise TimeoutError("flaky")
+            return i * 10
+
+        outcome = asyncio.run(agather(fn, list(range(10)), limiter=limiter, max_retries=1, backoff_seconds=0.01))
+        self.assertEqual([0, 10, 20, 30, None, 50, 60, 70, 80, 90], outcome.results)
+        self.assertEqual([4], list(outcome.errors))
+        self.assertIsInstance(outcome.errors[4], ValueError)
+        self.assertEqual((2, 2), (attempts[4], attempts[7]))
+        self.assertEqual(3, limiter.peak)
+        self.assertEqual(0, limiter.in_flight)
+
+
+class FlakyProvider:
+    def __init__(self):
+        self.calls = []
+
+    async def acomplete(self, prompt, model=None, **kwargs):
+        self.calls.append(prompt)
+        if prompt == "boom":
+            raise RuntimeError("provider down")
+        return {"text": prompt.upper(), "model": model}
+
+    def chat(self, messages, model=None, **kwargs):  # blocking only: runs on a worker thread
+        return {"text": f"chat:{messages[-1]['content']}", "model": model}
+
+
+class AsyncRouterTest(unittest.TestCase):
+    def test_agather_mixes_prompts_and_isolates_failures(self):
+        provider = FlakyProvider()
+        router = AsyncLLMRouter(max_concurrency=2, router=LLMRouter("stub", model="m"))
+        router.router._provider = provider
+
+        outcome = asyncio.run(router.agather(["a", "boom", [{"role": "user", "content": "hi"}], "b"]))
+        self.assertEqual(["A", None, "chat:hi", "B"], [r.text if r else None for r in outcome.results])
+        self.assertEqual({1}, set(outcome.errors))
+        self.assertEqual("m", outcome.results[0].model)
+
+        with self.assertRaises(RuntimeError):
+            asyncio.run(router.acomplete("boom"))
+
+    def test_stub_router_falls_back_to_threads(self):
+        router = AsyncLLMRouter("stub")
+        result = asyncio.run(router.achat([{"role": "user", "content": "ping"}]))
+        self.assertIn("ping", result.text)
+        self.assertEqual("stub", result.provider)
+
+
+class ProviderParamsTest(unittest.TestCase):
+    def test_requests_send_what_the_cache_keys_on(self):
+        kwargs = {"temperature": 0.3, "max_tokens": 64}
+        for system in (None, "be brief"):
+            messages, sampling = OpenAIProvider._cache_args("hi", system, kwargs)
+            sent = OpenAIProvider("m")._params(prompt="hi", model=None, system=system, **kwargs)
+            self.assertEqual({"model": "m", "messages": messages, **sampling}, sent)
+
+            sent = AnthropicProvider("c")._params(prompt="hi", model=None, system=system, **kwargs)
+            self.assertEqual(sampling, {k: sent[k] for k in sampling})
+            self.assertEqual(messages, ([{"role": "system", "content": sent["system"]}] if "system" in sent else []) + sent["messages"])
+
+
+class ProviderAsyncTest(unittest.TestCase):
+    def test_acomplete_uses_one_async_client_per_loop(self):
+        server, counts = stand_in_server(0, 0.05)
+        env = {
+            "OPENAI_API_KEY": "test",
+            "OPENAI_BASE_URL": f"http://127.0.0.1:{server.server_address[1]}/v1",
+            "ORCHESTRATOR_LLM_CACHE": "0",
+            "ORCHESTRATOR_LLM_STUB": "0",
+        }
+
+        async def fan_out():
+            provider = OpenAIProvider()
+            client = sdk_clients.async_openai_client()
+            self.assertIs(client, sdk_clients.async_openai_client())
+            outcome = await agather(lambda p: provider.acomplete(p, system="be brief"), [f"q{i}" for i in range(8)], limit=4)
+            await sdk_clients.registry().aclose()
+            return client, outcome
+
+        try:
+            with mock.patch.dict(os.environ, env):
+                first, outcome = asyncio.run(fan_out())
+                second, _ = asyncio.run(fan_out())
+            self.assertEqual(["ok"] * 8, [r.content for r in outcome.results])
+            self.assertIsNot(first, second)
+            self.assertEqual(16, counts["requests"])
+            self.assertLessEqual(counts["connections"], 8)  # at most `limit` per loop
+        finally:
+            server.shutdown()
+
+    def test_stub_and_unavailable(self):
+        with mock.patch.dict(os.environ, {"ORCHESTRATOR_LLM_STUB": "1"}):
+            self.assertTrue(asyncio.run(OpenAIProvider().achat([{"role": "user", "content": "hi"}])).raw["stub"])
+        with mock.patch.dict(os.environ, {"ORCHESTRATOR_LLM_STUB": "0", "OPENAI_API_KEY": ""}):
+            with self.assertRaises(RuntimeError):
+                asyncio.run(OpenAIProvider().acomplete("hi"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,234 @@
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock
+
+from orchestrator import blueprints
+from orchestrator.ingest_cache import IngestCache
+from orchestrator.ingest_checkpoint import IngestCheckpoint
+
+
+class FakeLLM:
+    """Counts API-shaped calls; returns deterministic summaries/embeddings."""
+
+    def __init__(self):
+        self.cfg = SimpleNamespace(openai_model="fake-chat", embedding_model="fake-embed")
+        self.chat_calls = 0
+        self.embed_calls = 0
+        self.embedded = 0
+
+    def chat_openai(self, messages, model=None, **extra):
+        self.chat_calls += 1
+        return "summary of " + messages[-1]["content"][-20:]
+
+    def embed(self, texts, model=None):
+        self.embed_calls += 1
+        self.embedded += len(texts)
+        return [[float(len(t)), float(sum(map(ord, t)) % 97) + 1.0, 1.0] for t in texts]
+
+
+def _fake_pandoc(src, dest, cache=None):
+    shutil.copyfile(src, dest)
+
+
+def _requirements(kind, n):
+    """Distinct sentences, so chunks are not near-duplicates of each other."""
+    return "".join(f"{kind} requirement {i} covers case {i * 7919 % 1009} of flow {i % 13}. " for i in range(n))
+
+
+class CrashingLLM(FakeLLM):
+    """Simulates the process dying mid-run after `survive` summaries."""
+
+    def __init__(self, survive):
+        super().__init__()
+        self.survive = survive
+
+    def chat_openai(self, messages, model=None, **extra):
+        if self.chat_calls >= self.survive:
+            raise KeyboardInterrupt
+        return super().chat_openai(messages, model, **extra)
+
+
+class BlueprintIngestTest(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self._tmp.name)
+        (self.root / "plans").mkdir()
+        self.nt = self.root / "plans" / "nt.md"
+        self.td = self.root / "plans" / "td.md"
+        self.nt.write_text("# Vision\n\n" + _requirements("Non-tech", 400), encoding="utf-8")
+        self.td.write_text("# Stack\n\n" + _requirements("Technical", 400), encoding="utf-8")
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _ingest(self, llm, **kwargs):
+        with mock.patch.object(blueprints, "run_pandoc", _fake_pandoc):
+            return blueprints.build_blueprint_index(self.root, self.nt, self.td, llm, **kwargs)
+
+    def test_reingest_only_pays_for_changed_chunks(self):
+        first = FakeLLM()
+        self._ingest(first)
+        meta, mat = blueprints.load_blueprint_index(self.root)
+        self.assertEqual(first.chat_calls, len(meta))
+        self.assertEqual(mat.shape[0], len(meta))
+
+        second = FakeLLM()
+        self._ingest(second)
+        self.assertEqual((second.chat_calls, second.embedded), (0, 0))
+
+        self.td.write_text(self.td.read_text(encoding="utf-8") + "\nOne new clause.", encoding="utf-8")
+        third = FakeLLM()
+        self._ingest(third)
+        self.assertEqual(third.chat_calls, 1)
+        self.assertEqual(third.embedded, 1)
+
+    def test_chunks_are_offsets_into_mmapped_source(self):
+        # CRLF and multi-byte characters must not shift the byte offsets.
+        self.td.write_bytes(("# Stack\r\n\r\n" + "Tëchnical rêquirement — ünïcode. " * 300).encode("utf-8"))
+        self._ingest(FakeLLM())
+        meta, _ = blueprints.load_blueprint_index(self.root)
+        source = (self.root / "docs" / "blueprints" / "tech_source.md").read_bytes().decode("utf-8")
+        tech = [row for row in meta if row["doc_type"] == "tech"]
+        self.assertGreater(len(tech), 1)
+        with blueprints.SourceTexts(self.root / "docs" / "blueprints") as sources:
+            for row in tech:
+                self.assertNotIn("text", row)
+                self.assertEqual(sources.text(row), source[row["char_start"] : row["char_end"]])
+            chunk = blueprints.BlueprintChunk.from_row(tech[0])
+            self.assertEqual(sources.text(chunk), source[: tech[0]["char_end"]])
+            self.assertEqual(sources.text({"text": "legacy"}), "legacy")
+        self.assertFalse(hasattr(chunk, "__dict__"))
+        self.assertFalse((self.root / "docs" / "blueprints" / "tech").exists())
+
+    def test_near_duplicate_chunks_share_one_summary_and_embedding(self):
+        section = "## Escalation\n\n" + _requirements("Escalation", 40) + "\n\n"
+        self.td.write_text("# Stack\n\n" + section + "# Ops\n\n" + section + "# Support\n\n" + section, encoding="utf-8")
+        llm = FakeLLM()
+        self._ingest(llm)
+        meta, mat = blueprints.load_blueprint_index(self.root)
+        dups = [row for row in meta if row.get("duplicate_of")]
+        self.assertEqual(len(dups), 2)
+        self.assertEqual(llm.chat_calls, len(meta) - 2)
+        self.assertEqual(llm.embedded, len(meta) - 2)
+        row_of = {row["id"]: i for i, row in enumerate(meta)}
+        for row in dups:
+            rep = meta[row_of[row["duplicate_of"]]]
+            self.assertIsNone(rep.get("duplicate_of"))
+            self.assertEqual(row["summary"], rep["summary"])
+            self.assertEqual(mat[row_of[row["id"]]].tolist(), mat[row_of[rep["id"]]].tolist())
+
+        hits = blueprints.search_blueprints(self.root, llm, _requirements("Escalation", 40), top_k=3, mode="vector")
+        self.assertEqual(len({row["id"] for row in hits}), 3)
+        self.assertFalse(any(row.get("duplicate_of") for row in hits))
+
+    def test_lexical_search_needs_no_llm_and_hybrid_fuses_both(self):
+        self._ingest(FakeLLM())
+        meta, _ = blueprints.load_blueprint_index(self.root)
+        target = meta[-1]["id"]
+        self.assertEqual(blueprints.search_blueprints(self.root, None, target, top_k=1, mode="lexical")[0]["id"], target)
+
+        (self.root / "docs" / "blueprints" / "blueprint_bm25.npz").unlink()
+        hits = blueprints.search_blueprints(self.root, FakeLLM(), f"{target} requirement", top_k=5)
+        self.assertEqual(hits[0]["id"], target)  # BM25 rebuilt on demand
+        with self.assertRaises(ValueError):
+            blueprints.search_blueprints(self.root, None, target, mode="vector")
+
+    def test_search_many_embeds_all_queries_in_one_cached_request(self):
+        self._ingest(FakeLLM())
+        queries = [f"requirement {i} covers case" for i in range(200)]
+        llm = FakeLLM()
+        many = blueprints.search_blueprints_many(self.root, llm, queries, top_k=3, mode="vector")
+        self.assertEqual((llm.embed_calls, llm.embedded), (1, 200))
+        self.assertEqual(len(many), 200)
+        for query in (queries[0], queries[137]):
+            single = blueprints.search_blueprints(self.root, llm, query, top_k=3, mode="vector")
+            self.assertEqual([r["id"] for r in single], [r["id"] for r in many[queries.index(query)]])
+        self.assertEqual(llm.embed_calls, 1)  # served from the query cache
+
+        again = FakeLLM()
+        blueprints.search_blueprints_many(self.root, again, queries + ["a new question"], top_k=3)
+        self.assertEqual((again.embed_calls, again.embedded), (1, 1))
+
+    def test_two_stage_search_on_compact_matrix_matches_full_search(self):
+        self._ingest(FakeLLM(), ingest_cfg={"compact_embeddings": ["f16"]})
+        self.assertTrue((self.root / "docs" / "blueprints" / "blueprint_embeddings.f16.npy").exists())
+        queries = [f"requirement {i} covers case" for i in range(20)]
+        full = blueprints.search_blueprints_many(self.root, FakeLLM(), queries, top_k=3, mode="vector")
+        two = blueprints.search_blueprints_many(self.root, FakeLLM(), queries, top_k=3, mode="vector", compact="f16")
+        self.assertEqual([[r["id"] for r in rows] for rows in two], [[r["id"] for r in rows] for rows in full])
+
+    def test_crashed_run_resumes_from_checkpoint_without_cache(self):
+        single = {"summary_workers": 1}
+        close = mock.patch.object(IngestCache, "close", autospec=True, side_effect=IngestCache.close)
+        with close as closed, self.assertRaises(KeyboardInterrupt):
+            self._ingest(CrashingLLM(survive=2), use_cache=False, ingest_cfg=single)
+        self.assertEqual(1, closed.call_count)  # the crash does not leak the cache connection
+
+        resumed = FakeLLM()
+        self._ingest(resumed, use_cache=False, ingest_cfg=single)
+        meta, _ = blueprints.load_blueprint_index(self.root)
+        self.assertEqual(resumed.chat_calls, len(meta) - 2)
+        self.assertTrue(all(row["summary"] for row in meta))
+        docs_root = self.root / "docs" / "blueprints"
+        self.assertFalse((docs_root / "ingest_checkpoint.jsonl").exists())
+
+    def test_checkpoint_discards_torn_tail(self):
+        docs_root = self.root / "cp"
+        cp = IngestCheckpoint(docs_root)
+        cp.commit_summary("NT-0000", "k0", "first")
+        cp.commit_vectors([("NT-0000", "e0", [1.0, 2.0]), ("NT-0001", "e1", [3.0, 4.0])])
+        cp.close()
+        with (docs_root / "ingest_checkpoint.jsonl").open("a", encoding="utf-8") as f:
+            f.write('{"t":"s","id":"NT-0001","key":"k1","summ')
+        with (docs_root / "ingest_checkpoint.f32").open("ab") as f:
+            f.write(b"\x00\x00")
+
+        cp = IngestCheckpoint(docs_root)
+        self.assertEqual(cp.summaries, {"k0": "first"})
+        self.assertEqual(cp.vector("e1").tolist(), [3.0, 4.0])
+        cp.commit_vectors([("NT-0002", "e2", [5.0, 6.0])])
+        self.assertEqual(cp.vector("e2").tolist(), [5.0, 6.0])
+        cp.discard()
+
+    def test_stale_embeddings_are_dropped_but_summaries_kept(self):
+        docs_root = self.root / "cp"
+        cp = IngestCheckpoint(docs_root, embedding_model="small")
+        cp.commit_summary("NT-0000", "k0", "first")
+        cp.commit_vectors([("NT-0000", "e0", [1.0, 2.0])])
+        cp.close()
+
+        cp = IngestCheckpoint(docs_root, embedding_model="large")  # model changed
+        self.assertEqual(({"k0": "first"}, {}, None), (cp.summaries, cp.rows, cp.dim))
+        cp.commit_vectors([("NT-0000", "e0", [1.0, 2.0, 3.0])])
+        cp.close()
+
+        cp = IngestCheckpoint(docs_root)  # same model, new width (e.g. a dimensions setting)
+        self.assertEqual(3, cp.dim)
+        cp.commit_vectors([("NT-0000", "e0", [1.0, 2.0, 3.0, 4.0])])
+        self.assertEqual([1.0, 2.0, 3.0, 4.0], cp.vector("e0").tolist())
+        with self.assertRaises(ValueError):  # a width change within one run is still a bug
+            cp.commit_vectors([("NT-0001", "e1", [1.0])])
+        cp.close()
+
+        cp = IngestCheckpoint(docs_root)
+        self.assertEqual(({"k0": "first"}, 4), (cp.summaries, cp.dim))
+        self.assertEqual([1.0, 2.0, 3.0, 4.0], cp.vector("e0").tolist())
+        cp.discard()
+
+    def test_source_hash_skips_unchanged_conversion(self):
+        cache = IngestCache(self.root / "cache.sqlite")
+        dest = self.root / "nt_source.md"
+        self.assertFalse(cache.source_unchanged(self.nt, dest))
+        _fake_pandoc(self.nt, dest)
+        cache.record_source(self.nt, dest)
+        self.assertTrue(cache.source_unchanged(self.nt, dest))
+        self.nt.write_text("changed", encoding="utf-8")
+        self.assertFalse(cache.source_unchanged(self.nt, dest))
+        cache.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,51 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+from orchestrator import blueprint_store
+
+
+class BlueprintStoreTest(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self._tmp.name)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_write_and_load_round_trip_is_normalised_and_mmapped(self):
+        rows = [{"id": "NT-0000", "summary": "a"}, {"id": "TD-0000", "summary": "b"}]
+        mat = np.array([[3.0, 4.0], [0.0, 0.0]], dtype="float32")
+        blueprint_store.write_index(self.root, rows, mat)
+
+        meta, loaded = blueprint_store.load_index(self.root)
+        self.assertEqual([r["id"] for r in meta], ["NT-0000", "TD-0000"])
+        self.assertIsInstance(loaded, np.memmap)
+        np.testing.assert_allclose(loaded[0], [0.6, 0.8], rtol=1e-6)
+        np.testing.assert_array_equal(loaded[1], [0.0, 0.0])
+
+    def test_migrate_legacy_json_index(self):
+        legacy = [
+            {"id": "NT-0000", "summary": "x", "embedding": [1.0, 0.0]},
+            {"id": "NT-0001", "summary": "y", "embedding": [0.0, 2.0]},
+        ]
+        (self.root / blueprint_store.LEGACY_INDEX_FILE).write_text(json.dumps(legacy), encoding="utf-8")
+
+        meta_path = blueprint_store.migrate_json_index(self.root, remove_legacy=True)
+        self.assertEqual(meta_path, self.root / blueprint_store.META_FILE)
+        self.assertFalse((self.root / blueprint_store.LEGACY_INDEX_FILE).exists())
+
+        meta, mat = blueprint_store.load_index(self.root)
+        self.assertNotIn("embedding", meta[0])
+        np.testing.assert_allclose(mat, [[1.0, 0.0], [0.0, 1.0]])
+
+    def test_missing_index_raises(self):
+        with self.assertRaises(FileNotFoundError):
+            blueprint_store.load_index(self.root)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+from orchestrator import compact_index
+from orchestrator.ann_index import top_k_rows
+from orchestrator.bench.compact import matryoshka_corpus
+from orchestrator.compact_index import CompactMatrix, two_stage_search
+
+
+class CompactMatrixTest(unittest.TestCase):
+    def setUp(self):
+        self.matrix = matryoshka_corpus(600, 384, seed=3)
+        rng = np.random.default_rng(4)
+        q = self.matrix[:20] + rng.standard_normal((20, 384)).astype("float32") * 0.02
+        self.queries = q / np.linalg.norm(q, axis=1, keepdims=True)
+        self.exact = top_k_rows(self.queries @ self.matrix.T, 10)
+
+    def test_spec_parsing(self):
+        self.assertEqual(CompactMatrix.parse("f16"), (None, "f16"))
+        self.assertEqual(CompactMatrix.parse("d256"), (256, "f32"))
+        self.assertEqual(CompactMatrix.parse("d512-i8"), (512, "i8"))
+        with self.assertRaises(ValueError):
+            CompactMatrix.parse("int4")
+
+    def test_representations_shrink_and_approximate_cosine(self):
+        full = self.queries @ self.matrix.T
+        for spec, dtype, width in (("f16", np.float16, 384), ("i8", np.int8, 384), ("d128-i8", np.int8, 128)):
+            compact = CompactMatrix.build(self.matrix, spec)
+            self.assertEqual((compact.data.dtype, compact.data.shape[1]), (np.dtype(dtype), width))
+            if compact.dims is None:
+                self.assertLess(np.abs(compact.scores(self.queries) - full).max(), 0.02)
+
+    def test_two_stage_matches_exact_top_k(self):
+        for spec in ("i8", "d128", "d128-i8"):
+            found = two_stage_search(self.matrix, CompactMatrix.build(self.matrix, spec), self.queries, 10, shortlist=60)
+            for f, e in zip(found, self.exact):
+                self.assertEqual(f.tolist(), e.tolist(), spec)
+
+    def test_persisted_next_to_the_index(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            docs_root = Path(tmp)
+            compact_index.build_for_index(docs_root, self.matrix, ["d128-i8", "f16"])
+            loaded = compact_index.load_for_index(docs_root, self.matrix, "d128-i8")
+            self.assertEqual(loaded.data.shape, (600, 128))
+            self.assertIsNotNone(loaded.scale)
+            self.assertIsNone(compact_index.load_for_index(docs_root, self.matrix[:10], "d128-i8"))
+
+            compact_index.build_for_index(docs_root, self.matrix, ["f16"])
+            self.assertIsNone(compact_index.load_for_index(docs_root, self.matrix, "d128-i8"))
+            self.assertFalse(list(docs_root.glob("*.d128-i8.*")))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,50 @@
+import threading
+import time
+import unittest
+
+from orchestrator.concurrency import RateLimiter, Throughput, map_bounded
+
+
+class MapBoundedTest(unittest.TestCase):
+    def test_results_keep_input_order_and_failures_are_isolated(self):
+        attempts = {}
+        lock = threading.Lock()
+
+        def work(x):
+            with lock:
+                attempts[x] = attempts.get(x, 0) + 1
+            if x == 3:
+                raise ValueError("always broken")
+            if x == 5 and attempts[x] == 1:
+                raise RuntimeError("flaky once")
+            time.sleep(0.001 * (10 - x))
+            return x * x
+
+        out = map_bounded(work, list(range(10)), workers=4, max_retries=2, backoff_seconds=0.0)
+        self.assertEqual(out.results, [0, 1, 4, None, 16, 25, 36, 49, 64, 81])
+        self.assertEqual(list(out.errors), [3])
+        self.assertEqual(attempts[3], 3)
+        self.assertEqual(attempts[5], 2)
+
+    def test_progress_counts_tokens(self):
+        progress = Throughput("[test]", total=3, every=100)
+        map_bounded(str.upper, ["a", "bb", "ccc"], workers=2, cost=len, progress=progress)
+        self.assertEqual((progress.done, progress.tokens, progress.failed), (3, 6, 0))
+
+
+class RateLimiterTest(unittest.TestCase):
+    def test_unlimited_never_waits(self):
+        limiter = RateLimiter(None, None)
+        self.assertEqual(sum(limiter.acquire(10_000) for _ in range(100)), 0.0)
+
+    def test_request_budget_throttles(self):
+        limiter = RateLimiter(requests_per_minute=600)  # 10 req/s, burst of 600
+        limiter._req = 1.0  # drain the burst
+        self.assertEqual(limiter.acquire(), 0.0)
+        waited = limiter.acquire()
+        self.assertGreater(waited, 0.05)
+        self.assertLess(waited, 0.5)
+
+
+if __name__ == "__main__":
+    unittest.main()
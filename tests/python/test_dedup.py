@@ -0,0 +1,40 @@
+import random
+import unittest
+
+from orchestrator import dedup
+
+
+def _paragraph(seed, n=120):
+    rng = random.Random(seed)
+    words = ["booking", "escrow", "studio", "model", "refund", "payout", "review", "search", "city", "launch",
+             "verification", "dispute", "deposit", "portfolio", "message", "policy", "ranking", "fraud"]
+    return " ".join(rng.choice(words) + str(rng.randrange(50)) for _ in range(n))
+
+
+class NearDuplicateGroupsTest(unittest.TestCase):
+    def test_groups_near_copies_under_earliest_representative(self):
+        base = _paragraph(1)
+        edited = base.replace("booking", "bookings", 1) + " one extra clause"
+        texts = [_paragraph(0), base, _paragraph(2), edited, base.upper()]
+        self.assertEqual(dedup.near_duplicate_groups(texts), {3: 1, 4: 1})
+
+    def test_distinct_texts_are_left_alone(self):
+        texts = [_paragraph(i) for i in range(50)]
+        self.assertEqual(dedup.near_duplicate_groups(texts), {})
+
+    def test_members_are_checked_against_the_representative_not_a_chain(self):
+        words = _paragraph(3, 200).split()
+        # Each step drifts ~10% from the previous text; the last is far from the first.
+        texts = [" ".join(words[i * 20 : i * 20 + 200] + words[: i * 20]) for i in range(0, 6)]
+        groups = dedup.near_duplicate_groups(texts, threshold=0.8)
+        shingles = [dedup.shingles(t) for t in texts]
+        for member, rep in groups.items():
+            self.assertGreaterEqual(dedup.jaccard(shingles[member], shingles[rep]), 0.8)
+
+    def test_threshold_one_only_folds_exact_copies(self):
+        base = _paragraph(4)
+        self.assertEqual(dedup.near_duplicate_groups([base, base + " tail", base], threshold=1.0), {2: 0})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,160 @@
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from orchestrator.dispatcher import Dispatcher
+from orchestrator.queue_store import QueueStore
+from orchestrator.workspaces import Workspace
+
+
+def _item(tid, priority, agent, deps=(), phase="Backend"):
+    return {"task_id": tid, "agent": agent, "status": "todo", "priority": priority, "depends_on": list(deps), "phase": phase}
+
+
+class FakeProc:
+    """Finishes after `polls` calls to poll()."""
+
+    def __init__(self, polls):
+        self.polls = polls
+
+    def poll(self):
+        self.polls -= 1
+        return 0 if self.polls <= 0 else None
+
+    def terminate(self):
+        self.polls = 0
+
+    def wait(self, timeout=None):
+        return -15
+
+
+class DispatcherTest(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self._tmp.name)
+        (self.root / "ops" / "locks").mkdir(parents=True)
+        with QueueStore.for_repo(self.root) as store:
+            store.replace_all(
+                [
+                    _item("WBS-001", 1, "AGENT-1"),
+                    _item("WBS-002", 2, "AGENT-2"),
+                    _item("WBS-003", 3, "AGENT-3"),
+                    _item("WBS-004", 4, "AGENT-2"),
+                    _item("WBS-005", 5, "AGENT-3", deps=["WBS-001", "WBS-002"], phase="QA"),
+                    _item("WBS-006", 6, "AGENT-4"),
+                ]
+            )
+        self.events = []
+        self.reviewed = []
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _start(self, item):
+        self.events.append(("start", item["task_id"], item["agent"]))
+        return FakeProc(polls=2)
+
+    def _post(self, task_id):
+        self.reviewed.append(task_id)
+        with QueueStore.for_repo(self.root) as store:
+            store.set_status(task_id, "done")
+
+    def _dispatcher(self, **kw):
+        return Dispatcher(self.root, poll_seconds=0, start=self._start, post=self._post, **kw)
+
+    def test_runs_agents_in_parallel_one_task_per_agent(self):
+        # AGENT-4 holds a fresh lock from a manual run: it must not be dispatched.
+        (self.root / "ops" / "locks" / "AGENT-4.lock").write_text("agent: AGENT-4\nwbs_id: WBS-900\n", encoding="utf-8")
+        d = self._dispatcher(max_agents=3)
+        phases = d.run(max_seconds=0.5)  # otherwise it waits for AGENT-4's lock to go stale
+
+        first_wave = [tid for _, tid, _ in self.events[:3]]
+        self.assertEqual({"WBS-001", "WBS-002", "WBS-003"}, set(first_wave))
+        started = [tid for _, tid, _ in self.events]
+        self.assertNotIn("WBS-006", started)
+        # WBS-005 only starts after both of its dependencies were reviewed and done.
+        self.assertLess(self.reviewed.index("WBS-001"), started.index("WBS-005"))
+        self.assertLess(self.reviewed.index("WBS-002"), started.index("WBS-005"))
+        self.assertEqual(sorted(["WBS-001", "WBS-002", "WBS-003", "WBS-004", "WBS-005"]), sorted(self.reviewed))
+        with QueueStore.for_repo(self.root) as store:
+            self.assertEqual({"done": 5, "todo": 1}, store.counts())
+        self.assertEqual({"Backend": 4, "QA": 1}, {p: c.tasks for p, c in phases.items()})
+
+    def test_at_most_max_agents_run_at_once(self):
+        peak = []
+
+        def start(item):
+            peak.append(len(d.running) + 1)
+            return self._start(item)
+
+        d = Dispatcher(self.root, max_agents=2, poll_seconds=0, start=start, post=self._post)
+        d.run()
+        self.assertEqual(2, max(peak))
+        with QueueStore.for_repo(self.root) as store:
+            self.assertEqual({"done": 6}, store.counts())
+
+    def test_own_lock_is_released_when_the_run_ends(self):
+        lock = self.root / "ops" / "locks" / "AGENT-1.lock"
+
+        def start(item):
+            if item["agent"] == "AGENT-1":
+                lock.write_text(f"agent: AGENT-1\nwbs_id: {item['task_id']}\n", encoding="utf-8")
+            return self._start(item)
+
+        Dispatcher(self.root, max_agents=4, poll_seconds=0, start=start, post=self._post).run()
+        self.assertFalse(lock.exists())
+
+    def test_locks_taken_inside_a_worktree_are_seen_and_released(self):
+        d = self._dispatcher(max_agents=4)
+        worktree_locks = self.root / ".worktrees" / "WBS-001" / "ops" / "locks"
+        seen = []
+
+        def start(item):
+            if item["agent"] == "AGENT-1":
+                d._worktrees[item["task_id"]] = Workspace(item["task_id"], worktree_locks.parent.parent, "task/wbs-001")
+                worktree_locks.mkdir(parents=True)
+                (worktree_locks / "AGENT-1.lock").write_text(f"wbs_id: {item['task_id']}\n", encoding="utf-8")
+                seen.append(d._locked("AGENT-1"))
+            return self._start(item)
+
+        def post(task_id):
+            d._worktrees.pop(task_id, None)
+            self._post(task_id)
+
+        d._start, d._post = start, post
+        d.run()
+        self.assertEqual([True], seen)
+        self.assertFalse((worktree_locks / "AGENT-1.lock").exists())
+
+    def test_failed_start_returns_the_task_to_todo_and_the_rest_carry_on(self):
+        def start(item):
+            if item["task_id"] == "WBS-002":
+                raise OSError("no space left on device")
+            return self._start(item)
+
+        Dispatcher(self.root, max_agents=4, poll_seconds=0, start=start, post=self._post).run()
+        with QueueStore.for_repo(self.root) as store:
+            self.assertEqual("todo", store.get("WBS-002")["status"])
+            self.assertEqual("todo", store.get("WBS-005")["status"])  # still blocked on WBS-002
+            self.assertEqual({"done": 4, "todo": 2}, store.counts())
+
+    def test_children_are_stopped_when_the_loop_dies(self):
+        procs = []
+
+        def start(item):
+            procs.append(FakeProc(polls=10**6))
+            return procs[-1]
+
+        d = Dispatcher(self.root, max_agents=2, poll_seconds=0, start=start, post=self._post)
+        with mock.patch.object(d, "_reap", side_effect=[None, KeyboardInterrupt]), self.assertRaises(KeyboardInterrupt):
+            d.run()
+        self.assertEqual(2, len(procs))
+        self.assertEqual([0, 0], [p.polls for p in procs])  # terminated
+        self.assertEqual({}, d.running)
+        with QueueStore.for_repo(self.root) as store:
+            self.assertEqual({"todo": 6}, store.counts())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,48 @@
+import threading
+import unittest
+
+from orchestrator.embed_scheduler import EmbeddingScheduler, OversizeInputError, pack_batches
+
+
+class PackBatchesTest(unittest.TestCase):
+    def test_packs_by_tokens_and_inputs_in_order(self):
+        self.assertEqual(pack_batches([5, 5, 5, 5], max_tokens=10, max_inputs=10), [[0, 1], [2, 3]])
+        self.assertEqual(pack_batches([1, 1, 1], max_tokens=100, max_inputs=2), [[0, 1], [2]])
+        # An input bigger than the ceiling still gets its own batch.
+        self.assertEqual(pack_batches([50, 1], max_tokens=10, max_inputs=10), [[0], [1]])
+
+
+class EmbeddingSchedulerTest(unittest.TestCase):
+    def test_splits_oversize_batches_and_keeps_order(self):
+        calls = []
+        lock = threading.Lock()
+
+        def embed(texts):
+            with lock:
+                calls.append(len(texts))
+            if len(texts) > 2:
+                raise RuntimeError("This model's maximum context length is 8192 tokens")
+            return [[float(len(t))] for t in texts]
+
+        texts = ["a" * n for n in range(1, 9)]
+        sched = EmbeddingScheduler(embed, max_tokens_per_request=10_000, in_flight=3, max_retries=0)
+        self.assertEqual(sched.embed(texts), [[float(n)] for n in range(1, 9)])
+        self.assertEqual(calls[0], 8)
+        self.assertTrue(all(n <= 8 for n in calls))
+
+    def test_single_oversize_input_is_not_retried(self):
+        calls = []
+
+        def embed(texts):
+            calls.append(len(texts))
+            raise RuntimeError("too many tokens")
+
+        sched = EmbeddingScheduler(embed, max_retries=3)
+        with self.assertRaises(RuntimeError) as ctx:
+            sched.embed(["x"])
+        self.assertIsInstance(ctx.exception.__cause__, OversizeInputError)
+        self.assertEqual(calls, [1])
+
+
+if __name__ == "__main__":
+    unittest.main()
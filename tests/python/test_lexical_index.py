@@ -0,0 +1,48 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from orchestrator import lexical_index
+from orchestrator.lexical_index import BM25Index, rrf_fuse, tokenize
+
+
+DOCS = [
+    "TD-0076 CUPED variance reduction for experiment metrics",
+    "Escrow release after the acceptance window closes",
+    "Studio deposits are held in escrow and refunded on cancellation",
+    "Search ranking fairness and promoted placement caps",
+]
+
+
+class BM25IndexTest(unittest.TestCase):
+    def test_tokenizer_keeps_identifiers_and_their_parts(self):
+        self.assertEqual(tokenize("See TD-0076, §1.2.A."), ["see", "td-0076", "td", "0076", "1.2.a", "1", "2", "a"])
+
+    def test_exact_identifiers_and_rare_terms_rank_first(self):
+        index = BM25Index.build(DOCS)
+        self.assertEqual(index.search("TD-0076", 3)[0].tolist(), [0])
+        self.assertEqual(index.search("cuped", 3)[0].tolist(), [0])
+        self.assertEqual(index.search("0076", 3)[0].tolist(), [0])
+        rows, scores = index.search("escrow refund deposits", 4)
+        self.assertEqual(rows[0], 2)
+        self.assertEqual(set(rows.tolist()), {1, 2})
+        self.assertTrue((scores[:-1] >= scores[1:]).all())
+        self.assertEqual(index.search("nothing matches", 3)[0].size, 0)
+
+    def test_save_and_load_round_trip(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            docs_root = Path(tmp)
+            lexical_index.build_for_index(docs_root, DOCS)
+            loaded = lexical_index.load_for_index(docs_root, len(DOCS))
+            self.assertIsNotNone(loaded)
+            self.assertEqual(
+                loaded.scores("escrow window").tolist(), BM25Index.build(DOCS).scores("escrow window").tolist()
+            )
+            self.assertIsNone(lexical_index.load_for_index(docs_root, len(DOCS) + 1))
+
+    def test_rrf_rewards_agreement_between_rankings(self):
+        self.assertEqual(rrf_fuse([[1, 2, 3], [4, 2, 9]], top_k=3), [2, 1, 4])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+import unittest
+
+from orchestrator import md_chunker
+from orchestrator.md_chunker import LABEL_LEVEL, heading_level, structural_spans
+
+
+DOC = (
+    "Work Breakdown Structure (WBS) Index\r\n\r\n"
+    "SubSection 1.1 --- Role System Design\r\n\r\n"
+    "One account per person.\r\n\r\n"
+    "**1.1.P Role field schemas**\r\n\r\n"
+    "Per-role fields are stored separately.\r\n\r\n"
+    "**Validation**\r\n\r\n"
+    "bio is required.\r\n\r\n"
+    "§1.2.7 Per-Platform Social Search\r\n\r\n"
+    "See §1.5 signals.\r\n\r\n"
+    "```\r\n# not a heading\r\n```\r\n\r\n"
+    "# Part 2 --- Non-Tech Blueprint\r\n"
+    "Section 2 --- Go-to-Market\r\n\r\n"
+    "Launch city by city.\r\n"
+)
+
+
+class HeadingLevelTest(unittest.TestCase):
+    def test_markers(self):
+        self.assertEqual(heading_level("SubSection 1.1 --- Role System Design"), (2, "SubSection 1.1 --- Role System Design"))
+        self.assertEqual(heading_level("**§1.1 --- Role System Design**")[0], 2)
+        self.assertEqual(heading_level("## **1.2.A Surfaces & UX contract**"), (3, "1.2.A Surfaces & UX contract"))
+        self.assertEqual(heading_level("# Part 2 --- Non-Tech Blueprint")[0], 0)
+        self.assertEqual(heading_level("# Appendices A--G"), (1, "Appendices A--G"))
+        self.assertEqual(heading_level("A1. Core Marketplace Terms")[0], 3)
+        self.assertEqual(heading_level("**Idempotency**"), (LABEL_LEVEL, "Idempotency"))
+        self.assertEqual(heading_level("1\\) Core Concept: Linked Profiles")[0], LABEL_LEVEL)
+
+    def test_body_text_is_not_a_heading(self):
+        self.assertIsNone(heading_level("§1.5 signals."))
+        self.assertIsNone(heading_level("1.2 Search results are ranked by relevance."))
+        self.assertIsNone(heading_level("# "))
+        self.assertIsNone(heading_level("Plain requirement text."))
+
+
+class StructuralSpansTest(unittest.TestCase):
+    def test_packs_sections_and_records_heading_path(self):
+        spans = structural_spans(DOC, max_tokens=1000)
+        self.assertEqual(spans[0].start, 0)
+        self.assertEqual(spans[-1].end, len(DOC))
+        for a, b in zip(spans, spans[1:]):
+            self.assertEqual(a.end, b.start)
+        # Part 2 is a hard break; everything before it packs into one chunk.
+        self.assertEqual(len(spans), 3)
+        self.assertTrue(DOC[spans[1].start :].startswith("# Part 2"))
+        self.assertEqual(spans[2].heading_path, ["Part 2 --- Non-Tech Blueprint", "Section 2 --- Go-to-Market"])
+
+    def test_small_budget_splits_on_headings_without_overlap(self):
+        spans = structural_spans(DOC, max_tokens=25, break_level=-1)
+        for a, b in zip(spans, spans[1:]):
+            self.assertEqual(a.end, b.start)
+        paths = [s.heading_path for s in spans]
+        self.assertIn(["SubSection 1.1 --- Role System Design", "1.1.P Role field schemas", "Validation"], paths)
+        self.assertIn(["SubSection 1.1 --- Role System Design", "§1.2.7 Per-Platform Social Search"], paths)
+
+    def test_oversized_section_uses_overlapping_windows_on_paragraphs(self):
+        body = "".join(f"Requirement {i} must hold in every city.\n\n" for i in range(200))
+        text = "SubSection 3.1 --- Monetisation\n\n" + body
+        spans = structural_spans(text, max_tokens=200)
+        self.assertGreater(len(spans), 1)
+        for a, b in zip(spans, spans[1:]):
+            self.assertLess(b.start, a.end)  # overlap only inside the oversized section
+            self.assertTrue(text[: a.end].endswith("\n\n"))
+        for span in spans:
+            self.assertLessEqual(md_chunker.estimate_tokens(text[span.start : span.end]), 200)
+            self.assertEqual(span.heading_path, ["SubSection 3.1 --- Monetisation"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from orchestrator import pipeline
+from orchestrator.pipeline import Pipeline
+from orchestrator.resilience import CircuitOpenError
+
+
+class PipelineTest(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self._tmp.name)
+        (self.root / "ops").mkdir()
+        self.config = self.root / "ops" / "config.yaml"
+        self.config.write_text("models: {}\n", encoding="utf-8")
+        self.pipe = Pipeline(self.root)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_config_and_clients_are_built_once(self):
+        with mock.patch.object(pipeline.cli, "load_config", return_value={"v": 1}) as load, mock.patch.object(
+            pipeline.cli, "make_llm", side_effect=lambda cfg: object()
+        ) as make:
+            llm = self.pipe.llm
+            for _ in range(3):
+                self.assertIs(llm, self.pipe.llm)
+            self.assertEqual((1, 1), (load.call_count, make.call_count))
+
+            st = self.config.stat()
+            os.utime(self.config, (st.st_atime, st.st_mtime + 5))
+            self.assertIsNot(llm, self.pipe.llm)
+            self.assertEqual((2, 2), (load.call_count, make.call_count))
+
+    def test_iteration_reviews_and_applies_the_task_it_ran(self):
+        calls = []
+        with mock.patch.object(self.pipe, "run_next", return_value={"task_id": "WBS-007"}), mock.patch.object(
+            self.pipe, "review", side_effect=lambda wbs: calls.append(("review", wbs))
+        ), mock.patch.object(self.pipe, "apply", side_effect=lambda wbs: calls.append(("apply", wbs)) or "done"):
+            self.assertEqual("done", self.pipe.iteration())
+        self.assertEqual([("review", "WBS-007"), ("apply", "WBS-007")], calls)
+        self.assertEqual({"run_next", "review", "apply", "total"}, set(self.pipe.timings[-1]))
+
+    def test_failed_run_next_is_not_retried(self):
+        # Retries happen per LLM request; re-running the whole step would redo (and re-bill) every call in it.
+        with mock.patch.object(
+            self.pipe, "run_next", side_effect=CircuitOpenError("openai", 30)
+        ) as run_next, mock.patch.object(self.pipe, "review") as review:
+            self.assertIsNone(self.pipe.iteration())
+        self.assertEqual(1, run_next.call_count)
+        review.assert_not_called()
+
+    def test_failed_review_does_not_stop_the_loop(self):
+        with mock.patch.object(self.pipe, "run_next", return_value={"task_id": "WBS-001"}), mock.patch.object(
+            self.pipe, "review", side_effect=FileNotFoundError("no report")
+        ), mock.patch.object(self.pipe, "apply", return_value="in_progress"):
+            self.assertEqual("in_progress", self.pipe.iteration())
+
+
+if __name__ == "__main__":
+    unittest.main()
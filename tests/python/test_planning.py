@@ -0,0 +1,345 @@
+import json
+import re
+import tempfile
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock
+
+import numpy as np
+
+from orchestrator import planning
+from orchestrator.json_stream import TaskStreamParser
+from orchestrator.queue_store import QueueStore
+
+
+def _meta_and_matrix():
+    """Two well-separated topics of 6 chunks each, plus one near-duplicate row."""
+    rng = np.random.default_rng(0)
+    meta, rows = [], []
+    for topic, (doc_type, axis) in enumerate((("tech", 0), ("non_tech", 1))):
+        for i in range(6):
+            meta.append({"id": f"{doc_type[0].upper()}-{topic}{i}", "doc_type": doc_type, "summary": f"topic {topic} item {i}"})
+            vec = np.zeros(8, dtype="float32")
+            vec[axis] = 1.0
+            rows.append(vec + rng.standard_normal(8).astype("float32") * 0.05)
+    meta.append({"id": "T-dup", "doc_type": "tech", "summary": "topic 0 item 0", "duplicate_of": "T-00"})
+    rows.append(rows[0])
+    matrix = np.stack(rows)
+    return meta, matrix / np.linalg.norm(matrix, axis=1, keepdims=True)
+
+
+class PlanningLLM:
+    """Plans one task per slice; the reduce step merges and links them."""
+
+    def __init__(self, fail_reduce=False):
+        self.cfg = SimpleNamespace(openai_model="fake-chat")
+        self.map_calls = 0
+        self.reduce_calls = 0
+        self.fail_reduce = fail_reduce
+
+    def chat_openai(self, messages, model=None, **extra):
+        system, user = messages[0]["content"], messages[-1]["content"]
+        if "ONE slice" in system:
+            self.map_calls += 1
+            prefix = re.search(r"ids of the form (C\d+)-001", system).group(1)
+            ids = re.findall(r"^(\S+) \(", user, re.MULTILINE)
+            kind = "schema" if ids[0].startswith("T-") else "screens"
+            tasks = [
+                {"id": f"{prefix}-001", "title": f"Build {kind}", "agent": "AGENT-2", "depends_on": [],
+                 "blueprint_ids": ids, "phase": "Backend", "acceptance_criteria": [f"{kind} done"],
+                 "needs": [] if kind == "schema" else ["database schema"]},
+                {"id": f"{prefix}-002", "title": "Write runbook", "agent": "AGENT-4", "depends_on": [f"{prefix}-001"],
+                 "blueprint_ids": ids[:1], "phase": "Docs", "acceptance_criteria": ["runbook"]},
+            ]
+            return "```json\n" + json.dumps({"tasks": tasks}) + "\n```"
+        self.reduce_calls += 1
+        if self.fail_reduce:
+            raise RuntimeError("reduce failed")
+        return json.dumps({
+            "order": ["C01-001", "C02-001", "C01-002", "C02-002"],
+            "merge": {"C02-002": "C01-002"},
+            "depends_on": {"C02-001": ["C01-001"], "C01-002": ["C02-002", "NOPE-1"]},
+            "extra_tasks": [{"id": "X-001", "title": "ARCHITECTURE.md", "agent": "AGENT-4",
+                             "depends_on": ["C02-001"], "blueprint_ids": [], "phase": "Docs"}],
+        })
+
+
+class PlanningTest(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self._tmp.name)
+        self.meta, self.matrix = _meta_and_matrix()
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_cluster_rows_splits_topics_and_skips_duplicates(self):
+        clusters = planning.cluster_rows(self.meta, self.matrix, cluster_size=6)
+        self.assertEqual([list(range(0, 6)), list(range(6, 12))], clusters)
+        self.assertEqual([list(range(12))], planning.cluster_rows(self.meta, self.matrix, cluster_size=100))
+
+    def test_map_reduce_merges_and_resolves_cross_cluster_dependencies(self):
+        llm = PlanningLLM()
+        tasks = planning.plan_map_reduce(self.root, llm, self.meta, self.matrix, {"cluster_size": 6, "workers": 2})
+        self.assertEqual((2, 1), (llm.map_calls, llm.reduce_calls))
+        by_title = {t["title"]: t for t in tasks}
+        self.assertEqual(["WBS-001", "WBS-002", "WBS-003", "WBS-004"], [t["id"] for t in tasks])
+        self.assertEqual(["Build schema", "Build screens", "Write runbook", "ARCHITECTURE.md"], [t["title"] for t in tasks])
+        self.assertEqual(["WBS-001"], by_title["Build screens"]["depends_on"])
+        # Merged runbook: union of both slices' deps/ids, no self-reference, unknown ids dropped.
+        self.assertEqual(["WBS-001", "WBS-002"], by_title["Write runbook"]["depends_on"])
+        self.assertEqual(["T-00", "N-10"], by_title["Write runbook"]["blueprint_ids"])
+        self.assertEqual(["WBS-002"], by_title["ARCHITECTURE.md"]["depends_on"])
+        self.assertNotIn("needs", by_title["Build screens"])
+
+    def test_failed_reduce_does_not_repeat_map_stage(self):
+        with self.assertRaises(RuntimeError):
+            planning.plan_map_reduce(self.root, PlanningLLM(fail_reduce=True), self.meta, self.matrix, {"cluster_size": 6})
+        self.assertEqual(2, len(list((self.root / planning.CACHE_DIR).glob("map-*.json"))))
+
+        llm = PlanningLLM()
+        tasks = planning.plan_map_reduce(self.root, llm, self.meta, self.matrix, {"cluster_size": 6})
+        self.assertEqual((0, 1), (llm.map_calls, llm.reduce_calls))
+        self.assertEqual(4, len(tasks))
+
+        again = PlanningLLM()
+        planning.plan_map_reduce(self.root, again, self.meta, self.matrix, {"cluster_size": 6})
+        self.assertEqual((0, 0), (again.map_calls, again.reduce_calls))
+
+    def test_parse_json_reply_strips_fences(self):
+        self.assertEqual({"a": 1}, planning.parse_json_reply('```json\n{"a": 1}\n```'))
+        self.assertEqual({"a": 1}, planning.parse_json_reply('{"a": 1}'))
+
+
+def _task(n, **extra):
+    return {"id": f"WBS-{n:03d}", "title": f"task {n}", "agent": "AGENT-2", "phase": "Backend", **extra}
+
+
+class StreamingLLM:
+    """Streams replies in small pieces; each reply may be cut short."""
+
+    def __init__(self, replies):
+        self.cfg = SimpleNamespace(openai_model="fake-chat")
+        self.replies = list(replies)
+        self.requests = []
+
+    def stream_openai(self, messages, model=None, **extra):
+        self.requests.append(messages)
+        text = self.replies.pop(0)
+        for i in range(0, len(text), 7):
+            yield text[i : i + 7]
+
+
+class TaskStreamParserTest(unittest.TestCase):
+    def test_emits_each_task_when_its_brace_closes(self):
+        doc = '```json\n{"tasks": [{"id": "A", "x": "}{\\"]"}, {"id": "B", "l": [1, {"z": 2}]}]}\n```'
+        parser = TaskStreamParser()
+        seen = []
+        for i, ch in enumerate(doc):
+            for obj in parser.feed(ch):
+                seen.append((obj["id"], i))
+        self.assertEqual(["A", "B"], [tid for tid, _ in seen])
+        self.assertEqual(doc.index('}, {"id": "B"'), seen[0][1])
+        self.assertTrue(parser.complete)
+
+    def test_truncated_reply_is_incomplete(self):
+        parser = TaskStreamParser()
+        got = parser.feed('{"tasks": [{"id": "A"}, {"id": "B", "ti')
+        self.assertEqual([{"id": "A"}], got)
+        self.assertFalse(parser.complete)
+        self.assertEqual('{"tasks": [{"id": "A"}', parser.text[: parser.last_end])
+
+    def test_bare_array(self):
+        self.assertEqual([{"id": "A"}], TaskStreamParser().feed('[{"id": "A"}]'))
+
+
+class StreamPlanTest(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self._tmp.name)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_tasks_are_written_as_they_stream(self):
+        reply = json.dumps({"tasks": [_task(1), _task(2, depends_on="WBS-001")]})
+        writer = planning.PlanWriter(self.root)
+        seen = []
+
+        class Watching(StreamingLLM):
+            def stream_openai(inner, messages, model=None, **extra):
+                for piece in super().stream_openai(messages, model, **extra):
+                    queue_path = self.root / "ops" / "queue.jsonl"
+                    seen.append(len(queue_path.read_text(encoding="utf-8").splitlines()) if queue_path.exists() else 0)
+                    yield piece
+
+        tasks = planning.stream_plan(Watching([reply]), [{"role": "user", "content": "plan"}], writer)
+        writer.finish()
+        self.assertEqual(["WBS-001", "WBS-002"], [t["id"] for t in tasks])
+        self.assertEqual([0, 1], sorted(set(seen)))  # task 1 was queued before the reply finished
+        self.assertEqual(["WBS-001"], tasks[1]["depends_on"])
+        queue = [json.loads(l) for l in (self.root / "ops" / "queue.jsonl").read_text(encoding="utf-8").splitlines()]
+        self.assertEqual([1, 2], [q["priority"] for q in queue])
+        self.assertEqual(tasks, json.loads((self.root / "ops" / "wbs.json").read_text(encoding="utf-8")))
+        self.assertIn("WBS-002", (self.root / "docs" / "TODO_MASTER.md").read_text(encoding="utf-8"))
+
+    def test_streamed_tasks_are_appended_not_rewritten(self):
+        writer = planning.PlanWriter(self.root)
+        export = mock.patch.object(writer.store, "export_jsonl", wraps=writer.store.export_jsonl)
+        write_json = mock.patch.object(planning, "_write_json", wraps=planning._write_json)
+        with export as exported, write_json as written:
+            for n in range(1, 51):
+                writer.add(_task(n, depends_on=[f"WBS-{n - 1:03d}"] if n > 1 else []))
+            self.assertEqual(1, exported.call_count)  # the emptied queue, before the first task
+            self.assertEqual(1, written.call_count)  # wbs.json: the first task, then at most every WBS_FLUSH_SECONDS
+            writer.finish()
+        self.assertEqual(2, written.call_count)
+
+        queue = (self.root / "ops" / "queue.jsonl").read_text(encoding="utf-8").splitlines()
+        self.assertEqual(list(range(1, 51)), [json.loads(l)["priority"] for l in queue])
+        self.assertEqual(50, len(json.loads((self.root / "ops" / "wbs.json").read_text(encoding="utf-8"))))
+        with QueueStore.for_repo(self.root) as store:  # the appends are not mistaken for an outside edit
+            store.set_status("WBS-050", "done")
+            store.export_jsonl()
+        self.assertIn('"done"', (self.root / "ops" / "queue.jsonl").read_text(encoding="utf-8").splitlines()[-1])
+
+    def test_truncated_reply_resumes_after_last_complete_task(self):
+        first = json.dumps({"tasks": [_task(1), _task(2)]})
+        first = first[: first.index('"WBS-002"') + 12]
+        second = json.dumps({"tasks": [_task(1), _task(2), _task(3)]})  # repeats task 1
+        llm = StreamingLLM([first, second])
+        writer = planning.PlanWriter(self.root)
+        tasks = planning.stream_plan(llm, [{"role": "user", "content": "plan"}], writer)
+        self.assertEqual(["WBS-001", "WBS-002", "WBS-003"], [t["id"] for t in tasks])
+        resume = llm.requests[1]
+        self.assertEqual("assistant", resume[-2]["role"])
+        self.assertIn('"WBS-001"', resume[-2]["content"])
+        self.assertNotIn('"WBS-002"', resume[-2]["content"])
+        self.assertIn("after task WBS-001", resume[-1]["content"])
+
+    def test_plan_time_cycles_are_broken(self):
+        tasks = planning.write_plan_outputs(
+            self.root, [_task(1, depends_on=["WBS-002"]), _task(2, depends_on=["WBS-001"]), _task(3, depends_on=["WBS-002"])]
+        )
+        self.assertEqual([[], ["WBS-001"], ["WBS-002"]], [t["depends_on"] for t in tasks])
+        with QueueStore.for_repo(self.root) as store:
+            self.assertEqual([], store.get("WBS-001")["depends_on"])
+        wbs = json.loads((self.root / "ops" / "wbs.json").read_text(encoding="utf-8"))
+        self.assertEqual([], wbs[0]["depends_on"])
+
+    def test_invalid_tasks_are_skipped(self):
+        reply = json.dumps({"tasks": [_task(1), {"id": "WBS-002", "agent": "nobody"}, {"title": "no id", "agent": "AGENT-1"}]})
+        writer = planning.PlanWriter(self.root)
+        tasks = planning.stream_plan(StreamingLLM([reply]), [], writer)
+        self.assertEqual(["WBS-001"], [t["id"] for t in tasks])
+        self.assertEqual(2, len(writer.rejected))
+
+    def test_unparsable_reply_raises_and_keeps_the_old_plan(self):
+        planning.write_plan_outputs(self.root, [_task(1), _task(2)])
+        with QueueStore.for_repo(self.root) as store:
+            store.set_status("WBS-001", "done")
+            store.export_jsonl()
+        queue_before = (self.root / "ops" / "queue.jsonl").read_text(encoding="utf-8")
+        wbs_before = (self.root / "ops" / "wbs.json").read_text(encoding="utf-8")
+
+        with self.assertRaises(ValueError):
+            planning.stream_plan(StreamingLLM(["Sorry, I cannot help"]), [], planning.PlanWriter(self.root), max_resumes=0)
+        self.assertEqual(queue_before, (self.root / "ops" / "queue.jsonl").read_text(encoding="utf-8"))
+        self.assertEqual(wbs_before, (self.root / "ops" / "wbs.json").read_text(encoding="utf-8"))
+        with QueueStore.for_repo(self.root) as store:
+            self.assertEqual("done", store.get("WBS-001")["status"])
+
+
+class IncrementalPlanLLM:
+    def __init__(self, reply):
+        self.cfg = SimpleNamespace(openai_model="fake-chat")
+        self.reply = reply
+        self.prompts = []
+
+    def chat_openai(self, messages, model=None, **extra):
+        self.prompts.append(messages[-1]["content"])
+        return json.dumps(self.reply)
+
+
+class IncrementalPlanTest(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self._tmp.name)
+        self.meta = [
+            {"id": "TD-0001", "doc_type": "tech", "summary": "schema"},
+            {"id": "TD-0002", "doc_type": "tech", "summary": "api"},
+            {"id": "TD-0003", "doc_type": "tech", "summary": "ui"},
+        ]
+        planning.write_plan_outputs(
+            self.root,
+            [_task(1, blueprint_ids=["TD-0001"]), _task(2, blueprint_ids=["TD-0002", "TD-0003"], depends_on=["WBS-001"])],
+        )
+        planning.save_plan_state(self.root, self.meta)
+        with QueueStore.for_repo(self.root) as store:
+            store.set_status("WBS-001", "done")
+            store.upsert({**store.get("WBS-002"), "priority": 7})
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _queue(self):
+        text = (self.root / "ops" / "queue.jsonl").read_text(encoding="utf-8")
+        return [json.loads(l) for l in text.splitlines() if l.strip()]
+
+    def test_unchanged_index_makes_no_call(self):
+        llm = IncrementalPlanLLM({"tasks": []})
+        self.assertFalse(planning.plan_incremental(self.root, llm, self.meta))
+        self.assertEqual([], llm.prompts)
+
+    def test_only_changed_chunks_are_sent_and_queue_state_is_kept(self):
+        meta = [dict(r) for r in self.meta[:2]] + [{"id": "TD-0004", "doc_type": "tech", "summary": "billing"}]
+        meta[1]["summary"] = "api v2"
+        reply = {"tasks": [
+            _task(2, title="api v2", blueprint_ids=["TD-0002"], depends_on=["WBS-001", "WBS-404"]),
+            _task(3, title="billing", blueprint_ids=["TD-0004"], depends_on=["WBS-002"]),
+            _task(1, title="rewrite done task"),
+        ]}
+        llm = IncrementalPlanLLM(reply)
+        self.assertTrue(planning.plan_incremental(self.root, llm, meta))
+
+        prompt = llm.prompts[0]
+        self.assertIn("TD-0002 (tech): api v2", prompt)
+        self.assertIn("TD-0004 (tech): billing", prompt)
+        self.assertNotIn("TD-0001 (tech)", prompt)
+        self.assertIn("removed from the blueprint (drop them from blueprint_ids): TD-0003", prompt)
+        self.assertIn("WBS-001 [AGENT-2/Backend/done] task 1", prompt)
+
+        queue = {q["task_id"]: q for q in self._queue()}
+        self.assertEqual(("done", "task 1"), (queue["WBS-001"]["status"], queue["WBS-001"]["title"]))
+        self.assertEqual(("todo", 7, "api v2"), (queue["WBS-002"]["status"], queue["WBS-002"]["priority"], queue["WBS-002"]["title"]))
+        self.assertEqual(["WBS-001"], queue["WBS-002"]["depends_on"])
+        self.assertEqual(("todo", 8, ["WBS-002"]), (queue["WBS-003"]["status"], queue["WBS-003"]["priority"], queue["WBS-003"]["depends_on"]))
+        wbs = json.loads((self.root / "ops" / "wbs.json").read_text(encoding="utf-8"))
+        self.assertEqual(["WBS-001", "WBS-002", "WBS-003"], [t["id"] for t in wbs])
+        self.assertEqual(["TD-0002"], wbs[1]["blueprint_ids"])
+
+        # The new state is recorded, so a second run has nothing to do.
+        self.assertFalse(planning.plan_incremental(self.root, IncrementalPlanLLM({"tasks": []}), meta))
+
+    def test_dependencies_on_rejected_new_tasks_are_dropped(self):
+        wbs = [_task(1)]
+        queue = [{"task_id": "WBS-001", "agent": "AGENT-2", "status": "todo", "priority": 1, "depends_on": []}]
+        updates = [
+            {"id": "WBS-002", "agent": "nobody"},  # rejected
+            _task(3, depends_on=["WBS-002", "WBS-001"]),
+        ]
+        added, edited = planning.merge_incremental(wbs, queue, updates)
+        self.assertEqual((["WBS-003"], []), (added, edited))
+        self.assertEqual(["WBS-001"], queue[-1]["depends_on"])
+        self.assertEqual(["WBS-001", "WBS-003"], [t["id"] for t in wbs])
+
+    def test_plans_without_state_treat_cited_chunks_as_planned(self):
+        (self.root / planning.STATE_FILE).unlink()
+        wbs = json.loads((self.root / "ops" / "wbs.json").read_text(encoding="utf-8"))
+        meta = self.meta + [{"id": "TD-0009", "doc_type": "tech", "summary": "new"}]
+        self.assertEqual((["TD-0009"], [], []), planning.diff_index(self.root, meta, wbs))
+
+
+if __name__ == "__main__":
+    unittest.main()
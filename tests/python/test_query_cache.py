@@ -0,0 +1,37 @@
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+from orchestrator.query_cache import QueryEmbeddingCache
+
+
+class QueryEmbeddingCacheTest(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self._tmp.name) / "q.sqlite"
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_keyed_by_model_and_text(self):
+        with QueryEmbeddingCache(self.path) as cache:
+            cache.put_many("m1", ["escrow"], [[1.0, 0.0]])
+            self.assertEqual(cache.get_many("m1", ["escrow"])["escrow"].tolist(), [1.0, 0.0])
+            self.assertEqual(cache.get_many("m2", ["escrow"]), {})
+            self.assertEqual((cache.hits, cache.misses), (1, 1))
+        with QueryEmbeddingCache(self.path) as cache:
+            self.assertIn("escrow", cache.get_many("m1", ["escrow", "refund"]))
+
+    def test_evicts_least_recently_used(self):
+        with QueryEmbeddingCache(self.path, max_entries=2) as cache:
+            cache.put_many("m", ["a", "b"], [[1.0], [2.0]])
+            time.sleep(0.01)
+            cache.get_many("m", ["a"])  # "b" is now the oldest
+            time.sleep(0.01)
+            cache.put_many("m", ["c"], [[3.0]])
+            self.assertEqual(sorted(cache.get_many("m", ["a", "b", "c"])), ["a", "c"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,133 @@
+import json
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock
+
+from orchestrator import task_status
+from orchestrator.queue_store import QueueStore
+
+
+def _item(tid, priority, agent="AGENT-2", status="todo", deps=()):
+    return {"task_id": tid, "agent": agent, "status": status, "priority": priority, "depends_on": list(deps), "title": tid}
+
+
+class QueueStoreTest(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self._tmp.name)
+        self.store = QueueStore.for_repo(self.root)
+        self.store.replace_all(
+            [
+                _item("WBS-001", 1, agent="AGENT-1"),
+                _item("WBS-002", 2, deps=["WBS-001"]),
+                _item("WBS-003", 3, agent="AGENT-3"),
+                _item("WBS-004", 4, deps=["WBS-999"]),
+            ]
+        )
+
+    def tearDown(self):
+        self.store.close()
+        self._tmp.cleanup()
+
+    def test_claim_next_respects_priority_dependencies_and_agent(self):
+        self.assertEqual(["WBS-001", "WBS-003"], [t["task_id"] for t in self.store.ready()])
+        self.assertEqual("WBS-003", self.store.claim_next(agent="AGENT-3")["task_id"])
+        claimed = self.store.claim_next()
+        self.assertEqual(("WBS-001", "in_progress"), (claimed["task_id"], claimed["status"]))
+        self.assertIsNone(self.store.claim_next())  # WBS-002 waits for WBS-001; WBS-004's dep is unknown
+
+        self.assertEqual("in_progress", self.store.set_status("WBS-001", "done"))
+        self.assertEqual("WBS-002", self.store.claim_next()["task_id"])
+        self.assertEqual({"done": 1, "in_progress": 2, "todo": 1}, self.store.counts())
+        self.assertIsNone(self.store.set_status("WBS-404", "done"))
+
+    def test_claim_specific_task_only_when_ready(self):
+        self.assertIsNone(self.store.claim("WBS-002"))
+        self.assertEqual("in_progress", self.store.claim("WBS-001")["status"])
+        self.assertIsNone(self.store.claim("WBS-001"))
+
+    def test_concurrent_claims_never_hand_out_a_task_twice(self):
+        self.store.replace_all([_item(f"T-{i:03d}", i) for i in range(40)])
+        claimed, lock = [], threading.Lock()
+
+        def worker():
+            with QueueStore.for_repo(self.root) as store:
+                while True:
+                    item = store.claim_next()
+                    if item is None:
+                        return
+                    with lock:
+                        claimed.append(item["task_id"])
+
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(40, len(claimed))
+        self.assertEqual(40, len(set(claimed)))
+
+    def test_update_fields_keeps_current_status(self):
+        self.store.set_status("WBS-003", "done")
+        self.store.update_fields({"WBS-003": {"title": "renamed", "depends_on": ["WBS-001"]}})
+        item = self.store.get("WBS-003")
+        self.assertEqual(("done", "renamed", 3), (item["status"], item["title"], item["priority"]))
+
+    def test_export_and_import_jsonl(self):
+        self.store.set_status("WBS-001", "done")
+        path = self.store.export_jsonl()
+        lines = [json.loads(l) for l in path.read_text(encoding="utf-8").splitlines()]
+        self.assertEqual(["WBS-001", "WBS-002", "WBS-003", "WBS-004"], [l["task_id"] for l in lines])
+        self.assertEqual("done", lines[0]["status"])
+
+        other = self.root / "copy"
+        other.mkdir()
+        (other / "ops").mkdir()
+        (other / "ops" / "queue.jsonl").write_text(path.read_text(encoding="utf-8"), encoding="utf-8")
+        with QueueStore.for_repo(other) as imported:
+            self.assertEqual(self.store.all(), imported.all())
+
+    def test_jsonl_changed_outside_the_store_is_reimported_not_overwritten(self):
+        path = self.store.export_jsonl()
+        edited = path.read_text(encoding="utf-8").replace('"title": "WBS-003"', '"title": "edited by hand"')
+        path.write_text(edited, encoding="utf-8")
+
+        self.store.set_status("WBS-001", "done")
+        self.store.export_jsonl()  # refuses: the hand edit would be lost
+        self.assertEqual(edited, path.read_text(encoding="utf-8"))
+
+        with QueueStore.for_repo(self.root) as reopened:
+            self.assertEqual("edited by hand", reopened.get("WBS-003")["title"])
+            reopened.set_status("WBS-002", "review")
+            reopened.export_jsonl()
+        self.assertIn('"review"', path.read_text(encoding="utf-8"))
+        with QueueStore.for_repo(self.root) as again:  # our own export is not an outside change
+            self.assertEqual("review", again.get("WBS-002")["status"])
+
+    def test_append_jsonl_falls_back_to_export_after_an_outside_edit(self):
+        path = self.store.export_jsonl()
+        self.store.upsert(_item("WBS-005", 5))
+        self.store.append_jsonl("WBS-005")
+        self.assertEqual(5, len(path.read_text(encoding="utf-8").splitlines()))
+
+        path.write_text(path.read_text(encoding="utf-8") + "\n", encoding="utf-8")  # edited by hand
+        self.store.upsert(_item("WBS-006", 6))
+        self.store.append_jsonl("WBS-006")  # full export, which refuses to overwrite the edit
+        self.assertNotIn("WBS-006", path.read_text(encoding="utf-8"))
+
+    def test_task_status_cli_uses_the_store(self):
+        with mock.patch.object(task_status, "REPO_ROOT", self.root):
+            task_status.cmd_set(SimpleNamespace(id="WBS-002", status="review"))
+            self.assertEqual("review", self.store.get("WBS-002")["status"])
+            exported = (self.root / "ops" / "queue.jsonl").read_text(encoding="utf-8")
+            self.assertIn('"review"', exported)
+            self.assertEqual(4, len(task_status.load_queue()))
+            with self.assertRaises(SystemExit):
+                task_status.cmd_set(SimpleNamespace(id="WBS-002", status="bogus"))
+
+
+if __name__ == "__main__":
+    unittest.main()
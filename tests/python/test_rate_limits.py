@@ -0,0 +1,156 @@
+import asyncio
+import os
+import sqlite3
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from orchestrator import rate_limits, sdk_clients
+from orchestrator.bench.clients import stand_in_server
+from orchestrator.providers import OpenAIProvider
+from orchestrator.rate_limits import Budget, SharedRateLimiter, parse_duration, parse_headers, request_cost, retry_after
+
+
+class HeaderParsingTest(unittest.TestCase):
+    def test_durations(self):
+        self.assertEqual(360.0, parse_duration("6m0s"))
+        self.assertAlmostEqual(0.02, parse_duration("20ms"))
+        self.assertAlmostEqual(1.5, parse_duration("1.5s"))
+        self.assertEqual(12.0, parse_duration("12"))
+        self.assertAlmostEqual(30.0, parse_duration("2024-01-01T00:00:30Z", now=1704067200.0))
+        self.assertIsNone(parse_duration("soon"))
+
+    def test_openai_and_anthropic_headers(self):
+        openai = {
+            "x-ratelimit-limit-requests": "500",
+            "x-ratelimit-remaining-requests": "499",
+            "x-ratelimit-limit-tokens": "200000",
+            "x-ratelimit-remaining-tokens": "150000",
+            "x-ratelimit-reset-tokens": "15s",
+        }
+        self.assertEqual({"requests": (500.0, 499.0), "tokens": (200000.0, 150000.0)}, parse_headers(openai))
+        anthropic = {"anthropic-ratelimit-requests-limit": "50", "anthropic-ratelimit-input-tokens-remaining": "100"}
+        self.assertEqual({"requests": (50.0, None), "tokens": (None, 100.0)}, parse_headers(anthropic))
+        self.assertEqual({}, parse_headers({"content-type": "application/json"}))
+
+        self.assertEqual(0.25, retry_after({"retry-after-ms": "250", "retry-after": "3"}))
+        self.assertEqual(3.0, retry_after({"retry-after": "3"}))
+        self.assertEqual(15.0, retry_after(openai))
+
+    def test_request_cost_counts_prompt_and_output(self):
+        body = b'{"model": "m", "system": "abcd", "messages": [{"role": "user", "content": [{"type": "text", "text": "efgh"}]}], "max_tokens": 10}'
+        model, tokens = request_cost(body)
+        self.assertEqual("m", model)
+        self.assertGreater(tokens, 10)
+        self.assertEqual(("", 0), request_cost(b"not json"))
+
+
+class SharedRateLimiterTest(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self._tmp.name) / "rate_limits.sqlite"
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_processes_draw_from_one_budget(self):
+        budgets = {"openai": Budget(requests_per_minute=3, tokens_per_minute=1000)}
+        now = [1000.0]
+        with mock.patch.object(rate_limits.time, "time", lambda: now[0]):
+            with SharedRateLimiter(self.path, budgets) as a, SharedRateLimiter(self.path, budgets) as b:
+                self.assertEqual(0.0, a.try_acquire("openai", "m", 100))
+                self.assertEqual(0.0, b.try_acquire("openai", "m", 100))
+                self.assertEqual(0.0, a.try_acquire("openai", "m", 100))
+                self.assertAlmostEqual(20.0, b.try_acquire("openai", "m", 100))  # 1 request refills in 60/3 s
+                now[0] += 20.0
+                self.assertEqual(0.0, b.try_acquire("openai", "m", 100))
+                # Another model has its own buckets; an oversize call waits for a full bucket only.
+                self.assertEqual(0.0, a.try_acquire("openai", "other", 5000))
+                self.assertAlmostEqual(60.0, a.try_acquire("openai", "other", 5000), places=3)
+
+    def test_unbudgeted_models_never_touch_the_disk(self):
+        limiter = SharedRateLimiter(self.path)
+        self.assertEqual(0.0, limiter.acquire("openai", "m", 10))
+        self.assertFalse(self.path.exists())
+        self.assertEqual([], limiter.snapshot())
+
+    def test_headers_resize_and_429_blocks_everyone(self):
+        now = [1000.0]
+        with mock.patch.object(rate_limits.time, "time", lambda: now[0]):
+            with SharedRateLimiter(self.path) as a, SharedRateLimiter(self.path) as b:
+                a.observe("anthropic", "c", 200, {"anthropic-ratelimit-requests-limit": "60", "anthropic-ratelimit-requests-remaining": "1"})
+                self.assertEqual(0.0, b.try_acquire("anthropic", "c"))
+                self.assertAlmostEqual(1.0, b.try_acquire("anthropic", "c"))
+                now[0] += 1.0
+                a.observe("anthropic", "c", 429, {"retry-after": "7"})
+                self.assertAlmostEqual(7.0, b.try_acquire("anthropic", "c"))
+                (row,) = b.snapshot()
+                self.assertEqual((60.0, 7.0), (row["capacity"], row["blocked_for"]))
+
+                # A 429 for a model with no known limits still blocks it.
+                a.observe("openai", "x", 429, {"retry-after": "2"})
+                self.assertAlmostEqual(2.0, b.try_acquire("openai", "x"))
+                now[0] += 2.0
+                self.assertEqual(0.0, b.try_acquire("openai", "x"))
+
+    def test_async_acquire_does_not_block_the_event_loop_on_a_locked_db(self):
+        limiter = SharedRateLimiter(self.path, {"openai": Budget(requests_per_minute=60)})
+        self.assertEqual(0.0, limiter.try_acquire("openai", "m"))  # creates the file
+        other = sqlite3.connect(str(self.path), isolation_level=None)
+        other.execute("BEGIN IMMEDIATE")  # another process is mid-transaction
+        ticks = []
+
+        async def main():
+            async def ticker():
+                while not acquired.done():
+                    ticks.append(1)
+                    await asyncio.sleep(0.01)
+
+            asyncio.get_running_loop().call_later(0.3, other.execute, "COMMIT")
+            acquired = asyncio.ensure_future(limiter.aacquire("openai", "m"))
+            await asyncio.gather(acquired, ticker())
+
+        try:
+            asyncio.run(main())
+        finally:
+            other.close()
+            limiter.close()
+        self.assertGreater(len(ticks), 10)
+
+
+class TransportHookTest(unittest.TestCase):
+    def test_sdk_calls_learn_the_limit_and_wait_instead_of_failing(self):
+        server, counts = stand_in_server(0, 0, requests_per_minute=600)
+        env = {
+            "OPENAI_API_KEY": "test",
+            "OPENAI_BASE_URL": f"http://127.0.0.1:{server.server_address[1]}/v1",
+            "ORCHESTRATOR_LLM_CACHE": "0",
+            "ORCHESTRATOR_LLM_STUB": "0",
+            "ORCHESTRATOR_RATE_LIMIT": "1",
+        }
+        with tempfile.TemporaryDirectory() as tmp:
+            limiter = SharedRateLimiter(Path(tmp) / "rate_limits.sqlite")
+            try:
+                with mock.patch.dict(os.environ, env), mock.patch.object(rate_limits, "_shared", limiter):
+                    sdk_clients.configure(sdk_clients.PoolConfig())
+                    provider = OpenAIProvider()
+                    provider.complete("first")
+                    (row,) = limiter.snapshot()
+                    self.assertEqual(("openai", "gpt-5", 600.0), (row["provider"], row["model"], row["capacity"]))
+
+                    # Spend the server's budget behind our back, then keep calling: we wait, not fail.
+                    limiter.observe("openai", "gpt-5", 200, {"x-ratelimit-remaining-requests": "0"})
+                    t0 = time.monotonic()
+                    self.assertEqual("ok", provider.complete("second").content)
+                    self.assertGreaterEqual(time.monotonic() - t0, 0.09)
+                self.assertEqual(0, counts["throttled"])
+            finally:
+                sdk_clients.configure(sdk_clients.PoolConfig.from_env())
+                limiter.close()
+                server.shutdown()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,192 @@
+import os
+import unittest
+from unittest import mock
+
+from orchestrator import resilience, sdk_clients
+from orchestrator.concurrency import map_bounded
+from orchestrator.bench.clients import stand_in_server
+from orchestrator.llm_router import LLMRouter
+from orchestrator.providers import OpenAIProvider
+from orchestrator.resilience import (
+    CircuitBreaker,
+    CircuitOpenError,
+    ProviderGuard,
+    RetryPolicy,
+    classify,
+)
+
+
+class _Response:
+    def __init__(self, status_code, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+class APIStatusError(Exception):
+    def __init__(self, status_code, headers=None):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+        self.response = _Response(status_code, headers)
+
+
+class APIConnectionError(Exception):
+    pass
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class ClassifyTest(unittest.TestCase):
+    def test_kinds(self):
+        self.assertEqual(resilience.RATE_LIMITED, classify(APIStatusError(429)))
+        for status in (500, 503, 529, 408):
+            self.assertEqual(resilience.TRANSIENT, classify(APIStatusError(status)))
+        self.assertEqual(resilience.TRANSIENT, classify(APIConnectionError("reset")))
+        self.assertEqual(resilience.TRANSIENT, classify(TimeoutError()))
+        for exc in (APIStatusError(400), APIStatusError(401), ValueError("bad"), CircuitOpenError("openai", 5)):
+            self.assertEqual(resilience.FATAL, classify(exc))
+
+
+class GuardTest(unittest.TestCase):
+    def setUp(self):
+        self.clock = _Clock()
+        patcher = mock.patch.object(resilience.time, "monotonic", self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.sleeps = []
+        patcher = mock.patch.object(resilience.time, "sleep", self.sleeps.append)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def guard(self, failures=3, cooldown=30.0, retries=3):
+        return ProviderGuard(
+            "p", RetryPolicy(max_retries=retries, backoff_seconds=1.0), CircuitBreaker("p", failures, cooldown)
+        )
+
+    def test_retries_transient_errors_and_honours_retry_after(self):
+        outcomes = [APIStatusError(429, {"retry-after": "7"}), APIStatusError(503), "ok"]
+
+        def fn():
+            out = outcomes.pop(0)
+            if isinstance(out, Exception):
+                raise out
+            return out
+
+        g = self.guard()
+        self.assertEqual("ok", g.call(fn))
+        self.assertEqual(7.0, self.sleeps[0])
+        self.assertTrue(1.0 <= self.sleeps[1] <= 3.0)  # 2 s backoff, jittered +/-50%
+        self.assertEqual(resilience.CLOSED, g.breaker.state)
+        self.assertEqual(2, g.breaker.counts["retries"])
+
+    def test_fatal_errors_are_not_retried(self):
+        fn = mock.Mock(side_effect=APIStatusError(400))
+        with self.assertRaises(APIStatusError):
+            self.guard().call(fn)
+        self.assertEqual(1, fn.call_count)
+        self.assertEqual([], self.sleeps)
+
+    def test_breaker_opens_fails_fast_then_lets_one_trial_through(self):
+        g = self.guard(failures=3, cooldown=30.0, retries=10)
+        down = mock.Mock(side_effect=APIStatusError(503))
+        with self.assertRaises(APIStatusError):
+            g.call(down)
+        self.assertEqual(3, down.call_count)  # gave up as soon as the breaker opened
+        self.assertEqual(resilience.OPEN, g.breaker.state)
+
+        with self.assertRaises(CircuitOpenError):
+            g.call(down)
+        self.assertEqual(3, down.call_count)
+        self.assertEqual(1, g.breaker.snapshot()["rejected"])
+
+        self.clock.now += 30.0
+        self.assertEqual(resilience.HALF_OPEN, g.breaker.state)
+        with self.assertRaises(APIStatusError):
+            g.call(down)  # the trial fails: open again, no further retries
+        self.assertEqual(4, down.call_count)
+        self.assertEqual(resilience.OPEN, g.breaker.state)
+
+        self.clock.now += 30.0
+        self.assertEqual("ok", g.call(lambda: "ok"))
+        snap = g.breaker.snapshot()
+        self.assertEqual((resilience.CLOSED, 0, 2), (snap["state"], snap["consecutive_failures"], snap["opened"]))
+
+    def test_rate_limits_do_not_trip_the_breaker(self):
+        g = self.guard(failures=2, retries=5)
+        with self.assertRaises(APIStatusError):
+            g.call(mock.Mock(side_effect=APIStatusError(429, {"retry-after-ms": "10"})))
+        self.assertEqual(resilience.CLOSED, g.breaker.state)
+        self.assertEqual([0.01] * 5, self.sleeps)
+
+
+class NestedRetryTest(unittest.TestCase):
+    def test_batch_retries_skip_errors_a_guard_already_handled(self):
+        g = ProviderGuard("p", RetryPolicy(max_retries=2, backoff_seconds=0), CircuitBreaker("p", 100, 30))
+        down = mock.Mock(side_effect=APIStatusError(503))
+        replies = iter(["not json", '{"ok": true}'])
+
+        def parse(_):
+            text = g.call(lambda: next(replies))
+            if not text.startswith("{"):
+                raise ValueError("reply is not JSON")
+            return text
+
+        with mock.patch.object(resilience.time, "sleep"), mock.patch("orchestrator.concurrency.time.sleep"):
+            failed = map_bounded(lambda _: g.call(down), [0], max_retries=3, retry_if=resilience.retry_outside)
+            parsed = map_bounded(parse, [0], max_retries=3, retry_if=resilience.retry_outside)
+        self.assertIsInstance(failed.errors[0], APIStatusError)
+        self.assertEqual(3, down.call_count)  # the guard's 1 + 2, not 4 x 3
+        self.assertEqual(['{"ok": true}'], parsed.results)
+        self.assertFalse(resilience.retry_outside(CircuitOpenError("p", 1)))
+
+
+class RouterTest(unittest.TestCase):
+    def tearDown(self):
+        resilience.reset()
+
+    def test_router_raises_provider_errors(self):
+        router = LLMRouter(provider_name="stub")
+        router._provider = mock.Mock(spec=["complete"], complete=mock.Mock(side_effect=APIStatusError(400)))
+        with self.assertRaises(APIStatusError):
+            router.complete("hi")
+
+    def test_health_reports_the_provider_breaker(self):
+        self.assertEqual({"provider": "stub", "state": "closed"}, LLMRouter(provider_name="stub").health())
+
+        server, counts = stand_in_server(0, fail_status=503)
+        env = {
+            "OPENAI_API_KEY": "test",
+            "OPENAI_BASE_URL": f"http://127.0.0.1:{server.server_address[1]}/v1",
+            "ORCHESTRATOR_LLM_CACHE": "0",
+            "ORCHESTRATOR_LLM_STUB": "0",
+            "ORCHESTRATOR_RATE_LIMIT": "0",
+            "ORCHESTRATOR_LLM_MAX_RETRIES": "1",
+            "ORCHESTRATOR_LLM_BACKOFF_SECONDS": "0",
+            "ORCHESTRATOR_LLM_BREAKER_FAILURES": "2",
+        }
+        try:
+            with mock.patch.dict(os.environ, env):
+                resilience.reset()
+                sdk_clients.configure(sdk_clients.PoolConfig())
+                router = LLMRouter(provider_name="openai")
+                router._provider = OpenAIProvider()
+                with self.assertRaises(Exception):
+                    router.complete("first")
+                with self.assertRaises(CircuitOpenError):
+                    router.complete("second")
+                health = router.health()
+            # One request plus one retry (the SDK itself no longer retries); the second call never went out.
+            self.assertEqual(2, counts["requests"])
+            self.assertEqual(("openai", "open", 2, 1), (health["provider"], health["state"], health["failures"], health["rejected"]))
+        finally:
+            sdk_clients.configure(sdk_clients.PoolConfig.from_env())
+            server.shutdown()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,122 @@
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock
+
+from orchestrator import llm as llm_module
+from orchestrator import response_cache
+from orchestrator.llm_client import LLMClient, LLMConfig
+from orchestrator.response_cache import ResponseCache, response_key
+
+
+class FakeCompletions:
+    def __init__(self):
+        self.calls = 0
+
+    def create(self, **kwargs):
+        self.calls += 1
+        content = f"reply {self.calls} to {kwargs['messages'][-1]['content']}"
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+
+class ResponseCacheTest(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self._tmp.name) / "llm_cache.sqlite"
+        self.cache = ResponseCache(self.path)
+
+    def tearDown(self):
+        self.cache.close()
+        self._tmp.cleanup()
+
+    def test_key_normalises_messages_and_params(self):
+        a = response_key("openai", "m", [{"role": "user", "content": "review this  \r\nplease\n"}], {"temperature": 0})
+        b = response_key("openai", "m", [{"role": "user", "content": "review this\nplease"}], {"temperature": 0, "top_p": None})
+        self.assertEqual(a, b)
+        self.assertNotEqual(a, response_key("openai", "m", [{"role": "user", "content": "review this\nplease"}], {"temperature": 0.2}))
+        self.assertNotEqual(a, response_key("anthropic", "m", [{"role": "user", "content": "review this\nplease"}], {"temperature": 0}))
+        self.assertNotEqual(a, response_key("openai", "m", [{"role": "system", "content": "review this\nplease"}], {"temperature": 0}))
+
+    def test_repeat_calls_are_served_from_disk_unless_fresh(self):
+        calls = []
+
+        def fn():
+            calls.append(1)
+            return f"answer {len(calls)}"
+
+        msgs = [{"role": "user", "content": "q"}]
+        self.assertEqual("answer 1", self.cache.call("openai", "m", msgs, {}, fn))
+        self.assertEqual("answer 1", self.cache.call("openai", "m", msgs, {}, fn))
+        self.assertEqual("answer 2", self.cache.call("openai", "m", msgs, {}, fn, fresh=True))
+        self.assertEqual("answer 2", self.cache.call("openai", "m", msgs, {}, fn))
+        with mock.patch.dict("os.environ", {"ORCHESTRATOR_LLM_CACHE_FRESH": "1"}):
+            self.assertEqual("answer 3", self.cache.call("openai", "m", msgs, {}, fn))
+        self.assertEqual((2, 1), (self.cache.hits, self.cache.misses))
+
+        # Counters persist for other processes; failures are never cached.
+        with ResponseCache(self.path) as other:
+            self.assertEqual({"entries": 1, "hits": 2, "misses": 1, "evictions": 0}, {k: v for k, v in other.stats().items() if k != "bytes"})
+            self.assertIsNone(other.call("openai", "m", [{"role": "user", "content": "x"}], {}, lambda: None))
+            self.assertEqual(1, other.stats()["entries"])
+
+    def test_ttl_and_lru_size_eviction(self):
+        small = ResponseCache(self.path, max_bytes=25, ttl_seconds=60)
+        small.put("a", "openai", "m", "x" * 10)
+        small.put("b", "openai", "m", "y" * 10)
+        small.get("a")  # "b" is now least recently used
+        small.put("c", "openai", "m", "z" * 10)
+        self.assertEqual("x" * 10, small.get("a"))
+        self.assertIsNone(small.get("b"))
+        self.assertEqual(1, small.evictions)
+
+        with mock.patch.object(response_cache.time, "time", return_value=time.time() + 120):
+            self.assertIsNone(small.get("c"))
+            self.assertEqual(2, small.prune())
+        self.assertEqual(0, small.stats()["entries"])
+        small.close()
+
+    def test_llm_client_replays_identical_chats(self):
+        with mock.patch("orchestrator.llm_client.sdk_clients.openai_client"):
+            llm = LLMClient(LLMConfig(), cache=self.cache)
+        llm._openai = SimpleNamespace(chat=SimpleNamespace(completions=FakeCompletions()))
+        msgs = [{"role": "user", "content": "summarise WBS-001"}]
+        first = llm.chat_openai(msgs, temperature=0)
+        self.assertEqual(first, llm.chat_openai(msgs, temperature=0))
+        self.assertNotEqual(first, llm.chat_openai(msgs, temperature=0, fresh=True))
+        self.assertEqual(2, llm._openai.chat.completions.calls)
+
+        # Sampled calls (LLMConfig defaults to 0.2) are never frozen.
+        sampled = llm.chat_openai(msgs)
+        self.assertNotEqual(sampled, llm.chat_openai(msgs))
+        self.assertEqual(4, llm._openai.chat.completions.calls)
+        self.assertEqual("x", self.cache.call("openai", "m", msgs, {"temperature": 0.7}, lambda: "x"))
+        self.assertIsNone(self.cache.get(response_key("openai", "m", msgs, {"temperature": 0.7})))
+
+    def test_default_temperature_decides_caching_for_module_calls(self):
+        calls = []
+
+        def fake(messages, model):
+            calls.append(model)
+            return f"reply {len(calls)}"
+
+        msgs = [{"role": "user", "content": "review this"}]
+        with mock.patch.object(response_cache, "shared", lambda: self.cache), mock.patch.object(
+            llm_module, "_anthropic_available", lambda: True
+        ), mock.patch.object(llm_module, "_call_anthropic", fake), mock.patch.object(llm_module, "_call_openai", fake):
+            for call in (llm_module.call_anthropic, llm_module.call_openai):
+                with mock.patch.object(llm_module, "TEMPERATURE", 0.7):  # callers pass no temperature
+                    self.assertNotEqual(call(msgs, model="m"), call(msgs, model="m"))
+                with mock.patch.object(llm_module, "TEMPERATURE", 0.0):
+                    self.assertEqual(call(msgs, model="m"), call(msgs, model="m"))
+        self.assertEqual(6, len(calls))
+
+    def test_shared_cache_can_be_disabled(self):
+        with mock.patch.dict("os.environ", {"ORCHESTRATOR_LLM_CACHE": "0"}):
+            self.assertIsNone(response_cache.shared())
+            self.assertEqual("live", response_cache.cached_call("openai", "m", [], {}, lambda: "live"))
+
+
+if __name__ == "__main__":
+    unittest.main()
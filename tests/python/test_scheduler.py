@@ -0,0 +1,69 @@
+import unittest
+
+from orchestrator.scheduler import CycleError, Scheduler, break_cycles, find_cycle, topological_order
+
+
+def _item(tid, priority, agent="AGENT-2", status="todo", deps=()):
+    return {"task_id": tid, "agent": agent, "status": status, "priority": priority, "depends_on": list(deps)}
+
+
+def _wbs():
+    #   A -> B -> C -> D      (critical path, AGENT-1/2)
+    #   E                     (independent, better priority than B's chain)
+    #   F depends on an id that is not in the queue
+    return [
+        _item("A", 5, agent="AGENT-1"),
+        _item("B", 6, deps=["A"]),
+        _item("C", 7, deps=["B"]),
+        _item("D", 8, agent="AGENT-3", deps=["C"]),
+        _item("E", 1),
+        _item("F", 2, deps=["MISSING"]),
+        _item("G", 3, agent="AGENT-3", deps=["A", "E"]),
+    ]
+
+
+class SchedulerTest(unittest.TestCase):
+    def test_longest_path_beats_priority(self):
+        sched = Scheduler(_wbs())
+        self.assertEqual({"A": 4, "B": 3, "C": 2, "D": 1, "E": 2, "F": 1, "G": 1}, sched.rank)
+        self.assertEqual(["A", "E"], sched.ready())
+        self.assertEqual("A", sched.peek())
+        self.assertEqual({"AGENT-1": ["A"], "AGENT-2": ["E"]}, sched.ready_by_agent())
+
+    def test_complete_unlocks_dependents_incrementally(self):
+        sched = Scheduler(_wbs())
+        self.assertEqual("A", sched.pop())
+        self.assertEqual(["E"], sched.ready())
+        self.assertEqual(["B"], sched.complete("A"))
+        self.assertEqual(["B", "E"], sched.ready())
+        self.assertEqual(["B", "E"], [sched.pop("AGENT-2"), sched.pop("AGENT-2")])
+        self.assertEqual(["G"], sched.complete("E"))
+        self.assertEqual({"AGENT-3": ["G"]}, sched.ready_by_agent())
+        self.assertEqual([], sched.complete("E"))  # idempotent
+        self.assertNotIn("F", sched.ready())
+
+    def test_done_tasks_and_release(self):
+        items = _wbs()
+        items[0]["status"] = "done"
+        items[1]["status"] = "in_progress"
+        sched = Scheduler(items)
+        self.assertEqual(["E"], sched.ready())
+        sched.release("B")
+        self.assertEqual(["B", "E"], sched.ready())
+
+    def test_cycles_are_detected_and_broken_against_plan_order(self):
+        items = [_item("A", 1, deps=["C"]), _item("B", 2, deps=["A"]), _item("C", 3, deps=["B"]), _item("D", 4)]
+        with self.assertRaises(CycleError):
+            Scheduler(items)
+        cycle = find_cycle(items)
+        self.assertEqual(cycle[0], cycle[-1])
+        self.assertEqual({"A", "B", "C"}, set(cycle))
+
+        self.assertEqual([("A", "C")], break_cycles(items))
+        self.assertEqual([], items[0]["depends_on"])
+        self.assertIsNone(find_cycle(items))
+        self.assertEqual(["A", "D", "B", "C"], topological_order(items))
+
+
+if __name__ == "__main__":
+    unittest.main()
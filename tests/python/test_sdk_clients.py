@@ -0,0 +1,88 @@
+import os
+import unittest
+from unittest import mock
+
+from orchestrator import sdk_clients
+from orchestrator.bench.clients import stand_in_server
+from orchestrator.providers import AnthropicProvider, OpenAIProvider
+from orchestrator.sdk_clients import ClientRegistry, PoolConfig
+
+
+class ClientRegistryTest(unittest.TestCase):
+    def setUp(self):
+        self.registry = ClientRegistry(PoolConfig(max_connections=3, max_keepalive=2, timeout=5, connect_timeout=1))
+
+    def tearDown(self):
+        self.registry.close()
+
+    def test_one_client_per_provider_key_and_base_url(self):
+        a = self.registry.get("openai", "k1", "http://127.0.0.1:9/v1")
+        self.assertIs(a, self.registry.get("openai", "k1", "http://127.0.0.1:9/v1"))
+        self.assertIsNot(a, self.registry.get("openai", "k2", "http://127.0.0.1:9/v1"))
+        self.assertIsNot(a, self.registry.get("openai", "k1", "http://127.0.0.1:10/v1"))
+        self.registry.get("anthropic", "k1")
+        self.assertEqual(4, len(self.registry))
+        with self.assertRaises(ValueError):
+            self.registry.get("mistral", "k1")
+
+        self.registry.close()
+        self.assertEqual(0, len(self.registry))
+
+    def test_one_http_pool_per_client(self):
+        with mock.patch.object(PoolConfig, "http_client", side_effect=self.registry.pool.http_client) as build:
+            self.registry.get("openai", "k1")
+            self.registry.get("openai", "k1")
+            self.registry.get("anthropic", "k1")
+        self.assertEqual(2, build.call_count)
+
+    def test_pool_config_from_env(self):
+        env = {"ORCHESTRATOR_HTTP_MAX_CONNECTIONS": "4", "ORCHESTRATOR_HTTP_CONNECT_TIMEOUT": "2.5"}
+        with mock.patch.dict(os.environ, env):
+            pool = PoolConfig.from_env()
+        self.assertEqual((4, 20, 600.0, 2.5), (pool.max_connections, pool.max_keepalive, pool.timeout, pool.connect_timeout))
+
+
+class ProviderTest(unittest.TestCase):
+    def test_providers_have_names_and_default_models(self):
+        self.assertEqual(("openai", "gpt-5"), (OpenAIProvider().name, OpenAIProvider().model))
+        self.assertEqual("anthropic", AnthropicProvider(default_model="claude-x").name)
+        self.assertEqual("claude-x", AnthropicProvider(default_model="claude-x").default_model)
+
+    def test_calls_reuse_one_connection_through_the_registry(self):
+        server, counts = stand_in_server(0)
+        env = {
+            "OPENAI_API_KEY": "test",
+            "OPENAI_BASE_URL": f"http://127.0.0.1:{server.server_address[1]}/v1",
+            "ANTHROPIC_API_KEY": "test",
+            "ANTHROPIC_BASE_URL": f"http://127.0.0.1:{server.server_address[1]}",
+            "ORCHESTRATOR_LLM_CACHE": "0",
+            "ORCHESTRATOR_LLM_STUB": "0",
+        }
+        try:
+            with mock.patch.dict(os.environ, env):
+                sdk_clients.configure(PoolConfig())
+                provider = OpenAIProvider()
+                for _ in range(3):
+                    out = provider.chat([{"role": "system", "content": "be brief"}, {"role": "user", "content": "ping"}])
+                    self.assertEqual("ok", out.content)
+                for _ in range(3):
+                    msg = sdk_clients.anthropic_client().messages.create(
+                        model="m", max_tokens=8, messages=[{"role": "user", "content": "ping"}]
+                    )
+                    self.assertEqual("ok", msg.content[0].text)
+            self.assertEqual(6, counts["requests"])
+            self.assertEqual(2, counts["connections"])  # one keep-alive connection per client
+        finally:
+            sdk_clients.configure(PoolConfig.from_env())
+            server.shutdown()
+
+    def test_stub_and_unavailable(self):
+        with mock.patch.dict(os.environ, {"ORCHESTRATOR_LLM_STUB": "1"}):
+            self.assertTrue(OpenAIProvider().complete("hi").raw["stub"])
+        with mock.patch.dict(os.environ, {"ORCHESTRATOR_LLM_STUB": "0", "ANTHROPIC_API_KEY": ""}):
+            with self.assertRaises(RuntimeError):
+                AnthropicProvider().complete("hi")
+
+
+if __name__ == "__main__":
+    unittest.main()
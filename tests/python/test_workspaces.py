@@ -0,0 +1,109 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from orchestrator.workspaces import MergeQueue, WorkspaceManager, git
+
+
+def _commit_all(cwd, message):
+    git(cwd, "add", "-A")
+    git(cwd, "commit", "-q", "-m", message)
+
+
+class WorkspaceTest(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self._tmp.name) / "repo"
+        self.root.mkdir()
+        git(self.root, "init", "-q", "-b", "main")
+        git(self.root, "config", "user.email", "orchestrator@example.com")
+        git(self.root, "config", "user.name", "Orchestrator")
+        (self.root / ".gitignore").write_text(".worktrees/\n", encoding="utf-8")
+        (self.root / "app.txt").write_text("one\n", encoding="utf-8")
+        _commit_all(self.root, "init")
+        self.manager = WorkspaceManager(self.root, ci_cmd=["true"])
+        self.queue = MergeQueue(self.manager)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _log(self):
+        return git(self.root, "log", "--format=%s", "main").stdout.splitlines()
+
+    def test_parallel_tasks_land_as_one_commit_per_wbs_id(self):
+        a = self.manager.create("WBS-001", title="Add api")
+        b = self.manager.create("WBS-002", title="Add web")
+        self.assertEqual("task/wbs-001", a.branch)
+
+        (a.path / "api.txt").write_text("api\n", encoding="utf-8")
+        _commit_all(a.path, "wip 1")
+        (a.path / "api.txt").write_text("api v2\n", encoding="utf-8")  # left uncommitted by the agent
+        (a.path / "ops" / "locks").mkdir(parents=True)
+        (a.path / "ops" / "locks" / "AGENT-1.lock").write_text("wbs_id: WBS-001\n", encoding="utf-8")
+        (b.path / "web.txt").write_text("web\n", encoding="utf-8")
+
+        self.assertIsNotNone(self.manager.commit(a))
+        self.assertIsNotNone(self.manager.commit(b))
+        self.assertTrue(self.queue.merge(a).ok)
+        self.assertTrue(self.queue.merge(b).ok)  # rebased onto WBS-001 first
+
+        self.assertEqual(["feat(wbs-002): Add web", "feat(wbs-001): Add api", "init"], self._log())
+        self.assertEqual("api v2\n", (self.root / "api.txt").read_text(encoding="utf-8"))
+        self.assertTrue((self.root / "web.txt").exists())
+        self.assertFalse((self.root / "ops" / "locks" / "AGENT-1.lock").exists())
+        body = git(self.root, "log", "-1", "--format=%B", "main~1").stdout
+        self.assertIn("WBS: WBS-001", body)
+
+        self.manager.remove(a)
+        self.assertFalse(a.path.exists())
+        self.assertNotIn("task/wbs-001", git(self.root, "branch").stdout)
+
+    def test_conflict_and_red_ci_leave_base_untouched(self):
+        a = self.manager.create("WBS-001")
+        b = self.manager.create("WBS-002")
+        (a.path / "app.txt").write_text("from a\n", encoding="utf-8")
+        (b.path / "app.txt").write_text("from b\n", encoding="utf-8")
+        self.manager.commit(a)
+        self.manager.commit(b)
+        self.assertTrue(self.queue.merge(a).ok)
+        head = git(self.root, "rev-parse", "main").stdout
+
+        result = self.queue.merge(b)
+        self.assertEqual("conflict", result.status)
+        self.assertEqual(head, git(self.root, "rev-parse", "main").stdout)
+
+        c = self.manager.create("WBS-003")
+        (c.path / "new.txt").write_text("x\n", encoding="utf-8")
+        self.manager.commit(c)
+        self.manager.ci_cmd = ["false"]
+        self.assertEqual("ci_failed", self.queue.merge(c).status)
+        self.assertEqual(head, git(self.root, "rev-parse", "main").stdout)
+
+        # A kept branch is resumed by the next create().
+        self.manager.remove(c, delete_branch=False)
+        again = self.manager.create("WBS-003")
+        self.assertTrue((again.path / "new.txt").exists())
+
+    def test_main_checkout_off_base_is_not_merged_into(self):
+        ws = self.manager.create("WBS-001")
+        (ws.path / "review.md").write_text("Decision: done\n", encoding="utf-8")
+        self.manager.commit(ws)
+        git(self.root, "checkout", "-q", "-b", "hotfix")
+        head = git(self.root, "rev-parse", "main").stdout
+
+        result = self.queue.merge(ws)
+        self.assertEqual("ff_failed", result.status)
+        self.assertIn("hotfix", result.detail)
+        self.assertEqual(head, git(self.root, "rev-parse", "main").stdout)
+
+        git(self.root, "checkout", "-q", "main")
+        self.assertTrue(self.queue.merge(ws).ok)
+        self.assertTrue((self.root / "review.md").exists())  # where apply_latest_review looks
+
+    def test_nothing_to_commit(self):
+        ws = self.manager.create("WBS-001")
+        self.assertIsNone(self.manager.commit(ws))
+
+
+if __name__ == "__main__":
+    unittest.main()